@@ -0,0 +1,248 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+# sounddevice bersifat opsional; tanpa PortAudio engine memakai perangkat null
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    SOUNDDEVICE_AVAILABLE = False
+
+
+def synthesize_alarm_tone(sample_rate: int, duration: float = 1.0) -> np.ndarray:
+    """Nada alarm dua frekuensi (880/660 Hz) sebagai cadangan jika file alarm tidak bisa didekode."""
+    t = np.arange(int(sample_rate * duration), dtype=np.float32) / sample_rate
+    freq = np.where(t < duration / 2, 880.0, 660.0).astype(np.float32)
+    tone = 0.8 * np.sin(2 * np.pi * freq * t)
+    fade = min(len(t) // 20, int(sample_rate * 0.01))
+    if fade > 0:
+        ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+        tone[:fade] *= ramp
+        tone[-fade:] *= ramp[::-1]
+    return tone.astype(np.float32).reshape(-1, 1)
+
+
+def _read_wav(path: str):
+    with wave.open(path, 'rb') as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        pcm = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        pcm = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        pcm = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+    return pcm.reshape(-1, channels), sample_rate
+
+
+def _decode_with_ffmpeg(path: str, sample_rate: int, channels: int):
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return None
+    result = subprocess.run(
+        [ffmpeg, '-v', 'error', '-i', path, '-f', 'f32le', '-ac', str(channels), '-ar', str(sample_rate), '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30
+    )
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return np.frombuffer(result.stdout, dtype='<f4').reshape(-1, channels).copy()
+
+
+def decode_audio_file(path: str, sample_rate: int = 44100, channels: int = 1):
+    """
+    Mendekode file alarm sekali menjadi PCM float32 berbentuk (frames, channels).
+    Urutan: file .wav di samping file asli (assets/alarm.wav ikut dikirim), ffmpeg bila terpasang,
+    lalu nada sintetis (dengan peringatan, karena suara alarm asli tidak terdengar).
+    Mengembalikan (pcm, sample_rate).
+    """
+    wav_path = path if path.lower().endswith('.wav') else os.path.splitext(path)[0] + '.wav'
+    if os.path.exists(wav_path):
+        try:
+            return _read_wav(wav_path)
+        except (wave.Error, ValueError, OSError) as e:
+            print(f"⚠️ Failed to read {wav_path}: {e}")
+    if os.path.exists(path):
+        try:
+            pcm = _decode_with_ffmpeg(path, sample_rate, channels)
+            if pcm is not None and len(pcm):
+                return pcm, sample_rate
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ ffmpeg decode failed for {path}: {e}")
+    print(f"⚠️ WARNING: Could not decode alarm sound {path} (no readable WAV copy and no ffmpeg). "
+          f"The real alarm will NOT play; using a synthesized alarm tone instead.")
+    return synthesize_alarm_tone(sample_rate), sample_rate
+
+
+class _NullTimeInfo:
+    __slots__ = ('currentTime', 'outputBufferDacTime')
+
+    def __init__(self, now):
+        self.currentTime = now
+        self.outputBufferDacTime = now
+
+
+class NullOutputStream:
+    """
+    Pengganti sounddevice.OutputStream tanpa perangkat audio (pengujian, unit tanpa speaker).
+    Memanggil callback dengan laju real-time dan membuang hasilnya.
+    """
+
+    def __init__(self, samplerate, channels, blocksize, callback, **kwargs):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.latency = 0.0
+        self._callback = callback
+        self._buffer = np.zeros((blocksize, channels), dtype=np.float32)
+        self._running = False
+        self._thread = None
+        self.blocks_written = 0
+        self.peak_level = 0.0 # Amplitudo maksimum blok terakhir, untuk verifikasi di pengujian
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="null-audio", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = self.blocksize / float(self.samplerate)
+        next_time = time.perf_counter()
+        while self._running:
+            self._callback(self._buffer, self.blocksize, _NullTimeInfo(time.perf_counter()), None)
+            self.peak_level = float(np.max(np.abs(self._buffer)))
+            self.blocks_written += 1
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.perf_counter()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+
+
+class AlarmAudioEngine:
+    """
+    Alarm berlatensi rendah: file alarm didekode sekali saat startup ke buffer PCM,
+    lalu diputar berulang tanpa jeda dari callback output stream yang selalu aktif
+    (mengeluarkan hening saat idle), sehingga memicu alarm hanya mengubah level.
+
+    Level eskalasi: 0 = diam, 1..3 = semakin keras. escalate() menaikkan level
+    otomatis setiap ESCALATION_STEP_SECONDS selama alarm berlangsung.
+    """
+    LEVEL_GAINS = (0.0, 0.5, 0.75, 1.0)
+    MAX_LEVEL = len(LEVEL_GAINS) - 1
+    ESCALATION_STEP_SECONDS = 4.0
+    BLOCK_SIZE = 256 # ~5.8 ms pada 44.1 kHz
+    SAMPLE_RATE = 44100
+
+    def __init__(self, sound_path: str, device=None):
+        """device: indeks/nama perangkat sounddevice, None = default, 'null' = tanpa perangkat."""
+        self.pcm, self.sample_rate = decode_audio_file(sound_path, self.SAMPLE_RATE)
+        self.channels = self.pcm.shape[1]
+        self.level = 0
+        self._position = 0
+        self._pending_trigger = None
+        self._latencies_ms = deque(maxlen=500)
+        self.stream = self._open_stream(device)
+        self.stream.start()
+        print(f"✅ Alarm audio ready: {len(self.pcm) / self.sample_rate:.2f}s buffer, "
+              f"{self.sample_rate} Hz, device={'null' if isinstance(self.stream, NullOutputStream) else device or 'default'}")
+
+    def _open_stream(self, device):
+        kwargs = dict(
+            samplerate=self.sample_rate, channels=self.channels, dtype='float32',
+            blocksize=self.BLOCK_SIZE, callback=self._callback,
+        )
+        if device != 'null' and SOUNDDEVICE_AVAILABLE:
+            try:
+                return sd.OutputStream(device=device, latency='low', **kwargs)
+            except Exception as e:
+                print(f" Audio output unavailable ({e}). Using null audio device.")
+        return NullOutputStream(**kwargs)
+
+    @property
+    def is_playing(self):
+        return self.level > 0
+
+    def play(self, level: int = 1):
+        """Memulai (atau melanjutkan) alarm pada level tertentu."""
+        level = max(1, min(self.MAX_LEVEL, level))
+        if not self.is_playing:
+            self._position = 0
+            self._pending_trigger = time.perf_counter()
+        self.level = level
+
+    def escalate(self, alarm_elapsed_seconds: float):
+        """Menaikkan level berdasarkan lama alarm aktif (detik sejak alarm dimulai)."""
+        if self.is_playing:
+            level = 1 + int(max(0.0, alarm_elapsed_seconds) // self.ESCALATION_STEP_SECONDS)
+            self.level = min(self.MAX_LEVEL, level)
+
+    def stop(self):
+        self.level = 0
+        self._pending_trigger = None
+
+    def close(self):
+        self.stop()
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception:
+            pass
+
+    def _callback(self, outdata, frames, time_info, status):
+        gain = self.LEVEL_GAINS[self.level]
+        if gain == 0.0:
+            outdata.fill(0)
+            return
+        # Salin buffer PCM secara melingkar (loop tanpa jeda), tanpa alokasi baru
+        total = len(self.pcm)
+        written = 0
+        position = self._position
+        while written < frames:
+            count = min(frames - written, total - position)
+            outdata[written:written + count] = self.pcm[position:position + count]
+            written += count
+            position = (position + count) % total
+        self._position = position
+        np.multiply(outdata, gain, out=outdata)
+
+        trigger = self._pending_trigger
+        if trigger is not None:
+            # Latensi = waktu hingga callback pertama + antrean buffer hingga DAC
+            dac_delay = max(0.0, time_info.outputBufferDacTime - time_info.currentTime)
+            self._latencies_ms.append((time.perf_counter() - trigger + dac_delay) * 1000.0)
+            self._pending_trigger = None
+
+    def latency_report(self) -> dict:
+        """Statistik latensi pemicu-ke-suara (ms)."""
+        if not self._latencies_ms:
+            return {'count': 0}
+        values = np.array(self._latencies_ms)
+        return {
+            'count': len(values),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p95_ms': float(np.percentile(values, 95)),
+            'max_ms': float(values.max()),
+        }
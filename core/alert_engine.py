@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+# kind: 'alarm_start' | 'alarm_stop' | 'log'
+AlertEvent = namedtuple('AlertEvent', ['kind', 'status_type', 'timestamp', 'elapsed', 'info'])
+
+
+class _AlertRule:
+    """State satu jenis gejala: kapan kondisi mulai dan apakah episode ini sudah dicatat."""
+    __slots__ = ('status_type', 'threshold', 'start_time', 'logged')
+
+    def __init__(self, status_type, threshold):
+        self.status_type = status_type
+        self.threshold = threshold
+        self.start_time = None
+        self.logged = False
+
+
+class AlertState:
+    """
+    Hasil AlertEngine.update() untuk satu frame. Objek yang sama dipakai ulang
+    setiap frame agar replay tidak mengalokasikan objek baru.
+
+    level     : 'alarm' | 'warning' | 'normal'
+    status_type / elapsed : gejala paling parah yang sedang aktif (microsleep > drowsy > yawn)
+    alarm_elapsed : lama alarm melewati ambang (detik), untuk eskalasi suara
+    events    : daftar AlertEvent yang terjadi pada frame ini
+    """
+    __slots__ = ('level', 'status_type', 'elapsed', 'alarm_elapsed', 'events')
+
+    def __init__(self):
+        self.level = 'normal'
+        self.status_type = None
+        self.elapsed = 0.0
+        self.alarm_elapsed = 0.0
+        self.events = []
+
+    @property
+    def alarm_active(self):
+        return self.level == 'alarm'
+
+
+class AlertEngine:
+    """
+    Logika alarm microsleep (EAR), drowsy dan yawn (YOLO) yang terpisah dari GUI,
+    jam sistem, dan database. Input berupa timestamp + hasil DrowsinessDetector.detect(),
+    output berupa AlertState beserta event alarm_start/alarm_stop/log.
+    """
+    MICROSLEEP_ALARM_THRESHOLD_SECONDS = 2
+    DROWSY_ALARM_THRESHOLD_SECONDS = 2
+    YAWN_ALARM_THRESHOLD_SECONDS = 2
+
+    # Urutan prioritas gejala (paling parah lebih dulu)
+    STATUS_TYPES = ('microsleep', 'drowsy', 'yawn')
+
+    def __init__(self, microsleep_threshold=None, drowsy_threshold=None, yawn_threshold=None):
+        self._rules = (
+            _AlertRule('microsleep', self.MICROSLEEP_ALARM_THRESHOLD_SECONDS if microsleep_threshold is None else microsleep_threshold),
+            _AlertRule('drowsy', self.DROWSY_ALARM_THRESHOLD_SECONDS if drowsy_threshold is None else drowsy_threshold),
+            _AlertRule('yawn', self.YAWN_ALARM_THRESHOLD_SECONDS if yawn_threshold is None else yawn_threshold),
+        )
+        self.state = AlertState()
+        self._alarm_active = False
+
+    @property
+    def thresholds(self):
+        return {rule.status_type: rule.threshold for rule in self._rules}
+
+    def reset(self):
+        for rule in self._rules:
+            rule.start_time = None
+            rule.logged = False
+        self._alarm_active = False
+        self.state = AlertState()
+
+    def update(self, timestamp: float, detection_results: dict) -> AlertState:
+        """Memproses satu frame. timestamp dalam detik (jam apa pun yang monoton untuk satu sesi)."""
+        yolo_status = detection_results['yolo_status']
+        conditions = (
+            detection_results['ear_status'] == 'microsleep',
+            yolo_status == 'drowsy',
+            yolo_status == 'yawn',
+        )
+
+        state = self.state
+        events = state.events
+        events.clear()
+        state.level = 'normal'
+        state.status_type = None
+        state.elapsed = 0.0
+        state.alarm_elapsed = 0.0
+        alarm_rule = None
+
+        for rule, active in zip(self._rules, conditions):
+            if not active:
+                rule.start_time = None
+                rule.logged = False
+                continue
+            if rule.start_time is None:
+                rule.start_time = timestamp
+            elapsed = timestamp - rule.start_time
+
+            if elapsed >= rule.threshold:
+                if alarm_rule is None:
+                    alarm_rule = rule
+                    state.status_type = rule.status_type
+                    state.elapsed = elapsed
+                state.alarm_elapsed = max(state.alarm_elapsed, elapsed - rule.threshold)
+                if not rule.logged:
+                    rule.logged = True # Satu log per episode
+                    events.append(AlertEvent('log', rule.status_type, timestamp, elapsed,
+                                             self._log_info(rule.status_type, elapsed, detection_results)))
+            elif state.status_type is None:
+                state.status_type = rule.status_type
+                state.elapsed = elapsed
+
+        if alarm_rule is not None:
+            state.level = 'alarm'
+            if not self._alarm_active:
+                self._alarm_active = True
+                events.insert(0, AlertEvent('alarm_start', alarm_rule.status_type, timestamp, state.elapsed, None))
+        else:
+            if state.status_type is not None:
+                state.level = 'warning'
+            if self._alarm_active:
+                self._alarm_active = False
+                events.append(AlertEvent('alarm_stop', None, timestamp, 0.0, None))
+        return state
+
+    @staticmethod
+    def _log_info(status_type, elapsed, detection_results):
+        if status_type == 'microsleep':
+            avg_ear = detection_results.get('avg_ear')
+            ear_text = f"{avg_ear:.2f}" if avg_ear is not None else "-"
+            return f"Mata Terpejam. Durasi: {elapsed:.1f}s, EAR: {ear_text}"
+        if status_type == 'drowsy':
+            return f"Kepala menunduk/miring. Durasi: {elapsed:.1f}s"
+        return f"Terdeteksi menguap. Durasi: {elapsed:.1f}s"
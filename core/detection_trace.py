@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+
+
+def _open_text(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class DetectionTraceWriter:
+    """
+    Merekam hasil deteksi per frame ke file JSON Lines (.jsonl atau .jsonl.gz)
+    agar bisa diputar ulang melalui AlertEngine tanpa kamera.
+    Setiap baris: {"t": detik, "yolo": ..., "ear": ..., "avg_ear": ...}
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = _open_text(path, 'w')
+        self.frame_count = 0
+
+    def write(self, timestamp: float, detection_results: dict):
+        avg_ear = detection_results.get('avg_ear')
+        self._file.write(json.dumps({
+            't': round(timestamp, 4),
+            'yolo': detection_results['yolo_status'],
+            'ear': detection_results['ear_status'],
+            'avg_ear': round(float(avg_ear), 4) if avg_ear is not None else None,
+        }, separators=(',', ':')) + '\n')
+        self.frame_count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def read_trace(path: str):
+    """Membaca trace menjadi list (timestamp, detection_results) siap diumpankan ke AlertEngine.update()."""
+    frames = []
+    with _open_text(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            frames.append((record['t'], {
+                'yolo_status': record['yolo'],
+                'ear_status': record['ear'],
+                'avg_ear': record.get('avg_ear'),
+            }))
+    return frames
+
+
+def find_trace_files(paths):
+    """Mengumpulkan file trace dari daftar file dan/atau folder."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.jsonl') or name.endswith('.jsonl.gz'):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
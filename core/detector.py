@@ -6,6 +6,15 @@ import numpy as np
 import mediapipe as mp
 import time
 
+from core.tracing import tracer
+
+# torch sudah menjadi dependensi ultralytics; dipakai langsung untuk jalur inferensi ringkas
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller."""
     try:
@@ -15,9 +24,211 @@ def resource_path(relative_path):
         
     return os.path.join(base_path, relative_path)
 
+class YoloDetections:
+    """
+    Hasil YOLO satu frame dalam bentuk array (tanpa objek per kotak).
+    boxes: int32 (N, 4) xyxy pada koordinat frame, confidences: float32 (N,), class_ids: int (N,),
+    status: kelas dengan prioritas tertinggi ('drowsy' > 'yawn' > 'no_yawn' > 'awake').
+    top_confidence: skor kelas tertinggi di seluruh frame, termasuk yang tidak lolos ambang.
+    """
+    __slots__ = ('boxes', 'confidences', 'class_ids', 'status', 'top_confidence')
+
+    def __init__(self, boxes, confidences, class_ids, status, top_confidence=0.0):
+        self.boxes = boxes
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.status = status
+        self.top_confidence = top_confidence # Skor kelas tertinggi sebelum ambang (ukuran keyakinan model)
+
+    def __len__(self):
+        return len(self.class_ids)
+
+
+class YoloRunner:
+    """
+    Menjalankan satu model YOLO dan mengembalikan YoloDetections.
+    Jalur ringkas: letterbox ke buffer yang dipakai ulang + pemanggilan model langsung.
+    Jika gagal (mis. model hasil ekspor / bukan deteksi), otomatis kembali ke model.predict().
+    """
+    LEAN_INFERENCE = True
+    IMGSZ = 640
+    STRIDE = 32
+    PREDICT_CONF = 0.3 # Ambang global seperti model.predict(conf=0.3)
+    NMS_IOU = 0.4
+
+    def __init__(self, model, name, confidence_thresholds, class_colors, status_priority):
+        self.model = model
+        self.name = name
+        # Nama span dibuat sekali agar tidak ada format string per frame
+        self._span_preprocess = f"{name}_preprocess"
+        self._span_forward = f"{name}_forward"
+        self._span_postprocess = f"{name}_postprocess"
+        self._span_predict = f"{name}_predict"
+        self.imgsz = self.IMGSZ
+        self._init_class_tables(confidence_thresholds, class_colors, status_priority)
+        self.lean_inference = self.LEAN_INFERENCE and TORCH_AVAILABLE and self._init_lean_model()
+        self._lean_shape = None
+
+    @property
+    def class_labels(self):
+        return self._class_labels
+
+    def set_imgsz(self, imgsz):
+        """Mengubah ukuran input model (kelipatan STRIDE); buffer letterbox dialokasikan ulang."""
+        self.imgsz = int(imgsz)
+        self._lean_shape = None
+
+    @property
+    def class_colors(self):
+        return self._class_colors
+
+    def _init_class_tables(self, confidence_thresholds, class_colors, status_priority):
+        """Tabel per indeks kelas: ambang confidence, warna, dan urutan prioritas (untuk filter vektor)."""
+        names = self.model.names
+        class_count = len(names)
+        self._class_labels = [names[i] for i in range(class_count)]
+        # Kelas tanpa ambang tidak pernah lolos (inf), sama seperti sebelumnya
+        self._class_thresholds = np.array(
+            [max(confidence_thresholds.get(label, np.inf), self.PREDICT_CONF) for label in self._class_labels],
+            dtype=np.float32,
+        )
+        self._class_colors = [class_colors.get(label, (255, 255, 255)) for label in self._class_labels]
+        self._priority_ids = [self._class_labels.index(label) for label in status_priority if label in self._class_labels]
+
+    def _init_lean_model(self):
+        try:
+            if getattr(self.model, 'task', 'detect') != 'detect' or not isinstance(self.model.model, torch.nn.Module):
+                return False
+            self.model.fuse() # Gabungkan Conv+BN seperti yang dilakukan predictor
+            self._net = self.model.model.eval()
+            self._net_dtype = next(self._net.parameters()).dtype
+            self._net_device = next(self._net.parameters()).device
+            print(f"✅ Lean inference path enabled for {self.name}.")
+            return True
+        except Exception as e:
+            print(f"WARNING: Lean inference path unavailable for {self.name} ({e}); using model.predict().")
+            return False
+
+    def _prepare_lean_buffers(self, shape):
+        """Alokasi buffer letterbox dan tensor input sekali per resolusi frame."""
+        h, w = shape[:2]
+        r = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * r)), int(round(h * r))
+        # Letterbox minimal (kelipatan stride), seperti predictor ultralytics dengan auto=True
+        pad_w = (new_w + self.STRIDE - 1) // self.STRIDE * self.STRIDE
+        pad_h = (new_h + self.STRIDE - 1) // self.STRIDE * self.STRIDE
+        self._lb_scale = r
+        self._lb_left = (pad_w - new_w) // 2
+        self._lb_top = (pad_h - new_h) // 2
+        self._lb_size = (new_w, new_h)
+        self._resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self._resized_rgb = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self._canvas = np.full((pad_h, pad_w, 3), 114, dtype=np.uint8) # Area padding tidak pernah berubah
+        self._canvas_view = self._canvas[self._lb_top:self._lb_top + new_h, self._lb_left:self._lb_left + new_w]
+        self._canvas_chw = torch.from_numpy(self._canvas).permute(2, 0, 1).unsqueeze(0) # Berbagi memori
+        self._input = torch.empty((1, 3, pad_h, pad_w), dtype=self._net_dtype, device=self._net_device)
+        self._lean_shape = shape
+
+    def _predict_lean(self, frame):
+        with tracer.span(self._span_preprocess):
+            if self._lean_shape != frame.shape:
+                self._prepare_lean_buffers(frame.shape)
+            if self._lb_size != (frame.shape[1], frame.shape[0]):
+                src = cv2.resize(frame, self._lb_size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            else:
+                src = frame
+            cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=self._resized_rgb)
+            self._canvas_view[...] = self._resized_rgb
+            self._input.copy_(self._canvas_chw).mul_(1.0 / 255.0)
+
+        with tracer.span(self._span_forward):
+            with torch.inference_mode():
+                preds = self._net(self._input)
+            if isinstance(preds, (list, tuple)):
+                preds = preds[0]
+            preds = preds[0].float().cpu().numpy() # (4 + nc, anchors)
+
+        with tracer.span(self._span_postprocess):
+            scores = preds[4:]
+            class_ids = scores.argmax(axis=0)
+            confidences = scores[class_ids, np.arange(scores.shape[1])]
+            top_confidence = float(confidences.max())
+            keep = confidences >= self._class_thresholds[class_ids] # Ambang per kelas dalam satu operasi
+            if not keep.any():
+                return self._empty_detections(top_confidence)
+            class_ids = class_ids[keep]
+            confidences = confidences[keep]
+            cx, cy, bw, bh = preds[:4, keep]
+            # xywh letterbox -> xyxy frame asli
+            x1 = (cx - bw / 2 - self._lb_left) / self._lb_scale
+            y1 = (cy - bh / 2 - self._lb_top) / self._lb_scale
+            bw = bw / self._lb_scale
+            bh = bh / self._lb_scale
+            # NMS per kelas (agnostic=False seperti predict)
+            indices = cv2.dnn.NMSBoxesBatched(
+                np.stack([x1, y1, bw, bh], axis=1).tolist(), confidences.tolist(), class_ids.tolist(),
+                0.0, self.NMS_IOU
+            )
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            h, w = frame.shape[:2]
+            boxes = np.empty((len(indices), 4), dtype=np.int32)
+            boxes[:, 0] = np.clip(x1[indices], 0, w)
+            boxes[:, 1] = np.clip(y1[indices], 0, h)
+            boxes[:, 2] = np.clip(x1[indices] + bw[indices], 0, w)
+            boxes[:, 3] = np.clip(y1[indices] + bh[indices], 0, h)
+            return self._make_detections(boxes, confidences[indices], class_ids[indices], top_confidence)
+
+    def _predict_ultralytics(self, frame):
+        """Jalur umum melalui model.predict(); hasilnya dikonversi ke array sekali jalan."""
+        with tracer.span(self._span_predict):
+            results_yolo = self.model.predict(
+                source=frame, imgsz=self.imgsz, conf=self.PREDICT_CONF, iou=self.NMS_IOU, verbose=False
+            )[0]
+        with tracer.span(self._span_postprocess):
+            boxes = results_yolo.boxes
+            if boxes is None or len(boxes) == 0:
+                return self._empty_detections(0.0)
+            confidences = boxes.conf.cpu().numpy()
+            class_ids = boxes.cls.cpu().numpy().astype(np.int64)
+            keep = confidences >= self._class_thresholds[class_ids]
+            return self._make_detections(
+                boxes.xyxy.cpu().numpy()[keep].astype(np.int32), confidences[keep], class_ids[keep],
+                float(confidences.max())
+            )
+
+    def _empty_detections(self, top_confidence):
+        return YoloDetections(np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.float32),
+                              np.empty(0, dtype=np.int64), "awake", top_confidence)
+
+    def _make_detections(self, boxes, confidences, class_ids, top_confidence):
+        # Status prioritas dari kelas yang muncul; default "awake" bila tidak ada yang lolos ambang
+        present = np.bincount(class_ids, minlength=len(self._class_labels))
+        status = "awake"
+        for class_id in self._priority_ids:
+            if present[class_id]:
+                status = self._class_labels[class_id]
+                break
+        return YoloDetections(boxes, confidences, class_ids, status, top_confidence)
+
+    def predict(self, frame: np.ndarray) -> YoloDetections:
+        """Deteksi pada frame BGR (jalur ringkas bila tersedia)."""
+        if self.lean_inference:
+            try:
+                return self._predict_lean(frame)
+            except Exception as e:
+                print(f"WARNING: Lean inference path failed for {self.name} ({e}); falling back to model.predict().")
+                self.lean_inference = False
+        return self._predict_ultralytics(frame)
+
+
 class DrowsinessDetector:
     LEFT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
     RIGHT_EYE_INDICES = [33, 160, 158, 133, 153, 144] 
+    # Kontur wajah FaceMesh, cukup untuk kotak wajah (thumbnail kejadian) tanpa memindai 478 landmark
+    FACE_OVAL_INDICES = [
+        10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288, 397, 365, 379, 378, 400, 377,
+        152, 148, 176, 149, 150, 136, 172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109,
+    ]
 
     CLASS_COLORS = {
         "awake": (0, 255, 0),     # Hijau
@@ -37,7 +248,31 @@ class DrowsinessDetector:
         "no_yawn": 0.5,  # Untuk tidak menguap
     }
 
-    def __init__(self, model_path='models/best.pt'):
+    # Urutan prioritas status YOLO (paling parah lebih dulu)
+    STATUS_PRIORITY = ("drowsy", "yawn", "no_yawn", "awake")
+
+    # Cascade: model nano (kelas sama dengan best.pt) dijalankan lebih dulu; best.pt hanya dipakai
+    # bila model nano melihat drowsy/yawn atau keyakinannya di bawah margin.
+    CASCADE_MODEL_PATH = 'models/nano.pt'
+    CASCADE_ESCALATE_STATUSES = ("drowsy", "yawn")
+    CASCADE_CONFIDENCE_MARGIN = 0.7
+
+    # False = hanya landmark (EAR); YOLO dilewati dan status YOLO selalu "awake"
+    YOLO_ENABLED = True
+
+    # --- Tahap landmark (FaceMesh) ---
+    # Refinement menjalankan model iris/atensi tambahan; EAR hanya memakai 12 landmark kelopak mata
+    FACEMESH_REFINE = True
+    # Lebar maksimum input FaceMesh untuk frame penuh (None = resolusi asli)
+    FACEMESH_MAX_WIDTH = None
+    # Tracking ROI: FaceMesh dijalankan pada potongan wajah dari landmark frame sebelumnya;
+    # bila wajah hilang di potongan, langsung dideteksi ulang pada frame penuh.
+    FACEMESH_ROI_TRACKING = False
+    ROI_MARGIN = 0.4      # Tambahan tiap sisi, relatif terhadap sisi terpanjang kotak wajah
+    ROI_INPUT_SIZE = 256  # Potongan diubah ke ukuran tetap agar input FaceMesh konsisten
+    ROI_MIN_FACE_PX = 40  # Wajah lebih kecil dari ini: kembali ke frame penuh
+
+    def __init__(self, model_path='models/best.pt', cascade_model_path=CASCADE_MODEL_PATH):
         actual_model_path = resource_path(model_path)
         try:
             self.model = YOLO(actual_model_path)
@@ -49,21 +284,155 @@ class DrowsinessDetector:
 
 
         self.mp_face_mesh = mp.solutions.face_mesh
+        self.face_mesh = None
+        self.configure_landmarks(self.FACEMESH_REFINE, self.FACEMESH_MAX_WIDTH, self.FACEMESH_ROI_TRACKING)
+        self.mp_drawing = mp.solutions.drawing_utils
+        self.mp_drawing_styles = mp.solutions.drawing_styles
+        print("✅ MediaPipe Face Mesh initialized.")
+
+        self.yolo_enabled = self.YOLO_ENABLED
+        # Buffer input MediaPipe yang dipakai ulang: per ukuran target (resize + RGB), dan satu buffer RGB
+        # frame penuh. Tidak per bentuk input, karena potongan ROI berubah ukuran hampir setiap frame.
+        self._mp_buffers = {}
+        self._mp_full_rgb = None
+        self.last_yolo = None # YoloDetections frame terakhir (None bila YOLO nonaktif)
+        self.yolo = YoloRunner(self.model, 'yolo', self.CONFIDENCE_THRESHOLDS, self.CLASS_COLORS, self.STATUS_PRIORITY)
+        self.cascade_yolo = self._load_cascade_model(cascade_model_path)
+        self.reset_cascade_stats()
+
+    def _load_cascade_model(self, cascade_model_path):
+        """Memuat model cascade bila file ada dan kelasnya sama dengan model utama."""
+        if not cascade_model_path:
+            return None
+        actual_path = resource_path(cascade_model_path)
+        if not os.path.exists(actual_path):
+            return None
+        try:
+            model = YOLO(actual_path)
+        except Exception as e:
+            print(f"WARNING: Failed to load cascade model {actual_path}: {e}")
+            return None
+        if dict(model.names) != dict(self.model.names):
+            print(f"WARNING: Cascade model classes {model.names} differ from {self.model.names}; cascade disabled.")
+            return None
+        print(f"✅ Cascade model loaded: {actual_path}")
+        return YoloRunner(model, 'yolo_cascade', self.CONFIDENCE_THRESHOLDS, self.CLASS_COLORS, self.STATUS_PRIORITY)
+
+    def configure_landmarks(self, refine=True, max_width=None, roi_tracking=False):
+        """Mengatur tahap FaceMesh. FaceMesh dibuat ulang (status tracking internal direset)."""
+        if self.face_mesh is not None:
+            self.face_mesh.close()
         self.face_mesh = self.mp_face_mesh.FaceMesh(
             static_image_mode=False,
             max_num_faces=1,
-            refine_landmarks=True, # Untuk landmark mata yang lebih detail
+            refine_landmarks=refine, # Landmark iris & kelopak mata lebih detail (model tambahan)
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
-        print("✅ MediaPipe Face Mesh initialized.")
+        self.facemesh_refine = refine
+        self.facemesh_max_width = max_width
+        self.roi_tracking = roi_tracking
+        self._roi = None # (left, top, side) potongan wajah untuk frame berikutnya
+        self.roi_frames = 0
+        self.roi_redetects = 0
 
+    def landmark_config(self) -> dict:
+        return {
+            'refine': self.facemesh_refine,
+            'max_width': self.facemesh_max_width,
+            'roi_tracking': self.roi_tracking,
+        }
 
-    def calculate_ear(self, landmarks, eye_indices, img_w, img_h):
-        """Menghitung Eye Aspect Ratio (EAR) dari landmarks mata."""
-        p = [(int(landmarks[i].x * img_w), int(landmarks[i].y * img_h)) for i in eye_indices]
+    def _process_face_mesh(self, image, target_size=None):
+        """FaceMesh pada image BGR (diperkecil ke target_size (w, h) bila diberikan). Landmark ternormalisasi atau None."""
+        if target_size:
+            buffers = self._mp_buffers.get(target_size)
+            if buffers is None:
+                out_w, out_h = target_size
+                buffers = self._mp_buffers[target_size] = (
+                    np.empty((out_h, out_w, 3), dtype=np.uint8), np.empty((out_h, out_w, 3), dtype=np.uint8)
+                )
+            resized, rgb = buffers
+            image = cv2.resize(image, target_size, dst=resized, interpolation=cv2.INTER_AREA)
+        else:
+            if self._mp_full_rgb is None or self._mp_full_rgb.shape != image.shape:
+                self._mp_full_rgb = np.empty(image.shape, dtype=np.uint8)
+            rgb = self._mp_full_rgb
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+        results_mp = self.face_mesh.process(rgb)
+        if not results_mp.multi_face_landmarks:
+            return None
+        return results_mp.multi_face_landmarks[0].landmark
+
+    def _detect_landmarks(self, frame):
+        """
+        Landmark wajah dan transformasi ke piksel frame: (landmarks, (skala_x, skala_y, offset_x, offset_y)),
+        atau (None, None). Piksel frame = landmark * skala + offset.
+        """
+        h, w = frame.shape[:2]
+        if self.roi_tracking and self._roi is not None:
+            left, top, side = self._roi
+            landmarks = self._process_face_mesh(
+                frame[top:top + side, left:left + side], (self.ROI_INPUT_SIZE, self.ROI_INPUT_SIZE)
+            )
+            if landmarks is not None:
+                self.roi_frames += 1
+                return landmarks, (side, side, left, top)
+            self.roi_redetects += 1 # Wajah hilang di potongan: deteksi ulang pada frame penuh
+            self._roi = None
+
+        target_size = None
+        if self.facemesh_max_width and w > self.facemesh_max_width:
+            target_size = (int(self.facemesh_max_width), int(round(h * self.facemesh_max_width / w)))
+        landmarks = self._process_face_mesh(frame, target_size)
+        if landmarks is None:
+            return None, None
+        return landmarks, (w, h, 0, 0)
+
+    def _update_roi(self, face_box, frame_shape):
+        """Potongan persegi untuk frame berikutnya di sekitar kotak wajah frame ini."""
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = face_box
+        face_side = max(x2 - x1, y2 - y1)
+        side = min(int(face_side * (1 + 2 * self.ROI_MARGIN)), h, w)
+        if face_side < self.ROI_MIN_FACE_PX:
+            self._roi = None
+            return
+        left = min(max((x1 + x2) // 2 - side // 2, 0), w - side)
+        top = min(max((y1 + y2) // 2 - side // 2, 0), h - side)
+        self._roi = (left, top, side)
+
+    def reset_cascade_stats(self):
+        self.cascade_frames = 0
+        self.cascade_escalations = 0
+
+    def should_escalate(self, cheap: YoloDetections) -> bool:
+        """True bila hasil model cascade perlu dikonfirmasi model utama."""
+        return cheap.status in self.CASCADE_ESCALATE_STATUSES or cheap.top_confidence < self.CASCADE_CONFIDENCE_MARGIN
+
+    def predict_yolo(self, frame: np.ndarray):
+        """Deteksi YOLO (dengan cascade bila tersedia). Mengembalikan (YoloDetections, escalated)."""
+        if self.cascade_yolo is None:
+            return self.yolo.predict(frame), False
+        cheap = self.cascade_yolo.predict(frame)
+        self.cascade_frames += 1
+        if not self.should_escalate(cheap):
+            return cheap, False
+        self.cascade_escalations += 1
+        return self.yolo.predict(frame), True
+
+    def cascade_report(self) -> dict:
+        """Statistik cascade sejak reset_cascade_stats()."""
+        return {
+            'enabled': self.cascade_yolo is not None,
+            'frames': self.cascade_frames,
+            'escalations': self.cascade_escalations,
+            'escalation_rate': self.cascade_escalations / self.cascade_frames if self.cascade_frames else None,
+        }
+
+    def calculate_ear(self, landmarks, eye_indices, img_w, img_h, offset_x=0, offset_y=0):
+        """Menghitung Eye Aspect Ratio (EAR) dari landmarks mata (img_w/img_h = ukuran area landmark)."""
+        p = [(int(landmarks[i].x * img_w + offset_x), int(landmarks[i].y * img_h + offset_y)) for i in eye_indices]
 
         # Konversi ke numpy array untuk perhitungan jarak
         p_np = np.array(p)
@@ -78,112 +447,99 @@ class DrowsinessDetector:
         ear = (A + B) / (2.0 * C)
         return ear
 
-    def detect(self, frame: np.ndarray):
+    def _face_box(self, landmarks, img_w, img_h, offset_x=0, offset_y=0):
+        """Kotak (x1, y1, x2, y2) dari kontur wajah FaceMesh."""
+        xs = [landmarks[i].x for i in self.FACE_OVAL_INDICES]
+        ys = [landmarks[i].y for i in self.FACE_OVAL_INDICES]
+        return (int(min(xs) * img_w + offset_x), int(min(ys) * img_h + offset_y),
+                int(max(xs) * img_w + offset_x), int(max(ys) * img_h + offset_y))
+
+    def detect(self, frame: np.ndarray, out: np.ndarray = None):
         """
         Melakukan deteksi YOLO dan EAR pada frame.
         Mengembalikan frame yang dianotasi dan dictionary hasil deteksi.
+        Jika out diberikan (buffer dari FramePool berukuran sama), anotasi ditulis ke sana
+        tanpa alokasi frame baru.
         """
         h, w, _ = frame.shape
-        annotated_frame = frame.copy()
+        if out is None:
+            annotated_frame = frame.copy()
+        else:
+            np.copyto(out, frame)
+            annotated_frame = out
         
-        # Inisialisasi status YOLO default.
-        # Jika tidak ada deteksi yang memenuhi ambang batas per kelas, status akan tetap "awake".
-        current_yolo_status = "awake" 
         current_ear_status = "unknown"
         avg_ear = None
+        face_box = None
 
         # 1. Deteksi YOLOv8
-        results_yolo = self.model.predict(source=frame, conf=0.3, iou=0.4, verbose=False)[0] # Global conf set lower
+        # Jika tidak ada deteksi yang memenuhi ambang batas per kelas, status akan tetap "awake".
+        if self.yolo_enabled:
+            yolo, yolo_escalated = self.predict_yolo(frame)
+        else:
+            yolo, yolo_escalated = self.yolo._empty_detections(0.0), False
+        self.last_yolo = yolo if self.yolo_enabled else None
+        current_yolo_status = yolo.status
+        class_labels = self.yolo.class_labels
+        class_colors = self.yolo.class_colors
 
-        # Simpan deteksi yang valid untuk anotasi dan penentuan status
-        valid_detections = [] 
-        
-        for box in results_yolo.boxes:
-            conf = float(box.conf[0])
-            cls = int(box.cls[0])
-            label = self.model.names[cls]
-            
-            if label in self.CONFIDENCE_THRESHOLDS and conf >= self.CONFIDENCE_THRESHOLDS[label]:
-                valid_detections.append({'box': box, 'conf': conf, 'label': label})
-        
-        has_drowsy = False
-        has_yawn = False
-        has_no_yawn = False
-        has_awake = False
-
-        for det in valid_detections:
-            x1, y1, x2, y2 = map(int, det['box'].xyxy[0])
-            label = det['label']
-            conf = det['conf']
-
-            # Anotasi bounding box
-            color = self.CLASS_COLORS.get(label, (255, 255, 255)) 
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(
-                annotated_frame,
-                f"{label} ({conf:.2f})",
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                color,
-                2
-            )
-            
-            # Set flag untuk penentuan status utama
-            if label == "drowsy":
-                has_drowsy = True
-            elif label == "yawn":
-                has_yawn = True
-            elif label == "no_yawn":
-                has_no_yawn = True
-            elif label == "awake":
-                has_awake = True
-        
-        # Tentukan current_yolo_status berdasarkan prioritas tertinggi
-        if has_drowsy:
-            current_yolo_status = "drowsy"
-        elif has_yawn:
-            current_yolo_status = "yawn"
-        elif has_no_yawn:
-            current_yolo_status = "no_yawn"
-        elif has_awake:
-            current_yolo_status = "awake"
+        with tracer.span('yolo_annotate'):
+            for (x1, y1, x2, y2), conf, cls in zip(yolo.boxes.tolist(), yolo.confidences.tolist(), yolo.class_ids.tolist()):
+                # Anotasi bounding box
+                color = class_colors[cls]
+                cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+                cv2.putText(
+                    annotated_frame,
+                    f"{class_labels[cls]} ({conf:.2f})",
+                    (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    color,
+                    2
+                )
 
         # 2. Deteksi MediaPipe FaceMesh (untuk EAR)
         # Convert BGR to RGB untuk MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results_mp = self.face_mesh.process(rgb_frame)
-
-        if results_mp.multi_face_landmarks:
-            landmarks = results_mp.multi_face_landmarks[0]
-
-            left_ear = self.calculate_ear(landmarks.landmark, self.LEFT_EYE_INDICES, w, h)
-            right_ear = self.calculate_ear(landmarks.landmark, self.RIGHT_EYE_INDICES, w, h)
-            avg_ear = (left_ear + right_ear) / 2.0
-
-            ear_color = (255, 255, 0) # Kuning
-            if avg_ear < self.EAR_THRESHOLD:
-                current_ear_status = "microsleep"
-                ear_color = (0, 0, 255) # Merah jika microsleep
-                # Gambar lingkaran di mata untuk indikasi
-                for i in self.LEFT_EYE_INDICES:
-                    cv2.circle(annotated_frame, (int(landmarks.landmark[i].x * w), int(landmarks.landmark[i].y * h)), 2, ear_color, -1)
-                for i in self.RIGHT_EYE_INDICES:
-                    cv2.circle(annotated_frame, (int(landmarks.landmark[i].x * w), int(landmarks.landmark[i].y * h)), 2, ear_color, -1)
-            else:
-                current_ear_status = "eyes_open"
+        with tracer.span('facemesh'):
+            landmarks, transform = self._detect_landmarks(frame)
+
+        with tracer.span('ear'):
+            if landmarks is not None:
+                sx, sy, ox, oy = transform
+                left_ear = self.calculate_ear(landmarks, self.LEFT_EYE_INDICES, sx, sy, ox, oy)
+                right_ear = self.calculate_ear(landmarks, self.RIGHT_EYE_INDICES, sx, sy, ox, oy)
+                avg_ear = (left_ear + right_ear) / 2.0
+                face_box = self._face_box(landmarks, sx, sy, ox, oy)
+                if self.roi_tracking:
+                    self._update_roi(face_box, frame.shape)
+
+                ear_color = (255, 255, 0) # Kuning
+                if avg_ear < self.EAR_THRESHOLD:
+                    current_ear_status = "microsleep"
+                    ear_color = (0, 0, 255) # Merah jika microsleep
+                    # Gambar lingkaran di mata untuk indikasi
+                    for i in self.LEFT_EYE_INDICES + self.RIGHT_EYE_INDICES:
+                        cv2.circle(annotated_frame, (int(landmarks[i].x * sx + ox), int(landmarks[i].y * sy + oy)), 2, ear_color, -1)
+                else:
+                    current_ear_status = "eyes_open"
             
-            cv2.putText(annotated_frame, f"EAR: {avg_ear:.3f}", (w - 150, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, ear_color, 2)
-        else:
-            current_ear_status = "no_face"
-            cv2.putText(annotated_frame, "No Face Detected!", (w - 250, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2) # Oranye
+                cv2.putText(annotated_frame, f"EAR: {avg_ear:.3f}", (w - 150, 30), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, ear_color, 2)
+            else:
+                current_ear_status = "no_face"
+                cv2.putText(annotated_frame, "No Face Detected!", (w - 250, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2) # Oranye
+
+        if face_box is None and len(yolo.boxes):
+            # Tanpa landmark: kotak YOLO terbesar (kelas model adalah kondisi wajah)
+            face_box = tuple(max(yolo.boxes.tolist(), key=lambda b: (b[2] - b[0]) * (b[3] - b[1])))
 
         detection_results = {
             'yolo_status': current_yolo_status,
             'ear_status': current_ear_status,
             'avg_ear': avg_ear,
+            'yolo_escalated': yolo_escalated, # True bila model utama dipakai (atau cascade nonaktif: False)
+            'face_box': face_box, # (x1, y1, x2, y2) piksel frame, atau None
         }
 
         return annotated_frame, detection_results
\ No newline at end of file
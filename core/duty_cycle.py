@@ -0,0 +1,122 @@
+class DutyCycleController:
+    """
+    Mengatur laju deteksi berdasarkan aktivitas kendaraan dan kehadiran pengemudi.
+
+    - Mode "active": deteksi pada laju penuh (ACTIVE_INTERVAL_MS).
+    - Mode "watch" : laju rendah (WATCH_INTERVAL_MS) saat kendaraan diam selama
+      STATIONARY_SECONDS atau wajah tidak terdeteksi selama UNATTENDED_SECONDS.
+
+    Kembali ke mode "active" segera setelah kendaraan bergerak atau wajah kembali
+    terdeteksi, sehingga latensi bangun maksimum = WATCH_INTERVAL_MS + waktu satu frame.
+    Mode diam hanya dipicu oleh kecepatan GPS yang diketahui, dan mode tanpa pengemudi
+    tidak pernah dipicu saat kendaraan terkonfirmasi bergerak.
+    """
+    ACTIVE = "active"
+    WATCH = "watch"
+
+    ACTIVE_INTERVAL_MS = 30
+    WATCH_INTERVAL_MS = 500
+    STATIONARY_SPEED_KMH = 3.0
+    STATIONARY_SECONDS = 300
+    UNATTENDED_SECONDS = 120
+
+    def __init__(self, active_interval_ms=None, watch_interval_ms=None):
+        if active_interval_ms is not None:
+            self.ACTIVE_INTERVAL_MS = active_interval_ms
+        if watch_interval_ms is not None:
+            self.WATCH_INTERVAL_MS = watch_interval_ms
+        self.reset()
+
+    def reset(self):
+        self.mode = self.ACTIVE
+        self.reason = None
+        self._stationary_since = None
+        self._no_face_since = None
+        self._face_present = True
+        self._last_update = None
+        # Statistik penghematan
+        self._avg_active_frame_cpu = None
+        self.watch_seconds = 0.0
+        self.watch_frames = 0
+        self.mode_switches = 0
+
+    @property
+    def interval_ms(self):
+        return self.WATCH_INTERVAL_MS if self.mode == self.WATCH else self.ACTIVE_INTERVAL_MS
+
+    @property
+    def max_wake_latency_ms(self):
+        """Batas atas waktu kembali ke laju penuh setelah gerakan/wajah muncul (tanpa waktu proses frame)."""
+        return self.WATCH_INTERVAL_MS
+
+    def update(self, now: float, ear_status: str, speed_kmh=None) -> int:
+        """
+        Dipanggil sekali per frame yang diproses. Mengembalikan interval timer (ms)
+        untuk frame berikutnya.
+        """
+        if self._last_update is not None and self.mode == self.WATCH:
+            self.watch_seconds += now - self._last_update
+            self.watch_frames += 1
+        self._last_update = now
+
+        moving = speed_kmh is not None and speed_kmh >= self.STATIONARY_SPEED_KMH
+        stationary = speed_kmh is not None and speed_kmh < self.STATIONARY_SPEED_KMH
+        face_present = ear_status != "no_face"
+        face_returned = face_present and not self._face_present
+        self._face_present = face_present
+
+        if not stationary:
+            self._stationary_since = None
+        elif self._stationary_since is None:
+            self._stationary_since = now
+
+        if face_present:
+            self._no_face_since = None
+        elif self._no_face_since is None:
+            self._no_face_since = now
+
+        if self.mode == self.WATCH:
+            if moving or face_returned:
+                # Pengemudi kembali saat parkir: hitung ulang waktu diam dari sekarang
+                if face_returned and stationary:
+                    self._stationary_since = now
+                self._switch(self.ACTIVE, "motion" if moving else "face")
+        else:
+            if self._stationary_since is not None and now - self._stationary_since >= self.STATIONARY_SECONDS:
+                self._switch(self.WATCH, "stationary")
+            elif not moving and self._no_face_since is not None and now - self._no_face_since >= self.UNATTENDED_SECONDS:
+                self._switch(self.WATCH, "unattended")
+
+        return self.interval_ms
+
+    def _switch(self, mode, reason):
+        self.mode = mode
+        self.reason = reason if mode == self.WATCH else None
+        self.mode_switches += 1
+        if mode == self.WATCH:
+            print(f"🌙 Duty cycle: watch mode ({reason}), interval {self.WATCH_INTERVAL_MS} ms")
+        else:
+            print(f"☀️ Duty cycle: active mode ({reason}), interval {self.ACTIVE_INTERVAL_MS} ms")
+
+    def record_frame_cpu(self, cpu_seconds: float):
+        """Mencatat waktu CPU satu frame pada mode active (rata-rata eksponensial)."""
+        if self.mode != self.ACTIVE:
+            return
+        if self._avg_active_frame_cpu is None:
+            self._avg_active_frame_cpu = cpu_seconds
+        else:
+            self._avg_active_frame_cpu = 0.95 * self._avg_active_frame_cpu + 0.05 * cpu_seconds
+
+    def report(self) -> dict:
+        """Estimasi waktu CPU yang dihemat: frame yang dilewati x rata-rata CPU per frame active."""
+        full_rate_frames = self.watch_seconds * 1000.0 / self.ACTIVE_INTERVAL_MS
+        skipped_frames = max(0.0, full_rate_frames - self.watch_frames)
+        avg_cpu = self._avg_active_frame_cpu or 0.0
+        return {
+            'mode': self.mode,
+            'watch_seconds': self.watch_seconds,
+            'frames_skipped': int(skipped_frames),
+            'avg_active_frame_cpu_ms': avg_cpu * 1000.0,
+            'cpu_seconds_saved': skipped_frames * avg_cpu,
+            'mode_switches': self.mode_switches,
+        }
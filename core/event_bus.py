@@ -0,0 +1,161 @@
+import threading
+from collections import deque, OrderedDict
+
+from core.frame_pool import FrameSlots
+
+
+class Subscription:
+    """
+    Satu pelanggan EventBus dengan antrean terbatas dan kebijakan saat penuh:
+
+    - 'drop_oldest' : buang pesan tertua (default; cocok untuk log/event)
+    - 'drop_newest' : buang pesan baru yang datang
+    - 'coalesce'    : hanya simpan pesan terbaru per topik (cocok untuk tampilan/status)
+
+    Jika callback diberikan, pesan dikirim oleh thread milik pelanggan ini.
+    Tanpa callback, pelanggan mengambil pesan sendiri melalui poll() (mis. timer GUI).
+
+    copy_frames=True (khusus 'coalesce' dengan satu topik berisi FrameResult): payload.frame disalin
+    ke FrameSlots milik pelanggan di thread penerbit, karena frame FramePool dipakai ulang penerbit
+    setelah POOL_SIZE frame, sementara pelanggan bisa memegangnya lebih lama.
+    """
+    POLICIES = ('drop_oldest', 'drop_newest', 'coalesce')
+
+    def __init__(self, name, topics, callback=None, maxsize=64, policy='drop_oldest', copy_frames=False):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        if copy_frames and (policy != 'coalesce' or len(topics) != 1):
+            raise ValueError("copy_frames requires the 'coalesce' policy and a single topic")
+        self.name = name
+        self.topics = frozenset(topics)
+        self.callback = callback
+        self.maxsize = maxsize
+        self.policy = policy
+        self._queue = OrderedDict() if policy == 'coalesce' else deque()
+        self._frame_slots = FrameSlots() if copy_frames else None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._busy = False
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+            self._thread.start()
+
+    def _offer(self, topic, payload):
+        """Dipanggil oleh EventBus.publish(); tidak pernah memblokir lebih dari satu lock singkat."""
+        with self._cond:
+            if self._closed:
+                return
+            self.received += 1
+            if self.policy == 'coalesce':
+                if topic in self._queue:
+                    self.dropped += 1
+                    del self._queue[topic]
+                if self._frame_slots is not None:
+                    payload = payload._replace(frame=self._frame_slots.store(payload.frame))
+                self._queue[topic] = payload
+            elif len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == 'drop_newest':
+                    return
+                self._queue.popleft()
+                self._queue.append((topic, payload))
+            else:
+                self._queue.append((topic, payload))
+            self._cond.notify()
+
+    def _pop_all(self):
+        if self._frame_slots is not None and self._queue:
+            self._frame_slots.take()
+        if self.policy == 'coalesce':
+            items = list(self._queue.items())
+        else:
+            items = list(self._queue)
+        self._queue.clear()
+        return items
+
+    def poll(self):
+        """Mengambil semua pesan yang tertunda sebagai list (topic, payload)."""
+        with self._cond:
+            items = self._pop_all()
+        self.delivered += len(items)
+        return items
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+                items = self._pop_all()
+                self._busy = True
+            for topic, payload in items:
+                try:
+                    self.callback(topic, payload)
+                except Exception as e:
+                    print(f"❌ Exception in bus subscriber '{self.name}': {e}")
+                self.delivered += 1
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Menunggu hingga semua pesan tertunda selesai diproses callback. True jika berhasil."""
+        if self._thread is None:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, drain=True, timeout=5.0):
+        """Menutup pelanggan; pesan tersisa diproses dulu jika drain=True."""
+        if drain:
+            self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            if not drain:
+                self._queue.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._queue)
+        return {'received': self.received, 'delivered': self.delivered, 'dropped': self.dropped, 'pending': pending}
+
+
+class EventBus:
+    """
+    Publish/subscribe di dalam proses untuk hasil frame dan event alarm.
+    publish() tidak pernah menunggu pelanggan: setiap pelanggan punya antrean terbatas
+    sendiri, sehingga GUI, database, audio, dan perekam yang lambat tidak memperlambat
+    loop deteksi.
+    """
+
+    def __init__(self):
+        self._subscriptions = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, name, topics, callback=None, maxsize=64, policy='drop_oldest', copy_frames=False) -> Subscription:
+        subscription = Subscription(name, topics, callback, maxsize, policy, copy_frames)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription, drain=True):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription.close(drain=drain)
+
+    def publish(self, topic, payload):
+        # Daftar pelanggan diganti (copy-on-write) saat subscribe, jadi bisa dibaca tanpa lock
+        for subscription in self._subscriptions:
+            if topic in subscription.topics:
+                subscription._offer(topic, payload)
+
+    def stats(self):
+        return {s.name: s.stats() for s in self._subscriptions}
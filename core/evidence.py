@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from db import database
+
+_ClipRequest = namedtuple('_ClipRequest', ['log_id', 'session_id', 'status_type', 'start_ts', 'end_ts'])
+
+
+class FrameRingBuffer:
+    """
+    Ring buffer frame N detik terakhir dalam satu array NumPy yang dialokasikan sekali.
+    push() menyalin (dan memperkecil) frame langsung ke slot berikutnya tanpa alokasi baru.
+    Setiap slot menyimpan nomor urut frame, sehingga pembaca dapat mendeteksi slot yang
+    sudah ditimpa frame baru.
+    """
+
+    def __init__(self, seconds: float, fps: int, width: int, height: int):
+        self.capacity = int(seconds * fps)
+        self.min_interval = 1.0 / fps
+        self.width = width
+        self.height = height
+        self._frames = np.zeros((self.capacity, height, width, 3), dtype=np.uint8)
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._seq = np.full(self.capacity, -1, dtype=np.int64)
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        self.latest_timestamp = None
+
+    @property
+    def nbytes(self):
+        return self._frames.nbytes
+
+    def push(self, frame: np.ndarray, timestamp: float) -> bool:
+        """Menyimpan frame BGR. False jika dilewati karena melebihi laju fps buffer."""
+        if self.latest_timestamp is not None and timestamp - self.latest_timestamp < self.min_interval:
+            return False
+        slot = self._next_seq % self.capacity
+        with self._lock:
+            if frame.shape[0] == self.height and frame.shape[1] == self.width:
+                np.copyto(self._frames[slot], frame)
+            else:
+                cv2.resize(frame, (self.width, self.height), dst=self._frames[slot], interpolation=cv2.INTER_AREA)
+            self._timestamps[slot] = timestamp
+            self._seq[slot] = self._next_seq
+            self._next_seq += 1
+        self.latest_timestamp = timestamp
+        return True
+
+    def frames_between(self, start_ts: float, end_ts: float):
+        """Nomor urut dan timestamp frame dalam rentang waktu, urut kronologis."""
+        with self._lock:
+            mask = (self._seq >= 0) & (self._timestamps >= start_ts) & (self._timestamps <= end_ts)
+            seqs = self._seq[mask]
+            timestamps = self._timestamps[mask]
+        order = np.argsort(seqs)
+        return seqs[order], timestamps[order]
+
+    def copy_frame(self, seq: int, out: np.ndarray) -> bool:
+        """Menyalin frame bernomor seq ke out. False jika slotnya sudah ditimpa."""
+        slot = seq % self.capacity
+        with self._lock:
+            if self._seq[slot] != seq:
+                return False
+            np.copyto(out, self._frames[slot])
+        return True
+
+
+class EvidenceRecorder:
+    """
+    Merekam klip video singkat di sekitar event microsleep/drowsy/yawn untuk tinjauan keselamatan.
+
+    Frame hasil deteksi disalin ke FrameRingBuffer (on_frame, dipanggil dari pelanggan EventBus).
+    Setelah event dicatat ke detection_log, request_clip() mengantrekan klip dari
+    SECONDS_BEFORE detik sebelum gejala mulai hingga SECONDS_AFTER detik setelah dicatat.
+    Encoding dilakukan thread latar sendiri, klip ditautkan ke baris log (tabel evidence_clip),
+    dan klip tertua dihapus bila total ukuran melebihi kuota.
+    """
+    STATUS_TYPES = ('microsleep', 'drowsy', 'yawn')
+    SECONDS_BEFORE = 5.0
+    SECONDS_AFTER = 3.0
+    RING_SECONDS = 15.0 # > SECONDS_BEFORE + lama gejala hingga dicatat + SECONDS_AFTER
+    CLIP_FPS = 10
+    CLIP_WIDTH = 320
+    CLIP_HEIGHT = 240
+    FOURCC = 'mp4v'
+    EXTENSION = '.mp4'
+    MAX_PENDING_CLIPS = 8
+    DEFAULT_QUOTA_MB = 500
+
+    def __init__(self, output_dir=None, quota_mb=None):
+        # Default: folder 'evidence' di samping database (lokasi yang pasti dapat ditulis)
+        self.output_dir = output_dir or os.path.join(os.path.dirname(database.DB_PATH), 'evidence')
+        self.quota_bytes = int((quota_mb if quota_mb is not None else self.DEFAULT_QUOTA_MB) * 1024 * 1024)
+        self.ring = FrameRingBuffer(self.RING_SECONDS, self.CLIP_FPS, self.CLIP_WIDTH, self.CLIP_HEIGHT)
+        self._scratch = np.empty((self.CLIP_HEIGHT, self.CLIP_WIDTH, 3), dtype=np.uint8)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closing = False
+        self.clips_written = 0
+        self.clips_dropped = 0
+        self.clips_deleted = 0
+        self._thread = threading.Thread(target=self._run, name="evidence-encoder", daemon=True)
+        self._thread.start()
+        print(f"🎞️ Evidence ring buffer: {self.ring.capacity} frames ({self.ring.nbytes / (1024 * 1024):.0f} MB), "
+              f"clips in {self.output_dir}")
+
+    def on_frame(self, topic, result):
+        """Pelanggan EventBus untuk FrameResult: simpan frame ke ring buffer."""
+        self.ring.push(result.frame, result.timestamp)
+
+    def request_clip(self, log_id, session_id, status_type, onset_ts, logged_ts):
+        """Mengantrekan klip untuk baris detection_log yang baru dicatat (tidak memblokir)."""
+        if log_id is None or status_type not in self.STATUS_TYPES:
+            return
+        request = _ClipRequest(log_id, session_id, status_type, onset_ts - self.SECONDS_BEFORE, logged_ts + self.SECONDS_AFTER)
+        with self._cond:
+            if len(self._pending) >= self.MAX_PENDING_CLIPS:
+                dropped = self._pending.popleft()
+                self.clips_dropped += 1
+                print(f"WARNING: Evidence queue full, dropping clip for log {dropped.log_id}.")
+            self._pending.append(request)
+            self._cond.notify()
+
+    def flush(self, timeout=10.0):
+        """Menunggu semua klip tertunda selesai di-encode. True jika berhasil."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout=10.0):
+        """Meng-encode klip tertunda dengan frame yang sudah ada, lalu menghentikan thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending:
+                        # Klip siap setelah jendela SECONDS_AFTER lewat (atau saat ditutup)
+                        wait = self._pending[0].end_ts - time.time()
+                        if wait <= 0 or self._closing:
+                            break
+                        self._cond.wait(wait)
+                    elif self._closing:
+                        return
+                    else:
+                        self._cond.wait()
+                request = self._pending.popleft()
+                self._busy = True
+            try:
+                self._encode(request)
+            except Exception as e:
+                print(f"❌ Failed to write evidence clip for log {request.log_id}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _encode(self, request):
+        seqs, timestamps = self.ring.frames_between(request.start_ts, request.end_ts)
+        if len(seqs) == 0:
+            print(f"WARNING: No buffered frames for evidence clip of log {request.log_id}.")
+            return
+
+        session_dir = os.path.join(self.output_dir, f"session_{request.session_id}")
+        os.makedirs(session_dir, exist_ok=True)
+        path = os.path.join(session_dir, f"{request.log_id}_{request.status_type}{self.EXTENSION}")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.FOURCC), self.CLIP_FPS,
+                                 (self.CLIP_WIDTH, self.CLIP_HEIGHT))
+        if not writer.isOpened():
+            print(f"ERROR: Could not open video writer for {path}.")
+            return
+        frame_count = 0
+        try:
+            for seq in seqs:
+                if self.ring.copy_frame(int(seq), self._scratch): # Frame yang sudah tertimpa dilewati
+                    writer.write(self._scratch)
+                    frame_count += 1
+        finally:
+            writer.release()
+
+        size_bytes = os.path.getsize(path)
+        database.insert_evidence_clip(
+            request.log_id, request.session_id, path, float(timestamps[0]), float(timestamps[-1]),
+            frame_count, size_bytes
+        )
+        self.clips_written += 1
+        print(f"🎞️ Evidence clip saved: {path} ({frame_count} frames, {size_bytes / 1024:.0f} KB)")
+        self._enforce_quota()
+
+    def _enforce_quota(self):
+        """Menghapus klip tertua hingga total ukuran di bawah kuota."""
+        total = database.get_evidence_total_bytes()
+        while total > self.quota_bytes:
+            oldest = database.fetch_oldest_evidence_clips(limit=16)
+            if not oldest:
+                break
+            for clip in oldest:
+                if total <= self.quota_bytes:
+                    break
+                try:
+                    os.remove(clip['path'])
+                except FileNotFoundError:
+                    pass
+                database.delete_evidence_clip(clip['log_id'])
+                total -= clip['size_bytes']
+                self.clips_deleted += 1
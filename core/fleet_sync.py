@@ -0,0 +1,221 @@
+import gzip
+import json
+import os
+import random
+import socket
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+
+
+class SyncError(Exception):
+    """Kegagalan sinkronisasi yang tidak akan berhasil dengan mencoba ulang (mis. HTTP 4xx)."""
+
+
+class SyncState:
+    """
+    High-water mark per tabel, disimpan di file JSON terpisah dari database deteksi
+    (database tidak pernah ditulisi agen). Ditulis atomik (tmp + rename) hanya setelah
+    collector mengonfirmasi batch, sehingga sinkronisasi dapat dilanjutkan setelah terputus.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.session_id = 0 # session_summary.session_id terakhir yang terkirim
+        self.session_rev = 0 # session_summary.sync_rev yang perubahannya sudah terkirim
+        self.log_id = 0 # detection_log.log_id terakhir yang terkirim
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.session_id = int(data.get('session_summary', 0))
+            self.session_rev = int(data.get('session_rev', 0))
+            self.log_id = int(data.get('detection_log', 0))
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Could not read sync state {self.path} ({e}); starting from zero.")
+
+    def save(self, session_id, session_rev, log_id):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'session_summary': session_id, 'session_rev': session_rev, 'detection_log': log_id,
+                       'updated_at': time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.session_id = session_id
+        self.session_rev = session_rev
+        self.log_id = log_id
+
+
+class FleetSyncAgent:
+    """
+    Mengunggah sesi yang sudah selesai beserta baris detection_log-nya ke collector pusat
+    secara bertahap (batch JSON terkompresi gzip melalui HTTP POST).
+
+    - Database dibuka read-only dengan transaksi baca singkat per batch; jalur tulis sesi aktif
+      tidak pernah disentuh.
+    - Sesi terbaru hanya dikirim bila sudah 'Completed'. Sesi lama yang masih 'Active'
+      (aplikasi tertutup paksa) tetap dikirim apa adanya agar sinkronisasi tidak macet.
+    - Sesi yang sudah terkirim lalu berubah (sync_rev naik, mis. ditutup pemulihan journal atau
+      metriknya diperbarui) dikirim ulang, urut sync_rev dengan high-water mark sendiri.
+    - Log hanya dikirim untuk sesi yang ringkasannya sudah terkirim (session_id <= high-water mark).
+    - Collector melakukan upsert per (vehicle_id, id) sehingga batch yang terkirim ulang aman.
+    """
+    SESSIONS_PER_BATCH = 20
+    LOGS_PER_BATCH = 2000
+    REQUEST_TIMEOUT = 30.0
+    BACKOFF_BASE_SECONDS = 1.0
+    BACKOFF_MAX_SECONDS = 60.0
+    MAX_ATTEMPTS = 8 # per batch; None = coba terus
+
+    def __init__(self, db_path, collector_url, vehicle_id=None, state_path=None, token=None):
+        self.db_path = str(db_path)
+        self.collector_url = collector_url
+        self.vehicle_id = vehicle_id or socket.gethostname()
+        self.state = SyncState(state_path or f"{self.db_path}.sync.json")
+        self.token = token
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            'batches': 0, 'sessions': 0, 'logs': 0, 'raw_bytes': 0, 'sent_bytes': 0,
+            'retries': 0, 'cpu_seconds': 0.0, 'wall_seconds': 0.0,
+        }
+
+    def _connect(self):
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=5.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def build_batch(self):
+        """Batch berikutnya berdasarkan high-water mark, atau None bila tidak ada yang perlu dikirim."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            # Satu transaksi baca: semua query melihat snapshot yang sama (sync_rev konsisten)
+            cursor.execute('BEGIN')
+            cursor.execute('SELECT IFNULL(MAX(session_id), 0), IFNULL(MAX(sync_rev), 0) FROM session_summary')
+            newest, current_rev = cursor.fetchone()
+            cursor.execute('''
+                SELECT * FROM session_summary
+                WHERE session_id <= ? AND sync_rev > ?
+                ORDER BY sync_rev LIMIT ?
+            ''', (self.state.session_id, self.state.session_rev, self.SESSIONS_PER_BATCH))
+            changed = [dict(row) for row in cursor.fetchall()]
+            # Semua perubahan hingga snapshot ini ikut terkirim bila daftarnya tidak terpotong LIMIT
+            rev_hwm = current_rev if len(changed) < self.SESSIONS_PER_BATCH else changed[-1]['sync_rev']
+            cursor.execute('''
+                SELECT * FROM session_summary
+                WHERE session_id > ? AND (status = 'Completed' OR session_id < ?)
+                ORDER BY session_id LIMIT ?
+            ''', (self.state.session_id, newest, self.SESSIONS_PER_BATCH))
+            sessions = [dict(row) for row in cursor.fetchall()]
+            # Hanya sesi terbaru yang bisa tertahan, jadi hasilnya selalu awalan berurutan (tanpa celah)
+            session_hwm = sessions[-1]['session_id'] if sessions else self.state.session_id
+
+            cursor.execute('''
+                SELECT * FROM detection_log
+                WHERE log_id > ? AND session_id <= ?
+                ORDER BY log_id LIMIT ?
+            ''', (self.state.log_id, session_hwm, self.LOGS_PER_BATCH))
+            logs = [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+        if not changed and not sessions and not logs:
+            return None
+        log_hwm = logs[-1]['log_id'] if logs else self.state.log_id
+        return {
+            'vehicle_id': self.vehicle_id,
+            'batch_id': (f"{self.vehicle_id}:{self.state.session_id}-{session_hwm}:"
+                         f"r{self.state.session_rev}-{rev_hwm}:{self.state.log_id}-{log_hwm}"),
+            'session_summary': changed + sessions,
+            'detection_log': logs,
+            'high_water_marks': {'session_summary': session_hwm, 'session_rev': rev_hwm, 'detection_log': log_hwm},
+        }
+
+    def _post(self, body):
+        headers = {
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+            'X-Vehicle-Id': self.vehicle_id,
+        }
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.collector_url, data=body, headers=headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.REQUEST_TIMEOUT) as response:
+            return json.loads(response.read() or b'{}')
+
+    def _send_with_retry(self, body, stop_event=None):
+        """POST dengan backoff eksponensial + jitter. Error 4xx (selain 408/429) tidak dicoba ulang."""
+        attempt = 0
+        while True:
+            try:
+                return self._post(body)
+            except urllib.error.HTTPError as e:
+                if 400 <= e.code < 500 and e.code not in (408, 429):
+                    raise SyncError(f"Collector rejected batch: HTTP {e.code} {e.reason}")
+                error = f"HTTP {e.code}"
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                error = str(getattr(e, 'reason', e))
+            attempt += 1
+            if self.MAX_ATTEMPTS is not None and attempt >= self.MAX_ATTEMPTS:
+                raise SyncError(f"Giving up after {attempt} attempts: {error}")
+            delay = min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.0)
+            self.stats['retries'] += 1
+            print(f"⚠️ Sync attempt {attempt} failed ({error}); retrying in {delay:.1f}s")
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise SyncError("Sync interrupted")
+            else:
+                time.sleep(delay)
+
+    def sync_once(self, stop_event=None):
+        """Mengirim satu batch. True jika ada batch yang terkirim."""
+        wall_started = time.monotonic()
+        cpu_started = time.process_time()
+        batch = self.build_batch()
+        if batch is None:
+            return False
+        raw = json.dumps(batch, separators=(',', ':')).encode('utf-8')
+        body = gzip.compress(raw, compresslevel=6)
+        cpu_seconds = time.process_time() - cpu_started
+
+        self._send_with_retry(body, stop_event)
+        marks = batch['high_water_marks']
+        self.state.save(marks['session_summary'], marks['session_rev'], marks['detection_log'])
+
+        stats = self.stats
+        stats['batches'] += 1
+        stats['sessions'] += len(batch['session_summary'])
+        stats['logs'] += len(batch['detection_log'])
+        stats['raw_bytes'] += len(raw)
+        stats['sent_bytes'] += len(body)
+        stats['cpu_seconds'] += cpu_seconds
+        stats['wall_seconds'] += time.monotonic() - wall_started
+        print(f"⬆️ Synced batch {batch['batch_id']}: {len(batch['session_summary'])} sessions, "
+              f"{len(batch['detection_log'])} logs, {len(raw) / 1024:.1f} KB -> {len(body) / 1024:.1f} KB gzip")
+        return True
+
+    def sync_all(self, stop_event=None):
+        """Mengirim semua batch yang tertunda. Mengembalikan jumlah batch yang terkirim."""
+        sent = 0
+        while not (stop_event is not None and stop_event.is_set()) and self.sync_once(stop_event):
+            sent += 1
+        return sent
+
+    def report(self) -> dict:
+        """Statistik sejak reset_stats(), termasuk bandwidth dan CPU per sesi tersinkron."""
+        stats = dict(self.stats)
+        sessions = stats['sessions']
+        stats['compression_ratio'] = stats['raw_bytes'] / stats['sent_bytes'] if stats['sent_bytes'] else None
+        stats['bytes_per_session'] = stats['sent_bytes'] / sessions if sessions else None
+        stats['cpu_ms_per_session'] = stats['cpu_seconds'] * 1000.0 / sessions if sessions else None
+        return stats
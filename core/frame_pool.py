@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class FramePool:
+    """
+    Kumpulan buffer frame yang dialokasikan sekali per sesi dan dipakai bergiliran (round-robin).
+
+    Buffer yang dikembalikan acquire() tetap valid sampai acquire() dipanggil POOL_SIZE kali lagi.
+    Pelanggan EventBus yang menyimpan frame lebih lama dari itu harus menyalinnya
+    (mis. FrameRingBuffer bukti kejadian, atau subscribe(..., copy_frames=True) lewat FrameSlots).
+    """
+    POOL_SIZE = 6
+
+    def __init__(self, size=None):
+        self.size = size or self.POOL_SIZE
+        self.shape = None
+        self._buffers = []
+        self._next = 0
+        self.allocations = 0
+
+    def ensure(self, shape, dtype=np.uint8):
+        """Mengalokasikan (ulang) semua buffer bila ukuran frame berubah. True jika dialokasikan."""
+        shape = tuple(shape)
+        if shape == self.shape:
+            return False
+        self.shape = shape
+        self._buffers = [np.empty(shape, dtype=dtype) for _ in range(self.size)]
+        self._next = 0
+        self.allocations += 1
+        return True
+
+    def acquire(self):
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % self.size
+        return buffer
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers)
+
+
+class FrameSlots:
+    """
+    Tiga buffer milik satu pelanggan EventBus 'coalesce' (subscribe(..., copy_frames=True)).
+
+    Frame dari FramePool disalin di thread penerbit, sebelum pesan masuk antrean pelanggan: satu slot
+    dipegang pelanggan (pesan terakhir yang diambil), satu menunggu di antrean, satu bebas ditulis.
+    Frame yang sedang dibaca pelanggan tidak pernah tertimpa, berapa pun lamanya pelanggan memprosesnya.
+    Dipanggil Subscription di bawah lock-nya sendiri.
+    """
+    SLOTS = 3
+
+    def __init__(self):
+        self.shape = None
+        self._buffers = []
+        self._queued = None
+        self._held = None
+        self.allocations = 0
+
+    def store(self, frame):
+        """Menyalin frame ke slot bebas yang menjadi slot antrean. Mengembalikan buffer salinan."""
+        if frame.shape != self.shape:
+            # Buffer lama tetap hidup selama masih direferensikan pelanggan
+            self.shape = frame.shape
+            self._buffers = [np.empty_like(frame) for _ in range(self.SLOTS)]
+            self._queued = self._held = None
+            self.allocations += 1
+        slot = next(i for i in range(self.SLOTS) if i != self._queued and i != self._held)
+        np.copyto(self._buffers[slot], frame)
+        self._queued = slot
+        return self._buffers[slot]
+
+    def take(self):
+        """Pesan antrean diambil pelanggan: slot-nya dipegang hingga pengambilan berikutnya."""
+        if self._queued is not None:
+            self._held, self._queued = self._queued, None
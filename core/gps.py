@@ -2,116 +2,117 @@ import threading
 import time
 import math
 
-# Import Windows Location API
-try:
-    import winsdk.windows.devices.geolocation as wdg
+from core.gps_sources import create_default_source, WINDOWS_LOCATION_API_AVAILABLE
+
+if WINDOWS_LOCATION_API_AVAILABLE:
     print(" Windows Location API loaded.")
-    WINDOWS_LOCATION_API_AVAILABLE = True
-except ImportError:
-    print(" winsdk module not found.")
-    WINDOWS_LOCATION_API_AVAILABLE = False
-except Exception as e:
-    print(f" Error loading winsdk: {e}")
-    WINDOWS_LOCATION_API_AVAILABLE = False
 
 
 class GPS:
     MAX_JUMP_THRESHOLD_KM = 2.0
+    STALE_FIX_SECONDS = 10.0 # Kecepatan dianggap tidak diketahui jika tidak ada fix selama ini
 
-    def __init__(self):
+    def __init__(self, source=None):
+        """
+        source: GPSSource (lihat core.gps_sources). Jika None, sumber dipilih otomatis
+        saat start() (GPS_SOURCE env, Windows Location API, atau gpsd lokal).
+        """
         self.latitude = 0.0
         self.longitude = 0.0
         self.is_running = False
+        self.source = source
         self._lock = threading.Lock()
-        self._geolocator = None
         self._last_known_position = None
         self._total_distance_km = 0.0
+        self._speed_kmh = None
+        self._last_fix_monotonic = None
+        self._fix_listeners = []
 
-    async def _initialize_geolocator(self):
-        if WINDOWS_LOCATION_API_AVAILABLE:
-            try:
-                access_status = await wdg.Geolocator.request_access_async()
-                if access_status == wdg.GeolocationAccessStatus.ALLOWED:
-                    self._geolocator = wdg.Geolocator()
-                    print(" Geolocator initialized.")
-                else:
-                    print(f" Location access denied: {access_status}")
-                    self._geolocator = None
-            except Exception as e:
-                print(f" Failed to init Geolocator: {e}")
-                self._geolocator = None
+    def add_fix_listener(self, callback):
+        """Mendaftarkan callback(fix) yang dipanggil untuk setiap fix yang diterima (lolos validasi loncat)."""
+        self._fix_listeners.append(callback)
+
+    def remove_fix_listener(self, callback):
+        if callback in self._fix_listeners:
+            self._fix_listeners.remove(callback)
 
     def start(self):
         if not self.is_running:
             self.is_running = True
             self._total_distance_km = 0.0
             self._last_known_position = None
+            self._speed_kmh = None
+            self._last_fix_monotonic = None
 
-            import asyncio
-            def run_async_init():
-                asyncio.run(self._initialize_geolocator())
-
-            init_thread = threading.Thread(target=run_async_init, daemon=True)
-            init_thread.start()
-            init_thread.join(timeout=5)
-
-            threading.Thread(target=self._update_loop, daemon=True).start()
-            print("📡 GPS tracking started.")
+            if self.source is None:
+                self.source = create_default_source()
+            self.source.start(self._on_fix)
+            print(f"📡 GPS tracking started ({self.source.name}).")
 
     def stop(self):
         self.is_running = False
+        if self.source:
+            self.source.stop()
         print(" GPS tracking stopped.")
 
-    def _update_loop(self):
-        while self.is_running:
-            if self._geolocator and WINDOWS_LOCATION_API_AVAILABLE:
+    def _on_fix(self, fix):
+        """Callback dari sumber GPS; dipanggil pada laju fix bawaan receiver."""
+        if not self.is_running:
+            return
+        accepted = False
+        with self._lock:
+            if self._last_known_position:
+                prev = self._last_known_position
+                segment_distance = self._haversine(prev.latitude, prev.longitude, fix.latitude, fix.longitude)
+
+                # Validasi agar tidak loncat
+                if segment_distance < self.MAX_JUMP_THRESHOLD_KM:
+                    self._total_distance_km += segment_distance
+                    # Kecepatan dari receiver jika ada, selain itu dari jarak/waktu antar fix
+                    if fix.speed_kmh is not None:
+                        self._speed_kmh = fix.speed_kmh
+                    elif fix.timestamp and prev.timestamp and fix.timestamp > prev.timestamp:
+                        self._speed_kmh = segment_distance / (fix.timestamp - prev.timestamp) * 3600.0
+                    self._last_fix_monotonic = time.monotonic()
+                    self.latitude = fix.latitude
+                    self.longitude = fix.longitude
+                    self._last_known_position = fix
+                    accepted = True
+                else:
+                    print(f" Skipped jump: {segment_distance:.2f} km (threshold: {self.MAX_JUMP_THRESHOLD_KM} km)")
+            else:
+                self.latitude = fix.latitude
+                self.longitude = fix.longitude
+                self._last_known_position = fix
+                self._speed_kmh = fix.speed_kmh
+                self._last_fix_monotonic = time.monotonic()
+                accepted = True
+                print(f"📍 First fix: {self.latitude:.6f}, {self.longitude:.6f}")
+
+        if accepted:
+            for listener in list(self._fix_listeners):
                 try:
-                    import asyncio
-                    async def get_position():
-                        try:
-                            return await self._geolocator.get_geoposition_async()
-                        except Exception as e:
-                            print(f" Error getting GPS: {e}")
-                            return None
-
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    position = loop.run_until_complete(get_position())
-                    loop.close()
-
-                    if position:
-                        new_lat = position.coordinate.latitude
-                        new_lon = position.coordinate.longitude
-
-                        with self._lock:
-                            if self._last_known_position:
-                                prev_lat = self._last_known_position.coordinate.latitude
-                                prev_lon = self._last_known_position.coordinate.longitude
-                                segment_distance = self._haversine(prev_lat, prev_lon, new_lat, new_lon)
-
-                                # Validasi agar tidak loncat
-                                if segment_distance < self.MAX_JUMP_THRESHOLD_KM:
-                                    self._total_distance_km += segment_distance
-                                    self.latitude = new_lat
-                                    self.longitude = new_lon
-                                    self._last_known_position = position
-                                    print(f" Updated: {self.latitude:.6f}, {self.longitude:.6f} | +{segment_distance:.2f} km | Total: {self._total_distance_km:.2f} km")
-                                else:
-                                    print(f" Skipped jump: {segment_distance:.2f} km (threshold: {self.MAX_JUMP_THRESHOLD_KM} km)")
-                            else:
-                                self.latitude = new_lat
-                                self.longitude = new_lon
-                                self._last_known_position = position
-                                print(f"📍 First fix: {self.latitude:.6f}, {self.longitude:.6f}")
+                    listener(fix)
                 except Exception as e:
-                    print(f"❌ Exception in GPS loop: {e}")
+                    print(f"❌ Exception in GPS fix listener: {e}")
 
-            time.sleep(2)
+    def has_fix(self):
+        with self._lock:
+            return self._last_known_position is not None
 
     def get_location(self):
         with self._lock:
             return self.latitude, self.longitude
 
+    def get_speed_kmh(self):
+        """Kecepatan terakhir (km/jam), atau None jika belum ada fix atau fix sudah basi."""
+        with self._lock:
+            if self._last_fix_monotonic is None:
+                return None
+            if time.monotonic() - self._last_fix_monotonic > self.STALE_FIX_SECONDS:
+                return None
+            return self._speed_kmh
+
     def get_total_distance_km(self):
         with self._lock:
             return self._total_distance_km
@@ -122,4 +123,4 @@ class GPS:
         dlon = math.radians(lon2 - lon1)
         a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
\ No newline at end of file
+        return R * c
@@ -0,0 +1,517 @@
+import os
+import socket
+import json
+import math
+import threading
+import time
+import asyncio
+import calendar
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime
+
+# Serial NMEA bersifat opsional (pyserial)
+try:
+    import serial
+    SERIAL_AVAILABLE = True
+except ImportError:
+    SERIAL_AVAILABLE = False
+
+# Windows Location API bersifat opsional (winsdk)
+try:
+    import winsdk.windows.devices.geolocation as wdg
+    WINDOWS_LOCATION_API_AVAILABLE = True
+except ImportError:
+    WINDOWS_LOCATION_API_AVAILABLE = False
+except Exception as e:
+    print(f" Error loading winsdk: {e}")
+    WINDOWS_LOCATION_API_AVAILABLE = False
+
+
+# Satu titik posisi dari receiver. timestamp dalam detik epoch, speed_kmh None jika tidak diketahui.
+GPSFix = namedtuple('GPSFix', ['latitude', 'longitude', 'timestamp', 'speed_kmh'])
+
+KNOTS_TO_KMH = 1.852
+
+
+# ---------------------------------------------------------------------------
+# Parser NMEA 0183
+# ---------------------------------------------------------------------------
+
+def nmea_checksum_ok(sentence: str) -> bool:
+    """Memvalidasi checksum *XX pada kalimat NMEA. Kalimat tanpa checksum dianggap valid."""
+    sentence = sentence.strip()
+    if not sentence.startswith('$'):
+        return False
+    if '*' not in sentence:
+        return True
+    body, checksum = sentence[1:].split('*', 1)
+    calculated = 0
+    for char in body:
+        calculated ^= ord(char)
+    try:
+        return calculated == int(checksum[:2], 16)
+    except ValueError:
+        return False
+
+
+def _nmea_to_degrees(value: str, hemisphere: str):
+    """Konversi format NMEA (d)ddmm.mmmm ke derajat desimal."""
+    if not value:
+        return None
+    dot = value.find('.')
+    head = dot if dot >= 0 else len(value)
+    degrees = float(value[:head - 2])
+    minutes = float(value[head - 2:])
+    result = degrees + minutes / 60.0
+    if hemisphere in ('S', 'W'):
+        result = -result
+    return result
+
+
+def _nmea_time_to_epoch(time_str: str, date_str: str = None):
+    """Konversi hhmmss.ss (+ ddmmyy) NMEA ke detik epoch UTC."""
+    if not time_str or len(time_str) < 6:
+        return None
+    hours, minutes = int(time_str[0:2]), int(time_str[2:4])
+    seconds = float(time_str[4:])
+    if date_str and len(date_str) == 6:
+        day, month, year = int(date_str[0:2]), int(date_str[2:4]), int(date_str[4:6])
+        year += 2000 if year < 80 else 1900
+    else:
+        today = time.gmtime()
+        day, month, year = today.tm_mday, today.tm_mon, today.tm_year
+    base = calendar.timegm((year, month, day, hours, minutes, 0, 0, 0, 0))
+    return base + seconds
+
+
+def _nearest_day(timestamp, reference):
+    """Menggeser timestamp ±1 hari ke hari yang paling dekat dengan reference (pergantian tengah malam UTC)."""
+    if timestamp - reference > 43200:
+        return timestamp - 86400
+    if reference - timestamp > 43200:
+        return timestamp + 86400
+    return timestamp
+
+
+class NMEAParser:
+    """
+    Parser NMEA stateful. Fix dikeluarkan dari kalimat RMC (punya tanggal & kecepatan).
+    GGA hanya dipakai selama belum ada RMC yang valid. Tanggal GGA diambil dari RMC terakhir
+    (juga RMC 'V' yang sudah membawa tanggal); tanggal hari ini hanya dipakai bila belum ada RMC.
+    Bila jam GGA sudah melewati tengah malam sejak RMC terakhir (atau jam sistem), tanggalnya digeser
+    ke hari terdekat agar waktu tidak mundur 24 jam.
+    """
+
+    def __init__(self):
+        self._seen_rmc = False
+        self._rmc_date = None # ddmmyy dari RMC terakhir
+        self._rmc_timestamp = None # waktu RMC terakhir (acuan pergantian hari GGA)
+
+    def feed(self, line: str):
+        """Memproses satu baris dan mengembalikan GPSFix atau None."""
+        line = line.strip()
+        if not line.startswith('$') or not nmea_checksum_ok(line):
+            return None
+        fields = line[1:].split('*', 1)[0].split(',')
+        sentence_type = fields[0][-3:]
+        try:
+            if sentence_type == 'RMC' and len(fields) >= 10:
+                if len(fields[9]) == 6:
+                    self._rmc_date = fields[9]
+                    self._rmc_timestamp = _nmea_time_to_epoch(fields[1], fields[9])
+                if fields[2] != 'A': # 'V' = data tidak valid
+                    return None
+                self._seen_rmc = True
+                lat = _nmea_to_degrees(fields[3], fields[4])
+                lon = _nmea_to_degrees(fields[5], fields[6])
+                if lat is None or lon is None:
+                    return None
+                speed = float(fields[7]) * KNOTS_TO_KMH if fields[7] else None
+                timestamp = _nmea_time_to_epoch(fields[1], fields[9]) or time.time()
+                return GPSFix(lat, lon, timestamp, speed)
+            if sentence_type == 'GGA' and len(fields) >= 7 and not self._seen_rmc:
+                if fields[6] in ('', '0'): # 0 = tidak ada fix
+                    return None
+                lat = _nmea_to_degrees(fields[2], fields[3])
+                lon = _nmea_to_degrees(fields[4], fields[5])
+                if lat is None or lon is None:
+                    return None
+                timestamp = _nmea_time_to_epoch(fields[1], self._rmc_date)
+                if timestamp is None:
+                    return GPSFix(lat, lon, time.time(), None)
+                reference = self._rmc_timestamp if self._rmc_timestamp is not None else time.time()
+                return GPSFix(lat, lon, _nearest_day(timestamp, reference), None)
+        except ValueError:
+            return None
+        return None
+
+
+def _iso_to_epoch(value: str):
+    """Konversi waktu ISO-8601 (gpsd/GPX) ke detik epoch."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def load_nmea_file(path):
+    """Membaca semua fix dari file log NMEA."""
+    parser = NMEAParser()
+    fixes = []
+    with open(path, 'r', encoding='ascii', errors='ignore') as f:
+        for line in f:
+            fix = parser.feed(line)
+            if fix:
+                fixes.append(fix)
+    return fixes
+
+
+def load_gpx_file(path):
+    """Membaca semua trackpoint (trkpt) dari file GPX."""
+    fixes = []
+    for _, elem in ET.iterparse(path):
+        if elem.tag.rsplit('}', 1)[-1] != 'trkpt':
+            continue
+        timestamp = None
+        speed = None
+        for child in elem:
+            tag = child.tag.rsplit('}', 1)[-1]
+            if tag == 'time':
+                timestamp = _iso_to_epoch(child.text)
+            elif tag == 'speed' and child.text:
+                speed = float(child.text) * 3.6 # m/s -> km/h
+        fixes.append(GPSFix(float(elem.get('lat')), float(elem.get('lon')), timestamp, speed))
+        elem.clear()
+    return fixes
+
+
+# ---------------------------------------------------------------------------
+# Sumber GPS
+# ---------------------------------------------------------------------------
+
+class GPSSource:
+    """
+    Antarmuka dasar sumber GPS. Setiap sumber berjalan di satu thread persisten
+    dan memanggil callback(fix) setiap kali receiver mengirim posisi baru.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.is_running = False
+        self._callback = None
+        self._thread = None
+
+    def start(self, callback):
+        if self.is_running:
+            return
+        self._callback = callback
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name=f"gps-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._interrupt()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=3)
+        self._thread = None
+
+    def _emit(self, fix):
+        if self.is_running and self._callback:
+            self._callback(fix)
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _interrupt(self):
+        """Membangunkan thread yang sedang blok pada I/O. Di-override oleh subclass."""
+        pass
+
+
+class WindowsLocationSource(GPSSource):
+    """Windows Geolocator (winsdk) berbasis event PositionChanged pada satu event loop persisten."""
+    name = "windows"
+
+    def __init__(self):
+        super().__init__()
+        self._loop = None
+        self._stop_event = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._watch())
+        except Exception as e:
+            print(f"❌ Exception in Windows GPS source: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _watch(self):
+        self._stop_event = asyncio.Event()
+        access_status = await wdg.Geolocator.request_access_async()
+        if access_status != wdg.GeolocationAccessStatus.ALLOWED:
+            print(f" Location access denied: {access_status}")
+            return
+        geolocator = wdg.Geolocator()
+        geolocator.report_interval = 0 # 0 = ikuti laju fix bawaan perangkat
+        print(" Geolocator initialized.")
+
+        def on_position_changed(sender, args):
+            coordinate = args.position.coordinate
+            speed = coordinate.speed * 3.6 if coordinate.speed is not None else None
+            self._emit(GPSFix(coordinate.latitude, coordinate.longitude, time.time(), speed))
+
+        token = geolocator.add_position_changed(on_position_changed)
+        try:
+            await self._stop_event.wait()
+        finally:
+            geolocator.remove_position_changed(token)
+
+    def _interrupt(self):
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+
+class SerialNMEASource(GPSSource):
+    """Receiver GPS serial/USB yang mengirim kalimat NMEA 0183 (membutuhkan pyserial)."""
+    name = "serial"
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self, port, baudrate=9600):
+        super().__init__()
+        self.port = port
+        self.baudrate = baudrate
+        self._serial = None
+
+    def _run(self):
+        if not SERIAL_AVAILABLE:
+            print(" pyserial module not found. Serial GPS disabled.")
+            return
+        parser = NMEAParser()
+        while self.is_running:
+            try:
+                self._serial = serial.Serial(self.port, self.baudrate, timeout=1)
+                print(f"📡 Serial GPS opened: {self.port} @ {self.baudrate}")
+                while self.is_running:
+                    raw = self._serial.readline()
+                    if not raw:
+                        continue
+                    fix = parser.feed(raw.decode('ascii', errors='ignore'))
+                    if fix:
+                        self._emit(fix)
+            except Exception as e:
+                if self.is_running:
+                    print(f"❌ Serial GPS error ({self.port}): {e}")
+                    time.sleep(self.RECONNECT_DELAY_SECONDS)
+            finally:
+                self._close_serial()
+
+    def _close_serial(self):
+        if self._serial:
+            try:
+                self._serial.close()
+            except Exception:
+                pass
+            self._serial = None
+
+    def _interrupt(self):
+        self._close_serial()
+
+
+class GPSDSource(GPSSource):
+    """Klien protokol JSON gpsd (default localhost:2947). Membaca laporan TPV."""
+    name = "gpsd"
+    RECONNECT_DELAY_SECONDS = 2.0
+    WATCH_COMMAND = b'?WATCH={"enable":true,"json":true};\n'
+
+    def __init__(self, host='127.0.0.1', port=2947):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self._sock = None
+
+    def _run(self):
+        warned = False
+        while self.is_running:
+            try:
+                # Referensi lokal: _interrupt() dari thread lain dapat mengosongkan self._sock kapan saja
+                sock = self._sock = socket.create_connection((self.host, self.port), timeout=5)
+                sock.settimeout(None)
+                sock.sendall(self.WATCH_COMMAND)
+                print(f"📡 Connected to gpsd at {self.host}:{self.port}")
+                warned = False
+                with sock.makefile('r', encoding='utf-8', errors='ignore') as stream:
+                    for line in stream:
+                        if not self.is_running:
+                            break
+                        fix = self.parse_report(line)
+                        if fix:
+                            self._emit(fix)
+            except OSError as e:
+                if self.is_running and not warned:
+                    print(f" gpsd not reachable at {self.host}:{self.port}: {e}")
+                    warned = True
+            finally:
+                self._close_socket()
+            if self.is_running:
+                time.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    @staticmethod
+    def parse_report(line):
+        """Mengubah satu laporan JSON gpsd menjadi GPSFix (hanya TPV dengan mode >= 2)."""
+        try:
+            report = json.loads(line)
+        except ValueError:
+            return None
+        if report.get('class') != 'TPV' or report.get('mode', 0) < 2:
+            return None
+        if 'lat' not in report or 'lon' not in report:
+            return None
+        speed = report.get('speed')
+        return GPSFix(
+            report['lat'], report['lon'],
+            _iso_to_epoch(report.get('time')) or time.time(),
+            speed * 3.6 if speed is not None else None,
+        )
+
+    def _close_socket(self):
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _interrupt(self):
+        self._close_socket()
+
+
+class FileReplaySource(GPSSource):
+    """
+    Memutar ulang log NMEA atau file GPX dengan jeda sesuai timestamp aslinya.
+    speed = faktor percepatan (0 = secepat mungkin), loop = ulangi dari awal setelah selesai.
+    """
+    name = "file"
+
+    def __init__(self, path, speed=1.0, loop=False):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self._wake = threading.Event()
+
+    def load(self):
+        if self.path.lower().endswith('.gpx'):
+            return load_gpx_file(self.path)
+        return load_nmea_file(self.path)
+
+    def _run(self):
+        try:
+            fixes = self.load()
+        except (OSError, ET.ParseError) as e:
+            print(f"❌ Failed to load GPS replay file {self.path}: {e}")
+            return
+        if not fixes:
+            print(f" No GPS fixes found in {self.path}")
+            return
+        self._wake.clear()
+
+        offset = 0.0
+        first_ts = fixes[0].timestamp
+        last_ts = fixes[-1].timestamp
+        duration = (last_ts - first_ts + 1.0) if first_ts is not None and last_ts is not None else 0.0
+        while self.is_running:
+            prev_ts = None
+            for fix in fixes:
+                if not self.is_running:
+                    return
+                if self.speed > 0 and prev_ts is not None and fix.timestamp is not None:
+                    delay = (fix.timestamp - prev_ts) / self.speed
+                    if delay > 0 and self._wake.wait(delay):
+                        return
+                prev_ts = fix.timestamp
+                timestamp = fix.timestamp + offset if fix.timestamp is not None else time.time()
+                self._emit(fix._replace(timestamp=timestamp))
+            if not self.loop:
+                return
+            offset += duration
+
+    def _interrupt(self):
+        self._wake.set()
+
+
+class SimulatedRouteSource(GPSSource):
+    """
+    Rute sintetis berbentuk lingkaran dengan kecepatan konstan (uji soak / tanpa receiver).
+    Fix dikirim setiap 1/rate_hz detik dengan timestamp jam sistem.
+    """
+    name = "sim"
+    EARTH_RADIUS_KM = 6371.0
+
+    def __init__(self, speed_kmh=60.0, rate_hz=1.0, center=(-6.2, 106.8), radius_km=2.0):
+        super().__init__()
+        self.speed_kmh = speed_kmh
+        self.rate_hz = rate_hz
+        self.center = center
+        self.radius_km = radius_km
+        self._wake = threading.Event()
+
+    def _run(self):
+        self._wake.clear()
+        lat0, lon0 = self.center
+        # Sudut yang ditempuh per fix pada kecepatan konstan
+        step = self.speed_kmh / 3600.0 / self.rate_hz / self.radius_km
+        angle = 0.0
+        while self.is_running:
+            dlat = self.radius_km * math.sin(angle) / self.EARTH_RADIUS_KM
+            dlon = self.radius_km * math.cos(angle) / (self.EARTH_RADIUS_KM * math.cos(math.radians(lat0)))
+            self._emit(GPSFix(lat0 + math.degrees(dlat), lon0 + math.degrees(dlon), time.time(), self.speed_kmh))
+            angle += step
+            if self._wake.wait(1.0 / self.rate_hz):
+                return
+
+    def _interrupt(self):
+        self._wake.set()
+
+
+def source_from_spec(spec: str) -> GPSSource:
+    """
+    Membuat sumber GPS dari string konfigurasi:
+      windows | gpsd[:host[:port]] | serial:PORT[:BAUD] | file:PATH | sim[:SPEED_KMH]
+    """
+    kind, _, rest = spec.partition(':')
+    kind = kind.strip().lower()
+    if kind == 'windows':
+        return WindowsLocationSource()
+    if kind == 'gpsd':
+        host, _, port = rest.partition(':')
+        return GPSDSource(host or '127.0.0.1', int(port) if port else 2947)
+    if kind == 'serial':
+        port, sep, baud = rest.rpartition(':')
+        if sep and baud.isdigit():
+            return SerialNMEASource(port, int(baud))
+        return SerialNMEASource(rest)
+    if kind == 'file':
+        return FileReplaySource(rest, loop=True)
+    if kind == 'sim':
+        return SimulatedRouteSource(float(rest) if rest else 60.0)
+    raise ValueError(f"Unknown GPS source: {spec}")
+
+
+def create_default_source() -> GPSSource:
+    """
+    Memilih sumber GPS: variabel lingkungan GPS_SOURCE jika diset,
+    Windows Location API jika tersedia, selain itu gpsd lokal.
+    """
+    spec = os.environ.get('GPS_SOURCE')
+    if spec:
+        return source_from_spec(spec)
+    if WINDOWS_LOCATION_API_AVAILABLE:
+        return WindowsLocationSource()
+    return GPSDSource()
@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+_HarvestRequest = namedtuple('_HarvestRequest', [
+    'timestamp', 'reason', 'frame', 'boxes', 'class_ids', 'confidences', 'face_box',
+    'yolo_status', 'ear_status', 'avg_ear',
+])
+
+
+def dhash(image, hash_size=8):
+    """Difference hash (hash_size^2 bit) gambar BGR sebagai int."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class PerceptualHashIndex:
+    """Indeks hash 64 bit per alasan; near-duplicate = jarak Hamming <= max_distance terhadap hash mana pun."""
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        self._hashes = {} # alasan -> np.uint64 array
+
+    def __len__(self):
+        return sum(len(h) for h in self._hashes.values())
+
+    def is_duplicate(self, reason, value):
+        hashes = self._hashes.get(reason)
+        if hashes is None or not len(hashes):
+            return False
+        xor = np.bitwise_xor(hashes, np.uint64(value))
+        distances = np.unpackbits(xor.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+        return bool(distances.min() <= self.max_distance)
+
+    def add(self, reason, value):
+        hashes = self._hashes.get(reason, np.empty(0, dtype=np.uint64))
+        self._hashes[reason] = np.append(hashes, np.uint64(value))
+
+
+class HardExampleHarvester:
+    """
+    Mengumpulkan frame yang sulit bagi model (opt-in) ke folder dataset YOLO untuk dilabeli ulang:
+      - 'yolo_awake_ear_closed' : EAR microsleep, tetapi YOLO awake/no_yawn
+      - 'yolo_drowsy_ear_open'  : YOLO drowsy, tetapi mata terbuka menurut EAR
+      - 'borderline'            : ada kotak YOLO dengan confidence < ambang kelas + BORDERLINE_MARGIN
+      - 'near_miss'             : tidak ada kotak lolos ambang, tetapi skor tertinggi >= ambang - BORDERLINE_MARGIN
+
+    offer() dipanggil loop deteksi setiap frame dan hanya membandingkan beberapa nilai; frame disalin
+    hanya untuk kandidat (maksimal satu per alasan per MIN_INTERVAL_SECONDS) dan antrean dibatasi.
+    Thread latar menghitung dHash wajah, membuang near-duplicate, lalu menulis images/<nama>.jpg,
+    labels/<nama>.txt (prediksi model sebagai label awal), dan satu baris di harvest.jsonl.
+    Pengumpulan berhenti saat total ukuran dataset mencapai kuota.
+    """
+    DEFAULT_QUOTA_MB = 2000
+    MIN_INTERVAL_SECONDS = 1.0
+    BORDERLINE_MARGIN = 0.1
+    HASH_DISTANCE = 4 # dari 64 bit
+    MAX_PENDING = 4
+    JPEG_QUALITY = 95
+    MANIFEST_NAME = 'harvest.jsonl'
+
+    def __init__(self, output_dir, class_labels, confidence_thresholds, quota_mb=None):
+        self.output_dir = output_dir
+        self.class_labels = list(class_labels)
+        self.quota_bytes = int((quota_mb if quota_mb is not None else self.DEFAULT_QUOTA_MB) * 1024 * 1024)
+        self._thresholds = np.array([confidence_thresholds.get(label, 1.0) for label in self.class_labels], dtype=np.float32)
+        self._near_miss_threshold = min(confidence_thresholds.values()) - self.BORDERLINE_MARGIN
+        self.images_dir = os.path.join(output_dir, 'images')
+        self.labels_dir = os.path.join(output_dir, 'labels')
+        self.manifest_path = os.path.join(output_dir, self.MANIFEST_NAME)
+        os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.labels_dir, exist_ok=True)
+        self._write_data_yaml()
+
+        self.index = PerceptualHashIndex(self.HASH_DISTANCE)
+        self._load_manifest()
+        self.total_bytes = self._dataset_bytes()
+        self.quota_full = self.total_bytes >= self.quota_bytes
+        self._last_accepted = {}
+        self.saved = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="hard-example-harvester", daemon=True)
+        self._thread.start()
+        print(f"🧲 Hard-example harvester: {output_dir} ({len(self.index)} known, "
+              f"{self.total_bytes / (1024 * 1024):.0f}/{self.quota_bytes / (1024 * 1024):.0f} MB)")
+
+    # --- Loop deteksi ---
+
+    def classify(self, detection_results, yolo):
+        """Alasan frame layak dipanen, atau None."""
+        ear_status = detection_results['ear_status']
+        yolo_status = detection_results['yolo_status']
+        if ear_status == 'microsleep' and yolo_status in ('awake', 'no_yawn'):
+            return 'yolo_awake_ear_closed'
+        if ear_status == 'eyes_open' and yolo_status == 'drowsy':
+            return 'yolo_drowsy_ear_open'
+        if len(yolo):
+            if np.any(yolo.confidences < self._thresholds[yolo.class_ids] + self.BORDERLINE_MARGIN):
+                return 'borderline'
+        elif yolo.top_confidence >= self._near_miss_threshold:
+            return 'near_miss'
+        return None
+
+    def offer(self, timestamp, frame, detection_results, yolo):
+        """Dipanggil per frame dengan frame mentah (tanpa anotasi). True bila frame diantrekan."""
+        if self.quota_full or yolo is None:
+            return False
+        reason = self.classify(detection_results, yolo)
+        if reason is None or timestamp - self._last_accepted.get(reason, 0.0) < self.MIN_INTERVAL_SECONDS:
+            return False
+        with self._cond:
+            if len(self._pending) >= self.MAX_PENDING:
+                self.dropped += 1
+                return False
+            self._last_accepted[reason] = timestamp
+            self._pending.append(_HarvestRequest(
+                timestamp, reason, frame.copy(), yolo.boxes.copy(), yolo.class_ids.copy(), yolo.confidences.copy(),
+                detection_results.get('face_box'), detection_results['yolo_status'], detection_results['ear_status'],
+                detection_results['avg_ear'],
+            ))
+            self._cond.notify()
+        return True
+
+    # --- Thread latar ---
+
+    def flush(self, timeout=10.0):
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout=10.0):
+        """Menulis frame yang masih antre lalu menghentikan thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        print(f"🧲 Harvester: {self.saved} saved, {self.duplicates} near-duplicates skipped, {self.dropped} dropped"
+              + (" (quota full)" if self.quota_full else ""))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                request = self._pending.popleft()
+                self._busy = True
+            try:
+                self._save(request)
+            except Exception as e:
+                print(f"❌ Failed to save hard example: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _save(self, request):
+        if self.quota_full:
+            return
+        # Hash bagian wajah: latar kabin yang sama membuat hash seluruh frame nyaris identik
+        region = request.frame
+        if request.face_box is not None:
+            x1, y1, x2, y2 = request.face_box
+            if x2 - x1 >= 9 and y2 - y1 >= 8:
+                region = request.frame[max(y1, 0):y2, max(x1, 0):x2]
+        value = dhash(region)
+        if self.index.is_duplicate(request.reason, value):
+            self.duplicates += 1
+            return
+
+        local = time.localtime(request.timestamp)
+        name = f"{time.strftime('%Y%m%d_%H%M%S', local)}_{int(request.timestamp * 1000) % 1000:03d}_{request.reason}"
+        image_path = os.path.join(self.images_dir, f"{name}.jpg")
+        label_path = os.path.join(self.labels_dir, f"{name}.txt")
+        if not cv2.imwrite(image_path, request.frame, [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY]):
+            print(f"ERROR: Could not write {image_path}.")
+            return
+        h, w = request.frame.shape[:2]
+        with open(label_path, 'w') as f:
+            for (x1, y1, x2, y2), cls in zip(request.boxes.tolist(), request.class_ids.tolist()):
+                f.write(f"{cls} {(x1 + x2) / 2 / w:.6f} {(y1 + y2) / 2 / h:.6f} {(x2 - x1) / w:.6f} {(y2 - y1) / h:.6f}\n")
+        with open(self.manifest_path, 'a') as f:
+            f.write(json.dumps({
+                'image': f"images/{name}.jpg", 'reason': request.reason, 'timestamp': round(request.timestamp, 3),
+                'yolo_status': request.yolo_status, 'ear_status': request.ear_status,
+                'avg_ear': round(request.avg_ear, 4) if request.avg_ear is not None else None,
+                'confidences': [round(c, 3) for c in request.confidences.tolist()],
+                'dhash': f"{value:016x}",
+            }) + '\n')
+        self.index.add(request.reason, value)
+        self.saved += 1
+        self.total_bytes += os.path.getsize(image_path) + os.path.getsize(label_path)
+        if self.total_bytes >= self.quota_bytes:
+            self.quota_full = True
+            print(f"WARNING: Hard-example quota reached ({self.quota_bytes / (1024 * 1024):.0f} MB); harvesting stopped.")
+
+    # --- Dataset ---
+
+    def _write_data_yaml(self):
+        """data.yaml berisi nama kelas model, agar folder langsung dapat dipakai tools/evaluate.py atau pelatihan."""
+        path = os.path.join(self.output_dir, 'data.yaml')
+        if os.path.exists(path):
+            return
+        with open(path, 'w') as f:
+            f.write("path: .\ntrain: images\nval: images\n")
+            f.write("names: [" + ", ".join(self.class_labels) + "]\n")
+
+    def _load_manifest(self):
+        """Hash contoh dari sesi sebelumnya, agar duplikat lintas sesi juga dilewati."""
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.index.add(record['reason'], int(record['dhash'], 16))
+                except (ValueError, KeyError):
+                    continue # Baris terpotong (mis. listrik mati saat menulis)
+
+    def _dataset_bytes(self):
+        total = 0
+        for folder in (self.images_dir, self.labels_dir):
+            with os.scandir(folder) as entries:
+                total += sum(entry.stat().st_size for entry in entries if entry.is_file())
+        return total
@@ -0,0 +1,411 @@
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+MJPEG_BOUNDARY = "frame"
+
+INDEX_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Live View Kabin</title>
+<style>
+body { font-family: Arial, sans-serif; background: #222; color: #eee; margin: 16px; }
+#status { font-size: 20px; font-weight: bold; margin: 8px 0; }
+#events { font-size: 13px; max-height: 240px; overflow-y: auto; }
+.alarm { color: #dc3545; } .warning { color: #ffc107; } .normal { color: #28a745; }
+</style></head>
+<body>
+<img src="/stream.mjpg" style="max-width: 100%; border-radius: 5px;">
+<div id="status">Menghubungkan...</div>
+<div id="info"></div>
+<div id="events"></div>
+<script>
+function connect() {
+  const ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/ws');
+  ws.onmessage = (e) => {
+    const m = JSON.parse(e.data);
+    if (m.type === 'status') {
+      const s = document.getElementById('status');
+      s.className = m.level;
+      s.textContent = m.level === 'normal' ? 'Normal' : (m.status_type + ' (' + m.elapsed + ' s)');
+      document.getElementById('info').textContent =
+        'YOLO: ' + m.yolo_status + ' | EAR: ' + m.ear_status + (m.avg_ear !== null ? ' (' + m.avg_ear + ')' : '') +
+        (m.perclos_1m !== null && m.perclos_1m !== undefined ? ' | PERCLOS 1m: ' + (m.perclos_1m * 100).toFixed(1) + '%' : '');
+    } else if (m.type === 'event') {
+      const row = document.createElement('div');
+      row.textContent = new Date(m.t * 1000).toLocaleTimeString() + ' ' + m.kind + ' ' + m.status_type + ' ' + (m.info || '');
+      const list = document.getElementById('events');
+      list.insertBefore(row, list.firstChild);
+      while (list.childNodes.length > 100) list.removeChild(list.lastChild);
+    }
+  };
+  ws.onclose = () => { document.getElementById('status').textContent = 'Terputus, mencoba lagi...'; setTimeout(connect, 2000); };
+}
+connect();
+</script>
+</body></html>
+"""
+
+
+def websocket_frame(payload: bytes, opcode=0x1) -> bytes:
+    """Frame WebSocket server -> klien (FIN, tanpa mask)."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class _SharedFrame:
+    """JPEG terbaru yang di-encode sekali dan dibaca semua klien MJPEG."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.jpeg = None
+
+    def update(self, jpeg):
+        with self.cond:
+            self.seq += 1
+            self.jpeg = jpeg
+            self.cond.notify_all()
+
+    def wait_newer(self, seq, timeout):
+        """(seq, jpeg) yang lebih baru dari seq; frame di antaranya otomatis terlewati (klien lambat)."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > seq, timeout)
+            return self.seq, self.jpeg
+
+
+class _WebSocketClient:
+    """Antrean pesan terbatas per klien WebSocket; pesan tertua dibuang bila klien lambat."""
+    MAX_QUEUE = 64
+
+    def __init__(self):
+        self.queue = deque(maxlen=self.MAX_QUEUE)
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def enqueue(self, payload):
+        with self.cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(payload)
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+
+class _LiveViewHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        live = self.server.live
+        path = self.path.split('?', 1)[0]
+        if path == '/':
+            self._reply(200, 'text/html; charset=utf-8', INDEX_HTML.encode('utf-8'))
+        elif path == '/stream.mjpg':
+            live.serve_mjpeg(self)
+        elif path == '/snapshot.jpg':
+            jpeg = live.frame.jpeg
+            if jpeg is None:
+                self._reply(503, 'text/plain', b'no frame yet')
+            else:
+                self._reply(200, 'image/jpeg', jpeg)
+        elif path == '/ws':
+            live.serve_websocket(self)
+        elif path == '/stats':
+            self._reply(200, 'application/json', json.dumps(live.report()).encode('utf-8'))
+        else:
+            self._reply(404, 'text/plain', b'not found')
+
+    def _reply(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Setiap frame MJPEG bukan request baru; tidak perlu log per request
+
+
+class LiveViewServer:
+    """
+    Server live view lokal (HTTP): frame beranotasi sebagai MJPEG (/stream.mjpg) dan status/event
+    sebagai JSON melalui WebSocket (/ws), dengan halaman viewer sederhana di /.
+
+    Berlangganan EventBus (attach), sehingga loop deteksi tidak pernah menunggu viewer:
+      - frame di-encode JPEG sekali di thread bus (hanya bila ada klien MJPEG), paling banyak MAX_FPS
+        per detik dan dibatasi CPU_BUDGET (fraksi satu core untuk encoding); hasilnya dibagi semua klien.
+      - setiap klien MJPEG dilayani thread sendiri yang selalu mengambil frame terbaru, sehingga klien
+        lambat hanya melewatkan frame. Laju kirim per klien dibatasi min(MAX_CLIENT_KBPS,
+        MAX_TOTAL_KBPS / jumlah klien).
+      - pesan WebSocket masuk antrean terbatas per klien (tertua dibuang bila klien lambat).
+    """
+    MAX_FPS = 10.0
+    JPEG_QUALITY = 70
+    MAX_WIDTH = 640
+    CPU_BUDGET = 0.15
+    MAX_TOTAL_KBPS = 4000
+    MAX_CLIENT_KBPS = 2000
+    MAX_CLIENTS = 8
+    STATUS_HZ = 5.0
+
+    def __init__(self, host='127.0.0.1', port=8080, max_fps=None, max_total_kbps=None, cpu_budget=None):
+        self.host = host
+        self.port = port
+        self.max_fps = max_fps or self.MAX_FPS
+        self.max_total_kbps = max_total_kbps or self.MAX_TOTAL_KBPS
+        self.cpu_budget = cpu_budget or self.CPU_BUDGET
+        self.frame = _SharedFrame()
+        self._lock = threading.Lock()
+        self._mjpeg_clients = 0
+        self._ws_clients = []
+        self._next_encode = 0.0
+        self._last_status = 0.0
+        self._resize_buffer = None
+        self._server = None
+        self._subscriptions = []
+        self.frames_encoded = 0
+        self.encode_ms = 0.0
+        self.bytes_sent = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0 # Frame bersama yang dilewati klien lambat
+        self.is_running = False
+
+    # --- Siklus hidup ---
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _LiveViewHandler)
+        self._server.daemon_threads = True
+        self._server.live = self
+        self.port = self._server.server_port
+        self.is_running = True
+        threading.Thread(target=self._server.serve_forever, name="live-view-http", daemon=True).start()
+        print(f"📺 Live view on http://{self.host}:{self.port}/ (MJPEG /stream.mjpg, WebSocket /ws)")
+
+    def stop(self):
+        self.is_running = False
+        with self._lock:
+            clients = list(self._ws_clients)
+        for client in clients:
+            client.close()
+        self.frame.update(self.frame.jpeg) # Bangunkan thread MJPEG agar melihat is_running
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def attach(self, bus, frame_topic='frame', alert_topic='alert'):
+        """Berlangganan frame (coalesce: hanya terbaru) dan event alarm dari EventBus."""
+        self._subscriptions = [
+            bus.subscribe('live-view-frames', [frame_topic], callback=self.on_frame, policy='coalesce', copy_frames=True),
+            bus.subscribe('live-view-alerts', [alert_topic], callback=self.on_alert, maxsize=256),
+        ]
+
+    def detach(self, bus):
+        for subscription in self._subscriptions:
+            bus.unsubscribe(subscription, drain=False)
+        self._subscriptions = []
+
+    # --- Pelanggan EventBus ---
+
+    def on_frame(self, topic, result):
+        now = time.monotonic()
+        if self._ws_clients and now - self._last_status >= 1.0 / self.STATUS_HZ:
+            self._last_status = now
+            self.publish(self._status_message(result))
+        if self._mjpeg_clients and now >= self._next_encode:
+            started = time.perf_counter()
+            jpeg = self._encode(result.frame)
+            elapsed = time.perf_counter() - started
+            self.frames_encoded += 1
+            self.encode_ms += elapsed * 1000
+            # Jeda berikutnya: batas fps, atau lebih lama bila encoding melebihi anggaran CPU
+            self._next_encode = now + max(1.0 / self.max_fps, elapsed / self.cpu_budget)
+            self.frame.update(jpeg)
+
+    def on_alert(self, topic, message):
+        event = message.event
+        self.publish({
+            'type': 'event', 'kind': event.kind, 'status_type': event.status_type,
+            't': event.timestamp, 'elapsed': round(event.elapsed, 2), 'info': event.info,
+            'session_id': message.session_id, 'latitude': message.latitude, 'longitude': message.longitude,
+        })
+
+    def _encode(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.MAX_WIDTH:
+            size = (self.MAX_WIDTH, int(h * self.MAX_WIDTH / w))
+            if self._resize_buffer is None or self._resize_buffer.shape[:2] != (size[1], size[0]):
+                self._resize_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            frame = cv2.resize(frame, size, dst=self._resize_buffer, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY])
+        return jpeg.tobytes() if ok else self.frame.jpeg
+
+    @staticmethod
+    def _status_message(result):
+        results = result.detection_results
+        avg_ear = results['avg_ear']
+        return {
+            'type': 'status', 't': result.timestamp, 'level': result.level, 'status_type': result.status_type,
+            'elapsed': round(result.elapsed, 1), 'yolo_status': results['yolo_status'],
+            'ear_status': results['ear_status'], 'avg_ear': round(float(avg_ear), 3) if avg_ear is not None else None,
+            'perclos_1m': results.get('perclos_1m'), 'processing_ms': round(result.processing_ms, 1),
+        }
+
+    def publish(self, message: dict):
+        """Mengirim pesan JSON ke semua klien WebSocket (tidak memblokir)."""
+        with self._lock:
+            clients = list(self._ws_clients)
+        if not clients:
+            return
+        payload = websocket_frame(json.dumps(message, separators=(',', ':'), default=str).encode('utf-8'))
+        for client in clients:
+            client.enqueue(payload)
+
+    # --- Klien HTTP (thread handler masing-masing) ---
+
+    def _admit(self, handler, client=None):
+        """Memeriksa MAX_CLIENTS dan mendaftarkan klien dalam satu bagian terkunci (client=None: MJPEG)."""
+        with self._lock:
+            admitted = self._mjpeg_clients + len(self._ws_clients) < self.MAX_CLIENTS
+            if admitted and client is None:
+                self._mjpeg_clients += 1
+            elif admitted:
+                self._ws_clients.append(client)
+        if not admitted:
+            handler._reply(503, 'text/plain', b'too many viewers')
+        return admitted
+
+    def _client_rate_bytes(self):
+        with self._lock:
+            clients = max(1, self._mjpeg_clients)
+        return min(self.MAX_CLIENT_KBPS, self.max_total_kbps / clients) * 1024 / 8
+
+    def serve_mjpeg(self, handler):
+        if not self._admit(handler):
+            return
+        try:
+            handler.send_response(200)
+            handler.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}')
+            handler.send_header('Cache-Control', 'no-cache')
+            handler.send_header('Connection', 'close')
+            handler.end_headers()
+            seq = 0
+            while self.is_running:
+                new_seq, jpeg = self.frame.wait_newer(seq, timeout=1.0)
+                if new_seq == seq or jpeg is None:
+                    continue
+                skipped = new_seq - seq - 1 if seq else 0
+                seq = new_seq
+                started = time.monotonic()
+                handler.wfile.write(
+                    f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode('ascii')
+                    + jpeg + b"\r\n"
+                )
+                with self._lock:
+                    self.frames_skipped += skipped
+                    self.bytes_sent += len(jpeg)
+                    self.frames_sent += 1
+                # Batas bandwidth: tunggu hingga frame ini "terbayar" pada laju klien
+                delay = len(jpeg) / self._client_rate_bytes() - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+        except OSError:
+            pass # Klien menutup koneksi
+        finally:
+            with self._lock:
+                self._mjpeg_clients -= 1
+            handler.close_connection = True
+
+    def serve_websocket(self, handler):
+        key = handler.headers.get('Sec-WebSocket-Key')
+        if handler.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            handler._reply(400, 'text/plain', b'websocket upgrade required')
+            return
+        client = _WebSocketClient()
+        if not self._admit(handler, client):
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+        handler.send_response(101, 'Switching Protocols')
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', accept)
+        handler.end_headers()
+        handler.close_connection = True
+
+        threading.Thread(target=self._read_websocket, args=(handler, client), name="live-view-ws-read", daemon=True).start()
+        try:
+            while True:
+                with client.cond:
+                    while not client.queue and not client.closed:
+                        client.cond.wait()
+                    if client.closed:
+                        break
+                    payload = client.queue.popleft()
+                handler.wfile.write(payload)
+                handler.wfile.flush()
+            handler.wfile.write(websocket_frame(b'', opcode=0x8))
+        except OSError:
+            pass
+        finally:
+            client.close()
+            with self._lock:
+                if client in self._ws_clients:
+                    self._ws_clients.remove(client)
+
+    @staticmethod
+    def _read_websocket(handler, client):
+        """Membaca frame dari klien hanya untuk mendeteksi penutupan (viewer tidak mengirim perintah)."""
+        stream = handler.rfile
+        try:
+            while not client.closed:
+                header = stream.read(2)
+                if len(header) < 2:
+                    break
+                opcode, length = header[0] & 0x0F, header[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack('!H', stream.read(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', stream.read(8))[0]
+                if header[1] & 0x80:
+                    stream.read(4) # mask
+                stream.read(length)
+                if opcode == 0x8:
+                    break
+        except (OSError, struct.error):
+            pass
+        finally:
+            client.close()
+
+    def report(self) -> dict:
+        with self._lock:
+            mjpeg_clients, ws_clients = self._mjpeg_clients, list(self._ws_clients)
+            frames_sent, frames_skipped, bytes_sent = self.frames_sent, self.frames_skipped, self.bytes_sent
+        return {
+            'mjpeg_clients': mjpeg_clients,
+            'websocket_clients': len(ws_clients),
+            'frames_encoded': self.frames_encoded,
+            'encode_ms_avg': self.encode_ms / self.frames_encoded if self.frames_encoded else None,
+            'frames_sent': frames_sent,
+            'frames_skipped': frames_skipped,
+            'bytes_sent': bytes_sent,
+            'websocket_dropped': sum(client.dropped for client in ws_clients),
+        }
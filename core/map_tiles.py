@@ -0,0 +1,278 @@
+import math
+import os
+import shutil
+import threading
+
+import cv2
+import numpy as np
+
+from core.track import load_track
+from db import database
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878 # Batas proyeksi Web Mercator
+
+# Warna BGRA (cv2) per jenis kejadian, selaras dengan grafik riwayat
+EVENT_COLORS = {
+    'microsleep': (69, 53, 220, 255),  # #dc3545
+    'drowsy': (20, 126, 253, 255),     # #fd7e14
+    'yawn': (255, 123, 0, 255),        # #007bff
+}
+ROUTE_COLOR = (193, 66, 111, 255)      # #6f42c1
+OUTLINE_COLOR = (255, 255, 255, 255)
+
+
+# ---------------------------------------------------------------------------
+# Proyeksi Web Mercator (koordinat piksel dunia pada level zoom)
+# ---------------------------------------------------------------------------
+
+def world_size(zoom):
+    return TILE_SIZE * (2 ** zoom)
+
+
+def project(latitudes, longitudes, zoom):
+    """Lintang/bujur (skalar atau array) -> koordinat piksel dunia (x, y) pada level zoom."""
+    lat = np.radians(np.clip(latitudes, -MAX_LATITUDE, MAX_LATITUDE))
+    size = world_size(zoom)
+    x = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0 * size
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * size
+    return x, y
+
+
+def unproject(x, y, zoom):
+    """Koordinat piksel dunia -> (lintang, bujur)."""
+    size = world_size(zoom)
+    longitude = x / size * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y / size))))
+    return latitude, longitude
+
+
+def tile_bounds(zoom, tx, ty, margin_px=0):
+    """(min_lat, min_lon, max_lat, max_lon) sebuah tile, diperluas margin_px piksel ke setiap sisi."""
+    max_lat, min_lon = unproject(tx * TILE_SIZE - margin_px, ty * TILE_SIZE - margin_px, zoom)
+    min_lat, max_lon = unproject((tx + 1) * TILE_SIZE + margin_px, (ty + 1) * TILE_SIZE + margin_px, zoom)
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def decimate_pixels(x, y):
+    """
+    Level-of-detail: koordinat dibulatkan ke piksel dan titik berurutan yang jatuh
+    di piksel yang sama dibuang. Mengembalikan array int32 Nx2.
+    """
+    points = np.column_stack((np.rint(x), np.rint(y))).astype(np.int32)
+    if len(points) < 2:
+        return points
+    keep = np.empty(len(points), dtype=bool)
+    keep[0] = True
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    return points[keep]
+
+
+# ---------------------------------------------------------------------------
+# Cache tile di disk
+# ---------------------------------------------------------------------------
+
+class MapTileCache:
+    """
+    Tile raster per layer disimpan di disk: <root>/<layer>/<version>/<z>/<x>/<y>.png.
+    Versi layer berubah saat datanya berubah; versi lama dihapus oleh prune().
+    Tile kosong disimpan sebagai file 0 byte agar tidak dirender ulang.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(os.path.dirname(str(database.DB_PATH)), 'map_cache')
+
+    def path(self, layer, version, zoom, tx, ty):
+        return os.path.join(self.root, layer, version, str(zoom), str(tx), f"{ty}.png")
+
+    def load(self, layer, version, zoom, tx, ty):
+        """(ditemukan, tile BGRA atau None bila kosong)."""
+        path = self.path(layer, version, zoom, tx, ty)
+        try:
+            if os.path.getsize(path) == 0:
+                return True, None
+        except OSError:
+            return False, None
+        tile = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        return tile is not None, tile
+
+    def store(self, layer, version, zoom, tx, ty, tile):
+        path = self.path(layer, version, zoom, tx, ty)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.png"
+        if tile is None:
+            open(tmp_path, 'wb').close()
+        else:
+            cv2.imwrite(tmp_path, tile)
+        os.replace(tmp_path, path) # Pembaca lain tidak pernah melihat PNG setengah jadi
+
+    def prune(self, layer, keep_version):
+        """Menghapus semua versi layer selain keep_version."""
+        layer_dir = os.path.join(self.root, layer)
+        if not os.path.isdir(layer_dir):
+            return
+        for version in os.listdir(layer_dir):
+            if version != keep_version:
+                shutil.rmtree(os.path.join(layer_dir, version), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Layer
+# ---------------------------------------------------------------------------
+
+def _empty_tile():
+    return np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+
+
+def _draw_marker(tile, x, y, radius, color):
+    cv2.circle(tile, (x, y), radius + 1, OUTLINE_COLOR, -1, cv2.LINE_AA)
+    cv2.circle(tile, (x, y), radius, color, -1, cv2.LINE_AA)
+
+
+def _dominant_status(row):
+    counts = {status: row[f"{status}_count"] for status in EVENT_COLORS}
+    return max(counts, key=counts.get)
+
+
+class EventsLayer:
+    """
+    Kejadian dari semua sesi. Zoom <= CLUSTER_MAX_ZOOM memakai klaster grid hotspot
+    (ukuran lingkaran ~ log jumlah kejadian), sehingga setahun data tetap beberapa ratus
+    lingkaran per tile; zoom lebih tinggi menggambar titik individual dari R*Tree.
+    """
+    CLUSTER_MAX_ZOOM = 14
+    MAX_CLUSTER_RADIUS = 14
+    POINT_RADIUS = 4
+    MAX_POINTS_PER_TILE = 20000
+
+    def __init__(self, status_types=None):
+        self.status_types = list(status_types) if status_types else None
+        self.name = 'events' if not self.status_types else 'events-' + '-'.join(sorted(self.status_types))
+        count, max_log_id = database.get_detection_log_version()
+        self.version = f"{count}-{max_log_id}"
+        self.is_empty = count == 0
+
+    def bounds(self):
+        return database.fetch_event_bounds()
+
+    def render_tile(self, zoom, tx, ty):
+        margin = self.MAX_CLUSTER_RADIUS + 2
+        min_lat, min_lon, max_lat, max_lon = tile_bounds(zoom, tx, ty, margin)
+        origin_x, origin_y = tx * TILE_SIZE, ty * TILE_SIZE
+        tile = None
+        if zoom <= self.CLUSTER_MAX_ZOOM:
+            cells = database.fetch_event_hotspots(min_lat, min_lon, max_lat, max_lon, zoom, self.status_types)
+            # Klaster kecil digambar lebih dulu agar klaster padat berada di atas
+            for row in reversed(cells):
+                x, y = project(row['cell_lat'], row['cell_lon'], zoom)
+                px, py = int(round(float(x) - origin_x)), int(round(float(y) - origin_y))
+                count = row['event_count']
+                radius = min(self.MAX_CLUSTER_RADIUS, self.POINT_RADIUS + int(2 * math.log2(count)))
+                if not (-radius <= px < TILE_SIZE + radius and -radius <= py < TILE_SIZE + radius):
+                    continue
+                if tile is None:
+                    tile = _empty_tile()
+                _draw_marker(tile, px, py, radius, EVENT_COLORS[_dominant_status(row)])
+                if count > 1 and radius >= 8:
+                    label = str(count) if count < 1000 else f"{count // 1000}k"
+                    cv2.putText(tile, label, (px - 4 * len(label), py + 4), cv2.FONT_HERSHEY_SIMPLEX, 0.35,
+                                OUTLINE_COLOR, 1, cv2.LINE_AA)
+            return tile
+
+        rows = database.fetch_events_in_bbox(min_lat, min_lon, max_lat, max_lon, limit=self.MAX_POINTS_PER_TILE)
+        rows = [r for r in rows if not self.status_types or r['status_type'] in self.status_types]
+        if not rows:
+            return None
+        tile = _empty_tile()
+        x, y = project(np.array([r['latitude'] for r in rows]), np.array([r['longitude'] for r in rows]), zoom)
+        # Titik yang jatuh di piksel sama hanya digambar sekali
+        pixels = np.column_stack((np.rint(x - origin_x), np.rint(y - origin_y))).astype(np.int32)
+        _, first = np.unique(pixels, axis=0, return_index=True)
+        for i in np.sort(first):
+            _draw_marker(tile, int(pixels[i, 0]), int(pixels[i, 1]), self.POINT_RADIUS, EVENT_COLORS.get(rows[i]['status_type'], ROUTE_COLOR))
+        return tile
+
+
+class SessionLayer:
+    """Jejak GPS satu sesi dan kejadian di sepanjang jejak."""
+    ROUTE_THICKNESS = 3
+    POINT_RADIUS = 5
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.name = f"session-{session_id}"
+        _, self.latitudes, self.longitudes = load_track(session_id)
+        logs = database.fetch_logs_for_session(session_id)
+        self.events = [
+            (log['latitude'], log['longitude'], log['status_type'])
+            for log in logs
+            if log['latitude'] is not None and not (log['latitude'] == 0 and log['longitude'] == 0)
+        ]
+        last_log_id = max((log['log_id'] for log in logs), default=0)
+        self.version = f"{len(self.latitudes)}-{last_log_id}"
+        self.is_empty = not len(self.latitudes) and not self.events
+        self._route_cache = {} # zoom -> titik jejak hasil decimation (piksel dunia)
+        self._lock = threading.Lock()
+
+    def bounds(self):
+        latitudes = list(self.latitudes) + [e[0] for e in self.events]
+        longitudes = list(self.longitudes) + [e[1] for e in self.events]
+        if not latitudes:
+            return None
+        return min(latitudes), min(longitudes), max(latitudes), max(longitudes)
+
+    def _route_at(self, zoom):
+        with self._lock:
+            points = self._route_cache.get(zoom)
+            if points is None:
+                x, y = project(self.latitudes, self.longitudes, zoom)
+                points = decimate_pixels(x, y)
+                self._route_cache[zoom] = points
+            return points
+
+    def render_tile(self, zoom, tx, ty):
+        origin = np.array([tx * TILE_SIZE, ty * TILE_SIZE], dtype=np.int32)
+        tile = None
+        points = self._route_at(zoom) if len(self.latitudes) else np.empty((0, 2), dtype=np.int32)
+        if len(points) >= 2:
+            margin = self.ROUTE_THICKNESS + 1
+            local = points - origin
+            inside = np.all((local >= -margin) & (local < TILE_SIZE + margin), axis=1)
+            # Sertakan tetangga agar segmen yang melintasi tepi tile tetap tergambar
+            near = inside.copy()
+            near[1:] |= inside[:-1]
+            near[:-1] |= inside[1:]
+            if near.any():
+                tile = _empty_tile()
+                # Pecah menjadi rangkaian berurutan (lompatan indeks = jejak keluar lalu masuk lagi)
+                indices = np.flatnonzero(near)
+                runs = np.split(indices, np.flatnonzero(np.diff(indices) > 1) + 1)
+                polylines = [local[run] for run in runs if len(run) >= 2]
+                cv2.polylines(tile, polylines, False, ROUTE_COLOR, self.ROUTE_THICKNESS, cv2.LINE_AA)
+
+        for latitude, longitude, status_type in self.events:
+            x, y = project(latitude, longitude, zoom)
+            px, py = int(round(float(x))) - origin[0], int(round(float(y))) - origin[1]
+            radius = self.POINT_RADIUS
+            if -radius <= px < TILE_SIZE + radius and -radius <= py < TILE_SIZE + radius:
+                if tile is None:
+                    tile = _empty_tile()
+                _draw_marker(tile, int(px), int(py), radius, EVENT_COLORS.get(status_type, ROUTE_COLOR))
+        return tile
+
+
+def fit_zoom(bounds, width, height, min_zoom=2, max_zoom=17):
+    """Zoom terbesar yang memuat bounds (min_lat, min_lon, max_lat, max_lon) di area width x height, dan pusatnya."""
+    min_lat, min_lon, max_lat, max_lon = bounds
+    center_lat, center_lon = (min_lat + max_lat) / 2.0, (min_lon + max_lon) / 2.0
+    zoom = max_zoom
+    while zoom > min_zoom:
+        x0, y0 = project(max_lat, min_lon, zoom)
+        x1, y1 = project(min_lat, max_lon, zoom)
+        if float(x1 - x0) <= width * 0.9 and float(y1 - y0) <= height * 0.9:
+            break
+        zoom -= 1
+    return zoom, center_lat, center_lon
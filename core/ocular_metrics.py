@@ -0,0 +1,142 @@
+from array import array
+
+
+class OcularMetrics:
+    """
+    Statistik mata berbasis jendela geser dari EAR per frame:
+    PERCLOS 1 dan 3 menit, jumlah & laju kedipan, dan rata-rata durasi kedipan.
+
+    Waktu dibagi ke bucket 1 detik dalam array berukuran tetap (LONG_WINDOW_SECONDS bucket).
+    Jumlah berjalan untuk jendela pendek dan panjang diperbarui saat bucket masuk/keluar jendela,
+    sehingga biaya per frame O(1) tanpa alokasi. Waktu diberi bobot selisih antar frame;
+    frame tanpa wajah dan celah lebih dari MAX_FRAME_GAP_SECONDS tidak dihitung.
+    """
+    SHORT_WINDOW_SECONDS = 60
+    LONG_WINDOW_SECONDS = 180
+    MAX_FRAME_GAP_SECONDS = 1.0  # Celah lebih lama (mode hemat, frame hilang) tidak dihitung
+    MAX_BLINK_SECONDS = 0.5      # Mata tertutup lebih lama dari ini bukan kedipan
+    MIN_OBSERVED_SECONDS = 10.0  # Nilai jendela baru dilaporkan setelah wajah teramati selama ini
+    PEAK_MIN_OBSERVED_SECONDS = 30.0
+
+    # Indeks kolom per bucket
+    _OBSERVED, _CLOSED, _BLINKS, _BLINK_TIME = range(4)
+
+    def __init__(self, closed_threshold=0.25):
+        self.closed_threshold = closed_threshold
+        self._buckets = array('d', [0.0]) * (self.LONG_WINDOW_SECONDS * 4)
+        self._short = array('d', [0.0]) * 4
+        self._long = array('d', [0.0]) * 4
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self._buckets)):
+            self._buckets[i] = 0.0
+        for i in range(4):
+            self._short[i] = 0.0
+            self._long[i] = 0.0
+        self._bucket = None
+        self._last_timestamp = None
+        self._closure_start = None
+        self.session_observed = 0.0
+        self.session_closed = 0.0
+        self.session_blinks = 0
+        self.session_blink_time = 0.0
+        self.peak_perclos_1m = None
+
+    def _advance(self, bucket):
+        """Memindahkan jendela ke bucket baru; bucket yang keluar dikurangkan dari jumlah berjalan."""
+        if self._bucket is None or bucket - self._bucket >= self.LONG_WINDOW_SECONDS or bucket < self._bucket:
+            for i in range(len(self._buckets)):
+                self._buckets[i] = 0.0
+            for i in range(4):
+                self._short[i] = 0.0
+                self._long[i] = 0.0
+            self._bucket = bucket
+            return
+        buckets = self._buckets
+        while self._bucket < bucket:
+            self._bucket += 1
+            # Bucket yang keluar dari jendela pendek masih ada di jendela panjang
+            leaving = ((self._bucket - self.SHORT_WINDOW_SECONDS) % self.LONG_WINDOW_SECONDS) * 4
+            for i in range(4):
+                self._short[i] -= buckets[leaving + i]
+            # Slot bucket baru sama dengan slot bucket yang keluar dari jendela panjang
+            slot = (self._bucket % self.LONG_WINDOW_SECONDS) * 4
+            for i in range(4):
+                self._long[i] -= buckets[slot + i]
+                buckets[slot + i] = 0.0
+
+    def _add(self, column, value):
+        self._buckets[(self._bucket % self.LONG_WINDOW_SECONDS) * 4 + column] += value
+        self._short[column] += value
+        self._long[column] += value
+
+    def update(self, timestamp: float, detection_results: dict) -> dict:
+        """
+        Memproses satu frame dan menambahkan metrik ke detection_results:
+        perclos_1m, perclos_3m (0..1), blink_count (sesi), blink_rate (per menit),
+        blink_duration_ms (rata-rata 3 menit). Nilai None bila data belum cukup.
+        """
+        self._advance(int(timestamp))
+        dt = 0.0 if self._last_timestamp is None else timestamp - self._last_timestamp
+        self._last_timestamp = timestamp
+        if dt < 0 or dt > self.MAX_FRAME_GAP_SECONDS:
+            dt = 0.0
+            self._closure_start = None # Tidak tahu apa yang terjadi selama celah
+
+        avg_ear = detection_results.get('avg_ear')
+        if avg_ear is None:
+            self._closure_start = None # Wajah hilang: episode mata tertutup tidak bisa dinilai
+        else:
+            closed = avg_ear < self.closed_threshold
+            self._add(self._OBSERVED, dt)
+            self.session_observed += dt
+            if closed:
+                self._add(self._CLOSED, dt)
+                self.session_closed += dt
+                if self._closure_start is None:
+                    self._closure_start = timestamp
+            elif self._closure_start is not None:
+                duration = timestamp - self._closure_start
+                self._closure_start = None
+                if duration <= self.MAX_BLINK_SECONDS:
+                    self._add(self._BLINKS, 1.0)
+                    self._add(self._BLINK_TIME, duration)
+                    self.session_blinks += 1
+                    self.session_blink_time += duration
+
+        perclos_1m = self._ratio(self._short)
+        if perclos_1m is not None and self._short[self._OBSERVED] >= self.PEAK_MIN_OBSERVED_SECONDS:
+            if self.peak_perclos_1m is None or perclos_1m > self.peak_perclos_1m:
+                self.peak_perclos_1m = perclos_1m
+
+        short_observed = self._short[self._OBSERVED]
+        long_blinks = self._long[self._BLINKS]
+        detection_results['perclos_1m'] = perclos_1m
+        detection_results['perclos_3m'] = self._ratio(self._long)
+        detection_results['blink_count'] = self.session_blinks
+        detection_results['blink_rate'] = (
+            max(self._short[self._BLINKS], 0.0) * 60.0 / short_observed
+            if short_observed >= self.MIN_OBSERVED_SECONDS else None
+        )
+        detection_results['blink_duration_ms'] = (
+            self._long[self._BLINK_TIME] / long_blinks * 1000.0 if long_blinks >= 1.0 else None
+        )
+        return detection_results
+
+    def _ratio(self, window):
+        observed = window[self._OBSERVED]
+        if observed < self.MIN_OBSERVED_SECONDS:
+            return None
+        return min(max(window[self._CLOSED] / observed, 0.0), 1.0)
+
+    def session_summary(self) -> dict:
+        """Ringkasan satu sesi untuk disimpan di session_summary."""
+        observed = self.session_observed
+        return {
+            'perclos': self.session_closed / observed if observed >= self.MIN_OBSERVED_SECONDS else None,
+            'perclos_peak_1m': self.peak_perclos_1m,
+            'blink_count': self.session_blinks,
+            'blink_rate_per_min': self.session_blinks * 60.0 / observed if observed >= self.MIN_OBSERVED_SECONDS else None,
+            'blink_duration_ms': self.session_blink_time / self.session_blinks * 1000.0 if self.session_blinks else None,
+        }
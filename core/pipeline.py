@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from core.alert_engine import AlertEngine
+from core.duty_cycle import DutyCycleController
+from core.frame_pool import FramePool
+from core.ocular_metrics import OcularMetrics
+from core.tracing import tracer
+
+# Hasil satu frame. Nilai AlertState disalin karena objeknya dipakai ulang oleh AlertEngine.
+FrameResult = namedtuple('FrameResult', [
+    'frame_id', 'timestamp', 'frame', 'detection_results',
+    'level', 'status_type', 'elapsed', 'alarm_elapsed', 'duty_mode', 'processing_ms',
+])
+# Event alarm beserta lokasi GPS pada saat event terjadi
+AlertMessage = namedtuple('AlertMessage', ['session_id', 'event', 'latitude', 'longitude'])
+
+
+class DetectionPipeline:
+    """
+    Loop capture -> DrowsinessDetector -> AlertEngine di thread sendiri.
+    Hasilnya hanya diterbitkan ke EventBus; tampilan, database, audio, feed status,
+    dan perekam berlangganan sendiri-sendiri sehingga pelanggan yang lambat
+    tidak memperlambat deteksi.
+
+    Buffer capture, flip, dan anotasi dialokasikan saat sesi dimulai lalu dipakai ulang,
+    sehingga loop tidak mengalokasikan frame baru di kode kita sendiri. FrameResult.frame
+    berasal dari FramePool: valid hingga FramePool.POOL_SIZE frame berikutnya; pelanggan yang
+    membacanya di luar callback singkat berlangganan dengan copy_frames=True.
+
+    Topik:
+      'frame'    : FrameResult setiap frame
+      'alert'    : AlertMessage untuk setiap AlertEvent (alarm_start/alarm_stop/log)
+      'pipeline' : dict {'state': 'started'|'stopped', 'reason': ...}
+    """
+    TOPIC_FRAME = 'frame'
+    TOPIC_ALERT = 'alert'
+    TOPIC_STATE = 'pipeline'
+
+    def __init__(self, detector, bus, gps_tracker, alert_engine=None, duty_cycle=None, flip=True):
+        self.detector = detector
+        self.bus = bus
+        self.gps_tracker = gps_tracker
+        self.alert_engine = alert_engine or AlertEngine()
+        self.duty_cycle = duty_cycle or DutyCycleController()
+        self.ocular = OcularMetrics(closed_threshold=detector.EAR_THRESHOLD) # PERCLOS & kedipan
+        self.flip = flip
+        self.harvester = None # HardExampleHarvester opsional (frame mentah + hasil deteksi)
+        self.thumbnails = None # ThumbnailRecorder opsional (potongan wajah dari frame mentah)
+        self.frame_pool = FramePool()
+        self._capture_buffer = None
+        self._flip_buffer = None
+        self.frame_count = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, capture, session_id, max_frames=None):
+        """Mulai loop deteksi. Pipeline mengambil alih capture dan melepasnya saat berhenti."""
+        if self.is_running:
+            return
+        self.alert_engine.reset()
+        self.duty_cycle.reset()
+        self.ocular.reset()
+        self.detector.reset_cascade_stats()
+        self._allocate_buffers(capture)
+        self.frame_count = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(capture, session_id, max_frames), name="detection-loop", daemon=True
+        )
+        self._thread.start()
+
+    def _allocate_buffers(self, capture):
+        """Mengalokasikan buffer frame sesuai resolusi kamera (dialokasikan ulang jika frame berbeda)."""
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if width > 0 and height > 0:
+            self._resize_buffers((height, width, 3))
+
+    def _resize_buffers(self, shape):
+        if self.frame_pool.ensure(shape):
+            self._capture_buffer = np.empty(shape, dtype=np.uint8)
+            self._flip_buffer = np.empty(shape, dtype=np.uint8)
+            print(f"🧱 Frame buffers allocated for {shape[1]}x{shape[0]} "
+                  f"({(self.frame_pool.nbytes + 2 * self._capture_buffer.nbytes) / (1024 * 1024):.1f} MB)")
+
+    def stop(self, timeout=5.0):
+        """Menghentikan loop dan menunggu thread selesai (capture sudah dilepas setelah ini)."""
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def wait(self, timeout=None):
+        """Menunggu loop berakhir dengan sendirinya. True jika sudah berakhir."""
+        if self._thread:
+            self._thread.join(timeout)
+        return not self.is_running
+
+    def _run(self, capture, session_id, max_frames):
+        reason = 'stopped'
+        self.bus.publish(self.TOPIC_STATE, {'state': 'started', 'session_id': session_id})
+        try:
+            while not self._stop_event.is_set():
+                frame_started = time.monotonic()
+                frame_cpu_start = time.thread_time()
+                if not self._process_frame(capture, session_id):
+                    print("ERROR: Camera read failed.")
+                    reason = 'capture_failed'
+                    break
+                self.frame_count += 1
+                self.duty_cycle.record_frame_cpu(time.thread_time() - frame_cpu_start)
+                if max_frames is not None and self.frame_count >= max_frames:
+                    reason = 'max_frames'
+                    break
+                remaining = self.duty_cycle.interval_ms / 1000.0 - (time.monotonic() - frame_started)
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+        except Exception as e:
+            print(f"❌ Exception in detection loop: {e}")
+            reason = 'error'
+        finally:
+            capture.release()
+            self.bus.publish(self.TOPIC_STATE, {'state': 'stopped', 'session_id': session_id, 'reason': reason})
+
+    def _process_frame(self, capture, session_id):
+        frame_id = tracer.begin_frame()
+        started = time.perf_counter()
+        with tracer.span('frame'):
+            with tracer.span('capture'):
+                ret, frame = capture.read(self._capture_buffer)
+            if not ret:
+                return False
+            if frame is not self._capture_buffer:
+                # Resolusi berbeda dari properti kamera: sesuaikan buffer sekali
+                self._resize_buffers(frame.shape)
+                self._capture_buffer = frame
+            if self.flip:
+                with tracer.span('flip'):
+                    frame = cv2.flip(frame, 1, dst=self._flip_buffer)
+            with tracer.span('detect'):
+                annotated_frame, detection_results = self.detector.detect(frame, out=self.frame_pool.acquire())
+
+            current_time = time.time()
+            with tracer.span('ocular'):
+                self.ocular.update(current_time, detection_results)
+            if self.harvester is not None:
+                with tracer.span('harvest'):
+                    self.harvester.offer(current_time, frame, detection_results, self.detector.last_yolo)
+            if self.thumbnails is not None:
+                with tracer.span('thumbnail'):
+                    self.thumbnails.offer(current_time, frame, detection_results)
+            with tracer.span('alert'):
+                alert_state = self.alert_engine.update(current_time, detection_results)
+
+            with tracer.span('publish'):
+                for event in alert_state.events:
+                    if event.kind == 'alarm_start':
+                        tracer.on_alarm(event.status_type)
+                    latitude, longitude = self.gps_tracker.get_location()
+                    self.bus.publish(self.TOPIC_ALERT, AlertMessage(session_id, event, latitude, longitude))
+
+                self.duty_cycle.update(current_time, detection_results['ear_status'], self.gps_tracker.get_speed_kmh())
+                self.bus.publish(self.TOPIC_FRAME, FrameResult(
+                    frame_id, current_time, annotated_frame, detection_results,
+                    alert_state.level, alert_state.status_type, alert_state.elapsed,
+                    alert_state.alarm_elapsed, self.duty_cycle.mode, (time.perf_counter() - started) * 1000.0,
+                ))
+        return True
@@ -0,0 +1,282 @@
+import os
+import time
+import threading
+
+from core.detector import DrowsinessDetector, resource_path
+from core.gps import GPS
+from core.track import TrackRecorder
+from core.duty_cycle import DutyCycleController
+from core.alarm_audio import AlarmAudioEngine
+from core.alert_engine import AlertEngine
+from core.status_feed import StatusFeedServer
+from core.event_bus import EventBus
+from core.evidence import EvidenceRecorder
+from core.harvester import HardExampleHarvester
+from core.pipeline import DetectionPipeline
+from core.session_metrics import SessionMetricsRecorder
+from core.thumbnails import ThumbnailRecorder
+from core.video_sources import open_capture
+from db import database
+
+# psutil opsional, hanya untuk laporan memori/CPU
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def process_usage():
+    """RSS (MB) dan total waktu CPU (detik) proses ini, atau (None, cpu) tanpa psutil."""
+    cpu = time.process_time()
+    if not PSUTIL_AVAILABLE:
+        return None, cpu
+    return psutil.Process().memory_info().rss / (1024 * 1024), cpu
+
+
+class DetectionService:
+    """
+    Layanan deteksi tanpa GUI (tanpa Qt). DetectionPipeline menerbitkan hasil ke EventBus;
+    database, alarm audio, dan StatusFeedServer berlangganan masing-masing sehingga
+    klien feed atau disk yang lambat tidak memperlambat deteksi.
+    Status dan event disiarkan melalui StatusFeedServer agar GUI atau klien lain
+    bisa menempel sebagai viewer.
+    """
+    STATUS_PUBLISH_INTERVAL_SECONDS = 0.2 # Laju maksimum pesan status (5 Hz); event dikirim segera
+    ALARM_SOUND_PATH = resource_path("assets/alarm.mp3")
+
+    def __init__(self, camera_source=0, feed_address=None, audio_device=None, gps=None,
+                 harvest_dir=None, harvest_quota_mb=None, live_view=None):
+        started = time.perf_counter()
+        self.camera_source = camera_source
+        self.loop_video = False # True: file video diputar berulang (uji soak)
+        self.video_speed = 1.0
+        self.detector = DrowsinessDetector(model_path='models/best.pt')
+        self.gps_tracker = gps or GPS()
+        self.alert_engine = AlertEngine()
+        self.duty_cycle = DutyCycleController()
+        self.alarm_audio = AlarmAudioEngine(self.ALARM_SOUND_PATH, device=audio_device)
+        self.feed = StatusFeedServer(feed_address)
+        self.bus = EventBus()
+        self.pipeline = DetectionPipeline(self.detector, self.bus, self.gps_tracker, self.alert_engine, self.duty_cycle)
+        if harvest_dir:
+            self.pipeline.harvester = HardExampleHarvester(
+                harvest_dir, self.detector.yolo.class_labels, self.detector.CONFIDENCE_THRESHOLDS, quota_mb=harvest_quota_mb
+            )
+        self.db_subscription = self.bus.subscribe(
+            'database', [DetectionPipeline.TOPIC_ALERT], callback=self._write_alert_event, maxsize=1024
+        )
+        self.audio_subscription = self.bus.subscribe(
+            'alarm-audio', [DetectionPipeline.TOPIC_FRAME], callback=self._drive_alarm_audio, policy='coalesce'
+        )
+        self.evidence = EvidenceRecorder()
+        self.evidence_subscription = self.bus.subscribe( # Frame FramePool disalin sebelum meninggalkan thread deteksi
+            'evidence-ring', [DetectionPipeline.TOPIC_FRAME], callback=self.evidence.on_frame, policy='coalesce',
+            copy_frames=True,
+        )
+        self.thumbnails = ThumbnailRecorder()
+        self.pipeline.thumbnails = self.thumbnails # Dipotong dari frame mentah di thread deteksi
+        self.feed_event_subscription = self.bus.subscribe(
+            'feed-events', [DetectionPipeline.TOPIC_ALERT], callback=self._publish_event, maxsize=1024
+        )
+        self.feed_status_subscription = self.bus.subscribe(
+            'feed-status', [DetectionPipeline.TOPIC_FRAME], callback=self._publish_status, policy='coalesce'
+        )
+        # Live view MJPEG/WebSocket opsional untuk pengawas depo (LiveViewServer yang belum dijalankan)
+        self.live_view = live_view
+        if self.live_view:
+            self.live_view.attach(self.bus, DetectionPipeline.TOPIC_FRAME, DetectionPipeline.TOPIC_ALERT)
+        self.current_session_id = None
+        self.journal = None
+        self.track_recorder = None
+        self.metrics_recorder = None
+        self.metrics_subscription = None
+        self.counts = {'microsleep': 0, 'drowsy': 0, 'yawn': 0}
+        self._stop_event = threading.Event()
+        self._last_status_publish = 0.0
+        self.startup_seconds = time.perf_counter() - started
+
+    # ------------------------------------------------------------------
+    # Siklus hidup
+    # ------------------------------------------------------------------
+
+    def stop(self):
+        """Meminta loop berhenti (aman dipanggil dari thread/sinyal lain)."""
+        self._stop_event.set()
+
+    def run(self, max_frames=None):
+        """Menjalankan loop deteksi hingga stop() dipanggil, kamera gagal, atau max_frames tercapai."""
+        try:
+            self.feed.start()
+        except OSError as e:
+            print(f"ERROR: Could not start status feed: {e}")
+            return False
+        if self.live_view:
+            self.live_view.start()
+        rss_mb, cpu = process_usage()
+        print(f"✅ Headless service ready in {self.startup_seconds:.1f}s"
+              + (f", RSS {rss_mb:.0f} MB" if rss_mb is not None else "") + f", CPU {cpu:.1f}s")
+        self.feed.publish({
+            'type': 'hello', 'pid': os.getpid(), 'startup_s': round(self.startup_seconds, 2),
+            'rss_mb': round(rss_mb, 1) if rss_mb is not None else None, 'cpu_s': round(cpu, 2),
+        })
+
+        capture = open_capture(self.camera_source, loop=self.loop_video, speed=self.video_speed)
+        if not capture.isOpened():
+            print(f"ERROR: Could not open camera {self.camera_source}.")
+            self.feed.stop()
+            if self.live_view:
+                self.live_view.stop()
+            return False
+
+        self._start_session()
+        try:
+            self.pipeline.start(capture, self.current_session_id, max_frames=max_frames)
+            while self.pipeline.is_running and not self._stop_event.is_set():
+                self._stop_event.wait(0.5)
+        finally:
+            self.pipeline.stop()
+            self._end_session()
+            self.evidence.close() # Klip yang masih antre di-encode dengan frame yang ada
+            self.thumbnails.close()
+            if self.pipeline.harvester:
+                self.pipeline.harvester.close()
+            self.alarm_audio.close()
+            self.feed.stop()
+            if self.live_view:
+                self.live_view.stop()
+        return True
+
+    @property
+    def frame_count(self):
+        return self.pipeline.frame_count
+
+    def _start_session(self):
+        for key in self.counts:
+            self.counts[key] = 0
+        # Journal dibuka sebelum sesi dibuat, agar sesi ini tidak ikut 'dipulihkan' saat dibuka
+        self.journal = database.open_session_journal()
+        self.current_session_id = database.start_new_session()
+        if self.journal:
+            self.journal.session_started(self.current_session_id)
+            self.gps_tracker.add_fix_listener(self._journal_progress)
+        self.track_recorder = TrackRecorder(self.current_session_id)
+        self.gps_tracker.add_fix_listener(self.track_recorder.add_fix)
+        self.metrics_recorder = SessionMetricsRecorder(self.current_session_id)
+        self.metrics_subscription = self.bus.subscribe(
+            'session-metrics', [DetectionPipeline.TOPIC_FRAME], callback=self.metrics_recorder.on_frame, maxsize=1024
+        )
+        self.gps_tracker.start()
+        self.feed.publish({'type': 'session', 'state': 'started', 'session_id': self.current_session_id})
+
+    def _end_session(self):
+        if self.current_session_id is None:
+            return
+        self.gps_tracker.stop()
+        # Tunggu pelanggan bus menyelesaikan antreannya sebelum sesi ditutup
+        for subscription in (self.db_subscription, self.audio_subscription, self.feed_event_subscription):
+            if not subscription.flush():
+                print(f"WARNING: Timed out flushing bus subscriber '{subscription.name}'.")
+        self.alarm_audio.stop()
+        self.bus.unsubscribe(self.metrics_subscription)
+        self.metrics_subscription = None
+        self.metrics_recorder.finish()
+        self.metrics_recorder = None
+        total_distance = self.gps_tracker.get_total_distance_km()
+        self.gps_tracker.remove_fix_listener(self.track_recorder.add_fix)
+        self.track_recorder.finish(incremental_distance_km=total_distance)
+        self.track_recorder = None
+        ocular_summary = self.pipeline.ocular.session_summary()
+        database.update_session_ocular_metrics(self.current_session_id, **ocular_summary)
+        database.end_session(self.current_session_id, total_distance)
+        if self.journal:
+            self.gps_tracker.remove_fix_listener(self._journal_progress)
+            self.journal.session_ended(self.current_session_id)
+            self.journal.close()
+            self.journal = None
+        self.feed.publish({
+            'type': 'session', 'state': 'ended', 'session_id': self.current_session_id,
+            'distance_km': round(total_distance, 3), 'counts': dict(self.counts),
+            'duty_cycle': self.duty_cycle.report(), 'alarm_latency': self.alarm_audio.latency_report(),
+            'bus': self.bus.stats(), 'ocular': ocular_summary, 'cascade': self.detector.cascade_report(),
+        })
+        self.current_session_id = None
+
+    # ------------------------------------------------------------------
+    # Pelanggan EventBus (masing-masing di thread bus sendiri)
+    # ------------------------------------------------------------------
+
+    def _write_alert_event(self, topic, message):
+        event = message.event
+        if event.kind != 'log' or message.session_id is None:
+            return
+        journal = self.journal
+        seq, timestamp = journal.event_pending(
+            message.session_id, event.status_type, message.latitude, message.longitude, event.info
+        ) if journal else (None, None)
+        log_id = database.log_detection_event(
+            message.session_id, event.status_type, message.latitude, message.longitude, info=event.info,
+            timestamp=timestamp, journal_seq=seq
+        )
+        database.update_session_counts(message.session_id, **{event.status_type: 1})
+        if journal:
+            journal.event_committed(seq, log_id)
+        self.counts[event.status_type] += 1
+        self.evidence.request_clip(
+            log_id, message.session_id, event.status_type, event.timestamp - event.elapsed, event.timestamp
+        )
+        self.thumbnails.request_thumbnail(log_id, message.session_id, event.status_type, event.timestamp)
+
+    def _journal_progress(self, fix):
+        """Listener fix GPS: jarak terakhir untuk menutup sesi bila proses mati."""
+        journal = self.journal
+        if journal and self.current_session_id is not None:
+            journal.session_progress(self.current_session_id, self.gps_tracker.get_total_distance_km())
+
+    def _drive_alarm_audio(self, topic, result):
+        if result.level == 'alarm':
+            if not self.alarm_audio.is_playing:
+                self.alarm_audio.play()
+            self.alarm_audio.escalate(result.alarm_elapsed)
+        elif self.alarm_audio.is_playing:
+            self.alarm_audio.stop()
+
+    def _publish_event(self, topic, message):
+        event = message.event
+        if event.kind == 'alarm_start':
+            print("🔊 Alarm triggered!")
+        elif event.kind == 'alarm_stop':
+            print("🔇 Alarm stopped.")
+        self.feed.publish({
+            'type': 'event', 'kind': event.kind, 'status_type': event.status_type,
+            't': event.timestamp, 'elapsed': round(event.elapsed, 2), 'info': event.info,
+            'latitude': message.latitude, 'longitude': message.longitude,
+        })
+
+    def _publish_status(self, topic, result):
+        if result.timestamp - self._last_status_publish < self.STATUS_PUBLISH_INTERVAL_SECONDS:
+            return
+        self._last_status_publish = result.timestamp
+        latitude, longitude = self.gps_tracker.get_location()
+        avg_ear = result.detection_results['avg_ear']
+        self.feed.publish({
+            'type': 'status',
+            't': result.timestamp,
+            'session_id': self.current_session_id,
+            'yolo_status': result.detection_results['yolo_status'],
+            'ear_status': result.detection_results['ear_status'],
+            'avg_ear': round(float(avg_ear), 3) if avg_ear is not None else None,
+            'perclos_1m': result.detection_results.get('perclos_1m'),
+            'perclos_3m': result.detection_results.get('perclos_3m'),
+            'blink_rate': result.detection_results.get('blink_rate'),
+            'level': result.level,
+            'status_type': result.status_type,
+            'elapsed': round(result.elapsed, 1),
+            'counts': dict(self.counts),
+            'distance_km': round(self.gps_tracker.get_total_distance_km(), 3),
+            'latitude': latitude,
+            'longitude': longitude,
+            'speed_kmh': self.gps_tracker.get_speed_kmh(),
+            'duty_mode': result.duty_mode,
+            'frames': self.pipeline.frame_count,
+        })
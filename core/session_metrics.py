@@ -0,0 +1,96 @@
+from db import database
+
+
+class _Bucket:
+    """Akumulator satu bucket waktu: EAR min/maks, PERCLOS maksimum, jumlah sampel."""
+    __slots__ = ('key', 'ear_min', 'ear_max', 'perclos', 'samples')
+
+    def __init__(self):
+        self.key = None
+        self.clear()
+
+    def clear(self):
+        self.ear_min = None
+        self.ear_max = None
+        self.perclos = None
+        self.samples = 0
+
+    def add(self, ear_min, ear_max, perclos, samples=1):
+        if ear_min is not None and (self.ear_min is None or ear_min < self.ear_min):
+            self.ear_min = ear_min
+        if ear_max is not None and (self.ear_max is None or ear_max > self.ear_max):
+            self.ear_max = ear_max
+        if perclos is not None and (self.perclos is None or perclos > self.perclos):
+            self.perclos = perclos
+        self.samples += samples
+
+
+class SessionMetricsRecorder:
+    """
+    Pelanggan EventBus yang merekam deret waktu EAR & PERCLOS satu sesi untuk grafik riwayat.
+
+    Frame digabung ke bucket 1/SAMPLE_HZ detik (EAR minimum & maksimum, sehingga kedipan tetap
+    terlihat saat diperkecil, dan PERCLOS 1 menit), lalu ditulis per batch ke session_metric.
+    Sekaligus dibuat rollup per database.METRIC_ROLLUP_SECONDS (session_metric_rollup), sehingga
+    grafik seluruh sesi 12 jam tidak perlu memindai ~430 ribu baris mentah.
+    """
+    SAMPLE_HZ = 10
+    FLUSH_ROWS = 50 # ~5 detik per batch tulis
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self._raw = _Bucket()
+        self._rollups = [(level, _Bucket()) for level in database.METRIC_ROLLUP_SECONDS]
+        self._pending = []
+        self._pending_rollups = []
+        self.rows_written = 0
+
+    def on_frame(self, topic, result):
+        """Callback bus untuk FrameResult (hanya timestamp & detection_results yang dibaca)."""
+        key = int(result.timestamp * self.SAMPLE_HZ)
+        if key != self._raw.key:
+            self._close_raw()
+            self._raw.key = key
+        ear = result.detection_results.get('avg_ear')
+        perclos = result.detection_results.get('perclos_1m')
+        self._raw.add(ear, ear, perclos)
+
+    def _close_raw(self):
+        raw = self._raw
+        if raw.key is None:
+            return
+        t = raw.key / self.SAMPLE_HZ
+        self._pending.append((self.session_id, t, raw.ear_min, raw.ear_max, raw.perclos))
+        for level, bucket in self._rollups:
+            key = int(t // level)
+            if key != bucket.key:
+                self._close_rollup(level, bucket)
+                bucket.key = key
+            bucket.add(raw.ear_min, raw.ear_max, raw.perclos)
+        raw.clear()
+        if len(self._pending) >= self.FLUSH_ROWS:
+            self.flush()
+
+    def _close_rollup(self, level, bucket):
+        if bucket.key is None:
+            return
+        self._pending_rollups.append((
+            self.session_id, level, bucket.key * level, bucket.ear_min, bucket.ear_max, bucket.perclos, bucket.samples
+        ))
+        bucket.clear()
+
+    def flush(self):
+        if self._pending or self._pending_rollups:
+            database.insert_session_metrics(self._pending, self._pending_rollups)
+            self.rows_written += len(self._pending)
+            self._pending = []
+            self._pending_rollups = []
+
+    def finish(self):
+        """Menutup bucket terakhir dan menulis sisa baris (setelah langganan bus dilepas)."""
+        self._close_raw()
+        self._raw.key = None
+        for level, bucket in self._rollups:
+            self._close_rollup(level, bucket)
+            bucket.key = None
+        self.flush()
@@ -0,0 +1,192 @@
+import errno
+import json
+import os
+import socket
+import threading
+from collections import deque
+
+DEFAULT_TCP_ADDRESS = "tcp:127.0.0.1:8765"
+DEFAULT_UNIX_ADDRESS = "unix:/tmp/drowsiness_service.sock"
+
+
+def default_feed_address():
+    """Unix domain socket jika didukung OS, selain itu TCP localhost."""
+    return DEFAULT_UNIX_ADDRESS if hasattr(socket, 'AF_UNIX') and os.name != 'nt' else DEFAULT_TCP_ADDRESS
+
+
+def _parse_address(address: str):
+    """'unix:/path/to.sock' atau 'tcp:host:port' -> (family, sockaddr)."""
+    kind, _, rest = address.partition(':')
+    if kind == 'unix':
+        return socket.AF_UNIX, rest
+    if kind == 'tcp':
+        host, _, port = rest.rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unknown feed address: {address}")
+
+
+class _FeedClient:
+    """Satu klien yang terhubung. Pesan diantrekan dan dikirim oleh thread milik klien sendiri."""
+    MAX_QUEUE = 256
+
+    def __init__(self, sock, on_close):
+        self.sock = sock
+        self._queue = deque(maxlen=self.MAX_QUEUE) # Pesan tertua dibuang jika klien lambat
+        self._cond = threading.Condition()
+        self._closed = False
+        self._on_close = on_close
+        self.dropped = 0
+        threading.Thread(target=self._send_loop, name="feed-client", daemon=True).start()
+
+    def enqueue(self, payload: bytes):
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(payload)
+            self._cond.notify()
+
+    def _send_loop(self):
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    payload = self._queue.popleft()
+                self.sock.sendall(payload)
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        self._on_close(self)
+
+
+class StatusFeedServer:
+    """
+    Menyiarkan status dan event layanan deteksi sebagai JSON Lines melalui
+    Unix domain socket atau TCP localhost. publish() tidak pernah memblokir:
+    setiap klien punya antrean terbatas dan thread pengirim sendiri.
+    """
+
+    def __init__(self, address: str = None):
+        self.address = address or default_feed_address()
+        self._family, self._sockaddr = _parse_address(self.address)
+        self._server_sock = None
+        self._clients = []
+        self._lock = threading.Lock()
+        self._latest = {} # Pesan terakhir per tipe, dikirim ke klien yang baru terhubung
+        self.is_running = False
+
+    def start(self):
+        """Mulai mendengarkan. OSError (EADDRINUSE) bila alamat dipakai layanan lain yang masih berjalan."""
+        if self._family == socket.AF_UNIX and os.path.exists(self._sockaddr):
+            if self._socket_alive():
+                raise OSError(errno.EADDRINUSE, f"Status feed {self.address} is in use by another running service")
+            os.remove(self._sockaddr) # Sisa socket dari proses sebelumnya yang tidak berhenti dengan bersih
+        self._server_sock = socket.socket(self._family, socket.SOCK_STREAM)
+        if self._family == socket.AF_INET:
+            self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_sock.bind(self._sockaddr)
+        self._server_sock.listen()
+        self.is_running = True
+        threading.Thread(target=self._accept_loop, name="feed-accept", daemon=True).start()
+        print(f"📢 Status feed listening on {self.address}")
+
+    def _socket_alive(self):
+        """True bila ada proses yang menerima koneksi di path Unix socket ini."""
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.settimeout(1.0)
+        try:
+            probe.connect(self._sockaddr)
+            return True
+        except OSError:
+            return False # ECONNREFUSED/ENOENT: socket basi
+        finally:
+            probe.close()
+
+    def stop(self):
+        self.is_running = False
+        owned = self._server_sock is not None # Jangan hapus socket milik layanan lain bila start() gagal
+        if self._server_sock:
+            self._server_sock.close()
+            self._server_sock = None
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.close()
+        if owned and self._family == socket.AF_UNIX and os.path.exists(self._sockaddr):
+            os.remove(self._sockaddr)
+
+    @property
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def _accept_loop(self):
+        while self.is_running:
+            try:
+                sock, _ = self._server_sock.accept()
+            except OSError:
+                return
+            client = _FeedClient(sock, self._remove_client)
+            with self._lock:
+                self._clients.append(client)
+                latest = list(self._latest.values())
+            for payload in latest:
+                client.enqueue(payload)
+
+    def _remove_client(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def publish(self, message: dict):
+        payload = (json.dumps(message, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+        with self._lock:
+            if message.get('type') in ('hello', 'status', 'session'):
+                self._latest[message['type']] = payload
+            clients = list(self._clients)
+        for client in clients:
+            client.enqueue(payload)
+
+
+class StatusFeedClient:
+    """Klien ringan untuk feed status (dipakai viewer GUI atau skrip lain)."""
+
+    def __init__(self, address: str = None, timeout: float = 5.0):
+        self.address = address or default_feed_address()
+        family, sockaddr = _parse_address(self.address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(sockaddr)
+        self._sock.settimeout(None)
+        self._stream = self._sock.makefile('r', encoding='utf-8')
+
+    def messages(self):
+        """Generator pesan (dict) hingga koneksi ditutup."""
+        try:
+            for line in self._stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        except (OSError, ValueError):
+            return
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from core.evidence import FrameRingBuffer
+from db import database
+
+_ThumbnailRequest = namedtuple('_ThumbnailRequest', ['log_id', 'session_id', 'status_type', 'logged_ts', 'deadline'])
+
+
+class ThumbnailRecorder:
+    """
+    Thumbnail wajah (JPEG kecil) untuk setiap kejadian microsleep/drowsy/yawn, agar alarm palsu dapat ditinjau.
+
+    offer (dipanggil DetectionPipeline dengan frame kamera mentah, tanpa anotasi) memotong kotak wajah
+    persegi dari detection_results['face_box'] (atau bagian tengah frame bila tidak ada wajah) dan
+    menyalinnya ke FrameRingBuffer kecil berukuran SIZE x SIZE, maksimal CAPTURE_FPS kali per detik.
+    Setelah event dicatat, request_thumbnail() mengantrekan permintaan; thread latar memilih potongan
+    yang paling dekat dengan waktu event, meng-encode JPEG, dan menyimpannya di tabel event_thumbnail.
+    """
+    STATUS_TYPES = ('microsleep', 'drowsy', 'yawn')
+    SIZE = 112
+    CAPTURE_FPS = 10
+    RING_SECONDS = 3.0
+    FACE_MARGIN = 0.2 # Tambahan di setiap sisi kotak wajah, relatif terhadap sisi terpanjang
+    JPEG_QUALITY = 80
+    WAIT_SECONDS = 0.5 # Batas tunggu potongan frame event bila frame itu belum masuk ring
+    MAX_PENDING = 32
+
+    def __init__(self):
+        self.ring = FrameRingBuffer(self.RING_SECONDS, self.CAPTURE_FPS, self.SIZE, self.SIZE)
+        self._scratch = np.empty((self.SIZE, self.SIZE, 3), dtype=np.uint8)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closing = False
+        self.thumbnails_written = 0
+        self.thumbnails_dropped = 0
+        self.bytes_written = 0
+        self._thread = threading.Thread(target=self._run, name="thumbnail-encoder", daemon=True)
+        self._thread.start()
+
+    def offer(self, timestamp, frame, detection_results):
+        """
+        Dipanggil per frame dari thread deteksi dengan frame mentah (buffer capture yang dipakai ulang):
+        potongan wajah langsung disalin ke ring. Dilewati di antara slot CAPTURE_FPS.
+        """
+        if self.ring.latest_timestamp is not None and timestamp - self.ring.latest_timestamp < self.ring.min_interval:
+            return
+        self.ring.push(self._crop(frame, detection_results.get('face_box')), timestamp)
+
+    def _crop(self, frame, face_box):
+        """View persegi di sekitar wajah (tanpa salinan); resize ke SIZE dilakukan FrameRingBuffer.push."""
+        h, w = frame.shape[:2]
+        if face_box is None:
+            side = min(h, w)
+            cx, cy = w // 2, h // 2
+        else:
+            x1, y1, x2, y2 = face_box
+            side = int(max(x2 - x1, y2 - y1) * (1 + 2 * self.FACE_MARGIN))
+            side = max(16, min(side, h, w))
+            cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+        left = min(max(cx - side // 2, 0), w - side)
+        top = min(max(cy - side // 2, 0), h - side)
+        return frame[top:top + side, left:left + side]
+
+    def request_thumbnail(self, log_id, session_id, status_type, logged_ts):
+        """Mengantrekan thumbnail untuk baris detection_log yang baru dicatat (tidak memblokir)."""
+        if log_id is None or status_type not in self.STATUS_TYPES:
+            return
+        request = _ThumbnailRequest(log_id, session_id, status_type, logged_ts, time.time() + self.WAIT_SECONDS)
+        with self._cond:
+            if len(self._pending) >= self.MAX_PENDING:
+                dropped = self._pending.popleft()
+                self.thumbnails_dropped += 1
+                print(f"WARNING: Thumbnail queue full, dropping thumbnail for log {dropped.log_id}.")
+            self._pending.append(request)
+            self._cond.notify()
+
+    def flush(self, timeout=5.0):
+        """Menunggu semua thumbnail tertunda tersimpan. True jika berhasil."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout=5.0):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _ready(self, request):
+        latest = self.ring.latest_timestamp
+        return (latest is not None and latest >= request.logged_ts) or time.time() >= request.deadline
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending:
+                        # Frame event dipotong oleh thread deteksi; tunggu sebentar hingga masuk ring
+                        if self._closing or self._ready(self._pending[0]):
+                            break
+                        self._cond.wait(0.05)
+                    elif self._closing:
+                        return
+                    else:
+                        self._cond.wait()
+                request = self._pending.popleft()
+                self._busy = True
+            try:
+                self._encode(request)
+            except Exception as e:
+                print(f"❌ Failed to store thumbnail for log {request.log_id}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _encode(self, request):
+        seqs, timestamps = self.ring.frames_between(request.logged_ts - self.RING_SECONDS, request.logged_ts + self.WAIT_SECONDS)
+        # Potongan terdekat dengan waktu event; yang sudah tertimpa dilewati
+        for i in np.argsort(np.abs(timestamps - request.logged_ts)):
+            if self.ring.copy_frame(int(seqs[i]), self._scratch):
+                break
+        else:
+            print(f"WARNING: No buffered frame for thumbnail of log {request.log_id}.")
+            return
+        ok, jpeg = cv2.imencode('.jpg', self._scratch, [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY])
+        if not ok:
+            print(f"ERROR: Could not encode thumbnail for log {request.log_id}.")
+            return
+        database.insert_event_thumbnail(
+            request.log_id, request.session_id, float(timestamps[i]), self.SIZE, self.SIZE, jpeg.tobytes()
+        )
+        self.thumbnails_written += 1
+        self.bytes_written += len(jpeg)
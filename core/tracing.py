@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class _NullSpan:
+    """Context manager kosong yang dipakai saat tracing nonaktif (tanpa alokasi)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start_us')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start_us = time.perf_counter_ns() // 1000
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_us = time.perf_counter_ns() // 1000
+        self.tracer._record({
+            'name': self.name, 'ph': 'X', 'ts': self.start_us, 'dur': end_us - self.start_us,
+            'pid': self.tracer.pid, 'tid': threading.get_ident(),
+            'args': dict(self.args, frame=self.tracer.frame_id) if self.args else {'frame': self.tracer.frame_id},
+        })
+        return False
+
+
+class FrameTracer:
+    """
+    Tracing latensi per frame dalam format Chrome trace-event (chrome://tracing, Perfetto).
+    Event disimpan di ring buffer berkapasitas tetap dan ditulis ke file JSON saat dump()
+    dipanggil, atau otomatis saat alarm berbunyi (auto_dump_on_alarm).
+    Saat nonaktif, span() mengembalikan context manager kosong sehingga overhead-nya nyaris nol.
+    """
+    DEFAULT_CAPACITY = 50000 # ~ beberapa ribu frame dengan 8-10 span per frame
+    AUTO_DUMP_MIN_INTERVAL_SECONDS = 10.0
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, output_dir='traces'):
+        self.enabled = False
+        self.auto_dump_on_alarm = True
+        self.output_dir = output_dir
+        self.pid = os.getpid()
+        self.frame_id = 0
+        self._events = deque(maxlen=capacity)
+        self._thread_names = {}
+        self._last_auto_dump = 0.0
+
+    def enable(self, output_dir=None):
+        if output_dir:
+            self.output_dir = output_dir
+        self.enabled = True
+        print(f"⏱️ Frame tracing enabled (dump dir: {self.output_dir})")
+
+    def disable(self):
+        self.enabled = False
+
+    def begin_frame(self):
+        """Menaikkan nomor frame; dipanggil sekali di awal setiap frame."""
+        if self.enabled:
+            self.frame_id += 1
+        return self.frame_id
+
+    def span(self, name, **args):
+        """Context manager yang mencatat durasi blok sebagai complete event ('X')."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def instant(self, name, **args):
+        """Event sesaat ('i'), mis. alarm_start."""
+        if not self.enabled:
+            return
+        args['frame'] = self.frame_id
+        self._record({
+            'name': name, 'ph': 'i', 's': 'g', 'ts': time.perf_counter_ns() // 1000,
+            'pid': self.pid, 'tid': threading.get_ident(), 'args': args,
+        })
+
+    def _record(self, event):
+        tid = event['tid']
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._events.append(event)
+
+    def snapshot(self):
+        """Salinan isi ring buffer beserta metadata nama thread."""
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        return metadata + list(self._events)
+
+    def dump(self, path=None, reason='manual', background=True):
+        """
+        Menulis isi ring buffer ke file trace JSON. Penulisan dilakukan di thread latar
+        (background=True) agar loop deteksi tidak tertahan. Mengembalikan path file.
+        """
+        events = self.snapshot()
+        if path is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            path = os.path.join(self.output_dir, f"trace_{stamp}_{reason}.json")
+
+        def write():
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            print(f"⏱️ Trace dumped ({reason}): {path} [{len(events)} events]")
+
+        if background:
+            threading.Thread(target=write, name="trace-dump", daemon=True).start()
+        else:
+            write()
+        return path
+
+    def on_alarm(self, status_type=None):
+        """Dipanggil saat alarm dimulai: tandai event dan dump otomatis (dibatasi frekuensinya)."""
+        if not self.enabled:
+            return None
+        self.instant('alarm_start', status_type=status_type)
+        now = time.monotonic()
+        if self.auto_dump_on_alarm and now - self._last_auto_dump >= self.AUTO_DUMP_MIN_INTERVAL_SECONDS:
+            self._last_auto_dump = now
+            return self.dump(reason=f"alarm_{status_type}" if status_type else 'alarm')
+        return None
+
+
+# Tracer bersama untuk seluruh pipeline (capture, detector, alert, database, tampilan)
+tracer = FrameTracer()
@@ -0,0 +1,154 @@
+import threading
+from array import array
+
+import numpy as np
+
+from db import database
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_track_km(latitudes: np.ndarray, longitudes: np.ndarray) -> float:
+    """Total jarak (km) sepanjang jejak, dihitung tervektorisasi untuk semua segmen sekaligus."""
+    if len(latitudes) < 2:
+        return 0.0
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    dlat = np.diff(lat)
+    dlon = np.diff(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return float(np.sum(EARTH_RADIUS_KM * c))
+
+
+def douglas_peucker(latitudes: np.ndarray, longitudes: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """
+    Penyederhanaan polyline Douglas-Peucker (iteratif, tanpa rekursi).
+    Koordinat diproyeksikan equirectangular ke meter di sekitar lintang rata-rata.
+    Mengembalikan mask boolean titik yang dipertahankan.
+    """
+    n = len(latitudes)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if n < 3:
+        return keep
+
+    lat0 = np.radians(np.mean(latitudes))
+    y = np.radians(latitudes) * EARTH_RADIUS_KM * 1000.0
+    x = np.radians(longitudes) * EARTH_RADIUS_KM * 1000.0 * np.cos(lat0)
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        px = x[start + 1:end] - x[start]
+        py = y[start + 1:end] - y[start]
+        seg_len = np.hypot(dx, dy)
+        if seg_len == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / seg_len
+        idx = int(np.argmax(distances))
+        if distances[idx] > tolerance_m:
+            split = start + 1 + idx
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def load_track(session_id: int):
+    """Memuat jejak sesi dari database sebagai tuple array numpy (timestamps, latitudes, longitudes)."""
+    chunks = database.fetch_track_chunks(session_id)
+    if not chunks:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty.copy(), empty.copy()
+    return (
+        np.concatenate([np.frombuffer(c['timestamps'], dtype=np.float64) for c in chunks]),
+        np.concatenate([np.frombuffer(c['latitudes'], dtype=np.float64) for c in chunks]),
+        np.concatenate([np.frombuffer(c['longitudes'], dtype=np.float64) for c in chunks]),
+    )
+
+
+class TrackRecorder:
+    """
+    Merekam setiap fix GPS yang diterima ke jejak per sesi.
+    Titik ditampung dalam array float64 ringkas dan ditulis ke database per batch.
+    """
+    FLUSH_BATCH_SIZE = 120         # Titik per batch (2 menit pada 1 Hz)
+    SIMPLIFY_TOLERANCE_M = 5.0     # Toleransi Douglas-Peucker saat sesi berakhir
+    DISTANCE_MISMATCH_TOLERANCE = 0.01 # Selisih relatif maksimum terhadap jarak inkremental
+
+    def __init__(self, session_id: int):
+        self.session_id = session_id
+        self.point_count = 0
+        self._lock = threading.Lock()
+        self._chunk_index = 0
+        self._new_buffers()
+
+    def _new_buffers(self):
+        self._timestamps = array('d')
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+
+    def add_fix(self, fix):
+        """Callback untuk GPS.add_fix_listener."""
+        with self._lock:
+            self._timestamps.append(fix.timestamp)
+            self._latitudes.append(fix.latitude)
+            self._longitudes.append(fix.longitude)
+            self.point_count += 1
+            should_flush = len(self._timestamps) >= self.FLUSH_BATCH_SIZE
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Menulis titik yang masih di buffer sebagai satu batch."""
+        with self._lock:
+            if not self._timestamps:
+                return
+            timestamps, latitudes, longitudes = self._timestamps, self._latitudes, self._longitudes
+            chunk_index = self._chunk_index
+            self._chunk_index += 1
+            self._new_buffers()
+        database.insert_track_chunk(
+            self.session_id, chunk_index, len(timestamps),
+            timestamps.tobytes(), latitudes.tobytes(), longitudes.tobytes()
+        )
+
+    def finish(self, incremental_distance_km: float = None):
+        """
+        Dipanggil saat sesi berakhir: flush sisa buffer, hitung ulang jarak dari jejak penuh,
+        lalu simpan jejak yang sudah disederhanakan. Mengembalikan ringkasan dalam dict.
+        """
+        self.flush()
+        timestamps, latitudes, longitudes = load_track(self.session_id)
+        track_distance_km = haversine_track_km(latitudes, longitudes)
+
+        keep = douglas_peucker(latitudes, longitudes, self.SIMPLIFY_TOLERANCE_M)
+        simplified_count = int(np.count_nonzero(keep))
+        if len(timestamps):
+            database.replace_track(
+                self.session_id, simplified_count,
+                timestamps[keep].tobytes(), latitudes[keep].tobytes(), longitudes[keep].tobytes(),
+                track_distance_km
+            )
+
+        summary = {
+            'point_count': len(timestamps),
+            'simplified_point_count': simplified_count,
+            'track_distance_km': track_distance_km,
+        }
+        print(f"🗺️ Track saved: {len(timestamps)} -> {simplified_count} points, {track_distance_km:.3f} km")
+
+        if incremental_distance_km is not None:
+            summary['incremental_distance_km'] = incremental_distance_km
+            difference = abs(track_distance_km - incremental_distance_km)
+            if difference > self.DISTANCE_MISMATCH_TOLERANCE * max(incremental_distance_km, 1e-9) and difference > 1e-6:
+                print(f" Distance mismatch: track {track_distance_km:.3f} km vs incremental {incremental_distance_km:.3f} km")
+        return summary
@@ -0,0 +1,67 @@
+import time
+
+import cv2
+
+
+class LoopingVideoCapture:
+    """
+    Pengganti cv2.VideoCapture untuk file video yang diputar berulang tanpa akhir
+    (uji soak tanpa kamera). speed = faktor laju terhadap FPS file (1.0 = real time,
+    0 = secepat mungkin). read(image) menulis ke buffer yang diberikan seperti cv2.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self._capture = cv2.VideoCapture(path)
+        fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.loops = 0
+        self.frames_read = 0
+        self._started = None
+
+    def isOpened(self):
+        return self._capture.isOpened()
+
+    def get(self, prop):
+        return self._capture.get(prop)
+
+    def read(self, image=None):
+        ret, frame = self._capture.read(image)
+        if not ret:
+            # Akhir file: kembali ke awal
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.loops += 1
+            ret, frame = self._capture.read(image)
+            if not ret:
+                return False, None
+        self._pace()
+        self.frames_read += 1
+        return True, frame
+
+    def _pace(self):
+        """Menahan laju baca agar tidak melebihi FPS file x speed."""
+        if self.speed <= 0:
+            return
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+            return
+        due = self._started + self.frames_read / (self.fps * self.speed)
+        if due > now:
+            time.sleep(due - now)
+
+    def release(self):
+        self._capture.release()
+
+
+def open_capture(source=0, loop=False, speed=1.0):
+    """
+    Membuka sumber video untuk DetectionPipeline: index kamera (int atau string angka),
+    atau path/URL video. loop=True memutar file berulang (LoopingVideoCapture).
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return cv2.VideoCapture(int(source))
+    if loop:
+        return LoopingVideoCapture(source, speed=speed)
+    return cv2.VideoCapture(source)
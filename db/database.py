@@ -1,10 +1,13 @@
 import sqlite3
 import os # Tambahkan impor os
 import sys # Tambahkan impor sys
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import List, Tuple, Optional
 
+from db.journal import JournalLock, SessionJournal, read_journal
+
 # Fungsi pembantu untuk mendapatkan path aset/data di lingkungan PyInstaller
 def get_resource_path(relative_path: str) -> Path:
     """
@@ -27,8 +30,21 @@ def get_resource_path(relative_path: str) -> Path:
         db_folder.mkdir(parents=True, exist_ok=True)
         return db_folder / relative_path
 
-# Gunakan fungsi get_resource_path untuk menentukan DB_PATH
-DB_PATH = get_resource_path("detection_history.db")
+# Gunakan fungsi get_resource_path untuk menentukan DB_PATH.
+# Variabel lingkungan DETECTION_DB_PATH dapat menimpanya (benchmark, pengujian, unit tanpa GUI).
+DB_PATH = Path(os.environ['DETECTION_DB_PATH']) if os.environ.get('DETECTION_DB_PATH') else get_resource_path("detection_history.db")
+# Journal sesi aktif (lihat db/journal.py), diputar ulang oleh init_db setelah crash
+JOURNAL_PATH = f"{DB_PATH}.journal"
+
+# Ukuran sel hotspot: satu tile peta (256 px) pada zoom z dibagi menjadi HOTSPOT_CELLS_PER_TILE sel
+HOTSPOT_CELLS_PER_TILE = 8
+# Level zoom yang agregatnya dipelihara oleh trigger (detection_hotspot_grid).
+# Zoom <= level digabung dari grid level tersebut; zoom di atas level tertinggi memakai R*Tree.
+HOTSPOT_GRID_LEVELS = (6, 9, 12)
+
+# Lebar bucket rollup deret waktu sesi (detik). Query grafik memakai level terkasar yang
+# masih lebih halus dari satu piksel, atau baris mentah session_metric bila tidak ada.
+METRIC_ROLLUP_SECONDS = (1, 10, 60)
 
 # --- MODIFIKASI BERAKHIR DI SINI ---
 
@@ -43,6 +59,9 @@ def init_db():
     """Membuat tabel jika belum ada."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        # WAL (tersimpan di file database): pembaca panjang seperti agen sinkronisasi armada tidak
+        # memblokir penulisan kejadian/GPS, dan penulis tidak memblokir pembaca
+        cursor.execute('PRAGMA journal_mode=WAL')
         # Tabel untuk ringkasan setiap sesi perjalanan
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS session_summary (
@@ -71,8 +90,217 @@ def init_db():
                 FOREIGN KEY (session_id) REFERENCES session_summary (session_id)
             )
         ''')
+        # Detail sesi (fetch_logs_for_session) membaca log satu sesi urut waktu; tanpa indeks ini
+        # setiap pembukaan detail memindai seluruh detection_log (bertambah linear dengan riwayat)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS detection_log_session_idx ON detection_log (session_id, timestamp)
+        ''')
+        # Tabel untuk jejak GPS per sesi, disimpan per batch sebagai array float64 (BLOB)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS gps_track (
+                session_id INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                point_count INTEGER NOT NULL,
+                simplified INTEGER NOT NULL DEFAULT 0, -- 1 jika sudah disederhanakan (Douglas-Peucker)
+                timestamps BLOB NOT NULL,
+                latitudes BLOB NOT NULL,
+                longitudes BLOB NOT NULL,
+                PRIMARY KEY (session_id, chunk_index),
+                FOREIGN KEY (session_id) REFERENCES session_summary (session_id)
+            )
+        ''')
+        # Klip video bukti di sekitar kejadian, satu per baris detection_log
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS evidence_clip (
+                log_id INTEGER PRIMARY KEY,
+                session_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                start_time REAL NOT NULL, -- epoch detik frame pertama
+                end_time REAL NOT NULL,
+                frame_count INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                FOREIGN KEY (log_id) REFERENCES detection_log (log_id)
+            )
+        ''')
+        # Thumbnail wajah (JPEG) saat kejadian dicatat, satu per baris detection_log
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS event_thumbnail (
+                log_id INTEGER PRIMARY KEY,
+                session_id INTEGER NOT NULL,
+                captured_at REAL NOT NULL, -- epoch detik frame sumber
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                jpeg BLOB NOT NULL,
+                FOREIGN KEY (log_id) REFERENCES detection_log (log_id)
+            )
+        ''')
+        # Deret waktu per sesi untuk grafik riwayat: satu baris per bucket SessionMetricsRecorder (100 ms)
+        # dengan EAR minimum & maksimum (kedipan tetap terlihat) dan PERCLOS 1 menit.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_metric (
+                session_id INTEGER NOT NULL,
+                t REAL NOT NULL, -- epoch detik awal bucket
+                ear_min REAL, -- NULL jika wajah tidak terdeteksi
+                ear_max REAL,
+                perclos REAL,
+                PRIMARY KEY (session_id, t),
+                FOREIGN KEY (session_id) REFERENCES session_summary (session_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_metric_rollup (
+                session_id INTEGER NOT NULL,
+                level INTEGER NOT NULL, -- lebar bucket (detik), lihat METRIC_ROLLUP_SECONDS
+                t REAL NOT NULL,
+                ear_min REAL,
+                ear_max REAL,
+                perclos REAL,
+                samples INTEGER NOT NULL, -- jumlah baris session_metric yang digabung
+                PRIMARY KEY (session_id, level, t)
+            ) WITHOUT ROWID
+        ''')
+        # Indeks spasial R*Tree untuk lokasi kejadian. Kolom tambahan (+status_type)
+        # disimpan di dalam indeks agar query hotspot tidak perlu join ke detection_log.
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS detection_log_rtree USING rtree(
+                log_id, min_lat, max_lat, min_lon, max_lon, +status_type
+            )
+        ''')
+        # Trigger menjaga indeks tetap sinkron saat insert/delete. Lokasi 0,0 (belum ada fix) diabaikan.
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS detection_log_rtree_insert
+            AFTER INSERT ON detection_log
+            WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+                 AND NOT (NEW.latitude = 0 AND NEW.longitude = 0)
+            BEGIN
+                INSERT INTO detection_log_rtree (log_id, min_lat, max_lat, min_lon, max_lon, status_type)
+                VALUES (NEW.log_id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude, NEW.status_type);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS detection_log_rtree_delete
+            AFTER DELETE ON detection_log
+            BEGIN
+                DELETE FROM detection_log_rtree WHERE log_id = OLD.log_id;
+            END
+        ''')
+        # Agregat hitungan per sel grid untuk zoom rendah, agar query area luas tidak
+        # perlu menelusuri jutaan titik di R*Tree.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detection_hotspot_grid'")
+        grid_exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS detection_hotspot_grid (
+                level INTEGER NOT NULL,
+                cell_y INTEGER NOT NULL,
+                cell_x INTEGER NOT NULL,
+                status_type TEXT NOT NULL,
+                event_count INTEGER NOT NULL,
+                sum_lat REAL NOT NULL,
+                sum_lon REAL NOT NULL,
+                PRIMARY KEY (level, cell_y, cell_x, status_type)
+            ) WITHOUT ROWID
+        ''')
+        for level in HOTSPOT_GRID_LEVELS:
+            cell = hotspot_cell_size_deg(level)
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS detection_hotspot_grid_insert_{level}
+                AFTER INSERT ON detection_log
+                WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+                     AND NOT (NEW.latitude = 0 AND NEW.longitude = 0)
+                BEGIN
+                    INSERT INTO detection_hotspot_grid (level, cell_y, cell_x, status_type, event_count, sum_lat, sum_lon)
+                    VALUES (
+                        {level},
+                        CAST((NEW.latitude + 90.0) / {cell!r} AS INTEGER),
+                        CAST((NEW.longitude + 180.0) / {cell!r} AS INTEGER),
+                        NEW.status_type, 1, NEW.latitude, NEW.longitude
+                    )
+                    ON CONFLICT (level, cell_y, cell_x, status_type) DO UPDATE SET
+                        event_count = event_count + 1,
+                        sum_lat = sum_lat + excluded.sum_lat,
+                        sum_lon = sum_lon + excluded.sum_lon;
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS detection_hotspot_grid_delete_{level}
+                AFTER DELETE ON detection_log
+                WHEN OLD.latitude IS NOT NULL AND OLD.longitude IS NOT NULL
+                     AND NOT (OLD.latitude = 0 AND OLD.longitude = 0)
+                BEGIN
+                    UPDATE detection_hotspot_grid SET
+                        event_count = event_count - 1,
+                        sum_lat = sum_lat - OLD.latitude,
+                        sum_lon = sum_lon - OLD.longitude
+                    WHERE level = {level}
+                      AND cell_y = CAST((OLD.latitude + 90.0) / {cell!r} AS INTEGER)
+                      AND cell_x = CAST((OLD.longitude + 180.0) / {cell!r} AS INTEGER)
+                      AND status_type = OLD.status_type;
+                END
+            ''')
+            if not grid_exists:
+                cursor.execute(f'''
+                    INSERT INTO detection_hotspot_grid (level, cell_y, cell_x, status_type, event_count, sum_lat, sum_lon)
+                    SELECT {level},
+                           CAST((latitude + 90.0) / {cell!r} AS INTEGER) AS cy,
+                           CAST((longitude + 180.0) / {cell!r} AS INTEGER) AS cx,
+                           status_type, COUNT(*), SUM(latitude), SUM(longitude)
+                    FROM detection_log
+                    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                      AND NOT (latitude = 0 AND longitude = 0)
+                    GROUP BY cy, cx, status_type
+                ''')
+        # Isi indeks untuk baris lama yang dibuat sebelum indeks ada
+        cursor.execute('''
+            INSERT INTO detection_log_rtree (log_id, min_lat, max_lat, min_lon, max_lon, status_type)
+            SELECT log_id, latitude, latitude, longitude, longitude, status_type
+            FROM detection_log
+            WHERE log_id > (SELECT IFNULL(MAX(log_id), 0) FROM detection_log_rtree)
+              AND latitude IS NOT NULL AND longitude IS NOT NULL
+              AND NOT (latitude = 0 AND longitude = 0)
+        ''')
+        # Migrasi kolom baru untuk database lama
+        _add_column_if_missing(cursor, 'session_summary', 'track_distance_km', 'REAL')
+        _add_column_if_missing(cursor, 'session_summary', 'track_point_count', 'INTEGER DEFAULT 0')
+        _add_column_if_missing(cursor, 'session_summary', 'perclos', 'REAL')
+        _add_column_if_missing(cursor, 'session_summary', 'perclos_peak_1m', 'REAL')
+        _add_column_if_missing(cursor, 'session_summary', 'blink_count', 'INTEGER DEFAULT 0')
+        _add_column_if_missing(cursor, 'session_summary', 'blink_rate_per_min', 'REAL')
+        _add_column_if_missing(cursor, 'session_summary', 'blink_duration_ms', 'REAL')
+        # Nomor urut SessionJournal (unik per sesi) untuk mengenali kejadian yang sudah masuk saat pemulihan
+        _add_column_if_missing(cursor, 'detection_log', 'journal_seq', 'INTEGER')
+        # Revisi global yang naik setiap baris session_summary dibuat atau diubah, agar agen sinkronisasi
+        # mengirim ulang sesi yang berubah setelah terkirim (mis. sesi 'Active' yang ditutup pemulihan)
+        _add_column_if_missing(cursor, 'session_summary', 'sync_rev', 'INTEGER')
+        cursor.execute('UPDATE session_summary SET sync_rev = session_id WHERE sync_rev IS NULL')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS session_summary_sync_rev_idx ON session_summary (sync_rev)
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS session_summary_sync_rev_insert
+            AFTER INSERT ON session_summary
+            BEGIN
+                UPDATE session_summary SET sync_rev = (SELECT IFNULL(MAX(sync_rev), 0) + 1 FROM session_summary)
+                WHERE session_id = NEW.session_id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS session_summary_sync_rev_update
+            AFTER UPDATE ON session_summary
+            WHEN NEW.sync_rev IS OLD.sync_rev
+            BEGIN
+                UPDATE session_summary SET sync_rev = (SELECT IFNULL(MAX(sync_rev), 0) + 1 FROM session_summary)
+                WHERE session_id = NEW.session_id;
+            END
+        ''')
         conn.commit()
     print(f"✅ Database initialized at: {DB_PATH}")
+    recover_sessions()
+
+def _add_column_if_missing(cursor, table: str, column: str, definition: str):
+    """Menambahkan kolom ke tabel jika belum ada (migrasi skema sederhana)."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
 
 def start_new_session() -> int:
     """Memulai sesi deteksi baru dan mengembalikan session_id."""
@@ -123,23 +351,97 @@ def update_session_counts(
         ''', (drowsy, microsleep, yawn, awake, no_yawn, session_id))
         conn.commit()
 
+def update_session_ocular_metrics(
+    session_id: int,
+    perclos: Optional[float] = None,
+    perclos_peak_1m: Optional[float] = None,
+    blink_count: int = 0,
+    blink_rate_per_min: Optional[float] = None,
+    blink_duration_ms: Optional[float] = None
+):
+    """Menyimpan ringkasan PERCLOS dan kedipan untuk satu sesi."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE session_summary
+            SET perclos = ?, perclos_peak_1m = ?, blink_count = ?,
+                blink_rate_per_min = ?, blink_duration_ms = ?
+            WHERE session_id = ?
+        ''', (perclos, perclos_peak_1m, blink_count, blink_rate_per_min, blink_duration_ms, session_id))
+        conn.commit()
+
 def log_detection_event(
     session_id: int,
     status_type: str,
     latitude: Optional[float] = None,
     longitude: Optional[float] = None,
-    info: Optional[str] = None
-):
+    info: Optional[str] = None,
+    timestamp: Optional[str] = None,
+    journal_seq: Optional[int] = None
+) -> int:
     """
     Mencatat satu kejadian deteksi (drowsy, microsleep, yawn, dll) ke detection_log.
+    timestamp & journal_seq diisi bila kejadian sudah dicatat di SessionJournal (agar pemulihan dapat mengenalinya).
+    Mengembalikan log_id baris baru (untuk menautkan klip bukti).
     """
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        timestamp = datetime.now().isoformat(sep=' ', timespec='seconds')
+        timestamp = timestamp or datetime.now().isoformat(sep=' ', timespec='seconds')
         cursor.execute('''
-            INSERT INTO detection_log (session_id, timestamp, status_type, latitude, longitude, info)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (session_id, timestamp, status_type, latitude, longitude, info))
+            INSERT INTO detection_log (session_id, timestamp, status_type, latitude, longitude, info, journal_seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (session_id, timestamp, status_type, latitude, longitude, info, journal_seq))
+        conn.commit()
+        return cursor.lastrowid
+
+def insert_track_chunk(
+    session_id: int,
+    chunk_index: int,
+    point_count: int,
+    timestamps: bytes,
+    latitudes: bytes,
+    longitudes: bytes
+):
+    """Menyimpan satu batch titik jejak GPS (array float64 dalam bentuk bytes)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO gps_track (session_id, chunk_index, point_count, simplified, timestamps, latitudes, longitudes)
+            VALUES (?, ?, ?, 0, ?, ?, ?)
+        ''', (session_id, chunk_index, point_count, timestamps, latitudes, longitudes))
+        conn.commit()
+
+def fetch_track_chunks(session_id: int) -> List[sqlite3.Row]:
+    """Mengambil semua batch jejak GPS untuk sesi tertentu, urut sesuai waktu."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM gps_track WHERE session_id = ? ORDER BY chunk_index ASC', (session_id,))
+        return cursor.fetchall()
+
+def replace_track(
+    session_id: int,
+    point_count: int,
+    timestamps: bytes,
+    latitudes: bytes,
+    longitudes: bytes,
+    track_distance_km: Optional[float] = None
+):
+    """
+    Mengganti seluruh jejak sesi dengan satu batch tersederhanakan dan menyimpan
+    jarak hasil perhitungan ulang jejak penuh, dalam satu transaksi.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM gps_track WHERE session_id = ?', (session_id,))
+        cursor.execute('''
+            INSERT INTO gps_track (session_id, chunk_index, point_count, simplified, timestamps, latitudes, longitudes)
+            VALUES (?, 0, ?, 1, ?, ?, ?)
+        ''', (session_id, point_count, timestamps, latitudes, longitudes))
+        cursor.execute('''
+            UPDATE session_summary
+            SET track_distance_km = ?, track_point_count = ?
+            WHERE session_id = ?
+        ''', (track_distance_km, point_count, session_id))
         conn.commit()
 
 
@@ -154,9 +456,257 @@ def fetch_logs_for_session(session_id: int) -> List[sqlite3.Row]:
     """Mengambil semua log deteksi untuk sesi tertentu."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM detection_log WHERE session_id = ? ORDER BY timestamp ASC', (session_id,))
+        cursor.execute('''
+            SELECT detection_log.*, evidence_clip.path AS clip_path,
+                   EXISTS (SELECT 1 FROM event_thumbnail t WHERE t.log_id = detection_log.log_id) AS has_thumbnail
+            FROM detection_log
+            LEFT JOIN evidence_clip ON evidence_clip.log_id = detection_log.log_id
+            WHERE detection_log.session_id = ?
+            ORDER BY detection_log.timestamp ASC
+        ''', (session_id,))
+        return cursor.fetchall()
+
+def insert_evidence_clip(
+    log_id: int,
+    session_id: int,
+    path: str,
+    start_time: float,
+    end_time: float,
+    frame_count: int,
+    size_bytes: int
+):
+    """Menautkan klip video bukti ke baris detection_log."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO evidence_clip (log_id, session_id, path, start_time, end_time, frame_count, size_bytes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (log_id, session_id, path, start_time, end_time, frame_count, size_bytes))
+        conn.commit()
+
+def insert_event_thumbnail(
+    log_id: int,
+    session_id: int,
+    captured_at: float,
+    width: int,
+    height: int,
+    jpeg: bytes
+):
+    """Menyimpan thumbnail JPEG untuk baris detection_log."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO event_thumbnail (log_id, session_id, captured_at, width, height, jpeg)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (log_id, session_id, captured_at, width, height, sqlite3.Binary(jpeg)))
+        conn.commit()
+
+def fetch_event_thumbnail(log_id: int) -> Optional[bytes]:
+    """JPEG thumbnail satu kejadian, atau None."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT jpeg FROM event_thumbnail WHERE log_id = ?', (log_id,))
+        row = cursor.fetchone()
+        return bytes(row['jpeg']) if row else None
+
+def get_evidence_total_bytes() -> int:
+    """Total ukuran semua klip bukti (byte), untuk penegakan kuota disk."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT IFNULL(SUM(size_bytes), 0) FROM evidence_clip')
+        return cursor.fetchone()[0]
+
+def fetch_oldest_evidence_clips(limit: int = 16) -> List[sqlite3.Row]:
+    """Mengambil klip bukti tertua (log_id terkecil lebih dulu)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM evidence_clip ORDER BY log_id ASC LIMIT ?', (limit,))
+        return cursor.fetchall()
+
+def delete_evidence_clip(log_id: int):
+    """Menghapus tautan klip bukti (file dihapus oleh pemanggil)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM evidence_clip WHERE log_id = ?', (log_id,))
+        conn.commit()
+
+def insert_session_metrics(rows: List[tuple], rollup_rows: List[tuple] = ()):
+    """
+    Menyimpan satu batch deret waktu sesi: rows = (session_id, t, ear_min, ear_max, perclos),
+    rollup_rows = (session_id, level, t, ear_min, ear_max, perclos, samples).
+    """
+    with get_db_connection() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO session_metric (session_id, t, ear_min, ear_max, perclos)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.executemany('''
+            INSERT OR REPLACE INTO session_metric_rollup (session_id, level, t, ear_min, ear_max, perclos, samples)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rollup_rows)
+        conn.commit()
+
+def fetch_session_metric_span(session_id: int) -> Optional[sqlite3.Row]:
+    """Rentang waktu (t_min, t_max) deret waktu satu sesi, None jika belum ada data."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # MIN/MAX pada awalan primary key dijawab langsung dari B-tree
+        cursor.execute('SELECT MIN(t) AS t_min, MAX(t) AS t_max FROM session_metric WHERE session_id = ?', (session_id,))
+        row = cursor.fetchone()
+        return row if row['t_min'] is not None else None
+
+def fetch_session_metric_buckets(session_id: int, t_start: float, t_end: float, bucket_count: int) -> List[sqlite3.Row]:
+    """
+    Downsampling min/max di SQL: rentang [t_start, t_end) dibagi bucket_count bucket
+    (biasanya satu per piksel). Setiap bucket: indeks, EAR min/max, PERCLOS maksimum, jumlah sampel mentah.
+    Sumbernya rollup terkasar yang lebih halus dari satu bucket, sehingga jumlah baris yang dipindai
+    tetap sebanding dengan bucket_count, berapa pun panjang rentangnya.
+    Hanya bucket yang berisi sampel yang dikembalikan.
+    """
+    width = max(t_end - t_start, 1e-6) / bucket_count
+    levels = [level for level in METRIC_ROLLUP_SECONDS if level <= width]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if levels:
+            # Bucket rollup yang terpotong t_start tetap disertakan agar tepi kiri tidak kosong
+            cursor.execute('''
+                SELECT MAX(CAST((t - ?) / ? AS INTEGER), 0) AS bucket,
+                       MIN(ear_min) AS ear_min, MAX(ear_max) AS ear_max,
+                       MAX(perclos) AS perclos, SUM(samples) AS samples
+                FROM session_metric_rollup
+                WHERE session_id = ? AND level = ? AND t > ? AND t < ?
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', (t_start, width, session_id, levels[-1], t_start - levels[-1], t_end))
+        else:
+            cursor.execute('''
+                SELECT CAST((t - ?) / ? AS INTEGER) AS bucket,
+                       MIN(ear_min) AS ear_min, MAX(ear_max) AS ear_max,
+                       MAX(perclos) AS perclos, COUNT(*) AS samples
+                FROM session_metric
+                WHERE session_id = ? AND t >= ? AND t < ?
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', (t_start, width, session_id, t_start, t_end))
+        return cursor.fetchall()
+
+def fetch_events_in_bbox(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    limit: Optional[int] = None
+) -> List[sqlite3.Row]:
+    """Mengambil kejadian di dalam bounding box menggunakan indeks R*Tree."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT l.*
+            FROM detection_log_rtree r
+            JOIN detection_log l ON l.log_id = r.log_id
+            WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?
+            ORDER BY l.log_id
+            {'LIMIT ?' if limit else ''}
+        ''', (min_lat, max_lat, min_lon, max_lon) + ((limit,) if limit else ()))
+        return cursor.fetchall()
+
+def hotspot_cell_size_deg(zoom: int) -> float:
+    """Ukuran sel klaster (derajat) untuk level zoom gaya peta web (0 = seluruh dunia)."""
+    return 360.0 / (2 ** zoom) / HOTSPOT_CELLS_PER_TILE
+
+def fetch_event_hotspots(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int,
+    status_types: Optional[List[str]] = None
+) -> List[sqlite3.Row]:
+    """
+    Mengelompokkan kejadian di dalam bounding box ke grid sesuai level zoom.
+    Grid ditambatkan ke koordinat absolut sehingga klaster stabil saat peta digeser.
+
+    Zoom <= level tertinggi HOTSPOT_GRID_LEVELS dijawab dari agregat detection_hotspot_grid
+    (sel di tepi bounding box dihitung utuh); zoom lebih tinggi dihitung dari titik di R*Tree.
+    Mengembalikan baris (cy, cx, cell_lat, cell_lon, event_count, microsleep_count,
+    drowsy_count, yawn_count), diurutkan dari klaster terpadat.
+    """
+    status_filter = ''
+    status_params = []
+    if status_types:
+        status_filter = f"AND status_type IN ({','.join('?' * len(status_types))})"
+        status_params = list(status_types)
+
+    grid_level = next((level for level in sorted(HOTSPOT_GRID_LEVELS) if level >= zoom), None)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if grid_level is not None:
+            grid_cell = hotspot_cell_size_deg(grid_level)
+            factor = 2 ** (grid_level - zoom)
+            cursor.execute(f'''
+                SELECT
+                    cell_y / ? AS cy,
+                    cell_x / ? AS cx,
+                    SUM(sum_lat) / SUM(event_count) AS cell_lat,
+                    SUM(sum_lon) / SUM(event_count) AS cell_lon,
+                    SUM(event_count) AS event_count,
+                    SUM(CASE WHEN status_type = 'microsleep' THEN event_count ELSE 0 END) AS microsleep_count,
+                    SUM(CASE WHEN status_type = 'drowsy' THEN event_count ELSE 0 END) AS drowsy_count,
+                    SUM(CASE WHEN status_type = 'yawn' THEN event_count ELSE 0 END) AS yawn_count
+                FROM detection_hotspot_grid
+                WHERE level = ?
+                  AND cell_y BETWEEN ? AND ? AND cell_x BETWEEN ? AND ?
+                  AND event_count > 0
+                  {status_filter}
+                GROUP BY cy, cx
+                ORDER BY event_count DESC
+            ''', [
+                factor, factor, grid_level,
+                int((min_lat + 90.0) // grid_cell), int((max_lat + 90.0) // grid_cell),
+                int((min_lon + 180.0) // grid_cell), int((max_lon + 180.0) // grid_cell),
+            ] + status_params)
+        else:
+            cell = hotspot_cell_size_deg(zoom)
+            cursor.execute(f'''
+                SELECT
+                    CAST((min_lat + 90.0) / ? AS INTEGER) AS cy,
+                    CAST((min_lon + 180.0) / ? AS INTEGER) AS cx,
+                    AVG(min_lat) AS cell_lat,
+                    AVG(min_lon) AS cell_lon,
+                    COUNT(*) AS event_count,
+                    SUM(status_type = 'microsleep') AS microsleep_count,
+                    SUM(status_type = 'drowsy') AS drowsy_count,
+                    SUM(status_type = 'yawn') AS yawn_count
+                FROM detection_log_rtree
+                WHERE min_lat >= ? AND max_lat <= ? AND min_lon >= ? AND max_lon <= ?
+                {status_filter}
+                GROUP BY cy, cx
+                ORDER BY event_count DESC
+            ''', [cell, cell, min_lat, max_lat, min_lon, max_lon] + status_params)
         return cursor.fetchall()
 
+def fetch_event_bounds() -> Optional[Tuple[float, float, float, float]]:
+    """(min_lat, min_lon, max_lat, max_lon) semua kejadian berlokasi, dari grid hotspot terhalus (tanpa memindai log)."""
+    level = max(HOTSPOT_GRID_LEVELS)
+    cell = hotspot_cell_size_deg(level)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MIN(cell_y), MIN(cell_x), MAX(cell_y), MAX(cell_x)
+            FROM detection_hotspot_grid WHERE level = ? AND event_count > 0
+        ''', (level,))
+        min_y, min_x, max_y, max_x = cursor.fetchone()
+    if min_y is None:
+        return None
+    return (min_y * cell - 90.0, min_x * cell - 180.0, (max_y + 1) * cell - 90.0, (max_x + 1) * cell - 180.0)
+
+def get_detection_log_version() -> Tuple[int, int]:
+    """(jumlah baris, log_id terbesar) detection_log; berubah setiap ada kejadian baru atau penghapusan."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), IFNULL(MAX(log_id), 0) FROM detection_log')
+        return tuple(cursor.fetchone())
+
 def get_last_session_summary(session_id: int) -> Optional[sqlite3.Row]:
     """Mengambil ringkasan sesi terakhir berdasarkan ID."""
     with get_db_connection() as conn:
@@ -164,11 +714,121 @@ def get_last_session_summary(session_id: int) -> Optional[sqlite3.Row]:
         cursor.execute('SELECT * FROM session_summary WHERE session_id = ?', (session_id,))
         return cursor.fetchone()
 
+def open_session_journal() -> Optional[SessionJournal]:
+    """
+    Membuka journal untuk sesi yang akan dimulai, atau None bila journal dipegang proses lain
+    (sesi tetap berjalan, tanpa perlindungan crash). Sisa journal proses yang crash setelah
+    proses ini dimulai dipulihkan lebih dulu.
+    """
+    lock = JournalLock(JOURNAL_PATH)
+    if not lock.acquire():
+        print(f"WARNING: Session journal {JOURNAL_PATH} is in use by another process; running without journal.")
+        return None
+    try:
+        _recover_sessions_locked()
+        return SessionJournal(JOURNAL_PATH, lock)
+    except Exception:
+        lock.release()
+        raise
+
+def recover_sessions() -> bool:
+    """
+    Dipanggil init_db: memutar ulang journal dan menutup sesi journal yang tertinggal 'Active'.
+    Dilewati (False) bila proses lain sedang memegang journal, karena sesinya masih berjalan.
+    """
+    lock = JournalLock(JOURNAL_PATH)
+    if not lock.acquire():
+        return False
+    try:
+        _recover_sessions_locked()
+    finally:
+        lock.release()
+    return True
+
+def _recover_sessions_locked():
+    """
+    Memasukkan kejadian journal yang belum committed (dilewati bila baris dengan journal_seq-nya ternyata
+    sudah ada), lalu menutup sesi journal yang masih 'Active' dengan jarak & waktu terakhir yang diketahui
+    (atau waktu kejadian terakhirnya) dan hitungan yang dihitung ulang dari detection_log.
+    Sesi 'Active' di luar journal tidak disentuh: bisa jadi milik proses yang berjalan tanpa journal.
+    Journal selalu kecil (dipadatkan saat menulis), sehingga waktunya tidak bergantung pada lama sesi.
+    """
+    started = time.perf_counter()
+    journal_sessions, pending = read_journal(JOURNAL_PATH)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        touched = set()
+        recovered_events = 0
+        for record in pending:
+            cursor.execute(
+                'SELECT 1 FROM detection_log WHERE session_id = ? AND journal_seq = ?',
+                (record['session_id'], record['seq'])
+            )
+            if cursor.fetchone() is None:
+                cursor.execute('''
+                    INSERT INTO detection_log (session_id, timestamp, status_type, latitude, longitude, info, journal_seq)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (record['session_id'], record['timestamp'], record['status_type'],
+                      record['latitude'], record['longitude'], record['info'], record['seq']))
+                recovered_events += 1
+                touched.add(record['session_id'])
+
+        orphans = []
+        open_ids = [session_id for session_id, state in journal_sessions.items() if not state['ended']]
+        if open_ids:
+            cursor.execute(f'''
+                SELECT session_id, start_time FROM session_summary
+                WHERE status = 'Active' AND session_id IN ({','.join('?' * len(open_ids))})
+            ''', open_ids)
+            orphans = cursor.fetchall()
+        for row in orphans:
+            session_id = row['session_id']
+            state = journal_sessions[session_id]
+            cursor.execute('SELECT MAX(timestamp) FROM detection_log WHERE session_id = ?', (session_id,))
+            last_event = cursor.fetchone()[0]
+            end_time = max(t for t in (row['start_time'], last_event, state.get('updated_at')) if t)
+            cursor.execute('''
+                UPDATE session_summary
+                SET end_time = ?, total_distance_km = IFNULL(?, total_distance_km), status = 'Completed'
+                WHERE session_id = ?
+            ''', (end_time, state.get('distance_km'), session_id))
+            touched.add(session_id)
+            print(f"♻️ Closed unfinished session {session_id} (end {end_time}, {state.get('distance_km') or 0.0:.2f} km)")
+
+        # Hitungan per sesi mungkin tertinggal (crash di antara log_detection_event dan update_session_counts)
+        for session_id in touched:
+            cursor.execute('''
+                UPDATE session_summary SET
+                    drowsy_count = (SELECT COUNT(*) FROM detection_log WHERE session_id = ? AND status_type = 'drowsy'),
+                    microsleep_count = (SELECT COUNT(*) FROM detection_log WHERE session_id = ? AND status_type = 'microsleep'),
+                    yawn_count = (SELECT COUNT(*) FROM detection_log WHERE session_id = ? AND status_type = 'yawn')
+                WHERE session_id = ?
+            ''', (session_id, session_id, session_id, session_id))
+        conn.commit()
+    if os.path.exists(JOURNAL_PATH):
+        os.remove(JOURNAL_PATH)
+    if orphans or recovered_events:
+        print(f"♻️ Recovered {len(orphans)} session(s) and {recovered_events} pending event(s) "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 def clear_all_data():
     """Menghapus semua data dari semua tabel (untuk reset atau debug)."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        # File klip bukti ikut dihapus agar tidak tertinggal tanpa tautan
+        cursor.execute('SELECT path FROM evidence_clip')
+        for row in cursor.fetchall():
+            try:
+                os.remove(row['path'])
+            except OSError:
+                pass
+        cursor.execute('DELETE FROM evidence_clip')
+        cursor.execute('DELETE FROM event_thumbnail')
+        cursor.execute('DELETE FROM session_metric')
+        cursor.execute('DELETE FROM session_metric_rollup')
         cursor.execute('DELETE FROM detection_log')
+        cursor.execute('DELETE FROM detection_hotspot_grid')
+        cursor.execute('DELETE FROM gps_track')
         cursor.execute('DELETE FROM session_summary')
         conn.commit()
     print("🗑️ All database data cleared.")
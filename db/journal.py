@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# Penguncian file lintas proses: fcntl (Linux/macOS) atau msvcrt (Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+def _try_lock(f):
+    """Kunci eksklusif non-blocking pada file terbuka. True jika berhasil (atau platform tanpa penguncian)."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+def _now_iso():
+    return datetime.now().isoformat(sep=' ', timespec='seconds')
+
+
+class JournalLock:
+    """
+    Kunci <journal>.lock yang dipegang selama journal terbuka. Pemulihan saat init_db hanya berjalan bila
+    kunci ini bisa diambil, sehingga proses lain (mis. tools atau GUI kedua) tidak menutup sesi yang masih berjalan.
+    """
+
+    def __init__(self, journal_path):
+        self.path = f"{journal_path}.lock"
+        self._file = None
+
+    def acquire(self):
+        f = open(self.path, 'a+')
+        if not _try_lock(f):
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            _unlock(self._file)
+            self._file.close()
+            self._file = None
+
+
+def read_journal(path):
+    """
+    Membaca journal menjadi status akhir:
+      sessions = {session_id: {'distance_km', 'updated_at', 'ended'}}
+      pending  = [record event yang belum ditandai 'committed'], urut seq
+    Pembacaan berhenti pada baris terpotong (listrik mati saat menulis); semua baris setelahnya diabaikan.
+    """
+    sessions, events, committed = {}, {}, set()
+    if not os.path.exists(path):
+        return sessions, []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                op = record['op']
+            except (ValueError, KeyError, TypeError):
+                break
+            if op in ('start', 'progress', 'end'):
+                state = sessions.setdefault(record['session_id'], {'distance_km': None, 'updated_at': None, 'ended': False})
+                if record.get('distance_km') is not None:
+                    state['distance_km'] = record['distance_km']
+                state['updated_at'] = record.get('t', state['updated_at'])
+                state['ended'] = state['ended'] or op == 'end'
+            elif op == 'event':
+                events[record['seq']] = record
+            elif op == 'committed':
+                committed.add(record['seq'])
+    pending = [events[seq] for seq in sorted(events) if seq not in committed]
+    return sessions, pending
+
+
+class SessionJournal:
+    """
+    Journal append-only (JSON per baris) untuk sesi aktif, agar crash atau listrik mati tidak meninggalkan
+    sesi 'Active' tanpa end_time/jarak dan tidak menghilangkan kejadian yang belum masuk database.
+
+    - event_pending() dicatat sebelum kejadian ditulis ke database (dengan journal_seq), event_committed()
+      setelah commit; kejadian tanpa tanda committed dan tanpa baris ber-journal_seq sama dimasukkan ulang
+      oleh database.recover_sessions() saat init_db.
+    - Jarak terakhir (session_progress) ditulis thread latar setiap PROGRESS_INTERVAL_SECONDS dan bersama
+      setiap kejadian (event_pending), sekaligus menjadi perkiraan end_time bila sesi harus ditutup saat
+      pemulihan. Yang hilang saat crash paling banyak PROGRESS_INTERVAL_SECONDS durasi/jarak sejak progress
+      atau kejadian terakhir.
+    - Baris langsung diteruskan ke OS (aman terhadap crash proses); fsync paling lambat FSYNC_INTERVAL_SECONDS
+      setelah penulisan (batas data yang hilang saat listrik mati).
+    - Bila file melebihi MAX_BYTES, journal dipadatkan menjadi snapshot (sesi terbuka + kejadian tertunda),
+      sehingga waktu pemulihan tetap kecil berapa pun lamanya sesi. File dihapus saat ditutup tanpa sisa.
+    """
+    FSYNC_INTERVAL_SECONDS = 1.0
+    PROGRESS_INTERVAL_SECONDS = 10.0
+    MAX_BYTES = 256 * 1024
+
+    def __init__(self, path, lock):
+        """Dibuat melalui database.open_session_journal(), yang memegang lock dan memulihkan sisa journal lama."""
+        self.path = path
+        self._lock_handle = lock
+        self._lock = threading.Lock()
+        self._sessions = {} # session_id -> jarak terakhir (km)
+        self._pending = {} # seq -> record event yang belum committed
+        self._seq = 0
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        self._last_progress = time.monotonic()
+        self.fsyncs = 0
+        self.compactions = 0
+        # Sisa journal proses sebelumnya sudah diproses init_db; mulai dari file kosong
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    # --- Dipanggil sesi / pelanggan bus ---
+
+    def session_started(self, session_id):
+        with self._lock:
+            self._sessions[session_id] = 0.0
+            self._append({'op': 'start', 'session_id': session_id, 't': _now_iso(), 'distance_km': 0.0})
+
+    def session_progress(self, session_id, distance_km):
+        """Jarak terbaru (murah, boleh per fix GPS); ditulis ke file oleh thread latar."""
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id] = distance_km
+
+    def session_ended(self, session_id):
+        """Dipanggil setelah end_session tersimpan di database."""
+        with self._lock:
+            distance = self._sessions.pop(session_id, None)
+            self._append({'op': 'end', 'session_id': session_id, 't': _now_iso(), 'distance_km': distance})
+            self._sync()
+
+    def event_pending(self, session_id, status_type, latitude, longitude, info=None):
+        """Mencatat kejadian sebelum ditulis ke database. Mengembalikan (seq, timestamp) untuk log_detection_event."""
+        with self._lock:
+            self._seq += 1
+            record = {
+                'op': 'event', 'seq': self._seq, 'session_id': session_id, 'timestamp': _now_iso(),
+                'status_type': status_type, 'latitude': latitude, 'longitude': longitude, 'info': info,
+            }
+            self._pending[self._seq] = record
+            if session_id in self._sessions:
+                self._append({'op': 'progress', 'session_id': session_id, 't': record['timestamp'],
+                              'distance_km': self._sessions[session_id]})
+            self._append(record)
+            return self._seq, record['timestamp']
+
+    def event_committed(self, seq, log_id=None):
+        """Dipanggil setelah baris detection_log (dengan journal_seq=seq) tersimpan."""
+        with self._lock:
+            if self._pending.pop(seq, None) is not None:
+                self._append({'op': 'committed', 'seq': seq, 'log_id': log_id})
+
+    def close(self):
+        """Menghentikan thread dan menghapus journal bila tidak ada sesi terbuka atau kejadian tertunda."""
+        self._stop_event.set()
+        self._thread.join(timeout=5.0)
+        with self._lock:
+            self._write_progress()
+            self._sync()
+            self._file.close()
+            if not self._sessions and not self._pending:
+                os.remove(self.path)
+        self._lock_handle.release()
+
+    # --- Internal (dengan self._lock) ---
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self._dirty = True
+        if time.monotonic() - self._last_fsync >= self.FSYNC_INTERVAL_SECONDS:
+            self._sync()
+        if self._file.tell() > self.MAX_BYTES:
+            self._compact()
+
+    def _sync(self):
+        if self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self.fsyncs += 1
+        self._last_fsync = time.monotonic()
+
+    def _write_progress(self):
+        now = _now_iso()
+        for session_id, distance in self._sessions.items():
+            self._append({'op': 'progress', 'session_id': session_id, 't': now, 'distance_km': distance})
+        self._last_progress = time.monotonic()
+
+    def _compact(self):
+        """Menulis ulang journal sebagai snapshot (tmp + fsync + rename), lalu melanjutkan append ke file baru."""
+        tmp_path = f"{self.path}.tmp"
+        now = _now_iso()
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for session_id, distance in self._sessions.items():
+                f.write(json.dumps({'op': 'start', 'session_id': session_id, 't': now, 'distance_km': distance},
+                                   separators=(',', ':')) + '\n')
+            for record in self._pending.values():
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._dirty = False
+        self.compactions += 1
+
+    # --- Thread latar ---
+
+    def _run(self):
+        while not self._stop_event.wait(self.FSYNC_INTERVAL_SECONDS / 2):
+            with self._lock:
+                if time.monotonic() - self._last_progress >= self.PROGRESS_INTERVAL_SECONDS:
+                    self._write_progress()
+                if self._dirty and time.monotonic() - self._last_fsync >= self.FSYNC_INTERVAL_SECONDS:
+                    self._sync()
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QStyledItemDelegate
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QRect, QSize
+
+from db import database
+
+
+class ThumbnailCache:
+    """
+    Cache LRU QPixmap thumbnail kejadian per log_id, dimuat dari database saat pertama kali dibutuhkan.
+    Hanya thumbnail yang berhasil dimuat yang disimpan; yang belum ada dicari ulang saat digambar lagi.
+    Dibatasi MAX_ITEMS, sehingga sesi dengan ribuan kejadian tidak memuat semua JPEG ke memori.
+    """
+    MAX_ITEMS = 200
+
+    def __init__(self, max_items=None):
+        self.max_items = max_items or self.MAX_ITEMS
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, log_id):
+        if log_id in self._items:
+            self._items.move_to_end(log_id)
+            self.hits += 1
+            return self._items[log_id]
+        self.misses += 1
+        jpeg = database.fetch_event_thumbnail(log_id)
+        if not jpeg:
+            return None # Tidak di-cache: thumbnail kejadian baru mungkin masih di-encode
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(jpeg, 'JPG'):
+            return None
+        self._items[log_id] = pixmap
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+        return pixmap
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """
+    Menggambar thumbnail untuk sel yang menyimpan log_id di Qt.UserRole.
+    Qt hanya memanggil paint() untuk baris yang terlihat, sehingga thumbnail dimuat saat di-scroll.
+    """
+    SIZE = 64
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+
+    def paint(self, painter, option, index):
+        log_id = index.data(Qt.UserRole)
+        pixmap = self.cache.get(log_id) if log_id is not None else None
+        if pixmap is None:
+            super().paint(painter, option, index)
+            return
+        side = min(self.SIZE, option.rect.height() - 4, option.rect.width() - 4)
+        target = QRect(0, 0, side, side)
+        target.moveCenter(option.rect.center())
+        painter.drawPixmap(target, pixmap)
+
+    def sizeHint(self, option, index):
+        return QSize(self.SIZE + 4, self.SIZE + 4)
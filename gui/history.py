@@ -1,11 +1,18 @@
+from datetime import datetime
+
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QPushButton,
     QMessageBox, QDialog, QTableWidget, QTableWidgetItem,
-    QHeaderView, QHBoxLayout
+    QHeaderView, QHBoxLayout, QTabWidget
 )
-from PyQt5.QtGui import QFont, QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QColor, QDesktopServices
+from PyQt5.QtCore import Qt, QUrl
 
+from core.detector import DrowsinessDetector
+from core.map_tiles import EventsLayer, MapTileCache, SessionLayer
+from gui.event_thumbnails import ThumbnailCache, ThumbnailDelegate
+from gui.map_view import MapView
+from gui.session_chart import SessionChartWidget
 from db import database # Import modul database yang sudah diupdate
 
 class HistoryPage(QWidget):
@@ -76,6 +83,11 @@ class HistoryPage(QWidget):
         self.refreshButton.setStyleSheet("background-color: #17a2b8; color: white; padding: 10px; border-radius: 5px;")
         self.refreshButton.clicked.connect(self.loadHistory)
         
+        self.mapButton = QPushButton("🗺️ Peta Kejadian")
+        self.mapButton.setFont(QFont('Arial', 12))
+        self.mapButton.setStyleSheet("background-color: #6f42c1; color: white; padding: 10px; border-radius: 5px;")
+        self.mapButton.clicked.connect(self.show_event_map)
+
         self.clearButton = QPushButton("🗑️ Bersihkan Semua Riwayat")
         self.clearButton.setFont(QFont('Arial', 12))
         self.clearButton.setStyleSheet("background-color: #dc3545; color: white; padding: 10px; border-radius: 5px;")
@@ -87,6 +99,7 @@ class HistoryPage(QWidget):
         self.backButton.clicked.connect(self.main_window.showHome)
         
         button_layout.addWidget(self.refreshButton)
+        button_layout.addWidget(self.mapButton)
         button_layout.addWidget(self.clearButton)
         button_layout.addWidget(self.backButton)
         
@@ -159,7 +172,7 @@ class HistoryPage(QWidget):
         
         detail_dialog = QDialog(self)
         detail_dialog.setWindowTitle(f"Detail Sesi ID: {session_id}")
-        detail_dialog.setGeometry(200, 200, 800, 500)
+        detail_dialog.setGeometry(200, 200, 1000, 650)
         
         dialog_layout = QVBoxLayout()
 
@@ -169,6 +182,7 @@ class HistoryPage(QWidget):
             f"<b>Sesi Selesai:</b> {session_summary['end_time'] if session_summary['end_time'] else 'Belum Selesai'}<br>"
             f"<b>Total Jarak:</b> {session_summary['total_distance_km']:.2f} km<br>"
             f"<b>Mengantuk:</b> {session_summary['drowsy_count']}x | <b>Microsleep:</b> {session_summary['microsleep_count']}x | <b>Menguap:</b> {session_summary['yawn_count']}x"
+            + self._format_ocular_summary(session_summary)
         )
         summary_label.setFont(QFont('Arial', 10))
         dialog_layout.addWidget(summary_label)
@@ -176,10 +190,17 @@ class HistoryPage(QWidget):
         # Table for individual logs
         log_table = QTableWidget()
         # Perbarui jumlah kolom sesuai log Anda (log_id tidak perlu ditampilkan)
-        log_table.setColumnCount(5) # timestamp, status_type, latitude, longitude, info
-        log_table.setHorizontalHeaderLabels(["Timestamp", "Tipe Status", "Latitude", "Longitude", "Info"])
+        log_table.setColumnCount(7) # timestamp, status_type, latitude, longitude, info, klip bukti, thumbnail
+        log_table.setHorizontalHeaderLabels(["Timestamp", "Tipe Status", "Latitude", "Longitude", "Info", "Klip", "Foto"])
         log_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch) # Kolom menyesuaikan lebar
         log_table.setEditTriggers(QTableWidget.NoEditTriggers) # Tidak bisa diedit
+        # Thumbnail dimuat hanya untuk baris yang terlihat, lewat cache LRU
+        thumbnail_delegate = ThumbnailDelegate(ThumbnailCache(), log_table)
+        log_table.setItemDelegateForColumn(6, thumbnail_delegate)
+        log_table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Fixed)
+        log_table.setColumnWidth(6, ThumbnailDelegate.SIZE + 8)
+        if any(log['has_thumbnail'] for log in logs):
+            log_table.verticalHeader().setDefaultSectionSize(ThumbnailDelegate.SIZE + 4)
 
         log_table.setRowCount(len(logs))
         for row_idx, log in enumerate(logs):
@@ -188,8 +209,29 @@ class HistoryPage(QWidget):
             log_table.setItem(row_idx, 2, QTableWidgetItem(f"{log['latitude']:.6f}" if log['latitude'] else "-"))
             log_table.setItem(row_idx, 3, QTableWidgetItem(f"{log['longitude']:.6f}" if log['longitude'] else "-"))
             log_table.setItem(row_idx, 4, QTableWidgetItem(log['info'] if log['info'] else "-"))
-        
-        dialog_layout.addWidget(log_table)
+            clip_item = QTableWidgetItem("▶️ Putar" if log['clip_path'] else "-")
+            clip_item.setData(Qt.UserRole, log['clip_path'])
+            log_table.setItem(row_idx, 5, clip_item)
+            thumbnail_item = QTableWidgetItem("" if log['has_thumbnail'] else "-")
+            if log['has_thumbnail']:
+                thumbnail_item.setData(Qt.UserRole, log['log_id'])
+            log_table.setItem(row_idx, 6, thumbnail_item)
+        # Klik ganda pada kolom Klip membuka video bukti dengan pemutar bawaan sistem
+        log_table.cellDoubleClicked.connect(
+            lambda row, col: self._open_evidence_clip(log_table.item(row, col)) if col == 5 else None
+        )
+
+        # Grafik EAR/PERCLOS sepanjang sesi dengan penanda kejadian
+        chart = SessionChartWidget(session_id, self._event_markers(logs), DrowsinessDetector.EAR_THRESHOLD)
+        detail_dialog.finished.connect(chart.shutdown)
+        # Jejak GPS & lokasi kejadian sesi ini
+        route_map = MapView([SessionLayer(session_id)])
+        detail_dialog.finished.connect(route_map.shutdown)
+        tabs = QTabWidget()
+        tabs.addTab(chart, "📈 Grafik")
+        tabs.addTab(route_map, "🗺️ Peta")
+        tabs.addTab(log_table, "📋 Log Kejadian")
+        dialog_layout.addWidget(tabs)
 
         close_button = QPushButton("Tutup")
         close_button.clicked.connect(detail_dialog.accept)
@@ -199,6 +241,63 @@ class HistoryPage(QWidget):
         detail_dialog.exec_() # Menampilkan dialog secara modal
 
 
+    def show_event_map(self):
+        """Peta semua kejadian dari seluruh sesi (klaster saat diperkecil, titik saat diperbesar)."""
+        map_dialog = QDialog(self)
+        map_dialog.setWindowTitle("Peta Kejadian Semua Sesi")
+        map_dialog.setGeometry(200, 200, 1000, 700)
+        dialog_layout = QVBoxLayout()
+
+        legend = QLabel(
+            "<span style='color:#dc3545'>●</span> Microsleep &nbsp; "
+            "<span style='color:#fd7e14'>●</span> Mengantuk &nbsp; "
+            "<span style='color:#007bff'>●</span> Menguap &nbsp; "
+            "— roda mouse untuk zoom, seret untuk geser, klik ganda untuk melihat semua"
+        )
+        legend.setFont(QFont('Arial', 10))
+        dialog_layout.addWidget(legend)
+
+        event_map = MapView([EventsLayer()])
+        map_dialog.finished.connect(event_map.shutdown)
+        dialog_layout.addWidget(event_map)
+
+        close_button = QPushButton("Tutup")
+        close_button.clicked.connect(map_dialog.accept)
+        dialog_layout.addWidget(close_button)
+
+        map_dialog.setLayout(dialog_layout)
+        map_dialog.exec_()
+
+    @staticmethod
+    def _event_markers(logs):
+        """(epoch detik, status_type) untuk setiap log; timestamp log berupa waktu lokal ISO."""
+        markers = []
+        for log in logs:
+            try:
+                markers.append((datetime.fromisoformat(log['timestamp']).timestamp(), log['status_type']))
+            except (TypeError, ValueError):
+                continue
+        return markers
+
+    def _format_ocular_summary(self, session_summary):
+        """Baris PERCLOS & kedipan untuk dialog detail (kosong untuk sesi lama tanpa data)."""
+        if session_summary['perclos'] is None:
+            return ""
+        text = f"<br><b>PERCLOS:</b> {session_summary['perclos']:.1%}"
+        if session_summary['perclos_peak_1m'] is not None:
+            text += f" (puncak 1 menit {session_summary['perclos_peak_1m']:.1%})"
+        text += f" | <b>Kedipan:</b> {session_summary['blink_count']}x"
+        if session_summary['blink_rate_per_min'] is not None:
+            text += f", {session_summary['blink_rate_per_min']:.1f}/menit"
+        if session_summary['blink_duration_ms'] is not None:
+            text += f", rata-rata {session_summary['blink_duration_ms']:.0f} ms"
+        return text
+
+    def _open_evidence_clip(self, item):
+        clip_path = item.data(Qt.UserRole) if item else None
+        if clip_path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(clip_path))
+
     def confirm_clear_logs(self):
         """Konfirmasi sebelum menghapus semua log."""
         reply = QMessageBox.question(
@@ -210,6 +309,7 @@ class HistoryPage(QWidget):
         )
         if reply == QMessageBox.Yes:
             database.clear_all_data()
+            MapTileCache().clear() # Tile peta lama tidak lagi sesuai dengan data
             QMessageBox.information(self, "Berhasil", "Semua riwayat perjalanan telah dihapus.")
             self.loadHistory() # Muat ulang riwayat setelah dihapus
 
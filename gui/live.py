@@ -1,17 +1,29 @@
-import cv2
 import time
 import os
 import sys
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton,
-    QStackedWidget, QSizePolicy, QSpacerItem
+    QStackedWidget, QSizePolicy, QSpacerItem, QCheckBox
 )
-from PyQt5.QtCore import QTimer, Qt, QUrl
+from PyQt5.QtCore import QTimer, Qt
 from PyQt5.QtGui import QImage, QPixmap, QFont
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 
 from core.detector import DrowsinessDetector
 from core.gps import GPS 
+from core.track import TrackRecorder
+from core.duty_cycle import DutyCycleController
+from core.alarm_audio import AlarmAudioEngine
+from core.alert_engine import AlertEngine
+from core.detection_trace import DetectionTraceWriter
+from core.event_bus import EventBus
+from core.evidence import EvidenceRecorder
+from core.harvester import HardExampleHarvester
+from core.live_server import LiveViewServer
+from core.pipeline import DetectionPipeline
+from core.session_metrics import SessionMetricsRecorder
+from core.thumbnails import ThumbnailRecorder
+from core.video_sources import open_capture
+from core.tracing import tracer
 from db import database
 
 # Fungsi pembantu untuk mendapatkan path aset di lingkungan PyInstaller
@@ -26,53 +38,96 @@ def resource_path(relative_path):
 
 
 class LivePage(QWidget):
-    # Konstanta untuk logika alarm
-    MICROSLEEP_ALARM_THRESHOLD_SECONDS = 2
-    DROWSY_ALARM_THRESHOLD_SECONDS = 2 
-    YAWN_ALARM_THRESHOLD_SECONDS = 2 
-    LOG_DEBOUNCE_SECONDS = 1.0 # Jeda minimal antar log untuk tipe event yang sama
+    # Teks status per gejala. Ambang alarm ada di AlertEngine.
+    ALARM_TEXTS = {
+        'microsleep': "AWAS! Microsleep! ({}s)",
+        'drowsy': "AWAS! Drowsy (Kepala Tunduk)! ({}s)",
+        'yawn': "AWAS! Menguap Berlebihan! ({}s)",
+    }
+    WARNING_TEXTS = {
+        'microsleep': "Microsleep! ({}s)",
+        'drowsy': "Drowsy (Kepala Tunduk)! ({}s)",
+        'yawn': "Menguap... ({}s)",
+    }
 
     ALARM_SOUND_PATH = resource_path("assets/alarm.mp3")
+    GUI_REFRESH_INTERVAL_MS = 30 # Laju tampilan; laju deteksi diatur DutyCycleController di thread pipeline
 
-    def __init__(self, main_window):
+    def __init__(self, main_window, trace_dir=None):
         super().__init__()
         self.main_window = main_window
+        self.trace_dir = trace_dir # Jika diset, hasil deteksi per frame direkam untuk replay
+        self.trace_writer = None
+        # Sumber video: kamera (index) atau file video; CAMERA_SOURCE env dapat menimpanya
+        self.camera_source = os.environ.get('CAMERA_SOURCE', 0)
+        self.loop_video = False # True: file video diputar berulang (uji soak)
+        self.video_speed = 1.0
 
         # DrowsinessDetector akan secara internal menggunakan resource_path untuk modelnya
         self.detector = DrowsinessDetector(model_path='models/best.pt') 
         self.gps_tracker = GPS() # Inisialisasi GPS
         self.current_session_id = None # Untuk melacak sesi aktif
+        self.journal = None # SessionJournal sesi aktif (pemulihan setelah crash/listrik mati)
         self.session_start_time = None
+        self.track_recorder = None # Perekam jejak GPS per sesi
         
-        # Inisialisasi QMediaPlayer untuk alarm
-        self.media_player = QMediaPlayer()
-        # Set media content menggunakan ALARM_SOUND_PATH yang sudah disesuaikan
-        self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(self.ALARM_SOUND_PATH)))
-        self.media_player.setVolume(100) # Atur volume (0-100)
-        self.media_player.mediaStatusChanged.connect(self._handle_media_status_changed) # Untuk loop
+        # Engine audio alarm: file didekode sekali ke buffer PCM dan diputar berulang dari stream yang selalu aktif
+        self.alarm_audio = AlarmAudioEngine(self.ALARM_SOUND_PATH)
         
         # Debugging: Cetak path alarm yang digunakan
         print(f"✅ Alarm sound path: {self.ALARM_SOUND_PATH}")
 
         # Status deteksi real-time
         self.is_detecting = False
-        self.capture = None
+        self.duty_cycle = DutyCycleController() # Laju rendah saat kendaraan diam / pengemudi tidak ada
+
+        # Logika alarm (microsleep, drowsy, yawn)
+        self.alert_engine = AlertEngine()
+
+        # Loop deteksi berjalan di thread sendiri dan hanya menerbitkan hasil ke EventBus.
+        # Tampilan, database, dan audio berlangganan dengan antrean & kebijakan masing-masing.
+        self.bus = EventBus()
+        self.pipeline = DetectionPipeline(self.detector, self.bus, self.gps_tracker, self.alert_engine, self.duty_cycle)
+        # Opt-in: HARVEST_DIR mengumpulkan frame yang membingungkan model untuk dilabeli ulang
+        if os.environ.get('HARVEST_DIR'):
+            self.pipeline.harvester = HardExampleHarvester(
+                os.environ['HARVEST_DIR'], self.detector.yolo.class_labels, self.detector.CONFIDENCE_THRESHOLDS
+            )
+        self.display_subscription = self.bus.subscribe( # Hanya frame terbaru, disalin agar aman dibaca timer GUI
+            'gui-display', [DetectionPipeline.TOPIC_FRAME], policy='coalesce', copy_frames=True
+        )
+        self.gui_event_subscription = self.bus.subscribe(
+            'gui-events', [DetectionPipeline.TOPIC_ALERT, DetectionPipeline.TOPIC_STATE], maxsize=256
+        )
+        self.db_subscription = self.bus.subscribe(
+            'database', [DetectionPipeline.TOPIC_ALERT], callback=self._write_alert_event, maxsize=1024
+        )
+        self.audio_subscription = self.bus.subscribe(
+            'alarm-audio', [DetectionPipeline.TOPIC_FRAME], callback=self._drive_alarm_audio, policy='coalesce'
+        )
+        # Klip video bukti di sekitar event: frame disalin ke ring buffer, encoding di thread latar
+        self.evidence = EvidenceRecorder()
+        self.evidence_subscription = self.bus.subscribe( # Frame FramePool disalin sebelum meninggalkan thread deteksi
+            'evidence-ring', [DetectionPipeline.TOPIC_FRAME], callback=self.evidence.on_frame, policy='coalesce',
+            copy_frames=True,
+        )
+        # Thumbnail wajah per kejadian untuk tinjauan alarm palsu
+        self.thumbnails = ThumbnailRecorder()
+        self.pipeline.thumbnails = self.thumbnails # Dipotong dari frame mentah di thread deteksi
+        # Opt-in: LIVE_VIEW_PORT menyiarkan frame beranotasi (MJPEG) dan status (WebSocket) ke pengawas depo
+        self.live_view = None
+        if os.environ.get('LIVE_VIEW_PORT'):
+            self.live_view = LiveViewServer(os.environ.get('LIVE_VIEW_HOST', '127.0.0.1'), int(os.environ['LIVE_VIEW_PORT']))
+            self.live_view.attach(self.bus, DetectionPipeline.TOPIC_FRAME, DetectionPipeline.TOPIC_ALERT)
+            self.live_view.start()
+        self.recorder_subscription = None
+        # Deret waktu EAR/PERCLOS per sesi untuk grafik riwayat (dibuat per sesi)
+        self.metrics_recorder = None
+        self.metrics_subscription = None
+
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
 
-        # Timer untuk logika alarm (reset)
-        self.microsleep_start_time = None 
-        self.drowsy_start_time = None     
-        self.yawn_start_time = None       
-
-        self.microsleep_logged = False
-        self.drowsy_logged = False
-        self.yawn_logged = False
-
-        self.last_logged_microsleep_time = 0
-        self.last_logged_drowsy_time = 0
-        self.last_logged_yawn_time = 0
-
         # Penghitung deteksi per sesi
         self.current_drowsy_count = 0
         self.current_microsleep_count = 0
@@ -135,20 +190,38 @@ class LivePage(QWidget):
         self.microsleep_count_label = QLabel("Microsleep (Mata Terpejam): 0") 
         self.yawn_count_label = QLabel("Menguap: 0")
         self.distance_label = QLabel("Jarak Tempuh: 0.0 km") # Ini akan diupdate dari gps_tracker
+        self.perclos_label = QLabel("PERCLOS 1m/3m: -")
+        self.blink_label = QLabel("Kedipan: 0")
 
         self.drowsy_count_label.setFont(QFont('Arial', 11))
         self.microsleep_count_label.setFont(QFont('Arial', 11))
         self.yawn_count_label.setFont(QFont('Arial', 11))
         self.distance_label.setFont(QFont('Arial', 11))
+        self.perclos_label.setFont(QFont('Arial', 11))
+        self.blink_label.setFont(QFont('Arial', 11))
 
         control_stats_panel_layout.addWidget(self.drowsy_count_label)
         control_stats_panel_layout.addWidget(self.microsleep_count_label)
         control_stats_panel_layout.addWidget(self.yawn_count_label)
         control_stats_panel_layout.addSpacerItem(QSpacerItem(20, 10, QSizePolicy.Minimum, QSizePolicy.Fixed))
         control_stats_panel_layout.addWidget(self.distance_label)
+        control_stats_panel_layout.addWidget(self.perclos_label)
+        control_stats_panel_layout.addWidget(self.blink_label)
         
         control_stats_panel_layout.addStretch(1) 
 
+        # Tracing latensi per frame (Chrome trace-event)
+        self.trace_checkbox = QCheckBox("Trace Latensi Frame")
+        self.trace_checkbox.setFont(QFont('Arial', 10))
+        self.trace_checkbox.setChecked(tracer.enabled)
+        self.trace_checkbox.toggled.connect(self._toggle_tracing)
+        self.dump_trace_button = QPushButton("💾 Simpan Trace")
+        self.dump_trace_button.setStyleSheet("background-color: #6c757d; color: white; padding: 6px; font-size: 12px; border-radius: 5px;")
+        self.dump_trace_button.setEnabled(tracer.enabled)
+        self.dump_trace_button.clicked.connect(lambda: tracer.dump(reason='manual'))
+        control_stats_panel_layout.addWidget(self.trace_checkbox)
+        control_stats_panel_layout.addWidget(self.dump_trace_button)
+
         # Control Buttons
         self.start_button = QPushButton("▶️ Mulai Deteksi")
         self.stop_button = QPushButton("⏹️ Berhenti Deteksi")
@@ -186,8 +259,8 @@ class LivePage(QWidget):
             return
 
         print("Starting detection...")
-        self.capture = cv2.VideoCapture(0)  # 0 = default webcam
-        if not self.capture.isOpened():
+        capture = open_capture(self.camera_source, loop=self.loop_video, speed=self.video_speed)
+        if not capture.isOpened():
             self.image_label.setText("Gagal membuka kamera.")
             print("ERROR: Could not open camera.")
             return
@@ -195,7 +268,7 @@ class LivePage(QWidget):
         self.is_detecting = True
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(True)
-        self.back_button.setEnabled(False) 
+        self.back_button.setEnabled(False)
 
         # Reset penghitung deteksi
         self.current_drowsy_count = 0
@@ -203,26 +276,41 @@ class LivePage(QWidget):
         self.current_yawn_count = 0
         self.current_awake_count = 0
         self.current_no_yawn_count = 0
-        
-        self.microsleep_start_time = None
-        self.drowsy_start_time = None
-        self.yawn_start_time = None
-        
-        # Reset flag logging debounce
-        self.last_logged_microsleep_time = 0
-        self.last_logged_drowsy_time = 0
-        self.last_logged_yawn_time = 0
 
-        self._update_counts_display() 
+        self._update_counts_display()
 
-        # Mulai sesi baru di database
+        # Mulai sesi baru di database; journal dibuka lebih dulu agar sesi ini tidak ikut 'dipulihkan'
+        self.journal = database.open_session_journal()
         self.current_session_id = database.start_new_session()
         self.session_start_time = time.time()
-
+        if self.journal:
+            self.journal.session_started(self.current_session_id)
+            self.gps_tracker.add_fix_listener(self._journal_progress)
+
+        if self.trace_dir:
+            trace_path = os.path.join(self.trace_dir, f"session_{self.current_session_id}.jsonl.gz")
+            self.trace_writer = DetectionTraceWriter(trace_path)
+            self.recorder_subscription = self.bus.subscribe(
+                'trace-recorder', [DetectionPipeline.TOPIC_FRAME], callback=self._record_trace_frame, maxsize=4096
+            )
+            print(f"📝 Recording detection trace to {trace_path}")
+
+        self.metrics_recorder = SessionMetricsRecorder(self.current_session_id)
+        self.metrics_subscription = self.bus.subscribe(
+            'session-metrics', [DetectionPipeline.TOPIC_FRAME], callback=self.metrics_recorder.on_frame, maxsize=1024
+        )
+
+        self.track_recorder = TrackRecorder(self.current_session_id)
+        self.gps_tracker.add_fix_listener(self.track_recorder.add_fix)
         self.gps_tracker.start()
-        self.timer.start(30) 
+
+        # Buang sisa pesan sesi sebelumnya, lalu jalankan loop deteksi (AlertEngine & duty cycle direset di sana)
+        self.display_subscription.poll()
+        self.gui_event_subscription.poll()
+        self.pipeline.start(capture, self.current_session_id)
+        self.timer.start(self.GUI_REFRESH_INTERVAL_MS)
         self.status_label.setText("Status: Deteksi Aktif")
-        self.status_label.setStyleSheet("color: #28a745; font-weight: bold;") 
+        self.status_label.setStyleSheet("color: #28a745; font-weight: bold;")
 
     def stop_detection(self):
         if not self.is_detecting:
@@ -231,20 +319,59 @@ class LivePage(QWidget):
         print("Stopping detection...")
         self.is_detecting = False
         self.timer.stop()
-        if self.capture:
-            self.capture.release()
-            self.capture = None
-        
+        self.pipeline.stop() # Kamera dilepas oleh thread pipeline
+
         self.gps_tracker.stop() # MENGHENTIKAN THREAD GPS
-        self.media_player.stop() 
-        
+
+        # Pastikan event yang masih antre tertulis sebelum sesi ditutup
+        if not self.db_subscription.flush():
+            print("WARNING: Timed out waiting for pending detection events to be written.")
+        self.audio_subscription.flush()
+        self.alarm_audio.stop()
+
+        latency = self.alarm_audio.latency_report()
+        if latency['count']:
+            print(f"🔊 Alarm latency: p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms, "
+                  f"max {latency['max_ms']:.1f} ms ({latency['count']} triggers)")
+
+        duty_report = self.duty_cycle.report()
+        print(f"🔋 Duty cycle: {duty_report['watch_seconds']:.0f}s in watch mode, "
+              f"{duty_report['frames_skipped']} frames skipped, "
+              f"~{duty_report['cpu_seconds_saved']:.1f}s CPU saved")
+
+        cascade = self.detector.cascade_report()
+        if cascade['enabled'] and cascade['frames']:
+            print(f"🪜 YOLO cascade: {cascade['escalations']}/{cascade['frames']} frames escalated "
+                  f"({cascade['escalation_rate']:.0%}) to the full model")
+
+        for name, stats in self.bus.stats().items():
+            if stats['dropped']:
+                print(f"📉 Bus subscriber '{name}': {stats['dropped']} of {stats['received']} messages dropped/coalesced")
+
+        if self.metrics_subscription:
+            self.bus.unsubscribe(self.metrics_subscription) # Menunggu frame yang masih antre
+            self.metrics_subscription = None
+            self.metrics_recorder.finish()
+            self.metrics_recorder = None
+
         # Akhiri sesi di database
         if self.current_session_id:
+            database.update_session_ocular_metrics(self.current_session_id, **self.pipeline.ocular.session_summary())
             # Mengambil total jarak dari GPS tracker sebelum mengakhiri sesi
-            total_distance = self.gps_tracker.get_total_distance_km() 
+            total_distance = self.gps_tracker.get_total_distance_km()
+            # Simpan sisa jejak GPS, sederhanakan, dan cocokkan jaraknya
+            if self.track_recorder:
+                self.gps_tracker.remove_fix_listener(self.track_recorder.add_fix)
+                self.track_recorder.finish(incremental_distance_km=total_distance)
+                self.track_recorder = None
             # database modul ini sudah dimodifikasi agar DB_PATH benar
             database.end_session(self.current_session_id, total_distance)
-            self.current_session_id = None 
+            if self.journal:
+                self.gps_tracker.remove_fix_listener(self._journal_progress)
+                self.journal.session_ended(self.current_session_id)
+                self.journal.close()
+                self.journal = None
+            self.current_session_id = None
             self.session_start_time = None
 
         self.image_label.clear()
@@ -252,157 +379,122 @@ class LivePage(QWidget):
         self.image_label.setStyleSheet("background-color: #000; color: #FFF; border-radius: 5px;")
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
-        self.back_button.setEnabled(True) 
+        self.back_button.setEnabled(True)
         self.status_label.setText("Status: Deteksi Dihentikan.")
-        self.status_label.setStyleSheet("color: #dc3545; font-weight: bold;") 
+        self.status_label.setStyleSheet("color: #dc3545; font-weight: bold;")
+
+        # Tutup trace setelah semua frame yang antre tertulis
+        if self.recorder_subscription:
+            self.bus.unsubscribe(self.recorder_subscription)
+            self.recorder_subscription = None
+        if self.trace_writer:
+            self.trace_writer.close()
+            print(f"📝 Trace saved: {self.trace_writer.frame_count} frames")
+            self.trace_writer = None
 
-        # Reset alarm state dan flag logging
-        self.microsleep_start_time = None
-        self.drowsy_start_time = None
-        self.yawn_start_time = None
-        
-        self.last_logged_microsleep_time = 0
-        self.last_logged_drowsy_time = 0
-        self.last_logged_yawn_time = 0
-        
         print("Detection stopped.")
 
-    def update_frame(self):
-        if not self.capture or not self.capture.isOpened():
-            self.stop_detection() 
-            return
+    # ------------------------------------------------------------------
+    # Pelanggan EventBus di thread bus (tidak menyentuh widget Qt)
+    # ------------------------------------------------------------------
 
-        ret, frame = self.capture.read()
-        if not ret:
-            self.stop_detection() 
+    def _write_alert_event(self, topic, message):
+        """Pelanggan 'database': mencatat event log beserta lokasi saat event terjadi."""
+        event = message.event
+        if event.kind != 'log' or message.session_id is None:
             return
-        
-        frame = cv2.flip(frame, 1)
+        journal = self.journal
+        with tracer.span('db_write', status_type=event.status_type):
+            # Dicatat di journal dulu: bila proses mati sebelum commit, init_db memasukkannya kembali
+            seq, timestamp = journal.event_pending(
+                message.session_id, event.status_type, message.latitude, message.longitude, event.info
+            ) if journal else (None, None)
+            # database modul ini sudah dimodifikasi agar DB_PATH benar
+            log_id = database.log_detection_event(
+                message.session_id, event.status_type, message.latitude, message.longitude, info=event.info,
+                timestamp=timestamp, journal_seq=seq
+            )
+            database.update_session_counts(message.session_id, **{event.status_type: 1})
+            if journal:
+                journal.event_committed(seq, log_id)
+        self.evidence.request_clip(
+            log_id, message.session_id, event.status_type, event.timestamp - event.elapsed, event.timestamp
+        )
+        self.thumbnails.request_thumbnail(log_id, message.session_id, event.status_type, event.timestamp)
+
+    def _journal_progress(self, fix):
+        """Listener fix GPS (thread GPS): jarak terakhir untuk menutup sesi bila aplikasi mati."""
+        journal = self.journal
+        if journal and self.current_session_id is not None:
+            journal.session_progress(self.current_session_id, self.gps_tracker.get_total_distance_km())
+
+    def _drive_alarm_audio(self, topic, result):
+        """Pelanggan 'alarm-audio': level naik bertahap selama alarm berlangsung."""
+        if result.level == 'alarm':
+            if not self.alarm_audio.is_playing:
+                self.alarm_audio.play()
+            self.alarm_audio.escalate(result.alarm_elapsed)
+        elif self.alarm_audio.is_playing:
+            self.alarm_audio.stop()
+
+    def _record_trace_frame(self, topic, result):
+        """Pelanggan 'trace-recorder': merekam hasil deteksi untuk replay."""
+        if self.trace_writer:
+            self.trace_writer.write(result.timestamp, result.detection_results)
+
+    # ------------------------------------------------------------------
+    # Tampilan (thread GUI)
+    # ------------------------------------------------------------------
 
-        # self.detector sudah menggunakan path yang benar secara internal
-        annotated_frame, detection_results = self.detector.detect(frame)
-        
-        yolo_status = detection_results['yolo_status']
-        ear_status = detection_results['ear_status']
-        avg_ear = detection_results['avg_ear'] 
+    def update_frame(self):
+        """Dipanggil timer GUI: mengambil pesan terbaru dari bus tanpa pernah menunggu deteksi."""
+        for topic, message in self.gui_event_subscription.poll():
+            if topic == DetectionPipeline.TOPIC_STATE:
+                if message['state'] == 'stopped' and message['reason'] != 'stopped':
+                    self.stop_detection() # Kamera gagal atau loop deteksi error
+                    return
+            else:
+                self._handle_alert_event(message.event)
+
+        frames = self.display_subscription.poll()
+        if frames:
+            self._display_result(frames[-1][1])
+
+    def _handle_alert_event(self, event):
+        if event.kind == 'log':
+            counter_name = f"current_{event.status_type}_count"
+            setattr(self, counter_name, getattr(self, counter_name) + 1)
+            self._update_counts_display()
+        elif event.kind == 'alarm_start':
+            print("🔊 Alarm triggered!")
+        elif event.kind == 'alarm_stop':
+            print("🔇 Alarm stopped.")
+
+    def _display_result(self, result):
+        yolo_status = result.detection_results['yolo_status']
+        ear_status = result.detection_results['ear_status']
 
-        current_time = time.time()
-        
         # --- LOGIKA PENGHITUNGAN JARAK (MENGGUNAKAN GPS ASLI) ---
         if self.current_session_id:
             # Ambil jarak total dari gps_tracker yang sudah menghitungnya secara internal
             current_total_distance = self.gps_tracker.get_total_distance_km()
             self.distance_label.setText(f"Jarak Tempuh: {current_total_distance:.2f} km")
-            self.current_distance_km = current_total_distance 
-
-        # --- LOGIKA PENENTUAN STATUS & ALARM (TETAP SAMA) ---
-        main_status_text = "Awake"
-        main_status_color = "#28a745" # Hijau (Awake)
-        play_alarm = False
-
-        # === Logika untuk Microsleep (EAR) ===
-        is_microsleep_ear = (ear_status == "microsleep")
-        if is_microsleep_ear:
-            if self.microsleep_start_time is None:
-                self.microsleep_start_time = current_time
-            
-            elapsed_time_microsleep = current_time - self.microsleep_start_time
-            
-            if elapsed_time_microsleep >= self.MICROSLEEP_ALARM_THRESHOLD_SECONDS:
-                play_alarm = True
-                main_status_text = f"AWAS! Microsleep! ({int(elapsed_time_microsleep)}s)"
-
-            if self.current_session_id and not self.microsleep_logged:
-                if elapsed_time_microsleep >= self.MICROSLEEP_ALARM_THRESHOLD_SECONDS:
-                    # database modul ini sudah dimodifikasi agar DB_PATH benar
-                    database.log_detection_event(
-                        self.current_session_id, 'microsleep',
-                        *self.gps_tracker.get_location(), # MENGAMBIL LOKASI DARI GPS ASLI
-                        info=f"Mata Terpejam. Durasi: {elapsed_time_microsleep:.1f}s, EAR: {avg_ear:.2f}"
-                    )
-                    database.update_session_counts(self.current_session_id, microsleep=1)
-                    self.current_microsleep_count += 1
-                    self.last_logged_microsleep_time = current_time
-                    self.microsleep_logged = True  # Hindari log ulang
-        else:
-            self.microsleep_start_time = None
-            self.microsleep_logged = False
-
-        # === Logika untuk Drowsy (YOLO - Kepala Tunduk) ===
-        is_drowsy_yolo = (yolo_status == "drowsy")
-        if is_drowsy_yolo:
-            if self.drowsy_start_time is None:
-                self.drowsy_start_time = current_time
-            
-            elapsed_time_drowsy = current_time - self.drowsy_start_time
-
-            if elapsed_time_drowsy >= self.DROWSY_ALARM_THRESHOLD_SECONDS:
-                play_alarm = True
-                main_status_text = f"AWAS! Drowsy (Kepala Tunduk)! ({int(elapsed_time_drowsy)}s)"
-
-            if self.current_session_id and not self.drowsy_logged:
-                if elapsed_time_drowsy >= self.DROWSY_ALARM_THRESHOLD_SECONDS:
-                    # database modul ini sudah dimodifikasi agar DB_PATH benar
-                    database.log_detection_event(
-                        self.current_session_id, 'drowsy',
-                        *self.gps_tracker.get_location(), # MENGAMBIL LOKASI DARI GPS ASLI
-                        info=f"Kepala menunduk/miring. Durasi: {elapsed_time_drowsy:.1f}s"
-                    )
-                    database.update_session_counts(self.current_session_id, drowsy=1)
-                    self.current_drowsy_count += 1
-                    self.last_logged_drowsy_time = current_time
-                    self.drowsy_logged = True
-        else:
-            self.drowsy_start_time = None
-            self.drowsy_logged = False
-
-        # === Logika untuk Yawn (YOLO) ===
-        is_yawn_yolo = (yolo_status == "yawn")
-        if is_yawn_yolo:
-            if self.yawn_start_time is None:
-                self.yawn_start_time = current_time
-            
-            elapsed_time_yawn = current_time - self.yawn_start_time
-
-            if elapsed_time_yawn >= self.YAWN_ALARM_THRESHOLD_SECONDS:
-                play_alarm = True
-                main_status_text = f"AWAS! Menguap Berlebihan! ({int(elapsed_time_yawn)}s)"
-
-            if self.current_session_id and not self.yawn_logged:
-                if elapsed_time_yawn >= self.YAWN_ALARM_THRESHOLD_SECONDS:
-                    # database modul ini sudah dimodifikasi agar DB_PATH benar
-                    database.log_detection_event(
-                        self.current_session_id, 'yawn',
-                        *self.gps_tracker.get_location(), # MENGAMBIL LOKASI DARI GPS ASLI
-                        info=f"Terdeteksi menguap. Durasi: {elapsed_time_yawn:.1f}s"
-                    )
-                    database.update_session_counts(self.current_session_id, yawn=1)
-                    self.current_yawn_count += 1
-                    self.last_logged_yawn_time = current_time
-                    self.yawn_logged = True
-        else:
-            self.yawn_start_time = None
-            self.yawn_logged = False
+            self.current_distance_km = current_total_distance
 
+        self._update_ocular_display(result.detection_results)
 
         # === Penentuan Status Tampilan Utama (Prioritas) ===
         # Prioritas: Alarm Merah > Peringatan Kuning > Normal Hijau/Biru
-        if play_alarm:
+        if result.level == 'alarm':
+            main_status_text = self.ALARM_TEXTS[result.status_type].format(int(result.elapsed))
             self.status_label.setStyleSheet(f"color: #dc3545; font-weight: bold;") # Merah jika ada alarm aktif
-        elif is_microsleep_ear or is_drowsy_yolo or is_yawn_yolo:
-            # Jika tidak ada alarm yang terpicu, tapi salah satu kondisi kelelahan masih ada
-            # Ambil status yang paling 'parah' jika ada beberapa (misal: microsleep > drowsy > yawn)
-            if is_microsleep_ear and self.microsleep_start_time is not None:
-                elapsed = int(current_time - self.microsleep_start_time)
-                main_status_text = f"Microsleep! ({elapsed}s)"
-            elif is_drowsy_yolo and self.drowsy_start_time is not None:
-                elapsed = int(current_time - self.drowsy_start_time)
-                main_status_text = f"Drowsy (Kepala Tunduk)! ({elapsed}s)"
-            elif is_yawn_yolo and self.yawn_start_time is not None:
-                elapsed = int(current_time - self.yawn_start_time)
-                main_status_text = f"Menguap... ({elapsed}s)"
+        elif result.level == 'warning':
+            # Kondisi kelelahan masih ada tetapi belum melewati ambang alarm
+            main_status_text = self.WARNING_TEXTS[result.status_type].format(int(result.elapsed))
             self.status_label.setStyleSheet(f"color: #ffc107; font-weight: bold;") # Kuning jika ada peringatan
         else: # Kondisi Normal
+            main_status_text = "Awake"
+            main_status_color = "#28a745" # Hijau (Awake)
             if yolo_status == "awake" and ear_status == "eyes_open":
                 main_status_text = "Awake & Eyes Open"
                 main_status_color = "#28a745"
@@ -417,26 +509,45 @@ class LivePage(QWidget):
                 main_status_color = "#6c757d"
             self.status_label.setStyleSheet(f"color: {main_status_color}; font-weight: bold;")
 
+        if result.duty_mode == DutyCycleController.WATCH and result.level != 'alarm':
+            main_status_text += " (Mode Hemat)"
         self.status_label.setText(f"Status: {main_status_text}")
 
-        # Kontrol alarm audio
-        if play_alarm and self.media_player.state() != QMediaPlayer.PlayingState:
-            self.media_player.play()
-            print("🔊 Alarm triggered!")
-        elif not play_alarm and self.media_player.state() == QMediaPlayer.PlayingState:
-            self.media_player.stop()
-            print("🔇 Alarm stopped.")
-
-        self._update_counts_display() 
-
         # Tampilkan frame ke QLabel
-        h, w, ch = annotated_frame.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(annotated_frame.data, w, h, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-        
-        scaled_pixmap = QPixmap.fromImage(qt_image).scaled(self.image_label.size(), 
-                                                           Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.image_label.setPixmap(scaled_pixmap)
+        with tracer.span('display', source_frame=result.frame_id):
+            annotated_frame = result.frame
+            h, w, ch = annotated_frame.shape
+            bytes_per_line = ch * w
+            # Format BGR langsung (Qt >= 5.14): tanpa salinan rgbSwapped(); QPixmap.fromImage menyalin sekali
+            qt_image = QImage(annotated_frame.data, w, h, bytes_per_line, QImage.Format_BGR888)
+
+            scaled_pixmap = QPixmap.fromImage(qt_image).scaled(self.image_label.size(),
+                                                               Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.image_label.setPixmap(scaled_pixmap)
+
+    def _toggle_tracing(self, checked):
+        """Mengaktifkan/menonaktifkan tracing latensi dari GUI."""
+        if checked:
+            tracer.enable()
+        else:
+            tracer.disable()
+        self.dump_trace_button.setEnabled(checked)
+
+    def _update_ocular_display(self, detection_results):
+        """Memperbarui label PERCLOS dan kedipan (nilai '-' sampai data jendela cukup)."""
+        perclos_1m = detection_results.get('perclos_1m')
+        perclos_3m = detection_results.get('perclos_3m')
+        self.perclos_label.setText(
+            f"PERCLOS 1m/3m: {f'{perclos_1m:.0%}' if perclos_1m is not None else '-'} / "
+            f"{f'{perclos_3m:.0%}' if perclos_3m is not None else '-'}"
+        )
+        blink_rate = detection_results.get('blink_rate')
+        blink_duration = detection_results.get('blink_duration_ms')
+        self.blink_label.setText(
+            f"Kedipan: {detection_results.get('blink_count', 0)}"
+            + (f" ({blink_rate:.0f}/menit" if blink_rate is not None else " (-/menit")
+            + (f", {blink_duration:.0f} ms)" if blink_duration is not None else ")")
+        )
 
     def _update_counts_display(self):
         """Memperbarui label hitungan di UI."""
@@ -445,28 +556,6 @@ class LivePage(QWidget):
         self.yawn_count_label.setText(f"Menguap: {self.current_yawn_count}")
         # Jarak sudah diupdate langsung di update_frame
 
-    def _handle_media_status_changed(self, status):
-        """Callback untuk memutar ulang alarm jika selesai."""
-        if status == QMediaPlayer.EndOfMedia:
-            if self.is_detecting: 
-                current_time = time.time()
-                # Periksa apakah ada alarm yang masih harus aktif
-                is_microsleep_alarm_active = (
-                    self.microsleep_start_time is not None and 
-                    (current_time - self.microsleep_start_time) >= self.MICROSLEEP_ALARM_THRESHOLD_SECONDS
-                )
-                is_drowsy_alarm_active = (
-                    self.drowsy_start_time is not None and 
-                    (current_time - self.drowsy_start_time) >= self.DROWSY_ALARM_THRESHOLD_SECONDS
-                )
-                is_yawn_alarm_active = (
-                    self.yawn_start_time is not None and
-                    (current_time - self.yawn_start_time) >= self.YAWN_ALARM_THRESHOLD_SECONDS
-                )
-                
-                if is_microsleep_alarm_active or is_drowsy_alarm_active or is_yawn_alarm_active:
-                    self.media_player.play()
-
     def showEvent(self, event):
         super().showEvent(event)
 
@@ -0,0 +1,284 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QImage, QPainter, QColor, QPen, QFont
+from PyQt5.QtCore import Qt, QObject, QRectF, pyqtSignal
+
+from core.map_tiles import TILE_SIZE, MapTileCache, fit_zoom, project, unproject, world_size
+
+GRATICULE_STEPS = (30, 10, 5, 2, 1, 0.5, 0.2, 0.1, 0.05, 0.02, 0.01, 0.005, 0.002, 0.001)
+
+
+def tile_to_qimage(tile):
+    """Tile BGRA numpy -> QImage (disalin, sehingga array boleh dibuang). None untuk tile kosong."""
+    if tile is None:
+        return None
+    height, width = tile.shape[:2]
+    # Gambar cv2 dengan LINE_AA di atas latar alpha 0 sudah berupa warna premultiplied
+    return QImage(tile.data, width, height, 4 * width, QImage.Format_ARGB32_Premultiplied).copy()
+
+
+class _TileSignals(QObject):
+    tile_ready = pyqtSignal(object, object) # (indeks layer, z, x, y), QImage atau None
+
+
+class TileRenderWorker:
+    """
+    Satu thread latar yang memuat tile dari cache disk atau merendernya (lalu menyimpannya).
+    Antrean diganti seluruhnya setiap kali tampilan berubah, sehingga tile yang sudah
+    digeser keluar layar tidak pernah dikerjakan.
+    """
+
+    def __init__(self, layers, cache):
+        self.layers = layers
+        self.cache = cache
+        self.signals = _TileSignals()
+        self.rendered = 0
+        self.loaded = 0
+        self.render_ms = 0.0
+        self._condition = threading.Condition()
+        self._queue = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="map-tiles", daemon=True)
+        self._thread.start()
+
+    def submit(self, keys):
+        """keys: daftar (indeks layer, z, x, y) yang dibutuhkan, urut prioritas."""
+        with self._condition:
+            self._queue = list(keys)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _run(self):
+        # Versi lama (data sudah berubah) dibuang sekali di awal, bukan di thread GUI
+        for layer in self.layers:
+            self.cache.prune(layer.name, layer.version)
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                key = self._queue.pop(0)
+            layer_index, zoom, tx, ty = key
+            layer = self.layers[layer_index]
+            try:
+                found, tile = self.cache.load(layer.name, layer.version, zoom, tx, ty)
+                if found:
+                    self.loaded += 1
+                else:
+                    started = time.perf_counter()
+                    tile = layer.render_tile(zoom, tx, ty)
+                    self.render_ms += (time.perf_counter() - started) * 1000
+                    self.rendered += 1
+                    self.cache.store(layer.name, layer.version, zoom, tx, ty, tile)
+                image = tile_to_qimage(tile)
+            except Exception as e:
+                print(f"❌ Map tile {layer.name} {zoom}/{tx}/{ty} failed: {e}")
+                continue
+            self.signals.tile_ready.emit(key, image)
+
+
+class MapView(QWidget):
+    """
+    Peta offline berbasis tile (proyeksi Web Mercator) untuk satu atau beberapa layer core.map_tiles.
+    Tanpa peta dasar/jaringan: hanya garis lintang-bujur sebagai acuan.
+    Roda mouse = zoom di sekitar kursor, seret = geser, klik ganda = tampilkan semua data.
+    Tile dirender thread latar, disimpan di cache disk per zoom, dan ~MAX_MEMORY_TILES terakhir
+    disimpan di memori; selama tile dimuat, tile induk (zoom lebih rendah) diregangkan sebagai pratinjau.
+    """
+    MIN_ZOOM = 2
+    MAX_ZOOM = 18
+    MAX_MEMORY_TILES = 256
+    FALLBACK_LEVELS = 4
+
+    def __init__(self, layers, cache=None, parent=None):
+        super().__init__(parent)
+        self.layers = list(layers)
+        self.cache = cache or MapTileCache()
+        self.setMinimumSize(400, 300)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMouseTracking(False)
+
+        self.zoom = self.MIN_ZOOM
+        self.center = (world_size(self.zoom) / 2.0, world_size(self.zoom) / 2.0) # piksel dunia
+        self._tiles = OrderedDict() # (indeks layer, z, x, y) -> QImage/None, urutan LRU
+        self._drag_pos = None
+        self._fitted = False
+
+        self.worker = TileRenderWorker(self.layers, self.cache)
+        self.worker.signals.tile_ready.connect(self._on_tile_ready)
+
+    def shutdown(self):
+        self.worker.close()
+
+    @property
+    def is_empty(self):
+        return all(layer.is_empty for layer in self.layers)
+
+    # --- Tampilan ---
+
+    def fit_to_data(self):
+        bounds = [b for b in (layer.bounds() for layer in self.layers) if b]
+        if not bounds:
+            return
+        merged = (min(b[0] for b in bounds), min(b[1] for b in bounds),
+                  max(b[2] for b in bounds), max(b[3] for b in bounds))
+        zoom, latitude, longitude = fit_zoom(merged, self.width(), self.height(), self.MIN_ZOOM, self.MAX_ZOOM - 2)
+        x, y = project(latitude, longitude, zoom)
+        self._set_view(zoom, (float(x), float(y)))
+
+    def _set_view(self, zoom, center):
+        size = world_size(zoom)
+        self.zoom = zoom
+        self.center = (min(max(center[0], 0.0), size), min(max(center[1], 0.0), size))
+        self.update()
+        self._request_tiles()
+
+    def _top_left(self):
+        return self.center[0] - self.width() / 2.0, self.center[1] - self.height() / 2.0
+
+    def _visible_tiles(self):
+        left, top = self._top_left()
+        last = 2 ** self.zoom - 1
+        x0, x1 = max(0, int(left // TILE_SIZE)), min(last, int((left + self.width()) // TILE_SIZE))
+        y0, y1 = max(0, int(top // TILE_SIZE)), min(last, int((top + self.height()) // TILE_SIZE))
+        cx, cy = self.center[0] / TILE_SIZE - 0.5, self.center[1] / TILE_SIZE - 0.5
+        tiles = [(tx, ty) for tx in range(x0, x1 + 1) for ty in range(y0, y1 + 1)]
+        tiles.sort(key=lambda t: (t[0] - cx) ** 2 + (t[1] - cy) ** 2) # Tengah layar lebih dulu
+        return tiles
+
+    def _request_tiles(self):
+        missing = [(index, self.zoom, tx, ty)
+                   for tx, ty in self._visible_tiles()
+                   for index in range(len(self.layers))
+                   if (index, self.zoom, tx, ty) not in self._tiles]
+        self.worker.submit(missing)
+
+    def _on_tile_ready(self, key, image):
+        self._tiles[key] = image
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.MAX_MEMORY_TILES:
+            self._tiles.popitem(last=False)
+        if key[1] == self.zoom:
+            self.update()
+
+    def _fallback(self, index, tx, ty):
+        """Tile induk terdekat di memori beserta sub-rektangle sumber yang menutupi tile (tx, ty)."""
+        for levels in range(1, min(self.FALLBACK_LEVELS, self.zoom) + 1):
+            key = (index, self.zoom - levels, tx >> levels, ty >> levels)
+            if key in self._tiles:
+                image = self._tiles[key]
+                if image is None:
+                    return None, None
+                scale = 2 ** levels
+                part = TILE_SIZE / scale
+                source = QRectF((tx % scale) * part, (ty % scale) * part, part, part)
+                return image, source
+        return None, None
+
+    # --- Event Qt ---
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._fitted:
+            self._fitted = True
+            self.fit_to_data()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._request_tiles()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#f4f3ef"))
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        self._draw_graticule(painter)
+        left, top = self._top_left()
+        visible = self._visible_tiles()
+        for index in range(len(self.layers)):
+            for tx, ty in visible:
+                target = QRectF(tx * TILE_SIZE - left, ty * TILE_SIZE - top, TILE_SIZE, TILE_SIZE)
+                key = (index, self.zoom, tx, ty)
+                if key in self._tiles:
+                    self._tiles.move_to_end(key)
+                    if self._tiles[key] is not None:
+                        painter.drawImage(target, self._tiles[key])
+                else:
+                    image, source = self._fallback(index, tx, ty)
+                    if image is not None:
+                        painter.drawImage(target, image, source)
+
+        painter.setPen(QColor("#6c757d"))
+        painter.setFont(QFont('Arial', 8))
+        if self.is_empty:
+            painter.drawText(self.rect(), Qt.AlignCenter, "Belum ada kejadian atau jejak GPS untuk ditampilkan.")
+        stats = f"zoom {self.zoom} · {self.worker.rendered} tile dirender"
+        if self.worker.rendered:
+            stats += f" ({self.worker.render_ms / self.worker.rendered:.1f} ms/tile)"
+        stats += f" · {self.worker.loaded} dari cache"
+        painter.drawText(self.rect().adjusted(0, 0, -8, -4), Qt.AlignRight | Qt.AlignBottom, stats)
+
+    def _draw_graticule(self, painter):
+        left, top = self._top_left()
+        degrees_per_px = 360.0 / world_size(self.zoom)
+        step = next((s for s in reversed(GRATICULE_STEPS) if s / degrees_per_px >= 120), GRATICULE_STEPS[0])
+        decimals = max(0, -int(math.floor(math.log10(step))))
+        max_lat, min_lon = unproject(left, max(top, 0.0), self.zoom)
+        min_lat, max_lon = unproject(left + self.width(), min(top + self.height(), world_size(self.zoom)), self.zoom)
+        painter.setFont(QFont('Arial', 7))
+        pen = QPen(QColor("#d9d7cf"))
+
+        lon = math.ceil(min_lon / step) * step
+        while lon <= max_lon:
+            x = float(project(0.0, lon, self.zoom)[0]) - left
+            painter.setPen(pen)
+            painter.drawLine(int(x), 0, int(x), self.height())
+            painter.setPen(QColor("#9a978c"))
+            painter.drawText(int(x) + 3, self.height() - 4, f"{lon:.{decimals}f}°")
+            lon += step
+        lat = math.ceil(min_lat / step) * step
+        while lat <= max_lat:
+            y = float(project(lat, 0.0, self.zoom)[1]) - top
+            painter.setPen(pen)
+            painter.drawLine(0, int(y), self.width(), int(y))
+            painter.setPen(QColor("#9a978c"))
+            painter.drawText(3, int(y) - 3, f"{lat:.{decimals}f}°")
+            lat += step
+
+    def wheelEvent(self, event):
+        steps = 1 if event.angleDelta().y() > 0 else -1
+        zoom = min(max(self.zoom + steps, self.MIN_ZOOM), self.MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        # Titik dunia di bawah kursor tetap di bawah kursor setelah zoom
+        left, top = self._top_left()
+        cursor_x, cursor_y = left + event.pos().x(), top + event.pos().y()
+        factor = 2.0 ** (zoom - self.zoom)
+        center = (cursor_x * factor - event.pos().x() + self.width() / 2.0,
+                  cursor_y * factor - event.pos().y() + self.height() / 2.0)
+        self._set_view(zoom, center)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_pos = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_pos is None:
+            return
+        delta = event.pos() - self._drag_pos
+        self._drag_pos = event.pos()
+        self._set_view(self.zoom, (self.center[0] - delta.x(), self.center[1] - delta.y()))
+
+    def mouseReleaseEvent(self, event):
+        self._drag_pos = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit_to_data()
@@ -0,0 +1,99 @@
+import threading
+
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QListWidget
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+
+from core.status_feed import StatusFeedClient
+
+
+class RemoteStatusPage(QWidget):
+    """
+    Viewer ringan untuk layanan deteksi headless (service.py).
+    Tidak memuat model apa pun; hanya membaca feed status melalui socket lokal.
+    """
+    message_received = pyqtSignal(dict)
+    MAX_EVENT_ROWS = 200
+
+    LEVEL_COLORS = {
+        'alarm': "#dc3545",   # Merah
+        'warning': "#ffc107", # Kuning
+        'normal': "#28a745",  # Hijau
+    }
+
+    def __init__(self, address=None):
+        super().__init__()
+        self.address = address
+        self.client = None
+        self.message_received.connect(self._handle_message)
+        self.init_ui()
+        self._connect()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        header_label = QLabel("Viewer Layanan Deteksi")
+        header_label.setFont(QFont('Arial', 18, QFont.Bold))
+        header_label.setAlignment(Qt.AlignCenter)
+        header_label.setStyleSheet("margin-bottom: 15px; color: #333;")
+        layout.addWidget(header_label)
+
+        self.status_label = QLabel("Status: Menghubungkan...")
+        self.status_label.setFont(QFont('Arial', 16, QFont.Bold))
+        self.status_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.status_label)
+
+        self.info_label = QLabel("-")
+        self.info_label.setFont(QFont('Arial', 11))
+        layout.addWidget(self.info_label)
+
+        self.event_list = QListWidget()
+        self.event_list.setFont(QFont('Arial', 10))
+        layout.addWidget(self.event_list)
+        self.setLayout(layout)
+
+    def _connect(self):
+        try:
+            self.client = StatusFeedClient(self.address)
+        except OSError as e:
+            self.status_label.setText(f"Status: Gagal terhubung ({e})")
+            self.status_label.setStyleSheet("color: #dc3545;")
+            return
+        threading.Thread(target=self._read_loop, name="feed-viewer", daemon=True).start()
+
+    def _read_loop(self):
+        for message in self.client.messages():
+            self.message_received.emit(message) # Diantrekan ke thread GUI
+        self.message_received.emit({'type': 'disconnected'})
+
+    def _handle_message(self, message):
+        kind = message.get('type')
+        if kind == 'status':
+            level = message.get('level', 'normal')
+            text = message.get('status_type') or f"{message.get('yolo_status')} / {message.get('ear_status')}"
+            self.status_label.setText(f"Status: {text} ({level})")
+            self.status_label.setStyleSheet(f"color: {self.LEVEL_COLORS.get(level, '#555')}; font-weight: bold;")
+            counts = message.get('counts', {})
+            avg_ear = message.get('avg_ear')
+            self.info_label.setText(
+                f"Sesi: {message.get('session_id')} | EAR: {avg_ear if avg_ear is not None else '-'} | "
+                f"Drowsy: {counts.get('drowsy', 0)} | Microsleep: {counts.get('microsleep', 0)} | "
+                f"Menguap: {counts.get('yawn', 0)} | Jarak: {message.get('distance_km', 0.0):.2f} km | "
+                f"Mode: {message.get('duty_mode')} | PERCLOS 1m: "
+                + (f"{message['perclos_1m']:.0%}" if message.get('perclos_1m') is not None else "-")
+            )
+        elif kind == 'event':
+            self.event_list.insertItem(0, f"[{message.get('kind')}] {message.get('status_type') or ''} {message.get('info') or ''}")
+            while self.event_list.count() > self.MAX_EVENT_ROWS:
+                self.event_list.takeItem(self.event_list.count() - 1)
+        elif kind == 'session':
+            self.event_list.insertItem(0, f"[session] {message.get('state')} #{message.get('session_id')}")
+        elif kind == 'disconnected':
+            self.status_label.setText("Status: Koneksi ke layanan terputus.")
+            self.status_label.setStyleSheet("color: #6c757d;")
+
+    def closeEvent(self, event):
+        if self.client:
+            self.client.close()
+        super().closeEvent(event)
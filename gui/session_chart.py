@@ -0,0 +1,307 @@
+import threading
+import time
+from datetime import datetime
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QImage, QPainter, QColor, QPen, QFont
+from PyQt5.QtCore import Qt, QObject, QPointF, QLineF, QRectF, pyqtSignal
+
+from core.session_metrics import SessionMetricsRecorder
+from db import database
+
+EVENT_COLORS = {
+    'microsleep': QColor("#dc3545"), # Merah
+    'drowsy': QColor("#fd7e14"),     # Oranye
+    'yawn': QColor("#007bff"),       # Biru
+}
+EAR_AXIS_MAX = 0.45
+TIME_TICK_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600)
+
+# Tata letak gambar grafik (piksel)
+MARGIN_LEFT = 48
+MARGIN_RIGHT = 12
+MARGIN_TOP = 8
+MARGIN_BOTTOM = 22
+PANEL_GAP = 18
+
+
+def plot_width(width):
+    return max(1, width - MARGIN_LEFT - MARGIN_RIGHT)
+
+
+def _connected_segments(points, max_gap):
+    """Garis antar titik berurutan yang indeks bucket-nya tidak berjarak lebih dari max_gap (celah data tidak disambung)."""
+    return [QLineF(QPointF(x0, y0), QPointF(x1, y1))
+            for (b0, x0, y0), (b1, x1, y1) in zip(points, points[1:]) if b1 - b0 <= max_gap]
+
+
+def render_session_chart(width, height, view_start, view_end, buckets, events, ear_threshold=None):
+    """
+    Menggambar grafik EAR (amplop min/max per piksel) dan PERCLOS 1 menit beserta penanda kejadian
+    ke QImage. Aman dipanggil di thread non-GUI. buckets: hasil fetch_session_metric_buckets dengan
+    bucket_count = plot_width(width); events: [(t, status_type)].
+    """
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor("#ffffff"))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing, False)
+    font = QFont('Arial', 8)
+    painter.setFont(font)
+
+    pw = plot_width(width)
+    plot_height = height - MARGIN_TOP - MARGIN_BOTTOM - PANEL_GAP
+    ear_rect = QRectF(MARGIN_LEFT, MARGIN_TOP, pw, plot_height * 0.6)
+    perclos_rect = QRectF(MARGIN_LEFT, ear_rect.bottom() + PANEL_GAP, pw, plot_height * 0.4)
+    span = max(view_end - view_start, 1e-6)
+    perclos_max = max([0.3] + [b['perclos'] for b in buckets if b['perclos'] is not None])
+
+    ear_y = lambda v: ear_rect.bottom() - min(v, EAR_AXIS_MAX) / EAR_AXIS_MAX * ear_rect.height()
+    perclos_y = lambda v: perclos_rect.bottom() - v / perclos_max * perclos_rect.height()
+
+    # Bingkai panel & label sumbu
+    painter.setPen(QPen(QColor("#dddddd")))
+    painter.drawRect(ear_rect)
+    painter.drawRect(perclos_rect)
+    painter.setPen(QColor("#555555"))
+    painter.drawText(QRectF(0, ear_rect.top(), MARGIN_LEFT - 4, 12), Qt.AlignRight, f"{EAR_AXIS_MAX:.2f}")
+    painter.drawText(QRectF(0, ear_rect.bottom() - 12, MARGIN_LEFT - 4, 12), Qt.AlignRight, "0")
+    painter.drawText(QRectF(0, ear_rect.center().y() - 6, MARGIN_LEFT - 4, 12), Qt.AlignRight, "EAR")
+    painter.drawText(QRectF(0, perclos_rect.top(), MARGIN_LEFT - 4, 12), Qt.AlignRight, f"{perclos_max:.0%}")
+    painter.drawText(QRectF(0, perclos_rect.bottom() - 12, MARGIN_LEFT - 4, 12), Qt.AlignRight, "0%")
+    painter.drawText(QRectF(0, perclos_rect.center().y() - 6, MARGIN_LEFT - 4, 12), Qt.AlignRight, "PERCLOS")
+
+    # Sumbu waktu: langkah tick terkecil dengan jarak >= 80 px
+    step = next((s for s in TIME_TICK_STEPS if s / span * pw >= 80), TIME_TICK_STEPS[-1])
+    time_format = "%H:%M:%S" if step < 60 else "%H:%M"
+    tick = (int(view_start) // step + 1) * step
+    painter.setPen(QPen(QColor("#eeeeee")))
+    ticks = []
+    while tick < view_end:
+        x = MARGIN_LEFT + (tick - view_start) / span * pw
+        ticks.append((x, tick))
+        painter.drawLine(QLineF(x, ear_rect.top(), x, perclos_rect.bottom()))
+        tick += step
+    painter.setPen(QColor("#555555"))
+    for x, t in ticks:
+        painter.drawText(QRectF(x - 40, perclos_rect.bottom() + 4, 80, 14), Qt.AlignHCenter,
+                         datetime.fromtimestamp(t).strftime(time_format))
+
+    if ear_threshold is not None:
+        pen = QPen(QColor("#dc3545"))
+        pen.setStyle(Qt.DashLine)
+        painter.setPen(pen)
+        y = ear_y(ear_threshold)
+        painter.drawLine(QLineF(ear_rect.left(), y, ear_rect.right(), y))
+
+    # Penanda kejadian di bawah kurva
+    for t, status_type in events:
+        if view_start <= t < view_end:
+            x = MARGIN_LEFT + (t - view_start) / span * pw
+            painter.setPen(QPen(EVENT_COLORS.get(status_type, QColor("#6c757d")), 1))
+            painter.drawLine(QLineF(x, ear_rect.top(), x, perclos_rect.bottom()))
+
+    # Saat diperbesar melebihi resolusi data, bucket berisi menjadi jarang: sambungkan hanya tetangga
+    px_per_sample = pw / (span * SessionMetricsRecorder.SAMPLE_HZ)
+    max_gap = max(1, int(px_per_sample * 2.5))
+
+    envelope = []
+    ear_mid = []
+    perclos_points = []
+    for b in buckets:
+        x = MARGIN_LEFT + b['bucket'] + 0.5
+        if b['ear_min'] is not None:
+            y_min, y_max = ear_y(b['ear_min']), ear_y(b['ear_max'])
+            envelope.append(QLineF(x, y_max, x, y_min + 1))
+            ear_mid.append((b['bucket'], x, (y_min + y_max) / 2))
+        if b['perclos'] is not None:
+            perclos_points.append((b['bucket'], x, perclos_y(b['perclos'])))
+
+    painter.setPen(QPen(QColor("#17a2b8"), 1))
+    painter.drawLines(envelope)
+    if px_per_sample > 1:
+        painter.drawLines(_connected_segments(ear_mid, max_gap))
+    painter.setPen(QPen(QColor("#6f42c1"), 1.5))
+    painter.drawLines(_connected_segments(perclos_points, max_gap))
+
+    # Legenda
+    x = ear_rect.right() - 250
+    for status_type, color in EVENT_COLORS.items():
+        painter.fillRect(QRectF(x, ear_rect.top() + 4, 10, 10), color)
+        painter.setPen(QColor("#333333"))
+        painter.drawText(QRectF(x + 14, ear_rect.top() + 2, 70, 14), Qt.AlignLeft, status_type)
+        x += 84
+    painter.end()
+    return image
+
+
+class _RenderSignals(QObject):
+    rendered = pyqtSignal(int, QImage, str) # generasi, gambar, teks statistik
+
+
+class ChartRenderWorker:
+    """
+    Satu thread latar untuk query bucket + render QImage. Hanya permintaan terbaru yang dikerjakan,
+    sehingga zoom/geser cepat tidak menumpuk antrean. Hasil dikirim lewat sinyal Qt (antrean ke thread GUI).
+    """
+
+    def __init__(self):
+        self.signals = _RenderSignals()
+        self._condition = threading.Condition()
+        self._request = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="chart-render", daemon=True)
+        self._thread.start()
+
+    def submit(self, request):
+        with self._condition:
+            self._request = request
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                request, self._request = self._request, None
+            generation, session_id, view_start, view_end, width, height, events, ear_threshold = request
+            try:
+                started = time.perf_counter()
+                buckets = database.fetch_session_metric_buckets(session_id, view_start, view_end, plot_width(width))
+                queried = time.perf_counter()
+                image = render_session_chart(width, height, view_start, view_end, buckets, events, ear_threshold)
+                rendered = time.perf_counter()
+            except Exception as e:
+                print(f"❌ Chart render failed: {e}")
+                continue
+            stats = (f"{sum(b['samples'] for b in buckets):,} sampel → {len(buckets)} bucket · "
+                     f"query {(queried - started) * 1000:.0f} ms · render {(rendered - queried) * 1000:.0f} ms")
+            self.signals.rendered.emit(generation, image, stats)
+
+
+class SessionChartWidget(QWidget):
+    """
+    Grafik EAR, PERCLOS, dan penanda kejadian sepanjang sesi.
+    Roda mouse = zoom di sekitar kursor, seret = geser, klik ganda = seluruh sesi.
+    Setiap perubahan tampilan me-query ulang hanya rentang yang terlihat dengan satu bucket
+    per piksel; paintEvent hanya menyalin gambar yang sudah dirender thread latar.
+    """
+    MIN_VIEW_SECONDS = 10.0
+    ZOOM_STEP = 0.8 # per takik roda mouse
+
+    def __init__(self, session_id, events, ear_threshold=None, parent=None):
+        super().__init__(parent)
+        self.session_id = session_id
+        self.events = events
+        self.ear_threshold = ear_threshold
+        self.setMinimumHeight(320)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        span = database.fetch_session_metric_span(session_id)
+        self.full_range = (span['t_min'], span['t_max'] + 1.0 / SessionMetricsRecorder.SAMPLE_HZ) if span else None
+        self.view = self.full_range
+        self._image = None
+        self._image_view = None # rentang waktu gambar saat ini (untuk pratinjau saat menunggu render)
+        self._stats = ""
+        self._generation = 0
+        self._drag_x = None
+
+        self.worker = ChartRenderWorker()
+        self.worker.signals.rendered.connect(self._on_rendered)
+
+    def shutdown(self):
+        self.worker.close()
+
+    # --- Permintaan render ---
+
+    def _request_render(self):
+        if not self.view or self.width() <= MARGIN_LEFT + MARGIN_RIGHT:
+            return
+        self._generation += 1
+        self.worker.submit((self._generation, self.session_id, self.view[0], self.view[1],
+                            self.width(), self.height(), self.events, self.ear_threshold))
+
+    def _on_rendered(self, generation, image, stats):
+        if generation != self._generation:
+            return # Hasil usang, sudah ada permintaan yang lebih baru
+        self._image = image
+        self._image_view = self.view
+        self._stats = stats
+        self.update()
+
+    def _set_view(self, start, end):
+        full_start, full_end = self.full_range
+        span = min(max(end - start, self.MIN_VIEW_SECONDS), full_end - full_start)
+        start = min(max(start, full_start), full_end - span)
+        self.view = (start, start + span)
+        self.update()
+        self._request_render()
+
+    # --- Event Qt ---
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._request_render()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#ffffff"))
+        if not self.view:
+            painter.setPen(QColor("#6c757d"))
+            painter.drawText(self.rect(), Qt.AlignCenter, "Belum ada data grafik untuk sesi ini.")
+            return
+        if self._image is not None:
+            if self._image_view == self.view:
+                painter.drawImage(0, 0, self._image)
+            else:
+                # Pratinjau: regangkan/geser gambar lama ke rentang baru sampai render baru tiba
+                pw = plot_width(self.width())
+                old_start, old_end = self._image_view
+                scale = (old_end - old_start) / (self.view[1] - self.view[0])
+                offset = (old_start - self.view[0]) / (self.view[1] - self.view[0]) * pw
+                painter.save()
+                painter.setClipRect(MARGIN_LEFT, 0, pw, self.height())
+                painter.translate(MARGIN_LEFT + offset, 0)
+                painter.scale(scale, 1.0)
+                painter.drawImage(QPointF(-MARGIN_LEFT, 0), self._image)
+                painter.restore()
+        painter.setPen(QColor("#6c757d"))
+        painter.setFont(QFont('Arial', 8))
+        painter.drawText(self.rect().adjusted(0, 0, -MARGIN_RIGHT, -2), Qt.AlignRight | Qt.AlignBottom, self._stats)
+
+    def wheelEvent(self, event):
+        if not self.view:
+            return
+        steps = event.angleDelta().y() / 120.0
+        factor = self.ZOOM_STEP ** steps
+        start, end = self.view
+        fraction = min(max((event.pos().x() - MARGIN_LEFT) / plot_width(self.width()), 0.0), 1.0)
+        cursor_t = start + fraction * (end - start)
+        new_span = (end - start) * factor
+        self._set_view(cursor_t - fraction * new_span, cursor_t + (1 - fraction) * new_span)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = event.pos().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None or not self.view:
+            return
+        dx = event.pos().x() - self._drag_x
+        self._drag_x = event.pos().x()
+        start, end = self.view
+        shift = -dx / plot_width(self.width()) * (end - start)
+        self._set_view(start + shift, end + shift)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        if self.full_range:
+            self._set_view(*self.full_range)
@@ -1,17 +1,22 @@
 import sys
+import argparse
 from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget
 from PyQt5.QtCore import Qt
 
-# Import halaman-halaman GUI
-from gui.home import HomePage
-from gui.live import LivePage
-from gui.history import HistoryPage
-
 from db import database
+from core.tracing import tracer
+from core.status_feed import default_feed_address
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, args=None):
         super().__init__()
+        self.args = args
+
+        # Import halaman-halaman GUI (di sini agar mode --attach tidak memuat model deteksi)
+        from gui.home import HomePage
+        from gui.live import LivePage
+        from gui.history import HistoryPage
+
         self.setWindowTitle("Drowsiness Detection System")
         self.setGeometry(100, 100, 1200, 800)
 
@@ -22,7 +27,7 @@ class MainWindow(QMainWindow):
 
         # Inisialisasi halaman-halaman
         self.home_page = HomePage(self)
-        self.live_page = LivePage(self)
+        self.live_page = LivePage(self, trace_dir=getattr(args, 'record_trace', None))
         self.history_page = HistoryPage(self)
 
         # Tambahkan halaman ke stacked widget
@@ -59,19 +64,51 @@ class MainWindow(QMainWindow):
 
         if self.live_page.is_detecting:
             self.live_page.stop_detection()
+        self.live_page.alarm_audio.close()
+        self.live_page.evidence.close()
+        self.live_page.thumbnails.close()
+        if self.live_page.pipeline.harvester:
+            self.live_page.pipeline.harvester.close()
+        if self.live_page.live_view:
+            self.live_page.live_view.detach(self.live_page.bus)
+            self.live_page.live_view.stop()
         
         super().closeEvent(event)
         event.accept()
 
 
+def parse_args():
+    """Argumen aplikasi; argumen yang tidak dikenal diteruskan ke Qt."""
+    parser = argparse.ArgumentParser(description="Driver Drowsiness Early Warning System")
+    parser.add_argument('--record-trace', metavar='DIR',
+                        help="Rekam hasil deteksi per frame ke DIR untuk replay (tools/replay_alerts.py)")
+    parser.add_argument('--trace', action='store_true',
+                        help="Aktifkan tracing latensi per frame (format Chrome trace-event)")
+    parser.add_argument('--trace-dir', default='traces', metavar='DIR',
+                        help="Folder tujuan dump trace latensi (default: traces)")
+    parser.add_argument('--attach', nargs='?', const=default_feed_address(), metavar='ADDRESS',
+                        help="Buka viewer ringan untuk layanan headless (service.py) alih-alih deteksi lokal")
+    return parser.parse_known_args()
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args()
+    tracer.output_dir = args.trace_dir
+    if args.trace:
+        tracer.enable()
+    app = QApplication(sys.argv[:1] + qt_args)
     
     # Atur font default aplikasi
     font = QApplication.font()
     font.setPointSize(10)
     app.setFont(font)
 
-    main_window = MainWindow()
+    if args.attach:
+        from gui.remote import RemoteStatusPage
+        main_window = RemoteStatusPage(args.attach)
+        main_window.setWindowTitle("Drowsiness Detection System - Viewer Layanan")
+        main_window.resize(800, 600)
+    else:
+        main_window = MainWindow(args)
     main_window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Entry point layanan deteksi tanpa GUI (untuk unit in-cab tanpa layar).
+
+    python service.py --camera 0
+    python service.py --attach              # tampilkan feed status layanan yang sedang berjalan
+    python main.py --attach                 # viewer PyQt ringan untuk layanan yang sama
+"""
+import sys
+import signal
+import argparse
+
+from core.status_feed import StatusFeedClient, default_feed_address
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless drowsiness detection service")
+    parser.add_argument('--camera', default='0', help="Index kamera, file video, atau URL RTSP/HTTP (default: 0)")
+    parser.add_argument('--loop', action='store_true', help="Putar file video berulang (uji soak)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Kecepatan putar file video dengan --loop (default 1.0)")
+    parser.add_argument('--feed', default=default_feed_address(),
+                        help="Alamat feed status: unix:/path.sock atau tcp:host:port")
+    parser.add_argument('--audio-device', default=None, help="Perangkat audio alarm ('null' = tanpa suara)")
+    parser.add_argument('--max-frames', type=int, default=None, help="Berhenti setelah N frame")
+    parser.add_argument('--trace', action='store_true', help="Aktifkan tracing latensi per frame")
+    parser.add_argument('--trace-dir', default='traces', metavar='DIR')
+    parser.add_argument('--harvest-dir', default=None, metavar='DIR',
+                        help="Kumpulkan hard example (YOLO vs EAR tidak sepakat / confidence di tepi ambang) ke DIR")
+    parser.add_argument('--harvest-quota-mb', type=float, default=None, help="Kuota disk hard example (default 2000)")
+    parser.add_argument('--live-port', type=int, default=None,
+                        help="Jalankan live view MJPEG/WebSocket di port ini (mis. 8080)")
+    parser.add_argument('--live-host', default='127.0.0.1', help="Alamat live view (0.0.0.0 = semua antarmuka)")
+    parser.add_argument('--live-fps', type=float, default=None, help="Batas fps stream (default 10)")
+    parser.add_argument('--live-max-kbps', type=float, default=None, help="Batas bandwidth total semua viewer (default 4000)")
+    parser.add_argument('--live-cpu-budget', type=float, default=None,
+                        help="Fraksi satu core untuk encoding JPEG (default 0.15)")
+    parser.add_argument('--no-refine', action='store_true', help="FaceMesh tanpa refine_landmarks (lebih ringan)")
+    parser.add_argument('--facemesh-max-width', type=int, default=None, help="Perkecil input FaceMesh ke lebar ini")
+    parser.add_argument('--roi-tracking', action='store_true', help="FaceMesh pada potongan wajah frame sebelumnya")
+    parser.add_argument('--attach', action='store_true', help="Jangan jalankan layanan; cetak feed status")
+    return parser.parse_args()
+
+
+def attach(address):
+    """Klien teks sederhana: mencetak setiap pesan dari feed status."""
+    try:
+        client = StatusFeedClient(address)
+    except OSError as e:
+        print(f"ERROR: Could not connect to {address}: {e}")
+        return 1
+    try:
+        for message in client.messages():
+            print(message)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+def main():
+    args = parse_args()
+    if args.attach:
+        return attach(args.feed)
+
+    # Impor detektor ditunda agar mode --attach tetap ringan
+    from core.live_server import LiveViewServer
+    from core.service import DetectionService
+    from core.tracing import tracer
+
+    tracer.output_dir = args.trace_dir
+    if args.trace:
+        tracer.enable()
+
+    camera_source = int(args.camera) if args.camera.isdigit() else args.camera
+    live_view = None
+    if args.live_port is not None:
+        live_view = LiveViewServer(args.live_host, args.live_port, max_fps=args.live_fps,
+                                   max_total_kbps=args.live_max_kbps, cpu_budget=args.live_cpu_budget)
+    service = DetectionService(camera_source, feed_address=args.feed, audio_device=args.audio_device,
+                               harvest_dir=args.harvest_dir, harvest_quota_mb=args.harvest_quota_mb,
+                               live_view=live_view)
+    service.loop_video = args.loop
+    service.video_speed = args.speed
+
+    if args.no_refine or args.facemesh_max_width or args.roi_tracking:
+        service.detector.configure_landmarks(not args.no_refine, args.facemesh_max_width, args.roi_tracking)
+
+    def handle_signal(signum, frame):
+        print(f"Received signal {signum}, stopping service...")
+        service.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    return 0 if service.run(max_frames=args.max_frames) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Modul dijalankan dari root repositori (python -m ...); pytest dijalankan dari mana saja
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# db.database menjalankan init_db saat diimpor: arahkan ke database sementara, bukan db/detection_history.db
+os.environ.setdefault('DETECTION_DB_PATH', os.path.join(tempfile.mkdtemp(prefix="ddews_tests_"), 'import.db'))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Modul db.database dengan database & journal baru di tmp_path."""
+    from db import database
+    monkeypatch.setattr(database, 'DB_PATH', tmp_path / 'detection.db')
+    monkeypatch.setattr(database, 'JOURNAL_PATH', str(tmp_path / 'detection.db.journal'))
+    database.init_db()
+    return database
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from core.event_bus import EventBus
+from core.frame_pool import FramePool
+
+Frame = namedtuple('Frame', ['frame_id', 'frame'])
+
+
+def payloads(subscription):
+    return [payload for _, payload in subscription.poll()]
+
+
+def test_drop_oldest_keeps_newest_messages():
+    bus = EventBus()
+    subscription = bus.subscribe('log', ['alert'], maxsize=3)
+    for i in range(5):
+        bus.publish('alert', i)
+    assert payloads(subscription) == [2, 3, 4]
+    assert subscription.stats() == {'received': 5, 'delivered': 3, 'dropped': 2, 'pending': 0}
+
+
+def test_drop_newest_keeps_oldest_messages():
+    bus = EventBus()
+    subscription = bus.subscribe('log', ['alert'], maxsize=3, policy='drop_newest')
+    for i in range(5):
+        bus.publish('alert', i)
+    assert payloads(subscription) == [0, 1, 2]
+    assert subscription.dropped == 2
+
+
+def test_coalesce_keeps_latest_per_topic():
+    bus = EventBus()
+    subscription = bus.subscribe('display', ['frame', 'pipeline'], policy='coalesce')
+    for i in range(4):
+        bus.publish('frame', i)
+    bus.publish('pipeline', 'started')
+    bus.publish('frame', 4)
+    bus.publish('other', 'ignored')
+    assert sorted(subscription.poll()) == [('frame', 4), ('pipeline', 'started')]
+    assert subscription.dropped == 4
+    assert subscription.poll() == []
+
+
+def test_callback_subscription_flush_and_close():
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe('db', ['alert'], callback=lambda topic, payload: received.append(payload), maxsize=100)
+    for i in range(50):
+        bus.publish('alert', i)
+    assert subscription.flush(timeout=5.0)
+    assert received == list(range(50))
+
+    bus.unsubscribe(subscription)
+    bus.publish('alert', 'late')
+    assert received == list(range(50))
+
+
+def test_callback_exception_does_not_stop_subscriber(capsys):
+    bus = EventBus()
+    received = []
+
+    def callback(topic, payload):
+        if payload == 1:
+            raise RuntimeError("boom")
+        received.append(payload)
+
+    subscription = bus.subscribe('fragile', ['alert'], callback=callback)
+    for i in range(3):
+        bus.publish('alert', i)
+    assert subscription.flush(timeout=5.0)
+    assert received == [0, 2]
+    assert "boom" in capsys.readouterr().out
+
+
+def test_invalid_policy_and_copy_frames_combinations():
+    bus = EventBus()
+    with pytest.raises(ValueError):
+        bus.subscribe('x', ['frame'], policy='lifo')
+    with pytest.raises(ValueError):
+        bus.subscribe('x', ['frame'], policy='drop_oldest', copy_frames=True)
+    with pytest.raises(ValueError):
+        bus.subscribe('x', ['frame', 'alert'], policy='coalesce', copy_frames=True)
+
+
+def test_copy_frames_detaches_payload_from_pool():
+    bus = EventBus()
+    pool = FramePool(size=2)
+    pool.ensure((4, 4, 3))
+    subscription = bus.subscribe('display', ['frame'], policy='coalesce', copy_frames=True)
+    source = pool.acquire()
+    source.fill(7)
+    bus.publish('frame', Frame(1, source))
+    (_, delivered), = subscription.poll()
+    assert delivered.frame_id == 1
+    assert delivered.frame is not source and not np.shares_memory(delivered.frame, source)
+    # Penerbit menimpa buffer pool: salinan milik pelanggan tidak berubah
+    source.fill(9)
+    for i in range(2, 10):
+        frame = pool.acquire()
+        frame.fill(i)
+        bus.publish('frame', Frame(i, frame))
+    assert (delivered.frame == 7).all()
+    (_, latest), = subscription.poll()
+    assert latest.frame_id == 9 and (latest.frame == 9).all()
+
+
+def test_copy_frames_held_frame_never_overwritten_by_publisher():
+    """Pelanggan lambat: frame yang sedang dibaca tidak tertimpa walau penerbit jauh melampaui POOL_SIZE."""
+    bus = EventBus()
+    pool = FramePool()
+    pool.ensure((8, 8, 3))
+    torn = []
+
+    def slow_reader(topic, result):
+        expected = result.frame_id % 256
+        time.sleep(0.002)
+        if not (result.frame == expected).all():
+            torn.append(result.frame_id)
+
+    subscription = bus.subscribe('evidence', ['frame'], callback=slow_reader, policy='coalesce', copy_frames=True)
+    for i in range(2000):
+        if i == 1000:
+            pool.ensure((16, 16, 3)) # Resolusi berubah di tengah jalan
+        frame = pool.acquire()
+        frame.fill(i % 256)
+        bus.publish('frame', Frame(i, frame))
+        if i % 50 == 0:
+            time.sleep(0.001)
+    assert subscription.flush(timeout=5.0)
+    assert torn == []
+    assert subscription._frame_slots.allocations == 2
+
+
+def test_publish_never_blocks_on_slow_subscriber():
+    bus = EventBus()
+    release = threading.Event()
+    subscription = bus.subscribe('slow', ['alert'], callback=lambda topic, payload: release.wait(5.0), maxsize=4)
+    started = time.perf_counter()
+    for i in range(1000):
+        bus.publish('alert', i)
+    assert time.perf_counter() - started < 1.0
+    release.set()
+    assert subscription.flush(timeout=5.0)
+    assert subscription.dropped >= 1000 - 4 - 1
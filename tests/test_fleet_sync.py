@@ -0,0 +1,133 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from core.fleet_sync import FleetSyncAgent, SyncError
+from tools.fleet_collector import FleetStore, IngestHandler
+
+
+class FlakyIngestHandler(IngestHandler):
+    """Collector referensi yang menjawab 503 untuk `failures` POST pertama."""
+    failures = 0
+
+    def do_POST(self):
+        if FlakyIngestHandler.failures > 0:
+            FlakyIngestHandler.failures -= 1
+            self._reply(503, {'error': 'injected failure'})
+            return
+        super().do_POST()
+
+
+@pytest.fixture
+def collector(tmp_path):
+    FlakyIngestHandler.store = FleetStore(str(tmp_path / 'fleet.db'))
+    FlakyIngestHandler.failures = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyIngestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield FlakyIngestHandler, f"http://127.0.0.1:{server.server_port}/ingest"
+    server.shutdown()
+    server.server_close()
+
+
+def make_agent(db, url, tmp_path):
+    agent = FleetSyncAgent(db.DB_PATH, url, vehicle_id='B1234XY', state_path=str(tmp_path / 'sync.json'))
+    agent.SESSIONS_PER_BATCH = 2
+    agent.LOGS_PER_BATCH = 1000
+    agent.BACKOFF_BASE_SECONDS = 0.01
+    return agent
+
+
+def fleet_sessions(handler):
+    rows = handler.store._conn.execute('SELECT session_id, status, data FROM fleet_session ORDER BY session_id')
+    return {session_id: (status, json.loads(data)) for session_id, status, data in rows}
+
+
+def record_sessions(db, count, events_per_session=3):
+    """count sesi berurutan; sesi ke-3 tertinggal 'Active' (crash tanpa journal), sesi terakhir masih berjalan."""
+    session_ids = []
+    for index in range(count):
+        session_id = db.start_new_session()
+        for _ in range(events_per_session):
+            db.log_detection_event(session_id, 'yawn', -6.2, 106.8)
+            db.update_session_counts(session_id, yawn=1)
+        if index != 2 and index != count - 1:
+            db.end_session(session_id, float(index))
+        session_ids.append(session_id)
+    return session_ids
+
+
+def test_batches_resume_retry_and_active_session_held_back(db, collector, tmp_path):
+    handler, url = collector
+    session_ids = record_sessions(db, 8)
+
+    agent = make_agent(db, url, tmp_path)
+    handler.failures = 1
+    assert agent.sync_once() and agent.sync_once()
+    assert agent.stats['retries'] == 1
+    # Agen baru dengan file state yang sama melanjutkan dari batch terakhir yang dikonfirmasi
+    resumed = make_agent(db, url, tmp_path)
+    assert resumed.state.session_id == session_ids[3]
+    assert resumed.sync_all() == 2
+    assert resumed.sync_all() == 0
+
+    synced = fleet_sessions(handler)
+    assert sorted(synced) == session_ids[:7] # Sesi terbaru yang masih 'Active' ditahan
+    assert synced[session_ids[2]][0] == 'Active' # Sesi lama yang tertinggal 'Active' tidak memacetkan sinkronisasi
+    logs = handler.store._conn.execute('SELECT COUNT(*) FROM fleet_detection_log').fetchone()[0]
+    assert logs == 7 * 3
+    assert agent.stats['batches'] + resumed.stats['batches'] == 4
+
+    db.end_session(session_ids[-1], 7.0)
+    assert resumed.sync_all() == 1
+    assert fleet_sessions(handler)[session_ids[-1]][0] == 'Completed'
+    assert handler.store.counts() == (8, 8 * 3)
+
+
+def test_changed_sessions_resent_after_sync(db, collector, tmp_path):
+    handler, url = collector
+    session_ids = record_sessions(db, 5)
+    agent = make_agent(db, url, tmp_path)
+    agent.sync_all()
+    assert fleet_sessions(handler)[session_ids[2]][0] == 'Active'
+
+    # Pemulihan / penutupan terlambat mengubah sesi yang sudah terkirim
+    with db.get_db_connection() as conn:
+        conn.execute('''
+            UPDATE session_summary SET end_time = '2026-01-01 09:00:00', total_distance_km = 42.5, status = 'Completed'
+            WHERE session_id = ?
+        ''', (session_ids[2],))
+    assert agent.sync_all() == 1
+    status, data = fleet_sessions(handler)[session_ids[2]]
+    assert (status, data['total_distance_km'], data['end_time']) == ('Completed', 42.5, '2026-01-01 09:00:00')
+    # Tidak ada perubahan lagi: tidak ada batch yang dikirim ulang
+    assert agent.sync_all() == 0
+
+
+def test_client_errors_are_not_retried(db, collector, tmp_path):
+    _, url = collector
+    record_sessions(db, 2)
+    agent = make_agent(db, url.replace('/ingest', '/missing'), tmp_path)
+    with pytest.raises(SyncError):
+        agent.sync_once()
+    assert agent.stats['retries'] == 0
+    assert agent.state.session_id == 0
+
+
+def test_sync_reader_does_not_block_writer(db, tmp_path):
+    session_ids = record_sessions(db, 3)
+    agent = make_agent(db, None, tmp_path)
+    with db.get_db_connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    reader = agent._connect()
+    try:
+        # Transaksi baca panjang (batch besar) yang masih terbuka
+        reader.execute('BEGIN')
+        reader.execute('SELECT COUNT(*) FROM detection_log').fetchone()
+        db.log_detection_event(session_ids[0], 'drowsy', -6.2, 106.8)
+        db.update_session_counts(session_ids[0], drowsy=1)
+    finally:
+        reader.close()
+    assert db.get_last_session_summary(session_ids[0])['drowsy_count'] == 1
@@ -0,0 +1,120 @@
+import calendar
+import json
+import time
+
+import pytest
+
+from core.gps_sources import GPSDSource, NMEAParser, nmea_checksum_ok
+
+
+def sentence(body):
+    """Kalimat NMEA lengkap dengan checksum *XX yang benar."""
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+def rmc(time_str, date_str, status='A', speed_knots='10.0'):
+    return sentence(f"GPRMC,{time_str},{status},0612.0000,S,10648.0000,E,{speed_knots},90.0,{date_str},,,A")
+
+
+def gga(time_str, quality='1'):
+    return sentence(f"GPGGA,{time_str},0612.0000,S,10648.0000,E,{quality},08,0.9,10.0,M,0.0,M,,")
+
+
+def epoch(year, month, day, hours, minutes, seconds):
+    return calendar.timegm((year, month, day, hours, minutes, seconds, 0, 0, 0))
+
+
+def test_checksum_validation():
+    line = rmc('120000.00', '150326')
+    assert nmea_checksum_ok(line)
+    assert not nmea_checksum_ok(line[:-2] + ('00' if line[-2:] != '00' else '01'))
+    assert not nmea_checksum_ok(line.replace('0612.0000', '0613.0000'))
+    assert not nmea_checksum_ok(line[:-2] + 'ZZ')
+    assert not nmea_checksum_ok(line[1:]) # Tanpa '$'
+    assert nmea_checksum_ok(line.split('*')[0]) # Tanpa checksum dianggap valid
+
+
+def test_bad_checksum_sentences_are_rejected():
+    parser = NMEAParser()
+    line = rmc('120000.00', '150326')
+    corrupted = line.replace('10648.0000', '10658.0000') # Bit rusak di jalur serial
+    assert parser.feed(corrupted) is None
+    fix = parser.feed(line)
+    assert fix is not None
+    assert fix.longitude == pytest.approx(106.8)
+
+
+def test_rmc_fix_position_speed_and_time():
+    fix = NMEAParser().feed(rmc('083015.50', '150326', speed_knots='20.0'))
+    assert fix.latitude == pytest.approx(-6.2)
+    assert fix.longitude == pytest.approx(106.8)
+    assert fix.speed_kmh == pytest.approx(37.04)
+    assert fix.timestamp == pytest.approx(epoch(2026, 3, 15, 8, 30, 15) + 0.5)
+
+
+def test_void_rmc_gives_no_fix_but_dates_gga():
+    parser = NMEAParser()
+    assert parser.feed(rmc('101010.00', '010199', status='V')) is None
+    fix = parser.feed(gga('101011.00'))
+    assert fix.speed_kmh is None
+    assert fix.timestamp == pytest.approx(epoch(1999, 1, 1, 10, 10, 11))
+
+
+def test_gga_without_rmc_uses_todays_date():
+    now = time.gmtime()
+    fix = NMEAParser().feed(gga(time.strftime('%H%M%S.00', now)))
+    assert fix.timestamp == pytest.approx(calendar.timegm(now))
+
+
+def test_gga_ignored_after_valid_rmc_and_without_fix():
+    parser = NMEAParser()
+    assert parser.feed(gga('120000.00', quality='0')) is None
+    assert parser.feed(rmc('120000.00', '150326')) is not None
+    assert parser.feed(gga('120001.00')) is None
+
+
+def test_gga_after_midnight_rolls_rmc_date_forward():
+    parser = NMEAParser()
+    parser.feed(rmc('235959.00', '311226', status='V'))
+    fix = parser.feed(gga('000001.00'))
+    assert fix.timestamp == pytest.approx(epoch(2027, 1, 1, 0, 0, 1))
+
+
+def test_gga_before_midnight_after_rmc_past_midnight():
+    parser = NMEAParser()
+    parser.feed(rmc('000001.00', '010127', status='V'))
+    fix = parser.feed(gga('235959.00')) # GGA terlambat dari epoch sebelumnya
+    assert fix.timestamp == pytest.approx(epoch(2026, 12, 31, 23, 59, 59))
+
+
+def test_rmc_across_midnight_uses_its_own_date():
+    parser = NMEAParser()
+    first = parser.feed(rmc('235959.00', '311226'))
+    second = parser.feed(rmc('000000.00', '010127'))
+    assert second.timestamp - first.timestamp == pytest.approx(1.0)
+
+
+def test_malformed_sentences_are_ignored():
+    parser = NMEAParser()
+    assert parser.feed('') is None
+    assert parser.feed('garbage') is None
+    assert parser.feed(sentence('GPRMC,12xx00.00,A,0612.0000,S,10648.0000,E,1.0,0,150326,,,A')) is None
+    assert parser.feed(sentence('GPRMC,120000.00,A,,,,,,,150326,,,A')) is None
+    assert parser.feed(sentence('GPGSV,3,1,11')) is None
+
+
+def test_gpsd_tpv_report():
+    report = {'class': 'TPV', 'mode': 3, 'time': '2026-03-15T08:30:15.000Z',
+              'lat': -6.2, 'lon': 106.8, 'speed': 10.0}
+    fix = GPSDSource.parse_report(json.dumps(report))
+    assert (fix.latitude, fix.longitude) == (-6.2, 106.8)
+    assert fix.speed_kmh == pytest.approx(36.0)
+    assert fix.timestamp == pytest.approx(epoch(2026, 3, 15, 8, 30, 15))
+
+    assert GPSDSource.parse_report(json.dumps(dict(report, mode=1))) is None # Belum ada fix
+    assert GPSDSource.parse_report(json.dumps({'class': 'SKY', 'satellites': []})) is None
+    assert GPSDSource.parse_report('{"class": "TPV", "mode": 2}') is None
+    assert GPSDSource.parse_report('not json') is None
@@ -0,0 +1,162 @@
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+
+from db.journal import JournalLock, SessionJournal, read_journal
+
+
+def crash(journal):
+    """Proses mati tanpa close(): thread berhenti, isi journal tertinggal, kunci lepas (OS menutup file)."""
+    journal._stop_event.set()
+    journal._thread.join()
+    with journal._lock:
+        journal._file.close()
+    journal._lock_handle.release()
+
+
+def write_event(db, journal, session_id, status_type='yawn'):
+    seq, timestamp = journal.event_pending(session_id, status_type, -6.2, 106.8, info=f"{status_type} test")
+    log_id = db.log_detection_event(session_id, status_type, -6.2, 106.8, info=f"{status_type} test",
+                                    timestamp=timestamp, journal_seq=seq)
+    db.update_session_counts(session_id, **{status_type: 1})
+    journal.event_committed(seq, log_id)
+    return seq
+
+
+def log_rows(db, session_id):
+    with db.get_db_connection() as conn:
+        return conn.execute(
+            'SELECT journal_seq, status_type FROM detection_log WHERE session_id = ? ORDER BY journal_seq', (session_id,)
+        ).fetchall()
+
+
+def test_pending_events_recovered_after_crash(db):
+    journal = db.open_session_journal()
+    session_id = db.start_new_session()
+    journal.session_started(session_id)
+    write_event(db, journal, session_id)
+    journal.session_progress(session_id, 12.5)
+    # Crash di antara journal dan database: dua kejadian hanya ada di journal
+    journal.event_pending(session_id, 'microsleep', -6.2, 106.8)
+    journal.event_pending(session_id, 'yawn', -6.2, 106.8)
+    crash(journal)
+
+    assert db.recover_sessions()
+    assert [tuple(row) for row in log_rows(db, session_id)] == [(1, 'yawn'), (2, 'microsleep'), (3, 'yawn')]
+    summary = db.get_last_session_summary(session_id)
+    assert summary['status'] == 'Completed'
+    assert summary['end_time'] is not None
+    # Progress ditulis bersama kejadian, tidak menunggu PROGRESS_INTERVAL_SECONDS
+    assert summary['total_distance_km'] == 12.5
+    assert (summary['yawn_count'], summary['microsleep_count']) == (2, 1)
+    assert not os.path.exists(db.JOURNAL_PATH)
+
+
+def test_replaying_same_journal_twice_adds_no_duplicates(db, tmp_path):
+    journal = db.open_session_journal()
+    session_id = db.start_new_session()
+    journal.session_started(session_id)
+    for _ in range(3):
+        write_event(db, journal, session_id)
+    # Baris sudah tersimpan tetapi tanda committed belum sempat ditulis
+    seq, timestamp = journal.event_pending(session_id, 'drowsy', -6.2, 106.8)
+    db.log_detection_event(session_id, 'drowsy', -6.2, 106.8, timestamp=timestamp, journal_seq=seq)
+    journal.event_pending(session_id, 'yawn', -6.2, 106.8)
+    crash(journal)
+    saved = tmp_path / 'journal.copy'
+    shutil.copy(db.JOURNAL_PATH, saved)
+
+    assert db.recover_sessions()
+    first = [tuple(row) for row in log_rows(db, session_id)]
+    shutil.copy(saved, db.JOURNAL_PATH)
+    assert db.recover_sessions()
+
+    assert [tuple(row) for row in log_rows(db, session_id)] == first
+    assert [seq for seq, _ in first] == [1, 2, 3, 4, 5]
+    summary = db.get_last_session_summary(session_id)
+    assert (summary['yawn_count'], summary['drowsy_count']) == (4, 1)
+
+
+def test_journal_compacts_above_max_bytes(db):
+    journal = db.open_session_journal()
+    session_id = db.start_new_session()
+    journal.session_started(session_id)
+    # Tanpa database: hanya ukuran journal yang diuji
+    for _ in range(3000):
+        seq, _ = journal.event_pending(session_id, 'yawn', -6.2, 106.8, info="Terdeteksi menguap. Durasi: 2.0s")
+        journal.event_committed(seq)
+    last_seq, _ = journal.event_pending(session_id, 'microsleep', -6.2, 106.8)
+    journal.session_progress(session_id, 3.25)
+
+    assert journal.compactions >= 1
+    assert os.path.getsize(db.JOURNAL_PATH) < SessionJournal.MAX_BYTES
+    crash(journal)
+    sessions, pending = read_journal(db.JOURNAL_PATH)
+    assert list(sessions) == [session_id] and not sessions[session_id]['ended']
+    assert [record['seq'] for record in pending] == [last_seq]
+
+    assert db.recover_sessions()
+    assert [tuple(row) for row in log_rows(db, session_id)] == [(last_seq, 'microsleep')]
+    assert db.get_last_session_summary(session_id)['status'] == 'Completed'
+
+
+def test_clean_close_removes_journal(db):
+    journal = db.open_session_journal()
+    session_id = db.start_new_session()
+    journal.session_started(session_id)
+    write_event(db, journal, session_id)
+    db.end_session(session_id, 1.0)
+    journal.session_ended(session_id)
+    journal.close()
+    assert not os.path.exists(db.JOURNAL_PATH)
+
+
+def test_recovery_skipped_while_lock_held_by_live_process(db):
+    session_id = db.start_new_session()
+    with open(db.JOURNAL_PATH, 'w', encoding='utf-8') as f:
+        f.write(f'{{"op":"start","session_id":{session_id},"t":"2026-01-01 08:00:00","distance_km":0.0}}\n')
+        f.write(f'{{"op":"event","seq":1,"session_id":{session_id},"timestamp":"2026-01-01 08:01:00",'
+                f'"status_type":"yawn","latitude":null,"longitude":null,"info":null}}\n')
+    holder = subprocess.Popen(
+        [sys.executable, '-c', textwrap.dedent(f'''
+            import sys
+            sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})
+            from db.journal import JournalLock
+            lock = JournalLock({db.JOURNAL_PATH!r})
+            assert lock.acquire()
+            print('locked', flush=True)
+            sys.stdin.readline()
+        ''')],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        assert not db.recover_sessions()
+        assert db.open_session_journal() is None
+        assert db.get_last_session_summary(session_id)['status'] == 'Active'
+        assert log_rows(db, session_id) == []
+        assert os.path.exists(db.JOURNAL_PATH)
+    finally:
+        holder.stdin.close()
+        holder.wait(timeout=10)
+
+    assert db.recover_sessions()
+    assert [tuple(row) for row in log_rows(db, session_id)] == [(1, 'yawn')]
+    assert db.get_last_session_summary(session_id)['status'] == 'Completed'
+
+
+def test_active_session_outside_journal_untouched(db):
+    journal = db.open_session_journal()
+    session_id = db.start_new_session()
+    journal.session_started(session_id)
+    crash(journal)
+    unjournaled = db.start_new_session()
+
+    assert db.recover_sessions()
+    assert db.get_last_session_summary(session_id)['status'] == 'Completed'
+    assert db.get_last_session_summary(unjournaled)['status'] == 'Active'
+    lock = JournalLock(db.JOURNAL_PATH)
+    assert lock.acquire() # Pemulihan melepas kuncinya kembali
+    lock.release()
@@ -0,0 +1,90 @@
+import pytest
+
+from core.ocular_metrics import OcularMetrics
+
+FPS = 10
+OPEN, CLOSED = 0.32, 0.12
+
+
+def feed(metrics, start, seconds, ear_at):
+    """Frame 10 fps dari start selama seconds; ear_at(i) = EAR frame ke-i (None = wajah tidak terdeteksi)."""
+    results = None
+    for i in range(int(seconds * FPS)):
+        results = metrics.update(start + i / FPS, {'avg_ear': ear_at(i)})
+    return results
+
+
+def blinking(i):
+    """Dua frame terakhir setiap detik tertutup: PERCLOS 0.2, satu kedipan 200 ms per detik."""
+    return CLOSED if i % FPS >= FPS - 2 else OPEN
+
+
+def test_values_withheld_until_enough_observation():
+    metrics = OcularMetrics(closed_threshold=0.25)
+    results = feed(metrics, 1000.0, 9, blinking)
+    assert results['perclos_1m'] is None and results['perclos_3m'] is None
+    assert results['blink_rate'] is None
+    assert results['blink_count'] == 8 # Kedipan sesi tetap dihitung
+    assert results['blink_duration_ms'] == pytest.approx(200.0)
+
+
+def test_steady_blinking_perclos_and_blink_rate():
+    metrics = OcularMetrics(closed_threshold=0.25)
+    results = feed(metrics, 1000.0, 120, blinking)
+    assert results['perclos_1m'] == pytest.approx(0.2, abs=0.005)
+    assert results['perclos_3m'] == pytest.approx(0.2, abs=0.005)
+    assert results['blink_rate'] == pytest.approx(60.0, abs=1.5)
+    assert results['blink_duration_ms'] == pytest.approx(200.0)
+    assert results['blink_count'] == 119
+
+
+def test_closed_minute_leaves_short_window_but_not_long_window():
+    metrics = OcularMetrics(closed_threshold=0.25)
+    feed(metrics, 1000.0, 60, lambda i: CLOSED)
+    results = feed(metrics, 1060.0, 60, lambda i: OPEN)
+    assert results['perclos_1m'] == pytest.approx(0.0)
+    assert results['perclos_3m'] == pytest.approx(0.5, abs=0.005)
+    # Mata tertutup satu menit bukan kedipan
+    assert results['blink_count'] == 0 and results['blink_duration_ms'] is None
+    assert metrics.peak_perclos_1m == pytest.approx(1.0)
+
+    results = feed(metrics, 1120.0, 60, lambda i: OPEN)
+    assert results['perclos_3m'] == pytest.approx(60.0 / 180.0, abs=0.005)
+    results = feed(metrics, 1180.0, 30, lambda i: OPEN)
+    assert results['perclos_3m'] == pytest.approx(30.0 / 180.0, abs=0.005) # Keluar per bucket 1 detik
+    results = feed(metrics, 1210.0, 30, lambda i: OPEN)
+    assert results['perclos_3m'] == pytest.approx(0.0) # Menit tertutup sudah keluar dari jendela 3 menit
+
+
+def test_missing_face_and_frame_gaps_not_counted():
+    metrics = OcularMetrics(closed_threshold=0.25)
+    feed(metrics, 1000.0, 30, lambda i: OPEN)
+    # Wajah hilang 20 detik: tidak menambah waktu teramati
+    feed(metrics, 1030.0, 20, lambda i: None)
+    results = feed(metrics, 1050.0, 10, lambda i: CLOSED)
+    assert results['perclos_1m'] == pytest.approx(10.0 / 40.0, abs=0.01)
+    # Celah > MAX_FRAME_GAP_SECONDS (mode hemat) juga tidak dihitung sebagai tertutup
+    before = metrics.update(1059.95, {'avg_ear': OPEN})['perclos_1m']
+    results = metrics.update(1060.5, {'avg_ear': CLOSED})
+    assert results['perclos_1m'] == pytest.approx(before * 40.0 / 39.0, abs=0.01) # Hanya bucket 1000 yang keluar
+
+
+def test_long_time_jump_resets_windows():
+    metrics = OcularMetrics(closed_threshold=0.25)
+    feed(metrics, 1000.0, 60, lambda i: CLOSED)
+    results = feed(metrics, 1000.0 + 10 * OcularMetrics.LONG_WINDOW_SECONDS, 30, lambda i: OPEN)
+    assert results['perclos_1m'] == pytest.approx(0.0)
+    assert results['perclos_3m'] == pytest.approx(0.0)
+
+
+def test_session_summary():
+    metrics = OcularMetrics(closed_threshold=0.25)
+    feed(metrics, 1000.0, 60, blinking)
+    summary = metrics.session_summary()
+    assert summary['perclos'] == pytest.approx(0.2, abs=0.005)
+    assert summary['blink_count'] == 59
+    assert summary['blink_rate_per_min'] == pytest.approx(59.0, abs=1.0)
+    assert summary['blink_duration_ms'] == pytest.approx(200.0)
+    assert summary['perclos_peak_1m'] == pytest.approx(0.2, abs=0.01)
+    metrics.reset()
+    assert metrics.session_summary()['blink_count'] == 0
@@ -0,0 +1,172 @@
+"""
+Benchmark alokasi memori per frame: jalur lama (alokasi baru setiap frame) dibanding
+jalur buffer pool (capture/flip/anotasi/cvtColor ke buffer yang dipakai ulang).
+
+Alokasi diukur dengan tracemalloc (NumPy dan array keluaran OpenCV tercatat di sana):
+puncak byte sementara per frame, jumlah frame yang mengalokasikan buffer seukuran frame,
+jumlah koleksi GC, dan puncak RSS proses.
+
+Contoh:
+    python -m tools.bench_frame_alloc --frames 600
+    python -m tools.bench_frame_alloc --video rekaman.mp4 --detector   # termasuk YOLO + FaceMesh
+"""
+import argparse
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from core.frame_pool import FramePool
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def peak_rss_mb():
+    if PSUTIL_AVAILABLE:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    return float('nan')
+
+
+def load_frames(video, width, height, count=30):
+    """Frame sumber: dari file video, atau frame sintetis berpola bila tidak ada."""
+    frames = []
+    if video:
+        capture = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+        capture.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+    return frames
+
+
+def annotate(frame):
+    """Anotasi setara detector (kotak, teks, titik mata) langsung pada frame."""
+    cv2.rectangle(frame, (100, 80), (300, 300), (0, 255, 0), 2)
+    cv2.putText(frame, "awake (0.91)", (100, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    cv2.putText(frame, "EAR: 0.301", (frame.shape[1] - 150, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+
+
+class LegacyPath:
+    """Jalur sebelum buffer pool: flip, copy, cvtColor, dan byte swap tampilan masing-masing mengalokasikan."""
+
+    def __init__(self, detector=None):
+        self.detector = detector
+
+    def process(self, source):
+        frame = source.copy() # capture.read() tanpa buffer tujuan
+        frame = cv2.flip(frame, 1)
+        if self.detector:
+            annotated, _ = self.detector.detect(frame)
+        else:
+            annotated = frame.copy()
+            annotate(annotated)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return np.ascontiguousarray(annotated[..., ::-1]) # setara QImage.rgbSwapped()
+
+
+class PooledPath:
+    """Jalur DetectionPipeline saat ini: semua tujuan berupa buffer yang sudah dialokasikan."""
+
+    def __init__(self, shape, detector=None):
+        self.detector = detector
+        self.pool = FramePool()
+        self.pool.ensure(shape)
+        self.capture_buffer = np.empty(shape, dtype=np.uint8)
+        self.flip_buffer = np.empty(shape, dtype=np.uint8)
+        self.rgb_buffer = np.empty(shape, dtype=np.uint8)
+
+    def process(self, source):
+        np.copyto(self.capture_buffer, source) # capture.read(buffer)
+        frame = cv2.flip(self.capture_buffer, 1, dst=self.flip_buffer)
+        out = self.pool.acquire()
+        if self.detector:
+            annotated, _ = self.detector.detect(frame, out=out)
+        else:
+            np.copyto(out, frame)
+            annotate(out)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+            annotated = out
+        return annotated # QImage.Format_BGR888 membaca buffer langsung
+
+
+def run(path, frames, count, warmup):
+    frame_bytes = frames[0].nbytes
+    for i in range(warmup):
+        path.process(frames[i % len(frames)])
+
+    gc.collect()
+    gc_before = sum(stat['collections'] for stat in gc.get_stats())
+    transient = []
+    frame_times = []
+    tracemalloc.start()
+    for i in range(count):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        path.process(frames[i % len(frames)])
+        frame_times.append((time.perf_counter() - started) * 1000)
+        transient.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    gc_after = sum(stat['collections'] for stat in gc.get_stats())
+
+    return {
+        'mean_kb': statistics.mean(transient) / 1024,
+        'max_kb': max(transient) / 1024,
+        # Frame yang mengalokasikan setidaknya setengah frame penuh dianggap alokasi buffer frame
+        'frames_allocating': sum(1 for b in transient if b >= frame_bytes // 2),
+        'gc_collections': gc_after - gc_before,
+        'frame_ms': statistics.median(frame_times),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-frame allocations (legacy vs buffer pool).")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--video', default=None, help="File video sebagai sumber frame (default: sintetis)")
+    parser.add_argument('--detector', action='store_true', help="Sertakan DrowsinessDetector.detect (YOLO + FaceMesh)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.width, args.height)
+    detector = None
+    if args.detector:
+        from core.detector import DrowsinessDetector
+        detector = DrowsinessDetector(model_path='models/best.pt')
+
+    h, w = frames[0].shape[:2]
+    print(f"Frames: {args.frames} @ {w}x{h} ({frames[0].nbytes / 1024:.0f} KB/frame), detector: {bool(detector)}")
+    print(f"{'path':>8} | {'mean KB/frame':>13} | {'max KB':>9} | {'alloc frames':>12} | {'GC':>4} | {'p50 ms':>7} | {'peak RSS':>9}")
+    # Jalur pool diukur lebih dulu agar puncak RSS-nya tidak tercampur puncak jalur lama
+    for name, path in (('pooled', PooledPath(frames[0].shape, detector)), ('legacy', LegacyPath(detector))):
+        r = run(path, frames, args.frames, args.warmup)
+        print(f"{name:>8} | {r['mean_kb']:>13.1f} | {r['max_kb']:>9.1f} | {r['frames_allocating']:>5}/{args.frames:<6} | "
+              f"{r['gc_collections']:>4} | {r['frame_ms']:>7.2f} | {r['peak_rss_mb']:>7.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark skala database & halaman riwayat dengan data armada sintetis (tools/gen_fleet_data.py).
+
+Database sementara diisi bertahap hingga setiap ukuran pada --sizes (jumlah sesi), lalu pada setiap ukuran diukur:
+  - insert     : laju tulis massal generator dan latensi log_detection_event (jalur aplikasi, satu commit per kejadian)
+  - history    : fetch_all_session_summaries (dan HistoryPage.loadHistory dengan --gui, Qt offscreen)
+  - detail     : ringkasan + log kejadian + jejak GPS + grafik (span & 800 bucket) untuk sesi acak
+  - export     : build_batch FleetSyncAgent + JSON + gzip (tanpa jaringan), laju baris/detik
+
+Contoh:
+    python -m tools.bench_history
+    python -m tools.bench_history --sizes 1000 5000 10000 --events-per-session 400 --gui --json reports/history.json
+"""
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Database sementara harus diset sebelum modul database diimpor (init_db berjalan saat impor)
+_tmp_dir = tempfile.mkdtemp(prefix="history_bench_")
+os.environ.setdefault('DETECTION_DB_PATH', os.path.join(_tmp_dir, 'bench.db'))
+
+from db import database  # noqa: E402
+from core.fleet_sync import FleetSyncAgent  # noqa: E402
+from tools.gen_fleet_data import generate_sessions, write_sessions, write_session_metrics  # noqa: E402
+
+CHART_BUCKETS = 800 # Lebar grafik riwayat dalam piksel
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000.0
+
+
+def bench_app_insert(count):
+    """Latensi per kejadian melalui log_detection_event + update_session_counts, seperti _write_alert_event."""
+    session_id = database.start_new_session()
+    rng = random.Random(count)
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        database.log_detection_event(session_id, 'yawn', rng.uniform(-8.0, -6.0), rng.uniform(106.0, 113.0),
+                                     info="Terdeteksi menguap. Durasi: 2.0s")
+        database.update_session_counts(session_id, yawn=1)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    database.end_session(session_id, 0.0)
+    return statistics.median(timings), percentile(timings, 95)
+
+
+def bench_history(repeats, page):
+    db_ms, gui_ms = [], []
+    for _ in range(repeats):
+        sessions, ms = timed(database.fetch_all_session_summaries)
+        db_ms.append(ms)
+        if page is not None:
+            _, ms = timed(page.loadHistory)
+            gui_ms.append(ms)
+    return len(sessions), statistics.median(db_ms), statistics.median(gui_ms) if gui_ms else None
+
+
+def load_session_detail(session_id):
+    """Data yang dimuat dialog detail sesi (HistoryPage.show_session_details_from_table)."""
+    # Diimpor di sini: core.track butuh numpy, benchmark lain tetap jalan tanpa numpy
+    from core.track import load_track
+    summary = database.get_last_session_summary(session_id)
+    logs = database.fetch_logs_for_session(session_id)
+    track = load_track(session_id)
+    span = database.fetch_session_metric_span(session_id)
+    if span is not None:
+        database.fetch_session_metric_buckets(session_id, span['t_min'], span['t_max'], CHART_BUCKETS)
+    return summary, logs, track
+
+
+def bench_detail(session_ids, samples, seed):
+    rng = random.Random(seed)
+    chosen = rng.sample(session_ids, min(samples, len(session_ids)))
+    timings, heaviest = [], (0, None)
+    for session_id in chosen:
+        (_, logs, _), ms = timed(load_session_detail, session_id)
+        timings.append(ms)
+        if len(logs) >= heaviest[0]:
+            heaviest = (len(logs), ms)
+    return statistics.median(timings), percentile(timings, 95), heaviest
+
+
+def bench_export(log_limit):
+    """Batch sinkronisasi dari awal (high-water mark nol) hingga log_limit baris; state hanya di memori."""
+    agent = FleetSyncAgent(database.DB_PATH, collector_url=None, vehicle_id='bench',
+                           state_path=os.path.join(_tmp_dir, 'bench.sync.json'))
+    batches = logs = sessions = sent_bytes = 0
+    started = time.perf_counter()
+    while logs < log_limit:
+        batch = agent.build_batch()
+        if batch is None:
+            break
+        body = gzip.compress(json.dumps(batch, separators=(',', ':')).encode('utf-8'), compresslevel=6)
+        marks = batch['high_water_marks']
+        agent.state.session_id, agent.state.session_rev, agent.state.log_id = (
+            marks['session_summary'], marks['session_rev'], marks['detection_log'])
+        batches += 1
+        logs += len(batch['detection_log'])
+        sessions += len(batch['session_summary'])
+        sent_bytes += len(body)
+    seconds = time.perf_counter() - started
+    return {
+        'batches': batches, 'logs': logs, 'sessions': sessions, 'gzip_mb': sent_bytes / (1024 * 1024),
+        'logs_per_s': logs / seconds if seconds else None,
+        'ms_per_batch': seconds * 1000.0 / batches if batches else None,
+    }
+
+
+def fmt(value, pattern):
+    return pattern.format(value) if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database/history scaling with synthetic fleet data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 5000], help="Jumlah sesi per tahap")
+    parser.add_argument('--events-per-session', type=float, default=400.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--metric-sessions', type=int, default=2, help="Sesi baru per tahap yang diberi deret waktu grafik")
+    parser.add_argument('--app-inserts', type=int, default=200, help="Kejadian yang ditulis lewat log_detection_event")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--detail-samples', type=int, default=50)
+    parser.add_argument('--export-logs', type=int, default=200_000, help="Batas baris detection_log per uji export")
+    parser.add_argument('--gui', action='store_true', help="Ukur juga HistoryPage.loadHistory (Qt offscreen)")
+    parser.add_argument('--json', default=None, help="Simpan laporan sebagai JSON")
+    args = parser.parse_args()
+
+    page = None
+    if args.gui:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication
+        from gui.history import HistoryPage
+        app = QApplication(sys.argv[:1])  # noqa: F841
+        page = HistoryPage(main_window=None)
+
+    print(f"Database: {database.DB_PATH}")
+    detail_enabled = importlib.util.find_spec('numpy') is not None
+    if not detail_enabled:
+        print("WARNING: numpy is not installed; skipping the detail benchmark (GPS track loading needs numpy).")
+    sessions = generate_sessions(args.seed, args.events_per_session)
+    session_ids = []
+    report = []
+    for size in sorted(args.sizes):
+        spans = []
+
+        def take(count):
+            # Sesi dialirkan langsung ke database; hanya waktu mulai/selesai yang disimpan
+            for _ in range(count):
+                session = next(sessions)
+                spans.append((session.start, session.end))
+                yield session
+
+        conn = database.get_db_connection()
+        try:
+            first_id = conn.execute('SELECT IFNULL(MAX(session_id), 0) + 1 FROM session_summary').fetchone()[0]
+            count, events, seconds = write_sessions(conn, take(size - len(session_ids)))
+        finally:
+            conn.close()
+        stage_ids = list(range(first_id, first_id + count))
+        if args.metric_sessions:
+            for session_id, (start, end) in list(zip(stage_ids, spans))[-args.metric_sessions:]:
+                write_session_metrics(session_id, start, end, args.seed)
+        session_ids.extend(stage_ids)
+
+        total_events = database.get_detection_log_version()[0]
+        app_p50, app_p95 = bench_app_insert(args.app_inserts)
+        rows, history_ms, gui_ms = bench_history(args.repeats, page)
+        if detail_enabled:
+            detail_p50, detail_p95, (heavy_logs, heavy_ms) = bench_detail(session_ids, args.detail_samples, args.seed)
+        else:
+            detail_p50 = detail_p95 = heavy_logs = heavy_ms = None
+        export = bench_export(args.export_logs)
+        entry = {
+            'sessions': rows, 'events': total_events,
+            'db_mb': os.path.getsize(database.DB_PATH) / (1024 * 1024),
+            'bulk_events_per_s': events / seconds if seconds else None,
+            'app_insert_p50_ms': app_p50, 'app_insert_p95_ms': app_p95,
+            'history_db_ms': history_ms, 'history_gui_ms': gui_ms,
+            'detail_p50_ms': detail_p50, 'detail_p95_ms': detail_p95,
+            'detail_heaviest_logs': heavy_logs, 'detail_heaviest_ms': heavy_ms,
+            'export': export,
+        }
+        report.append(entry)
+        print(f"\n{rows:,} sessions / {total_events:,} events ({entry['db_mb']:.0f} MB)")
+        print(f"  insert : bulk {fmt(entry['bulk_events_per_s'], '{:,.0f}')} events/s | "
+              f"log_detection_event p50 {app_p50:.2f} ms, p95 {app_p95:.2f} ms")
+        print(f"  history: query {history_ms:.1f} ms | page {fmt(gui_ms, '{:.1f}')} ms")
+        if detail_enabled:
+            print(f"  detail : p50 {detail_p50:.1f} ms, p95 {detail_p95:.1f} ms | "
+                  f"heaviest {heavy_logs:,} events {heavy_ms:.1f} ms")
+        else:
+            print("  detail : skipped (numpy not installed)")
+        print(f"  export : {export['logs']:,} logs in {export['batches']} batches, "
+              f"{fmt(export['logs_per_s'], '{:,.0f}')} logs/s, {fmt(export['ms_per_batch'], '{:.1f}')} ms/batch, "
+              f"{export['gzip_mb']:.1f} MB gzip")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'seed': args.seed, 'events_per_session': args.events_per_session, 'results': report}, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+
+    if page is not None:
+        page.deleteLater()
+    if os.environ['DETECTION_DB_PATH'].startswith(_tmp_dir):
+        for name in os.listdir(_tmp_dir):
+            os.remove(os.path.join(_tmp_dir, name))
+        os.rmdir(_tmp_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""
+Benchmark indeks spasial dan query hotspot pada jutaan kejadian sintetis.
+
+Membuat database sementara, mengisi detection_log (indeks R*Tree diperbarui oleh trigger),
+lalu membandingkan query hotspot berindeks dengan full scan pada beberapa level zoom.
+
+Contoh:
+    python -m tools.bench_hotspots --events 2000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Database sementara harus diset sebelum modul database diimpor (init_db berjalan saat impor)
+_tmp_dir = tempfile.mkdtemp(prefix="hotspot_bench_")
+os.environ.setdefault('DETECTION_DB_PATH', os.path.join(_tmp_dir, 'bench.db'))
+
+from db import database  # noqa: E402
+
+STATUS_TYPES = ['microsleep', 'drowsy', 'yawn']
+# Area sekitar Jawa sebagai contoh sebaran armada
+REGION = (-8.5, 105.5, -6.0, 114.5) # min_lat, min_lon, max_lat, max_lon
+
+
+def generate_events(count, seed=42, hotspot_count=50, hotspot_share=0.3):
+    """Menghasilkan (lat, lon, status) — sebagian terkumpul di titik rawan, sisanya tersebar."""
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = REGION
+    hotspots = [(rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)) for _ in range(hotspot_count)]
+    for _ in range(count):
+        if rng.random() < hotspot_share:
+            lat, lon = rng.choice(hotspots)
+            lat += rng.gauss(0, 0.002)
+            lon += rng.gauss(0, 0.002)
+        else:
+            lat = rng.uniform(min_lat, max_lat)
+            lon = rng.uniform(min_lon, max_lon)
+        yield lat, lon, rng.choice(STATUS_TYPES)
+
+
+def populate(count, batch_size=50000):
+    """Mengisi database dan mengembalikan laju insert (event/detik)."""
+    session_id = database.start_new_session()
+    started = time.perf_counter()
+    conn = database.get_db_connection()
+    batch = []
+    for lat, lon, status in generate_events(count):
+        batch.append((session_id, '2025-01-01 00:00:00', status, lat, lon, None))
+        if len(batch) >= batch_size:
+            conn.executemany('''
+                INSERT INTO detection_log (session_id, timestamp, status_type, latitude, longitude, info)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', batch)
+            conn.commit()
+            batch.clear()
+    if batch:
+        conn.executemany('''
+            INSERT INTO detection_log (session_id, timestamp, status_type, latitude, longitude, info)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', batch)
+        conn.commit()
+    conn.close()
+    return count / (time.perf_counter() - started)
+
+
+def full_scan_hotspots(min_lat, min_lon, max_lat, max_lon, zoom):
+    """Pembanding tanpa indeks: GROUP BY langsung pada detection_log."""
+    cell = database.hotspot_cell_size_deg(zoom)
+    with database.get_db_connection() as conn:
+        return conn.execute('''
+            SELECT CAST((latitude + 90.0) / ? AS INTEGER) AS cy, CAST((longitude + 180.0) / ? AS INTEGER) AS cx,
+                   COUNT(*)
+            FROM detection_log
+            WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?
+            GROUP BY cy, cx
+        ''', (cell, cell, min_lat, max_lat, min_lon, max_lon)).fetchall()
+
+
+def random_bbox(rng, zoom):
+    """Bounding box seukuran layar 1024x768 px pada level zoom tertentu."""
+    min_lat, min_lon, max_lat, max_lon = REGION
+    width = 360.0 / (2 ** zoom) * 4
+    height = width * 0.75
+    lat = rng.uniform(min_lat, max_lat - min(height, max_lat - min_lat))
+    lon = rng.uniform(min_lon, max_lon - min(width, max_lon - min_lon))
+    return lat, lon, lat + height, lon + width
+
+
+def time_queries(func, zoom, repeats, seed=7):
+    rng = random.Random(seed + zoom)
+    timings = []
+    for _ in range(repeats):
+        bbox = random_bbox(rng, zoom)
+        started = time.perf_counter()
+        func(*bbox, zoom)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spatial index + hotspot query.")
+    parser.add_argument('--events', type=int, default=2_000_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--zooms', type=int, nargs='+', default=[5, 7, 9, 10, 12, 13, 15])
+    args = parser.parse_args()
+
+    print(f"Database: {database.DB_PATH}")
+    rate = populate(args.events)
+    print(f"Insert (with R*Tree + grid triggers): {rate:,.0f} events/s for {args.events:,} events")
+
+    print(f"{'zoom':>4} | {'cells':>7} | {'index p50':>10} | {'index max':>10} | {'scan p50':>10} | {'scan max':>10}")
+    for zoom in args.zooms:
+        cells = len(database.fetch_event_hotspots(*random_bbox(random.Random(zoom), zoom), zoom))
+        idx_p50, idx_max = time_queries(database.fetch_event_hotspots, zoom, args.repeats)
+        scan_p50, scan_max = time_queries(full_scan_hotspots, zoom, args.repeats)
+        print(f"{zoom:>4} | {cells:>7} | {idx_p50:>8.1f}ms | {idx_max:>8.1f}ms | {scan_p50:>8.1f}ms | {scan_max:>8.1f}ms")
+
+    if os.environ['DETECTION_DB_PATH'].startswith(_tmp_dir):
+        os.remove(os.environ['DETECTION_DB_PATH'])
+        os.rmdir(_tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
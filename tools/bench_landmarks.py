@@ -0,0 +1,162 @@
+"""
+Benchmark tahap landmark (FaceMesh): latensi dan akurasi EAR beberapa konfigurasi dibanding konfigurasi
+saat ini (refine_landmarks=True, frame penuh). Setiap konfigurasi memproses frame video yang sama secara
+berurutan (tracking FaceMesh bergantung pada urutan frame); YOLO dinonaktifkan.
+
+Konfigurasi ditulis sebagai daftar opsi dipisah koma:
+    refine | norefine     refine_landmarks on/off
+    w<N>                  perkecil frame penuh ke lebar N piksel
+    roi                   tracking potongan wajah dari landmark frame sebelumnya
+
+Contoh:
+    python -m tools.bench_landmarks rekaman.mp4
+    python -m tools.bench_landmarks rekaman.mp4 --frames 900 --configs norefine norefine,roi norefine,w320,roi
+"""
+import argparse
+import json
+import statistics
+
+import cv2
+
+from core.detector import DrowsinessDetector
+from core.tracing import tracer
+
+BASELINE = 'refine'
+DEFAULT_CONFIGS = ['norefine', 'refine,w320', 'norefine,w320', 'refine,roi', 'norefine,roi', 'norefine,w320,roi']
+
+
+def parse_config(spec):
+    config = {'refine': True, 'max_width': None, 'roi_tracking': False}
+    for option in filter(None, (part.strip() for part in spec.split(','))):
+        if option == 'refine':
+            config['refine'] = True
+        elif option == 'norefine':
+            config['refine'] = False
+        elif option == 'roi':
+            config['roi_tracking'] = True
+        elif option.startswith('w') and option[1:].isdigit():
+            config['max_width'] = int(option[1:])
+        else:
+            raise ValueError(f"Unknown landmark option: {option}")
+    return config
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def run_config(detector, video, spec, frame_limit, warmup, flip):
+    """EAR & status per frame serta latensi span facemesh+ear untuk satu konfigurasi."""
+    detector.configure_landmarks(**parse_config(spec))
+    capture = cv2.VideoCapture(video)
+    ears, statuses, latencies = [], [], []
+    index = 0
+    tracer._events.clear()
+    tracer.enable()
+    try:
+        while frame_limit is None or index < frame_limit:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            if flip:
+                frame = cv2.flip(frame, 1)
+            _, results = detector.detect(frame)
+            ears.append(results['avg_ear'])
+            statuses.append(results['ear_status'])
+            index += 1
+    finally:
+        tracer.disable()
+        capture.release()
+    stage_ms = {}
+    for event in tracer.snapshot():
+        if event.get('ph') == 'X' and event['name'] in ('facemesh', 'ear'):
+            stage_ms.setdefault(event['name'], []).append(event['dur'] / 1000.0)
+    facemesh = stage_ms.get('facemesh', [])
+    ear_stage = stage_ms.get('ear', [])
+    latencies = [a + b for a, b in zip(facemesh, ear_stage)][warmup:]
+    return {
+        'config': spec,
+        'frames': index,
+        'ears': ears,
+        'statuses': statuses,
+        'latency_p50_ms': statistics.median(latencies) if latencies else None,
+        'latency_p95_ms': percentile(latencies, 95) if latencies else None,
+        'face_rate': sum(e is not None for e in ears) / index if index else None,
+        'roi_frames': detector.roi_frames,
+        'roi_redetects': detector.roi_redetects,
+    }
+
+
+def compare(baseline, run):
+    """Selisih EAR dan kesepakatan status terhadap baseline (frame dengan wajah di keduanya)."""
+    pairs = [(b, r) for b, r in zip(baseline['ears'], run['ears']) if b is not None and r is not None]
+    errors = [abs(b - r) for b, r in pairs]
+    statuses = list(zip(baseline['statuses'], run['statuses']))
+    closed = [(b, r) for b, r in statuses if b == 'microsleep']
+    flagged = [(b, r) for b, r in statuses if r == 'microsleep']
+    return {
+        'ear_mae': statistics.mean(errors) if errors else None,
+        'ear_p95_error': percentile(errors, 95) if errors else None,
+        'status_agreement': sum(b == r for b, r in statuses) / len(statuses) if statuses else None,
+        # Frame mata tertutup baseline yang juga tertutup di konfigurasi ini, dan sebaliknya
+        'closed_recall': sum(r == 'microsleep' for _, r in closed) / len(closed) if closed else None,
+        'closed_precision': sum(b == 'microsleep' for b, _ in flagged) / len(flagged) if flagged else None,
+    }
+
+
+def fmt(value, pattern):
+    return pattern.format(value) if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FaceMesh landmark configurations (latency vs EAR accuracy).")
+    parser.add_argument('video', help="File video berisi wajah pengemudi")
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS, help="Konfigurasi yang dibandingkan")
+    parser.add_argument('--frames', type=int, default=600, help="Jumlah frame per konfigurasi (0 = seluruh video)")
+    parser.add_argument('--warmup', type=int, default=10, help="Frame awal yang tidak dihitung latensinya")
+    parser.add_argument('--no-flip', action='store_true', help="Jangan membalik frame seperti pipeline")
+    parser.add_argument('--json', default=None, help="Simpan laporan sebagai JSON")
+    args = parser.parse_args()
+
+    detector = DrowsinessDetector(cascade_model_path=None)
+    detector.yolo_enabled = False
+    frame_limit = args.frames or None
+
+    baseline = run_config(detector, args.video, BASELINE, frame_limit, args.warmup, not args.no_flip)
+    if not baseline['frames']:
+        print(f"No frames read from {args.video}.")
+        return 1
+    rows = [(baseline, None)]
+    for spec in args.configs:
+        run = run_config(detector, args.video, spec, frame_limit, args.warmup, not args.no_flip)
+        rows.append((run, compare(baseline, run)))
+
+    base_p50 = baseline['latency_p50_ms']
+    print(f"\n{baseline['frames']} frames, baseline = {BASELINE} (full frame)")
+    print(f"{'config':>20} | {'p50 ms':>7} | {'p95 ms':>7} | {'speedup':>7} | {'face':>6} | {'EAR MAE':>8} | "
+          f"{'EAR p95':>8} | {'status':>7} | {'closed R/P':>11} | {'re-detect':>9}")
+    report = []
+    for run, accuracy in rows:
+        speedup = base_p50 / run['latency_p50_ms'] if base_p50 and run['latency_p50_ms'] else None
+        accuracy = accuracy or {}
+        closed = (f"{fmt(accuracy.get('closed_recall'), '{:.0%}')}/{fmt(accuracy.get('closed_precision'), '{:.0%}')}"
+                  if accuracy else '-')
+        print(f"{run['config']:>20} | {fmt(run['latency_p50_ms'], '{:.2f}'):>7} | {fmt(run['latency_p95_ms'], '{:.2f}'):>7} | "
+              f"{fmt(speedup, 'x{:.2f}'):>7} | {fmt(run['face_rate'], '{:.0%}'):>6} | "
+              f"{fmt(accuracy.get('ear_mae'), '{:.4f}'):>8} | {fmt(accuracy.get('ear_p95_error'), '{:.4f}'):>8} | "
+              f"{fmt(accuracy.get('status_agreement'), '{:.1%}'):>7} | {closed:>11} | "
+              f"{run['roi_redetects'] if 'roi' in run['config'] else '-':>9}")
+        entry = {k: v for k, v in run.items() if k not in ('ears', 'statuses')}
+        entry.update(accuracy, speedup=speedup)
+        report.append(entry)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'video': args.video, 'baseline': BASELINE, 'results': report}, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
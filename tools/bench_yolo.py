@@ -0,0 +1,101 @@
+"""
+Benchmark jalur YOLO: model.predict() vs jalur ringkas (letterbox ke buffer + pemanggilan model langsung
++ filter ambang per kelas tervektorisasi). Melaporkan waktu per frame (p50/p95), porsi di luar jaringan,
+dan kecocokan status serta jumlah kotak antara kedua jalur.
+
+Contoh:
+    python -m tools.bench_yolo --video rekaman.mp4 --frames 300
+"""
+import argparse
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from core.detector import DrowsinessDetector
+from core.tracing import tracer
+
+
+def load_frames(video, count):
+    frames = []
+    if video:
+        capture = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+        capture.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(min(count, 30))]
+    return frames
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def time_path(predict, frames, count, warmup):
+    """Waktu total per frame dan waktu per span (dari tracer) untuk satu jalur."""
+    for i in range(warmup):
+        predict(frames[i % len(frames)])
+    tracer._events.clear()
+    tracer.enable()
+    totals, results = [], []
+    for i in range(count):
+        started = time.perf_counter()
+        results.append(predict(frames[i % len(frames)]))
+        totals.append((time.perf_counter() - started) * 1000)
+    tracer.disable()
+    spans = {}
+    for event in tracer.snapshot():
+        if event.get('ph') == 'X':
+            spans.setdefault(event['name'], []).append(event['dur'] / 1000.0)
+    return totals, spans, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lean YOLO path vs model.predict().")
+    parser.add_argument('--video', default=None, help="File video sebagai sumber frame (default: sintetis)")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--model', default='models/best.pt')
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    detector = DrowsinessDetector(model_path=args.model, cascade_model_path=None)
+    if not detector.yolo.lean_inference:
+        print("Lean path not available for this model; nothing to compare.")
+        return
+
+    paths = {
+        'predict': detector.yolo._predict_ultralytics,
+        'lean': detector.yolo._predict_lean,
+    }
+    outcomes = {}
+    print(f"{'path':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'network ms':>10} | {'overhead ms':>11}")
+    for name, predict in paths.items():
+        totals, spans, results = time_path(predict, frames, args.frames, args.warmup)
+        network = spans.get('yolo_forward') or spans.get('yolo_predict') or [0.0]
+        network_p50 = statistics.median(network)
+        if name == 'predict':
+            # predict() membungkus pre/post-processing ultralytics di dalam span yolo_predict
+            overhead = statistics.median(totals) - network_p50
+            network_label = "(incl.)"
+        else:
+            overhead = statistics.median(spans['yolo_preprocess']) + statistics.median(spans['yolo_postprocess'])
+            network_label = f"{network_p50:.2f}"
+        print(f"{name:>8} | {statistics.median(totals):>7.2f} | {percentile(totals, 95):>7.2f} | "
+              f"{network_label:>10} | {overhead:>11.2f}")
+        outcomes[name] = results
+
+    status_match = sum(a.status == b.status for a, b in zip(outcomes['predict'], outcomes['lean']))
+    count_match = sum(len(a) == len(b) for a, b in zip(outcomes['predict'], outcomes['lean']))
+    print(f"Status agreement: {status_match}/{args.frames}, box count agreement: {count_match}/{args.frames}")
+
+
+if __name__ == '__main__':
+    main()
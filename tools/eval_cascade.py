@@ -0,0 +1,133 @@
+"""
+Evaluasi cascade YOLO (model nano lebih dulu, best.pt hanya saat ragu) terhadap model penuh.
+
+Setiap frame dijalankan melalui kedua model; keputusan cascade disimulasikan dari hasil model nano.
+Laporan: tingkat eskalasi, kecocokan status cascade vs model penuh (keseluruhan dan per kelas),
+waktu CPU rata-rata per frame (penuh vs cascade), dan — bila klip berada di folder berlabel
+(mis. clips/yawn/a.mp4) — apakah label klip terdeteksi oleh masing-masing jalur.
+
+Contoh:
+    python -m tools.eval_cascade clips/ --cascade-model models/nano.pt
+    python -m tools.eval_cascade clips/ --margin 0.6 0.7 0.8
+"""
+import argparse
+import os
+import time
+from collections import Counter, defaultdict
+
+import cv2
+
+from core.detector import DrowsinessDetector
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def find_clips(paths):
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                clips.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            clips.append(path)
+    return clips
+
+
+def clip_label(path):
+    """Label klip dari nama folder induknya, bila berupa status YOLO."""
+    label = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return label if label in DrowsinessDetector.STATUS_PRIORITY else None
+
+
+def collect(detector, clips, stride):
+    """Hasil kedua model per frame: (clip, full status, nano hasil, cpu full, cpu nano)."""
+    records = []
+    for clip in clips:
+        capture = cv2.VideoCapture(clip)
+        index = 0
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            index += 1
+            if (index - 1) % stride:
+                continue
+            frame = cv2.flip(frame, 1)
+            started = time.thread_time()
+            full = detector.yolo.predict(frame)
+            full_cpu = time.thread_time() - started
+            started = time.thread_time()
+            cheap = detector.cascade_yolo.predict(frame)
+            cheap_cpu = time.thread_time() - started
+            records.append((clip, full.status, cheap.status, cheap.top_confidence, full_cpu, cheap_cpu))
+        capture.release()
+    return records
+
+
+def report(detector, records, margin):
+    escalations = 0
+    agree = 0
+    per_class = defaultdict(lambda: [0, 0]) # status penuh -> [cocok, total]
+    cascade_cpu = 0.0
+    full_cpu_total = 0.0
+    clip_statuses = defaultdict(lambda: (set(), set())) # clip -> (status penuh, status cascade)
+    for clip, full_status, cheap_status, cheap_conf, full_cpu, cheap_cpu in records:
+        # Aturan yang sama dengan DrowsinessDetector.should_escalate, dengan margin yang diuji
+        escalate = cheap_status in detector.CASCADE_ESCALATE_STATUSES or cheap_conf < margin
+        final_status = full_status if escalate else cheap_status
+        escalations += escalate
+        cascade_cpu += cheap_cpu + (full_cpu if escalate else 0.0)
+        full_cpu_total += full_cpu
+        agree += final_status == full_status
+        per_class[full_status][0] += final_status == full_status
+        per_class[full_status][1] += 1
+        clip_statuses[clip][0].add(full_status)
+        clip_statuses[clip][1].add(final_status)
+
+    n = len(records)
+    print(f"\n--- margin {margin:.2f} ---")
+    print(f"Escalation rate     : {escalations / n:.1%} ({escalations}/{n} frames)")
+    print(f"Agreement with full : {agree / n:.2%}")
+    for status in DrowsinessDetector.STATUS_PRIORITY:
+        if status in per_class:
+            matched, total = per_class[status]
+            print(f"  {status:<8}: {matched / total:.2%} of {total} frames")
+    print(f"CPU / frame         : full {full_cpu_total / n * 1000:.1f} ms, cascade {cascade_cpu / n * 1000:.1f} ms "
+          f"({full_cpu_total / cascade_cpu if cascade_cpu else float('inf'):.1f}x less)")
+
+    labelled = [(clip, clip_label(clip)) for clip in clip_statuses if clip_label(clip)]
+    if labelled:
+        found = Counter()
+        for clip, label in labelled:
+            found['full'] += label in clip_statuses[clip][0]
+            found['cascade'] += label in clip_statuses[clip][1]
+        print(f"Labelled clips      : label seen by full {found['full']}/{len(labelled)}, "
+              f"by cascade {found['cascade']}/{len(labelled)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the YOLO cascade against the full model.")
+    parser.add_argument('paths', nargs='+', help="File video atau folder klip")
+    parser.add_argument('--model', default='models/best.pt')
+    parser.add_argument('--cascade-model', default=DrowsinessDetector.CASCADE_MODEL_PATH)
+    parser.add_argument('--margin', type=float, nargs='+', default=[DrowsinessDetector.CASCADE_CONFIDENCE_MARGIN])
+    parser.add_argument('--stride', type=int, default=1, help="Evaluasi setiap N frame")
+    args = parser.parse_args()
+
+    detector = DrowsinessDetector(model_path=args.model, cascade_model_path=args.cascade_model)
+    if detector.cascade_yolo is None:
+        print(f"Cascade model not available: {args.cascade_model}")
+        return 1
+    clips = find_clips(args.paths)
+    records = collect(detector, clips, args.stride)
+    if not records:
+        print("No frames found.")
+        return 1
+    print(f"Clips: {len(clips)}, frames: {len(records)}")
+    for margin in args.margin:
+        report(detector, records, margin)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
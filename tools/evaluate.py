@@ -0,0 +1,411 @@
+"""
+Harness evaluasi satu konfigurasi detector pada data berlabel lokal.
+
+Sumber data (boleh salah satu atau keduanya):
+  --dataset : dataset YOLO (images/ + labels/ .txt, opsional data.yaml berisi `names`).
+              Dilaporkan presisi/recall per kelas (pencocokan kotak IoU >= --iou).
+  --clips   : file/folder video. Klip berlabel memiliki file pendamping `<klip>.events.json`
+              berisi daftar kejadian {"type": "microsleep"|"drowsy"|"yawn", "start": s, "end": s}
+              (detik sejak awal video; daftar kosong = mengemudi normal). Klip diputar melalui
+              DrowsinessDetector + AlertEngine dengan jam video; setiap alarm (event 'log') dicocokkan
+              ke kejadian sejenis. Dilaporkan recall kejadian, alarm palsu per jam, dan jeda alarm.
+
+Latensi per frame (p50/p90/p95/p99) dilaporkan untuk YOLO pada gambar dan detect() penuh pada klip.
+
+Konfigurasi detector: --model (termasuk model hasil ekspor/kuantisasi yang dapat dimuat ultralytics),
+--imgsz, --cascade-model / --no-cascade, --stride (proses setiap N frame), --landmark-only (tanpa YOLO),
+--ear-threshold.
+
+Contoh:
+    python -m tools.evaluate --dataset datasets/test --clips clips/
+    python -m tools.evaluate --clips clips/ --imgsz 480 --stride 2 --json reports/imgsz480.json
+    python -m tools.evaluate --clips clips/ --landmark-only
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from core.alert_engine import AlertEngine
+from core.detector import DrowsinessDetector
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+EVENTS_SUFFIX = '.events.json'
+DEFAULT_FPS = 30.0
+
+
+def find_files(paths, extensions):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(extensions))
+        elif os.path.exists(path):
+            found.append(path)
+    return found
+
+
+def percentiles(values_ms):
+    if not values_ms:
+        return None
+    ordered = sorted(values_ms)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+    return {
+        'frames': len(ordered),
+        'mean_ms': statistics.mean(ordered),
+        'p50_ms': pick(50), 'p90_ms': pick(90), 'p95_ms': pick(95), 'p99_ms': pick(99),
+    }
+
+
+# --- Dataset gambar (presisi/recall per kelas) ---
+
+def dataset_class_names(root):
+    """Nama kelas dari data.yaml dataset (list atau dict), None bila tidak ada."""
+    path = os.path.join(root, 'data.yaml')
+    if not (YAML_AVAILABLE and os.path.exists(path)):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        names = (yaml.safe_load(f) or {}).get('names')
+    if isinstance(names, dict):
+        return [names[i] for i in sorted(names)]
+    return list(names) if names else None
+
+
+def label_path_for(image_path):
+    """Konvensi YOLO: .../images/x.jpg -> .../labels/x.txt (atau x.txt di folder yang sama)."""
+    stem = os.path.splitext(image_path)[0]
+    parts = stem.split(os.sep)
+    if 'images' in parts:
+        index = len(parts) - 1 - parts[::-1].index('images')
+        candidate = os.sep.join(parts[:index] + ['labels'] + parts[index + 1:]) + '.txt'
+        if os.path.exists(candidate):
+            return candidate
+    return stem + '.txt'
+
+
+def read_labels(path, width, height, class_names):
+    """Kotak ground truth (nama kelas, x1, y1, x2, y2) dalam piksel dari file label YOLO ternormalisasi."""
+    boxes = []
+    if not os.path.exists(path):
+        return boxes
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            values = line.split()
+            if len(values) < 5:
+                continue
+            class_id = int(float(values[0]))
+            cx, cy, bw, bh = (float(v) for v in values[1:5])
+            name = class_names[class_id] if class_id < len(class_names) else str(class_id)
+            boxes.append((name, (cx - bw / 2) * width, (cy - bh / 2) * height,
+                          (cx + bw / 2) * width, (cy + bh / 2) * height))
+    return boxes
+
+
+def box_iou(a, b):
+    iw = min(a[2], b[2]) - max(a[0], b[0])
+    ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def match_boxes(predictions, ground_truth, iou_threshold, counts):
+    """Pencocokan greedy per kelas (confidence tertinggi lebih dulu); menambah TP/FP/FN ke counts."""
+    unmatched = list(ground_truth)
+    for name, conf, box in sorted(predictions, key=lambda p: -p[1]):
+        best, best_iou = None, iou_threshold
+        for gt in unmatched:
+            if gt[0] != name:
+                continue
+            iou = box_iou(box, gt[1:])
+            if iou >= best_iou:
+                best, best_iou = gt, iou
+        if best is None:
+            counts[name]['fp'] += 1
+        else:
+            unmatched.remove(best)
+            counts[name]['tp'] += 1
+    for gt in unmatched:
+        counts[gt[0]]['fn'] += 1
+
+
+def evaluate_dataset(detector, root, iou_threshold, warmup):
+    images = find_files([root], IMAGE_EXTENSIONS)
+    class_names = dataset_class_names(root) or detector.yolo.class_labels
+    class_labels = detector.yolo.class_labels
+    counts = defaultdict(lambda: {'tp': 0, 'fp': 0, 'fn': 0})
+    latencies = []
+    for index, path in enumerate(images):
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        h, w = frame.shape[:2]
+        started = time.perf_counter()
+        yolo, _ = detector.predict_yolo(frame)
+        if index >= warmup:
+            latencies.append((time.perf_counter() - started) * 1000)
+        predictions = [
+            (class_labels[cls], conf, box)
+            for box, conf, cls in zip(yolo.boxes.tolist(), yolo.confidences.tolist(), yolo.class_ids.tolist())
+        ]
+        match_boxes(predictions, read_labels(label_path_for(path), w, h, class_names), iou_threshold, counts)
+
+    per_class = {}
+    for name in sorted(counts):
+        c = counts[name]
+        per_class[name] = {
+            **c,
+            'precision': c['tp'] / (c['tp'] + c['fp']) if c['tp'] + c['fp'] else None,
+            'recall': c['tp'] / (c['tp'] + c['fn']) if c['tp'] + c['fn'] else None,
+        }
+    return {'images': len(images), 'per_class': per_class, 'latency': percentiles(latencies)}
+
+
+# --- Klip video (recall kejadian & alarm palsu) ---
+
+def read_clip_events(clip):
+    """Kejadian berlabel klip, atau None bila klip tidak berlabel."""
+    path = os.path.splitext(clip)[0] + EVENTS_SUFFIX
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    events = data.get('events', []) if isinstance(data, dict) else data
+    return [(e['type'], float(e['start']), float(e['end'])) for e in events]
+
+
+def run_clip(detector, engine, clip, stride, flip, warmup):
+    """Memutar klip dengan jam video. Mengembalikan (durasi detik, alarm [(type, t)], latensi ms)."""
+    capture = cv2.VideoCapture(clip)
+    fps = capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    engine.reset()
+    alarms, latencies = [], []
+    flip_buffer = None
+    index = -1
+    processed = 0
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        index += 1
+        if index % stride:
+            continue
+        if flip:
+            if flip_buffer is None or flip_buffer.shape != frame.shape:
+                flip_buffer = np.empty_like(frame)
+            frame = cv2.flip(frame, 1, dst=flip_buffer)
+        started = time.perf_counter()
+        _, detection_results = detector.detect(frame)
+        if processed >= warmup:
+            latencies.append((time.perf_counter() - started) * 1000)
+        processed += 1
+        timestamp = index / fps
+        for event in engine.update(timestamp, detection_results).events:
+            if event.kind == 'log':
+                alarms.append((event.status_type, timestamp))
+    capture.release()
+    return (index + 1) / fps, alarms, latencies
+
+
+def score_events(labelled_events, alarms, tolerance):
+    """
+    Alarm cocok dengan kejadian sejenis bila terjadi dalam [start - tolerance, end + tolerance].
+    Kejadian terdeteksi bila setidaknya satu alarm cocok; alarm tanpa kejadian = alarm palsu.
+    """
+    detected = [None] * len(labelled_events) # waktu alarm pertama per kejadian
+    false_alarms = []
+    for status_type, t in alarms:
+        hit = False
+        for i, (event_type, start, end) in enumerate(labelled_events):
+            if event_type == status_type and start - tolerance <= t <= end + tolerance:
+                hit = True
+                if detected[i] is None:
+                    detected[i] = t
+        if not hit:
+            false_alarms.append((status_type, t))
+    return detected, false_alarms
+
+
+def evaluate_clips(detector, paths, stride, flip, tolerance, warmup):
+    engine = AlertEngine()
+    detector.reset_cascade_stats()
+    clips = find_files(paths, VIDEO_EXTENSIONS)
+    per_type = {t: {'events': 0, 'detected': 0, 'false_alarms': 0, 'delays': []} for t in AlertEngine.STATUS_TYPES}
+    latencies = []
+    labelled_clips = 0
+    labelled_seconds = 0.0
+    total_seconds = 0.0
+    for clip in clips:
+        duration, alarms, clip_latencies = run_clip(detector, engine, clip, stride, flip, warmup)
+        latencies.extend(clip_latencies)
+        total_seconds += duration
+        labelled_events = read_clip_events(clip)
+        if labelled_events is None:
+            print(f"  {os.path.basename(clip)}: {duration:.0f}s, {len(alarms)} alarms (unlabelled)")
+            continue
+        labelled_clips += 1
+        labelled_seconds += duration
+        detected, false_alarms = score_events(labelled_events, alarms, tolerance)
+        for (event_type, start, _), t in zip(labelled_events, detected):
+            stats = per_type.setdefault(event_type, {'events': 0, 'detected': 0, 'false_alarms': 0, 'delays': []})
+            stats['events'] += 1
+            if t is not None:
+                stats['detected'] += 1
+                stats['delays'].append(t - start)
+        for status_type, _ in false_alarms:
+            per_type[status_type]['false_alarms'] += 1
+        print(f"  {os.path.basename(clip)}: {duration:.0f}s, {sum(t is not None for t in detected)}/{len(labelled_events)} "
+              f"events detected, {len(false_alarms)} false alarms")
+
+    hours = labelled_seconds / 3600.0
+    summary = {}
+    for status_type, stats in per_type.items():
+        summary[status_type] = {
+            'events': stats['events'],
+            'detected': stats['detected'],
+            'recall': stats['detected'] / stats['events'] if stats['events'] else None,
+            'false_alarms': stats['false_alarms'],
+            'false_alarms_per_hour': stats['false_alarms'] / hours if hours else None,
+            'median_delay_s': statistics.median(stats['delays']) if stats['delays'] else None,
+        }
+    events = sum(s['events'] for s in per_type.values())
+    detected = sum(s['detected'] for s in per_type.values())
+    false_alarms = sum(s['false_alarms'] for s in per_type.values())
+    return {
+        'clips': len(clips),
+        'labelled_clips': labelled_clips,
+        'seconds': total_seconds,
+        'labelled_seconds': labelled_seconds,
+        'per_type': summary,
+        'events': events,
+        'recall': detected / events if events else None,
+        'false_alarms': false_alarms,
+        'false_alarms_per_hour': false_alarms / hours if hours else None,
+        'latency': percentiles(latencies),
+    }
+
+
+# --- Laporan ---
+
+def fmt(value, spec='.2%'):
+    return '-' if value is None else format(value, spec)
+
+
+def print_latency(title, latency):
+    if latency:
+        print(f"{title:<22}: p50 {latency['p50_ms']:.1f} ms, p90 {latency['p90_ms']:.1f} ms, "
+              f"p95 {latency['p95_ms']:.1f} ms, p99 {latency['p99_ms']:.1f} ms ({latency['frames']} frames)")
+
+
+def print_report(report):
+    print(f"\n=== Configuration: {json.dumps(report['config'])} ===")
+    dataset = report.get('dataset')
+    if dataset:
+        print(f"\nImages: {dataset['images']}")
+        print(f"{'class':<10} | {'TP':>5} | {'FP':>5} | {'FN':>5} | {'precision':>9} | {'recall':>7}")
+        for name, c in dataset['per_class'].items():
+            print(f"{name:<10} | {c['tp']:>5} | {c['fp']:>5} | {c['fn']:>5} | {fmt(c['precision']):>9} | {fmt(c['recall']):>7}")
+    clips = report.get('clips')
+    if clips:
+        print(f"\nClips: {clips['clips']} ({clips['labelled_clips']} labelled, {clips['labelled_seconds'] / 3600:.2f} h)")
+        print(f"{'event':<10} | {'events':>6} | {'recall':>7} | {'false':>5} | {'false/h':>7} | {'delay s':>7}")
+        for status_type, s in clips['per_type'].items():
+            print(f"{status_type:<10} | {s['events']:>6} | {fmt(s['recall']):>7} | {s['false_alarms']:>5} | "
+                  f"{fmt(s['false_alarms_per_hour'], '.2f'):>7} | {fmt(s['median_delay_s'], '.2f'):>7}")
+        print(f"{'all':<10} | {clips['events']:>6} | {fmt(clips['recall']):>7} | {clips['false_alarms']:>5} | "
+              f"{fmt(clips['false_alarms_per_hour'], '.2f'):>7} |")
+    print()
+    if dataset:
+        print_latency("YOLO latency (images)", dataset['latency'])
+    if clips:
+        print_latency("detect() latency", clips['latency'])
+    cascade = report.get('cascade')
+    if cascade and cascade['enabled'] and cascade['frames']:
+        print(f"Cascade escalation    : {cascade['escalation_rate']:.1%} of {cascade['frames']} frames")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a detector configuration on labelled images and clips.")
+    parser.add_argument('--dataset', default=None, help="Folder dataset YOLO (images/ + labels/)")
+    parser.add_argument('--clips', nargs='+', default=[], help="File video atau folder klip (+ <klip>.events.json)")
+    parser.add_argument('--model', default='models/best.pt')
+    parser.add_argument('--cascade-model', default=DrowsinessDetector.CASCADE_MODEL_PATH)
+    parser.add_argument('--no-cascade', action='store_true')
+    parser.add_argument('--imgsz', type=int, default=None, help="Ukuran input YOLO (kelipatan 32)")
+    parser.add_argument('--stride', type=int, default=1, help="Proses setiap N frame klip")
+    parser.add_argument('--landmark-only', action='store_true', help="Hanya EAR (FaceMesh), tanpa YOLO")
+    parser.add_argument('--ear-threshold', type=float, default=None)
+    parser.add_argument('--no-refine', action='store_true', help="FaceMesh tanpa refine_landmarks")
+    parser.add_argument('--facemesh-max-width', type=int, default=None, help="Perkecil input FaceMesh ke lebar ini")
+    parser.add_argument('--roi-tracking', action='store_true', help="FaceMesh pada potongan wajah frame sebelumnya")
+    parser.add_argument('--no-flip', action='store_true', help="Jangan membalik frame klip seperti pipeline")
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU minimum pencocokan kotak")
+    parser.add_argument('--tolerance', type=float, default=1.0, help="Toleransi waktu pencocokan alarm (detik)")
+    parser.add_argument('--warmup', type=int, default=5, help="Frame awal yang tidak dihitung latensinya")
+    parser.add_argument('--json', default=None, help="Simpan laporan sebagai JSON")
+    args = parser.parse_args()
+
+    if not args.dataset and not args.clips:
+        parser.error("give --dataset and/or --clips")
+
+    detector = DrowsinessDetector(
+        model_path=args.model, cascade_model_path=None if args.no_cascade else args.cascade_model
+    )
+    if args.imgsz:
+        detector.yolo.set_imgsz(args.imgsz)
+        if detector.cascade_yolo is not None:
+            detector.cascade_yolo.set_imgsz(args.imgsz)
+    if args.landmark_only:
+        detector.yolo_enabled = False
+    if args.ear_threshold is not None:
+        detector.EAR_THRESHOLD = args.ear_threshold
+    if args.no_refine or args.facemesh_max_width or args.roi_tracking:
+        detector.configure_landmarks(not args.no_refine, args.facemesh_max_width, args.roi_tracking)
+
+    report = {'config': {
+        'model': args.model,
+        'cascade_model': None if detector.cascade_yolo is None else args.cascade_model,
+        'imgsz': detector.yolo.imgsz,
+        'lean_inference': detector.yolo.lean_inference,
+        'stride': args.stride,
+        'landmark_only': args.landmark_only,
+        'ear_threshold': detector.EAR_THRESHOLD,
+        'landmarks': detector.landmark_config(),
+    }}
+    if args.dataset:
+        if args.landmark_only:
+            print("Landmark-only configuration: skipping per-class YOLO evaluation of the image dataset.")
+        else:
+            print(f"Evaluating images in {args.dataset} ...")
+            report['dataset'] = evaluate_dataset(detector, args.dataset, args.iou, args.warmup)
+    if args.clips:
+        print("Evaluating clips ...")
+        report['clips'] = evaluate_clips(
+            detector, args.clips, max(1, args.stride), not args.no_flip, args.tolerance, args.warmup
+        )
+        report['cascade'] = detector.cascade_report()
+
+    print_report(report)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""
+Server pengganti gpsd untuk pengujian lokal.
+
+Memutar ulang log NMEA/GPX sebagai laporan TPV protokol gpsd sehingga
+GPSDSource (dan aplikasi) bisa diuji tanpa receiver atau daemon gpsd.
+
+Contoh:
+    python -m tools.fake_gpsd route.gpx --port 2947 --speed 5
+    GPS_SOURCE=gpsd:127.0.0.1:2947 python main.py
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+from core.gps_sources import FileReplaySource
+
+
+class FakeGPSDServer:
+    """Server TCP kecil yang meniru gpsd: menerima ?WATCH lalu mengirim TPV untuk setiap fix."""
+
+    def __init__(self, host='127.0.0.1', port=2947):
+        self.host = host
+        self.port = port
+        self._server_sock = None
+        self._clients = []
+        self._lock = threading.Lock()
+        self.is_running = False
+
+    def start(self):
+        self._server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_sock.bind((self.host, self.port))
+        self._server_sock.listen()
+        self.port = self._server_sock.getsockname()[1] # port 0 -> port acak
+        self.is_running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def stop(self):
+        self.is_running = False
+        if self._server_sock:
+            self._server_sock.close()
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
+
+    def _accept_loop(self):
+        while self.is_running:
+            try:
+                client, _ = self._server_sock.accept()
+            except OSError:
+                return
+            client.sendall(b'{"class":"VERSION","release":"fake","proto_major":3,"proto_minor":14}\n')
+            with self._lock:
+                self._clients.append(client)
+
+    def publish(self, fix):
+        """Mengirim satu GPSFix sebagai laporan TPV ke semua klien."""
+        report = {
+            'class': 'TPV',
+            'mode': 2,
+            'lat': fix.latitude,
+            'lon': fix.longitude,
+        }
+        if fix.timestamp is not None:
+            report['time'] = datetime.fromtimestamp(fix.timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+        if fix.speed_kmh is not None:
+            report['speed'] = fix.speed_kmh / 3.6
+        payload = (json.dumps(report) + '\n').encode('utf-8')
+        with self._lock:
+            for client in list(self._clients):
+                try:
+                    client.sendall(payload)
+                except OSError:
+                    self._clients.remove(client)
+                    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in gpsd server replaying an NMEA/GPX file.")
+    parser.add_argument('path', help="File log NMEA atau GPX")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2947)
+    parser.add_argument('--speed', type=float, default=1.0, help="Faktor percepatan replay (0 = secepat mungkin)")
+    parser.add_argument('--no-loop', action='store_true')
+    args = parser.parse_args()
+
+    server = FakeGPSDServer(args.host, args.port)
+    server.start()
+    print(f"📡 Fake gpsd listening on {server.host}:{server.port}")
+
+    replay = FileReplaySource(args.path, speed=args.speed, loop=not args.no_loop)
+    replay.start(server.publish)
+    try:
+        while replay.is_running and replay._thread and replay._thread.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        replay.stop()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
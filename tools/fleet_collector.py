@@ -0,0 +1,142 @@
+"""
+Collector referensi untuk sinkronisasi armada (pengujian lokal tools/fleet_sync.py).
+
+Menerima batch JSON (gzip) melalui POST /ingest dan melakukan upsert ke SQLite per
+(vehicle_id, session_id) dan (vehicle_id, log_id), sehingga batch yang dikirim ulang tidak menggandakan data.
+--fail-rate menyuntikkan HTTP 503 acak untuk menguji retry/backoff agen.
+
+Contoh:
+    python -m tools.fleet_collector --port 8765 --db fleet.db
+    python -m tools.fleet_collector --port 8765 --fail-rate 0.3
+"""
+import argparse
+import gzip
+import json
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOG_COLUMNS = ('session_id', 'timestamp', 'status_type', 'latitude', 'longitude', 'info')
+
+
+class FleetStore:
+    """Penyimpanan collector: satu koneksi SQLite yang dipakai bergantian oleh thread handler."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS fleet_session (
+                vehicle_id TEXT NOT NULL,
+                session_id INTEGER NOT NULL,
+                start_time TEXT,
+                end_time TEXT,
+                status TEXT,
+                data TEXT NOT NULL, -- baris session_summary lengkap (JSON)
+                received_at REAL NOT NULL,
+                PRIMARY KEY (vehicle_id, session_id)
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS fleet_detection_log (
+                vehicle_id TEXT NOT NULL,
+                log_id INTEGER NOT NULL,
+                session_id INTEGER NOT NULL,
+                timestamp TEXT,
+                status_type TEXT,
+                latitude REAL,
+                longitude REAL,
+                info TEXT,
+                PRIMARY KEY (vehicle_id, log_id)
+            )
+        ''')
+        self._conn.commit()
+
+    def ingest(self, batch):
+        vehicle_id = batch['vehicle_id']
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany('''
+                INSERT OR REPLACE INTO fleet_session (vehicle_id, session_id, start_time, end_time, status, data, received_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (vehicle_id, s['session_id'], s.get('start_time'), s.get('end_time'), s.get('status'), json.dumps(s), now)
+                for s in batch.get('session_summary', [])
+            ])
+            self._conn.executemany(f'''
+                INSERT OR REPLACE INTO fleet_detection_log (vehicle_id, log_id, {', '.join(LOG_COLUMNS)})
+                VALUES (?, ?, {', '.join('?' * len(LOG_COLUMNS))})
+            ''', [
+                (vehicle_id, row['log_id'], *(row.get(column) for column in LOG_COLUMNS))
+                for row in batch.get('detection_log', [])
+            ])
+
+    def counts(self):
+        with self._lock:
+            sessions = self._conn.execute('SELECT COUNT(*) FROM fleet_session').fetchone()[0]
+            logs = self._conn.execute('SELECT COUNT(*) FROM fleet_detection_log').fetchone()[0]
+        return sessions, logs
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    store = None
+    fail_rate = 0.0
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/ingest':
+            self._reply(404, {'error': 'not found'})
+            return
+        if random.random() < self.fail_rate:
+            self._reply(503, {'error': 'injected failure'})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            batch = json.loads(body)
+            self.store.ingest(batch)
+        except (ValueError, KeyError, OSError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        sessions, logs = self.store.counts()
+        print(f"📥 {batch['batch_id']}: {len(batch.get('session_summary', []))} sessions, "
+              f"{len(batch.get('detection_log', []))} logs (total {sessions} sessions, {logs} logs)")
+        self._reply(200, {'ok': True, 'batch_id': batch['batch_id']})
+
+    def _reply(self, code, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # Log per request sudah dicetak di do_POST
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference collector for fleet sync batches.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--db', default='fleet.db')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Peluang respons 503 (uji retry)")
+    args = parser.parse_args()
+
+    IngestHandler.store = FleetStore(args.db)
+    IngestHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), IngestHandler)
+    print(f"🏢 Fleet collector listening on http://{args.host}:{server.server_port}/ingest -> {args.db}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Agen sinkronisasi armada: mengunggah sesi yang sudah selesai dan detection_log-nya ke collector pusat.
+
+High-water mark disimpan di `<db>.sync.json` (bukan di database), sehingga agen dapat dihentikan kapan
+saja dan melanjutkan dari batch terakhir yang dikonfirmasi collector. Aman dijalankan bersamaan dengan
+aplikasi: database hanya dibaca.
+
+Contoh:
+    python -m tools.fleet_collector --port 8765                       # collector referensi (pengujian)
+    python -m tools.fleet_sync --url http://127.0.0.1:8765/ingest     # sekali jalan
+    python -m tools.fleet_sync --url https://pusat/ingest --interval 300 --vehicle-id B1234XY
+"""
+import argparse
+import os
+import threading
+
+from core.fleet_sync import FleetSyncAgent, SyncError
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'detection_history.db')
+
+
+def print_report(report):
+    print(f"📦 Sync: {report['batches']} batches, {report['sessions']} sessions, {report['logs']} logs, "
+          f"{report['sent_bytes'] / 1024:.1f} KB sent ({report['raw_bytes'] / 1024:.1f} KB raw), "
+          f"{report['retries']} retries")
+    if report['sessions']:
+        print(f"   per session: {report['bytes_per_session'] / 1024:.2f} KB, "
+              f"{report['cpu_ms_per_session']:.2f} ms CPU (compression x{report['compression_ratio']:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload completed sessions to a fleet collector.")
+    parser.add_argument('--url', default=os.environ.get('FLEET_COLLECTOR_URL'), help="URL ingest collector")
+    parser.add_argument('--db', default=os.environ.get('DETECTION_DB_PATH') or DEFAULT_DB_PATH)
+    parser.add_argument('--state', default=None, help="File high-water mark (default: <db>.sync.json)")
+    parser.add_argument('--vehicle-id', default=os.environ.get('FLEET_VEHICLE_ID'), help="Default: hostname")
+    parser.add_argument('--token', default=os.environ.get('FLEET_TOKEN'), help="Bearer token (opsional)")
+    parser.add_argument('--interval', type=float, default=0, help="Ulangi setiap N detik (0 = sekali jalan)")
+    parser.add_argument('--sessions-per-batch', type=int, default=FleetSyncAgent.SESSIONS_PER_BATCH)
+    parser.add_argument('--logs-per-batch', type=int, default=FleetSyncAgent.LOGS_PER_BATCH)
+    args = parser.parse_args()
+
+    if not args.url:
+        parser.error("--url (or FLEET_COLLECTOR_URL) is required")
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+
+    agent = FleetSyncAgent(args.db, args.url, vehicle_id=args.vehicle_id, state_path=args.state, token=args.token)
+    agent.SESSIONS_PER_BATCH = args.sessions_per_batch
+    agent.LOGS_PER_BATCH = args.logs_per_batch
+    if args.interval > 0:
+        agent.MAX_ATTEMPTS = None # Mode daemon: terus mencoba sampai collector tersedia
+    print(f"🔄 Fleet sync {agent.vehicle_id} -> {args.url} (resume from session {agent.state.session_id}, "
+          f"log {agent.state.log_id})")
+
+    stop_event = threading.Event()
+    try:
+        while True:
+            agent.sync_all(stop_event)
+            if args.interval <= 0:
+                break
+            stop_event.wait(args.interval)
+    except SyncError as e:
+        print(f"❌ {e}")
+        print_report(agent.report())
+        return 1
+    except KeyboardInterrupt:
+        stop_event.set()
+        print("Interrupted; progress up to the last confirmed batch is kept.")
+    print_report(agent.report())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
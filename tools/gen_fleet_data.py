@@ -0,0 +1,306 @@
+"""
+Generator data armada sintetis untuk menguji skala database dan halaman riwayat.
+
+Mengisi database dengan ribuan sesi berurutan waktu (jam mulai siang/malam, durasi, jeda istirahat),
+jejak GPS yang menyusuri antarkota di Jawa, dan kejadian detection_log yang bertambah sering menjelang
+akhir perjalanan dan pada malam hari, dengan campuran yawn/drowsy/microsleep yang bergeser ke microsleep.
+Kejadian sebelum fix GPS pertama dicatat di (0, 0) seperti aplikasi. Dengan seed dan rata-rata kejadian
+per sesi yang sama, sesi ke-i selalu identik, berapa pun jumlah sesi yang dibuat.
+
+Contoh:
+    python -m tools.gen_fleet_data --db /tmp/fleet.db --sessions 5000 --events 2000000
+    python -m tools.gen_fleet_data --db /tmp/fleet.db --sessions 200 --events 50000 --metric-sessions 5 --seed 7
+"""
+import argparse
+import math
+import os
+import random
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+SyntheticSession = namedtuple('SyntheticSession', [
+    'start', 'end', 'distance_km', 'track', 'events', 'ocular',
+])
+# track = (timestamps, latitudes, longitudes) sebagai array('d'); events = [(datetime, status, lat, lon, info)]
+
+START_DATE = datetime(2024, 1, 1, 6, 0, 0)
+# Kota asal/tujuan rute (lat, lon)
+CITIES = [
+    (-6.200, 106.817), # Jakarta
+    (-6.914, 107.609), # Bandung
+    (-6.732, 108.552), # Cirebon
+    (-6.870, 109.125), # Tegal
+    (-6.967, 110.417), # Semarang
+    (-7.797, 110.370), # Yogyakarta
+    (-7.566, 110.817), # Surakarta
+    (-7.250, 112.750), # Surabaya
+    (-7.983, 112.630), # Malang
+]
+STATUS_TYPES = ('yawn', 'drowsy', 'microsleep')
+TRACK_STEP_SECONDS = 20.0 # Kerapatan titik setelah penyederhanaan Douglas-Peucker (TrackRecorder.finish)
+NIGHT_HOURS = (22, 5) # Jam mulai (inklusif) dengan risiko kantuk lebih tinggi
+NIGHT_FACTOR = 1.8
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(min(1.0, a)))
+
+
+def _poisson(rng, lam):
+    if lam <= 0:
+        return 0
+    if lam > 30:
+        return max(0, int(round(rng.gauss(lam, math.sqrt(lam)))))
+    limit, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _is_night(hour):
+    start, end = NIGHT_HOURS
+    return hour >= start or hour < end
+
+
+def _drive(rng, origin, start_ts, duration_s):
+    """Jejak kendaraan dari origin menuju kota acak (berganti tujuan saat tiba), satu titik per TRACK_STEP_SECONDS."""
+    timestamps, latitudes, longitudes = array('d'), array('d'), array('d')
+    lat, lon = origin
+    destination = rng.choice(CITIES)
+    cruise_kmh = rng.uniform(45.0, 85.0)
+    distance = 0.0
+    t = 0.0
+    while True:
+        timestamps.append(start_ts + t)
+        latitudes.append(lat)
+        longitudes.append(lon)
+        if t >= duration_s:
+            break
+        if _haversine_km(lat, lon, *destination) < 2.0:
+            destination = rng.choice([c for c in CITIES if c != destination])
+        step = min(TRACK_STEP_SECONDS, duration_s - t)
+        # Macet, lampu merah, atau berhenti sejenak
+        speed = 0.0 if rng.random() < 0.04 else max(0.0, rng.gauss(cruise_kmh, 12.0))
+        step_km = speed * step / 3600.0
+        heading = math.atan2(destination[1] - lon, destination[0] - lat) + rng.gauss(0.0, 0.35)
+        new_lat = lat + step_km / 111.0 * math.cos(heading)
+        new_lon = lon + step_km / (111.0 * math.cos(math.radians(lat))) * math.sin(heading)
+        distance += _haversine_km(lat, lon, new_lat, new_lon)
+        lat, lon = new_lat, new_lon
+        t += step
+    return (timestamps, latitudes, longitudes), distance
+
+
+def _position_at(track, ts):
+    timestamps, latitudes, longitudes = track
+    i = min(max(0, int((ts - timestamps[0]) / TRACK_STEP_SECONDS)), len(timestamps) - 1)
+    return latitudes[i], longitudes[i]
+
+
+def _event_info(rng, status_type):
+    """Teks info seperti AlertEngine._log_info."""
+    elapsed = 2.0 + rng.expovariate(1.0 / (1.5 if status_type == 'microsleep' else 1.0))
+    if status_type == 'microsleep':
+        return f"Mata Terpejam. Durasi: {elapsed:.1f}s, EAR: {rng.uniform(0.08, 0.2):.2f}"
+    if status_type == 'drowsy':
+        return f"Kepala menunduk/miring. Durasi: {elapsed:.1f}s"
+    return f"Terdeteksi menguap. Durasi: {elapsed:.1f}s"
+
+
+def generate_sessions(seed=42, events_per_session=400.0, start=START_DATE):
+    """
+    Generator tak hingga SyntheticSession berurutan waktu untuk satu kendaraan/pengemudi.
+    Rata-rata jumlah kejadian per sesi mendekati events_per_session (dibobot durasi, malam, dan kelelahan).
+    """
+    rng = random.Random(seed)
+    position = rng.choice(CITIES)
+    current = start
+    # Normalisasi bobot agar rata-rata kejadian per sesi ~ events_per_session
+    night_share = (24 - NIGHT_HOURS[0] + NIGHT_HOURS[1]) / 24.0
+    weight_norm = 1.0 + night_share * (NIGHT_FACTOR - 1.0)
+    index = 0
+    while True:
+        session_rng = random.Random(f"{seed}:{index}")
+        duration_s = min(10 * 3600, max(600, session_rng.lognormvariate(math.log(100 * 60), 0.6)))
+        end = current + timedelta(seconds=duration_s)
+        track, distance_km = _drive(session_rng, position, current.timestamp(), duration_s)
+        position = (track[1][-1], track[2][-1])
+
+        fatigue = session_rng.lognormvariate(-0.32, 0.8) # rata-rata 1
+        night = NIGHT_FACTOR if _is_night(current.hour) else 1.0
+        expected = events_per_session * fatigue * night / weight_norm * duration_s / (120 * 60)
+        count = _poisson(session_rng, expected)
+        first_fix_s = session_rng.uniform(5.0, 90.0)
+        events = []
+        for offset in sorted(duration_s * session_rng.random() ** 0.6 for _ in range(count)):
+            progress = offset / duration_s
+            microsleep_p = 0.08 + 0.17 * progress * min(fatigue, 2.0) / 2.0
+            roll = session_rng.random()
+            status_type = 'microsleep' if roll < microsleep_p else ('drowsy' if roll < microsleep_p + 0.3 else 'yawn')
+            when = current + timedelta(seconds=offset)
+            lat, lon = (0.0, 0.0) if offset < first_fix_s else _position_at(track, when.timestamp())
+            events.append((when, status_type, lat, lon, _event_info(session_rng, status_type)))
+
+        perclos = min(0.6, 0.03 * fatigue * night + session_rng.uniform(0.0, 0.03))
+        minutes = duration_s / 60.0
+        blink_rate = session_rng.uniform(10.0, 22.0) * (1.0 + 0.2 * (fatigue - 1.0))
+        ocular = {
+            'perclos': perclos,
+            'perclos_peak_1m': min(1.0, perclos * session_rng.uniform(1.5, 3.0)),
+            'blink_count': int(blink_rate * minutes),
+            'blink_rate_per_min': blink_rate,
+            'blink_duration_ms': session_rng.uniform(120.0, 200.0) * (1.0 + 0.3 * (fatigue - 1.0)),
+        }
+        # Odometer GPS inkremental sedikit berbeda dari jarak jejak yang dihitung ulang
+        yield SyntheticSession(current, end, distance_km * session_rng.uniform(0.98, 1.02), track, events, ocular)
+
+        rest_hours = session_rng.lognormvariate(math.log(3.0), 0.7) if session_rng.random() < 0.8 \
+            else session_rng.uniform(8.0, 14.0) # istirahat singkat, atau tidur/libur
+        current = end + timedelta(hours=max(0.25, rest_hours))
+        index += 1
+
+
+def _iso(value):
+    return value.isoformat(sep=' ', timespec='seconds')
+
+
+def write_sessions(conn, sessions, batch_events=50000):
+    """
+    Menulis SyntheticSession ke database (session_summary, detection_log, gps_track) dalam transaksi
+    berbatch, seperti bench_hotspots. Mengembalikan (jumlah sesi, jumlah kejadian, detik).
+    """
+    started = time.perf_counter()
+    next_id = conn.execute('SELECT IFNULL(MAX(session_id), 0) + 1 FROM session_summary').fetchone()[0]
+    summaries, logs, tracks = [], [], []
+    session_count = event_count = 0
+
+    def flush():
+        conn.executemany('''
+            INSERT INTO session_summary (
+                session_id, start_time, end_time, total_distance_km, drowsy_count, microsleep_count, yawn_count,
+                status, track_distance_km, track_point_count,
+                perclos, perclos_peak_1m, blink_count, blink_rate_per_min, blink_duration_ms
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'Completed', ?, ?, ?, ?, ?, ?, ?)
+        ''', summaries)
+        conn.executemany('''
+            INSERT INTO gps_track (session_id, chunk_index, point_count, simplified, timestamps, latitudes, longitudes)
+            VALUES (?, 0, ?, 1, ?, ?, ?)
+        ''', tracks)
+        conn.executemany('''
+            INSERT INTO detection_log (session_id, timestamp, status_type, latitude, longitude, info)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', logs)
+        conn.commit()
+        summaries.clear()
+        logs.clear()
+        tracks.clear()
+
+    for session in sessions:
+        session_id = next_id + session_count
+        counts = dict.fromkeys(STATUS_TYPES, 0)
+        for when, status_type, lat, lon, info in session.events:
+            counts[status_type] += 1
+            logs.append((session_id, _iso(when), status_type, lat, lon, info))
+        timestamps, latitudes, longitudes = session.track
+        ocular = session.ocular
+        summaries.append((
+            session_id, _iso(session.start), _iso(session.end), session.distance_km,
+            counts['drowsy'], counts['microsleep'], counts['yawn'],
+            session.distance_km, len(timestamps),
+            ocular['perclos'], ocular['perclos_peak_1m'], ocular['blink_count'],
+            ocular['blink_rate_per_min'], ocular['blink_duration_ms'],
+        ))
+        tracks.append((session_id, len(timestamps), timestamps.tobytes(), latitudes.tobytes(), longitudes.tobytes()))
+        session_count += 1
+        event_count += len(session.events)
+        if len(logs) >= batch_events:
+            flush()
+    flush()
+    return session_count, event_count, time.perf_counter() - started
+
+
+_MetricFrame = namedtuple('_MetricFrame', ['timestamp', 'detection_results'])
+
+
+def write_session_metrics(session_id, start, end, seed=42):
+    """
+    Deret waktu EAR/PERCLOS 10 Hz untuk grafik satu sesi, melalui SessionMetricsRecorder
+    (baris mentah + rollup persis seperti saat deteksi). Mengembalikan jumlah baris mentah.
+    """
+    from core.session_metrics import SessionMetricsRecorder
+
+    rng = random.Random(f"{seed}:metrics:{session_id}")
+    recorder = SessionMetricsRecorder(session_id)
+    recorder.FLUSH_ROWS = 20000 # Batch besar: satu transaksi per ~30 menit data
+    step = 1.0 / recorder.SAMPLE_HZ
+    t, t_end = start.timestamp(), end.timestamp()
+    closed_until = 0.0
+    perclos = 0.05
+    while t < t_end:
+        if t >= closed_until and rng.random() < 0.03:
+            closed_until = t + (rng.uniform(0.1, 0.3) if rng.random() < 0.97 else rng.uniform(1.0, 3.0))
+        ear = rng.uniform(0.08, 0.15) if t < closed_until else rng.gauss(0.3, 0.02)
+        if rng.random() < 0.01:
+            perclos = min(0.6, max(0.0, perclos + rng.gauss(0.0, 0.01)))
+        face = rng.random() > 0.01
+        recorder.on_frame('frame', _MetricFrame(t, {
+            'avg_ear': ear if face else None, 'perclos_1m': perclos,
+        }))
+        t += step
+    recorder.finish()
+    return recorder.rows_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic fleet sessions, GPS tracks and events.")
+    parser.add_argument('--db', required=True, help="File database tujuan (dibuat bila belum ada; data lama dipertahankan)")
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=1_000_000, help="Perkiraan total kejadian detection_log")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start', default=START_DATE.isoformat(sep=' '), help="Waktu mulai sesi pertama")
+    parser.add_argument('--metric-sessions', type=int, default=0,
+                        help="Jumlah sesi terakhir yang juga diberi deret waktu grafik EAR/PERCLOS (10 Hz)")
+    args = parser.parse_args()
+
+    # Database harus diset sebelum modul database diimpor (init_db berjalan saat impor)
+    os.environ['DETECTION_DB_PATH'] = os.path.abspath(args.db)
+    from db import database
+
+    sessions = generate_sessions(args.seed, args.events / max(args.sessions, 1), datetime.fromisoformat(args.start))
+    written = []
+
+    def take(count):
+        for _ in range(count):
+            session = next(sessions)
+            written.append((session.start, session.end))
+            yield session
+
+    conn = database.get_db_connection()
+    try:
+        first_id = conn.execute('SELECT IFNULL(MAX(session_id), 0) + 1 FROM session_summary').fetchone()[0]
+        session_count, event_count, seconds = write_sessions(conn, take(args.sessions))
+    finally:
+        conn.close()
+    print(f"✅ {session_count:,} sessions, {event_count:,} events in {seconds:.1f}s "
+          f"({event_count / seconds if seconds else 0:,.0f} events/s) -> {database.DB_PATH}")
+
+    if args.metric_sessions:
+        started = time.perf_counter()
+        rows = 0
+        for offset in range(max(0, session_count - args.metric_sessions), session_count):
+            start, end = written[offset]
+            rows += write_session_metrics(first_id + offset, start, end, args.seed)
+        print(f"📈 {rows:,} metric rows for {min(args.metric_sessions, session_count)} sessions "
+              f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
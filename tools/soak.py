@@ -0,0 +1,286 @@
+"""
+Uji soak jangka panjang: menjalankan LivePage penuh tanpa layar (Qt offscreen) dengan video yang
+diputar berulang, GPS simulasi, dan database sementara, lalu memantau pertumbuhan memori dan
+pergeseran waktu frame.
+
+Setiap --sample-interval detik dicatat: RSS, heap Python (tracemalloc), jumlah objek GC, handle/FD
+terbuka, jumlah thread, FPS, dan persentil waktu proses frame (p50/p95/p99) pada jendela itu.
+Setelah --warmup, pertumbuhan dibandingkan dengan anggaran; exit code 1 bila ada yang terlampaui.
+
+Contoh:
+    python -m tools.soak rekaman.mp4 --duration 10h --csv soak.csv
+    python -m tools.soak rekaman.mp4 --duration 30m --speed 2 --session-minutes 5
+"""
+import argparse
+import csv
+import gc
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+SAMPLE_FIELDS = (
+    'elapsed_s', 'frames', 'fps', 'rss_mb', 'heap_mb', 'gc_objects', 'handles', 'threads',
+    'frame_p50_ms', 'frame_p95_ms', 'frame_p99_ms',
+)
+# Jumlah sampel di awal dan akhir yang dibandingkan (median) agar satu lonjakan tidak memicu kegagalan
+TREND_SAMPLES = 3
+
+
+def parse_duration(text):
+    """'90', '45s', '30m', '10h' -> detik."""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def rss_mb():
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return float('nan')
+
+
+def open_handles():
+    if PSUTIL_AVAILABLE:
+        process = psutil.Process()
+        return process.num_handles() if hasattr(process, 'num_handles') else process.num_fds()
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return -1
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+class FrameProbe:
+    """Pelanggan bus: mengumpulkan waktu proses frame (FrameResult.processing_ms) per jendela sampel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._window = []
+        self.frames = 0
+
+    def on_frame(self, topic, result):
+        with self._lock:
+            self._window.append(result.processing_ms)
+            self.frames += 1
+
+    def take_window(self):
+        with self._lock:
+            window, self._window = self._window, []
+            return sorted(window)
+
+
+class SoakMonitor:
+    def __init__(self, live_page, probe, args):
+        self.live = live_page
+        self.probe = probe
+        self.args = args
+        self.samples = []
+        self.failures = []
+        self.sessions = 0
+        self._started = time.monotonic()
+        self._last_sample = (self._started, 0)
+
+    def start_session(self):
+        self.live.start_detection()
+        if not self.live.is_detecting:
+            self.failures.append("could not start detection (video source?)")
+            return False
+        self.sessions += 1
+        return True
+
+    def rotate_session(self):
+        """Menutup sesi dan memulai yang baru (menguji kebocoran per sesi)."""
+        self.live.stop_detection()
+        self.start_session()
+
+    def sample(self):
+        now = time.monotonic()
+        frames = self.probe.frames
+        last_time, last_frames = self._last_sample
+        self._last_sample = (now, frames)
+        window = self.probe.take_window()
+        heap = tracemalloc.get_traced_memory()[0] / (1024 * 1024) if tracemalloc.is_tracing() else float('nan')
+        sample = {
+            'elapsed_s': now - self._started,
+            'frames': frames,
+            'fps': (frames - last_frames) / (now - last_time) if now > last_time else 0.0,
+            'rss_mb': rss_mb(),
+            'heap_mb': heap,
+            'gc_objects': len(gc.get_objects()),
+            'handles': open_handles(),
+            'threads': threading.active_count(),
+            'frame_p50_ms': percentile(window, 50) if window else float('nan'),
+            'frame_p95_ms': percentile(window, 95) if window else float('nan'),
+            'frame_p99_ms': percentile(window, 99) if window else float('nan'),
+        }
+        self.samples.append(sample)
+        print(f"⏱️ {sample['elapsed_s'] / 60:7.1f} min | {sample['fps']:5.1f} fps | RSS {sample['rss_mb']:7.1f} MB | "
+              f"heap {sample['heap_mb']:6.1f} MB | objs {sample['gc_objects']:>8} | handles {sample['handles']:>4} | "
+              f"threads {sample['threads']:>3} | frame p50/p95/p99 {sample['frame_p50_ms']:.1f}/"
+              f"{sample['frame_p95_ms']:.1f}/{sample['frame_p99_ms']:.1f} ms")
+        if not self.live.is_detecting:
+            self.failures.append(f"detection stopped unexpectedly at {sample['elapsed_s']:.0f}s")
+            return False
+        if window == [] and sample['elapsed_s'] > self.args.warmup:
+            self.failures.append(f"no frames processed in the window ending at {sample['elapsed_s']:.0f}s")
+        return True
+
+    def evaluate(self):
+        """Membandingkan awal (setelah warmup) dan akhir run terhadap anggaran."""
+        measured = [s for s in self.samples if s['elapsed_s'] >= self.args.warmup]
+        if len(measured) < 2:
+            print("⚠️ Not enough samples after warmup to evaluate budgets.")
+            return {}
+        k = min(TREND_SAMPLES, len(measured) // 2)
+        first, last = measured[:k], measured[-k:]
+        median = lambda samples, key: statistics.median(s[key] for s in samples)
+        growth = {key: median(last, key) - median(first, key) for key in ('rss_mb', 'heap_mb', 'gc_objects', 'handles', 'threads')}
+        base_p95 = median(first, 'frame_p95_ms')
+        growth['frame_p95_drift'] = (median(last, 'frame_p95_ms') - base_p95) / base_p95 if base_p95 else 0.0
+
+        budgets = {
+            'rss_mb': self.args.max_rss_growth_mb,
+            'heap_mb': self.args.max_heap_growth_mb,
+            'handles': self.args.max_handle_growth,
+            'threads': self.args.max_thread_growth,
+            'frame_p95_drift': self.args.max_frame_drift,
+        }
+        hours = (measured[-1]['elapsed_s'] - measured[0]['elapsed_s']) / 3600.0
+        print(f"\nGrowth over {hours:.2f} h after warmup (median of first/last {k} samples):")
+        for key, value in growth.items():
+            budget = budgets.get(key)
+            if value != value: # NaN: metrik tidak tersedia
+                status = "n/a"
+            elif budget is None:
+                status = ""
+            elif value > budget:
+                status = f"❌ over budget {budget}"
+                self.failures.append(f"{key} grew by {value:.2f} (budget {budget})")
+            else:
+                status = f"✅ budget {budget}"
+            print(f"  {key:<16}: {value:+.2f} {status}")
+        return growth
+
+
+def write_csv(path, samples):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+        writer.writeheader()
+        writer.writerows(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless soak test of the live detection pipeline.")
+    parser.add_argument('video', help="File video yang diputar berulang sebagai kamera")
+    parser.add_argument('--duration', default='1h', help="Lama run, mis. 600, 30m, 10h (default: 1h)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Laju video terhadap real time (0 = secepat mungkin)")
+    parser.add_argument('--gps-speed', type=float, default=60.0, help="Kecepatan GPS simulasi (km/jam)")
+    parser.add_argument('--sample-interval', type=float, default=30.0, help="Detik antar sampel")
+    parser.add_argument('--warmup', type=float, default=120.0, help="Detik awal yang tidak dihitung sebagai pertumbuhan")
+    parser.add_argument('--session-minutes', type=float, default=0, help="Mulai sesi baru setiap N menit (0 = satu sesi)")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="Jangan ukur heap Python (tanpa overhead)")
+    parser.add_argument('--max-rss-growth-mb', type=float, default=50.0)
+    parser.add_argument('--max-heap-growth-mb', type=float, default=20.0)
+    parser.add_argument('--max-handle-growth', type=float, default=10)
+    parser.add_argument('--max-thread-growth', type=float, default=2)
+    parser.add_argument('--max-frame-drift', type=float, default=0.25, help="Kenaikan relatif p95 waktu frame")
+    parser.add_argument('--csv', default=None, help="Simpan semua sampel ke CSV")
+    parser.add_argument('--keep', action='store_true', help="Jangan hapus folder sementara (DB & klip bukti)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video):
+        print(f"Video not found: {args.video}")
+        return 1
+    duration = parse_duration(args.duration)
+
+    # Lingkungan harus disiapkan sebelum modul aplikasi diimpor (DB_PATH dibaca saat impor)
+    workdir = tempfile.mkdtemp(prefix='soak_')
+    os.environ['DETECTION_DB_PATH'] = os.path.join(workdir, 'soak.db')
+    os.environ['GPS_SOURCE'] = f"sim:{args.gps_speed}"
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from core.pipeline import DetectionPipeline
+    from main import MainWindow
+
+    app = QApplication(sys.argv[:1])
+    window = MainWindow(argparse.Namespace(record_trace=None))
+    live = window.live_page
+    live.camera_source = args.video
+    live.loop_video = True
+    live.video_speed = args.speed
+    window.show()
+    window.showLive()
+
+    probe = FrameProbe()
+    live.bus.subscribe('soak-probe', [DetectionPipeline.TOPIC_FRAME], callback=probe.on_frame, maxsize=4096)
+    monitor = SoakMonitor(live, probe, args)
+    print(f"🧪 Soak: {args.video} x{args.speed} for {duration / 3600:.2f} h, temp dir {workdir}")
+
+    def finish():
+        if live.is_detecting:
+            live.stop_detection()
+        window.close()
+        app.quit()
+
+    def on_sample():
+        if not monitor.sample():
+            finish()
+
+    sample_timer = QTimer()
+    sample_timer.timeout.connect(on_sample)
+    rotate_timer = QTimer()
+    rotate_timer.timeout.connect(monitor.rotate_session)
+    QTimer.singleShot(int(duration * 1000), finish)
+
+    if monitor.start_session():
+        sample_timer.start(int(args.sample_interval * 1000))
+        if args.session_minutes > 0:
+            rotate_timer.start(int(args.session_minutes * 60 * 1000))
+        app.exec_()
+    sample_timer.stop()
+    rotate_timer.stop()
+
+    growth = monitor.evaluate()
+    if args.csv:
+        write_csv(args.csv, monitor.samples)
+        print(f"Samples saved to {args.csv}")
+    if args.keep:
+        print(f"Temp dir kept: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nSessions: {monitor.sessions}, frames: {probe.frames}, samples: {len(monitor.samples)}")
+    if monitor.failures:
+        for failure in monitor.failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Soak passed." if growth else "⚠️ Soak finished without a budget evaluation.")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())